@@ -45,6 +45,88 @@ class Settings(BaseSettings):
         description="Percentage of sessions to use streamlined protocol (0-100)"
     )
     
+    STREAM_STRAWMAN: bool = Field(
+        default=False,
+        description="Send strawman slides as 'append' slide updates while the model generates them"
+    )
+    
+    # Intent routing fast path
+    INTENT_FAST_PATH: bool = Field(
+        default=True,
+        description="Classify button clicks and obvious messages with local rules before calling the LLM"
+    )
+    
+    INTENT_LOCAL_CONFIDENCE: float = Field(
+        default=0.85,
+        ge=0.0,
+        le=1.0,
+        description="Minimum confidence for a locally classified intent to skip the LLM"
+    )
+    
+    # Speculative execution of the likely next Director state
+    SPECULATIVE_DIRECTOR: bool = Field(
+        default=False,
+        description="Start the Director for the predicted next state while the intent is classified"
+    )
+    
+    # Local tokenizer for prompt token counts (empty: character heuristic only)
+    TOKEN_COUNTER_ENCODING: str = Field(
+        default="cl100k_base",
+        description="tiktoken encoding used to count prompt tokens before provider usage is known"
+    )
+    
+    # Token budget for the Director's user prompt (older context is compacted to fit)
+    CONTEXT_TOKEN_BUDGET: int = Field(
+        default=12000,
+        ge=1000,
+        description="Maximum user prompt tokens; low-priority context is compacted or dropped to fit"
+    )
+    
+    # Process-wide metrics (exported at GET /metrics)
+    METRICS_FLUSH_INTERVAL: int = Field(
+        default=60,
+        ge=0,
+        description="Seconds between metrics snapshots sent to Logfire (0 disables flushing)"
+    )
+    METRICS_EXPORT_PATH: Optional[str] = Field(
+        default=None,
+        description="JSON file the metrics snapshot is written to on every flush"
+    )
+    
+    # Outbound WebSocket writer (see src/utils/outbound_writer.py)
+    WS_BATCH_FRAMES: bool = Field(
+        default=False,
+        description="Send a turn's messages as one 'batch' frame instead of back to back"
+    )
+    WS_REVEAL_INTERVAL_MS: int = Field(
+        default=100,
+        ge=0,
+        description="Pacing hint for the client when revealing the messages of a batch frame"
+    )
+    WS_SEND_QUEUE_SIZE: int = Field(
+        default=256,
+        ge=1,
+        description="Outbound frames buffered per connection before senders wait"
+    )
+    WS_SEND_TIMEOUT: float = Field(
+        default=10.0,
+        gt=0,
+        description="Seconds a client may take to read a frame before it is disconnected"
+    )
+    
+    # Per-turn WebSocket tracing (span timings always go to the metrics store)
+    TRACE_SAMPLE_RATE: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of WebSocket turns whose span breakdown is logged"
+    )
+    TRACE_SLOW_TURN_MS: int = Field(
+        default=5000,
+        ge=0,
+        description="Turns slower than this are always logged (0 disables)"
+    )
+    
     # Layout Architect Settings (Phase 2)
     LAYOUT_ARCHITECT_MODEL: str = Field("gemini-2.5-flash-lite-preview-06-17", env="LAYOUT_ARCHITECT_MODEL")
     LAYOUT_ARCHITECT_TEMPERATURE: float = Field(0.7, env="LAYOUT_ARCHITECT_TEMPERATURE")
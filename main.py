@@ -6,7 +6,7 @@ Main entry point for the application.
 import asyncio
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from dotenv import load_dotenv
@@ -19,6 +19,11 @@ from src.utils.logfire_config import configure_logfire
 configure_logfire()
 
 from src.handlers.websocket import WebSocketHandler
+from src.agents.intent_router import IntentRouter
+from src.storage.image_store import get_image_store
+from src.utils.asset_channel import is_valid_asset_id
+from src.utils.speculation import get_speculation_metrics
+from src.utils.metrics_store import get_metrics_store
 from src.utils.logger import setup_logger
 from config.settings import get_settings
 
@@ -61,8 +66,19 @@ async def lifespan(app: FastAPI):
         logger.error(f"FATAL: Failed to connect to Supabase: {str(e)}")
         raise RuntimeError("Cannot start without valid Supabase connection.")
     
+    # Periodic metrics snapshots
+    metrics_store = get_metrics_store()
+    flush_task = None
+    if settings.METRICS_FLUSH_INTERVAL:
+        flush_task = asyncio.create_task(
+            metrics_store.run_flush_loop(settings.METRICS_FLUSH_INTERVAL, settings.METRICS_EXPORT_PATH)
+        )
+    
     yield
     logger.info("Shutting down Deckster API...")
+    if flush_task:
+        flush_task.cancel()
+    await metrics_store.flush(settings.METRICS_EXPORT_PATH)
 
 app = FastAPI(
     title="Deckster API",
@@ -93,28 +109,21 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str, user_id: str
         await websocket.close(code=1008, reason="Missing required parameters")
         return
         
-    print(f"[DEBUG] Attempting to initialize WebSocketHandler for session: {session_id}")
     try:
         handler = WebSocketHandler()
-        print("[DEBUG] WebSocketHandler initialized successfully")
     except Exception as init_error:
-        print(f"[DEBUG] Failed to initialize WebSocketHandler: {str(init_error)}")
         logger.error(f"Failed to initialize WebSocketHandler: {str(init_error)}", exc_info=True)
         await websocket.close(code=1011, reason="Server error during initialization")
         return
         
     try:
-        print("[DEBUG] Accepting WebSocket connection")
         await websocket.accept()
-        print(f"[DEBUG] WebSocket accepted for user: {user_id}, session: {session_id}")
         logger.info(f"WebSocket connection established for user: {user_id}, session: {session_id}")
         
         # Add explicit error handling for the handler
         try:
-            print("[DEBUG] Calling handler.handle_connection")
             await handler.handle_connection(websocket, session_id, user_id)
         except Exception as handler_error:
-            print(f"[DEBUG] Handler error: {str(handler_error)}")
             logger.error(f"Handler error for user {user_id}, session {session_id}: {str(handler_error)}", exc_info=True)
             raise
     except WebSocketDisconnect:
@@ -139,14 +148,52 @@ async def health_check():
         "environment": settings.APP_ENV
     }
 
+# Prometheus metrics (Director latency and tokens per state, intent routing, speculation)
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Process-wide metrics in the Prometheus text format."""
+    return Response(
+        content=get_metrics_store().render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+# Intent routing statistics (share of messages classified without the LLM)
+@app.get("/metrics/intent")
+async def intent_metrics():
+    """Intent router fast path statistics."""
+    return IntentRouter.get_metrics()
+
+# Speculative Director statistics (hits, latency saved, tokens wasted)
+@app.get("/metrics/speculation")
+async def speculation_metrics():
+    """Speculative Director execution statistics per state transition."""
+    return get_speculation_metrics()
+
+# Asset fetch endpoint (generated images referenced from content packages)
+@app.get("/assets/{asset_id}")
+async def get_asset(asset_id: str):
+    """Serve a generated image by its content hash."""
+    if not is_valid_asset_id(asset_id):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    store = get_image_store()
+    data = await store.get_blob(asset_id) if store else None
+    if data is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    # Content-addressed, so the bytes behind an id never change
+    return Response(
+        content=data,
+        media_type="image/png",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
 # Test endpoint for WebSocketHandler initialization
 @app.get("/test-handler")
 async def test_handler():
     """Test WebSocketHandler initialization."""
     try:
-        print("[TEST] Creating WebSocketHandler instance")
         handler = WebSocketHandler()
-        print("[TEST] WebSocketHandler created successfully")
         return {
             "status": "success",
             "message": "WebSocketHandler initialized successfully",
@@ -160,9 +207,7 @@ async def test_handler():
             }
         }
     except Exception as e:
-        print(f"[TEST] Failed to create WebSocketHandler: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Failed to create WebSocketHandler: {str(e)}", exc_info=True)
         return {
             "status": "error",
             "message": f"Failed to initialize WebSocketHandler: {str(e)}",
@@ -180,6 +225,7 @@ async def root():
         "endpoints": {
             "websocket": "/ws?session_id={session_id}&user_id={user_id}",
             "health": "/health",
+            "assets": "/assets/{asset_id}",
             "test-handler": "/test-handler"
         }
     }
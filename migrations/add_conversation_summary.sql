@@ -0,0 +1,5 @@
+-- Rolling summary of older conversation turns (see src/utils/context_budget.py)
+-- Run this in your Supabase SQL editor
+
+ALTER TABLE sessions 
+ADD COLUMN IF NOT EXISTS conversation_summary JSONB;
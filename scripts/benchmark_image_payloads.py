@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inline base64 images vs. the asset side-channel.
+
+Simulates the content package for a deck with N generated images and
+measures the size of the JSON message(s) sent over the WebSocket and the
+peak Python memory needed to produce them.
+
+- inline:       base64 strings in generated_images, one JSON message
+- side-channel: asset references in the JSON message, bytes sent as one
+                binary frame per image (see src/utils/asset_channel.py)
+
+Usage:
+    python scripts/benchmark_image_payloads.py [--images 15] [--image-kb 1500]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage.image_store import content_hash
+from src.utils.asset_channel import asset_reference, encode_asset_frame
+
+
+def _make_images(count: int, image_kb: int):
+    """Random bytes are incompressible, like real PNG payloads."""
+    images = []
+    for i in range(count):
+        raw = os.urandom(image_kb * 1024)
+        # Roughly a third of archetypes get a transparent variant
+        transparent = os.urandom(image_kb * 1024) if i % 3 == 0 else None
+        images.append((raw, transparent))
+    return images
+
+
+def _manifest(i: int) -> dict:
+    return {"slide_id": f"slide_{i + 1:03d}", "content_manifest": {"title": f"Slide {i + 1}", "body": "x" * 800}}
+
+
+def run_inline(images):
+    """Current behaviour: image results carry base64, package is one JSON message."""
+    content = []
+    for i, (raw, transparent) in enumerate(images):
+        result = {"success": True, "base64": base64.b64encode(raw).decode("utf-8")}
+        if transparent is not None:
+            result["transparent_base64"] = base64.b64encode(transparent).decode("utf-8")
+        result["image_base64"] = result["base64"]
+        content.append({**_manifest(i), "generated_images": {"primary": result["image_base64"]}})
+    message = json.dumps({"content": content})
+    return [len(message.encode("utf-8"))], []
+
+
+def run_side_channel(images):
+    """Asset references in JSON; bytes streamed as separate binary frames."""
+    content = []
+    frame_sizes = []
+    for i, (raw, transparent) in enumerate(images):
+        asset_id = content_hash(raw)
+        transparent_id = content_hash(transparent) if transparent is not None else None
+        content.append({
+            **_manifest(i),
+            "generated_images": {"primary": asset_reference(asset_id, transparent_asset_id=transparent_id)}
+        })
+        # Frames are produced and sent one at a time
+        frame_sizes.append(len(encode_asset_frame({"asset_id": asset_id, "slide_id": f"slide_{i + 1:03d}"}, raw)))
+    message = json.dumps({"content": content})
+    return [len(message.encode("utf-8"))], frame_sizes
+
+
+def measure(fn, images):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    json_sizes, frame_sizes = fn(images)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return json_sizes, frame_sizes, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=15)
+    parser.add_argument("--image-kb", type=int, default=1500, help="Size of each generated PNG in KB")
+    args = parser.parse_args()
+
+    images = _make_images(args.images, args.image_kb)
+    raw_total = sum(len(raw) for raw, _ in images)
+
+    print(f"Deck: {args.images} images x {args.image_kb} KB (raw primary bytes {raw_total / 1e6:.1f} MB)")
+    print(f"{'mode':<14}{'largest JSON msg':>18}{'binary frames':>16}{'peak memory':>14}")
+    for name, fn in (("inline", run_inline), ("side-channel", run_side_channel)):
+        json_sizes, frame_sizes, peak = measure(fn, images)
+        frames = f"{sum(frame_sizes) / 1e6:.1f} MB" if frame_sizes else "-"
+        print(f"{name:<14}{max(json_sizes) / 1e6:>15.2f} MB{frames:>16}{peak / 1e6:>11.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
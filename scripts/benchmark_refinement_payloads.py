@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: refinement slide_update payload size, full deck vs. structural diff.
+
+Applies typical refinements to test/mock_strawman.json and measures the JSON
+size of the slide_update sent to the client:
+
+- full:    full_update with every slide (what a client has to fetch when a
+           partial update cannot be trusted)
+- partial: partial_update built from the structural diff (changed fields of
+           existing slides, new slides in full, slide order if structure changed)
+
+Usage:
+    python scripts/benchmark_refinement_payloads.py [--iterations 200]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.agents import PresentationStrawman, StateContext
+from src.utils.strawman_diff import diff_strawman
+from src.utils.streamlined_packager import StreamlinedMessagePackager
+
+MOCK_STRAWMAN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test", "mock_strawman.json")
+
+
+def _renumber(deck, renumber_ids):
+    for number, slide in enumerate(deck["slides"], start=1):
+        slide["slide_number"] = number
+        if renumber_ids:
+            slide["slide_id"] = f"slide_{number:03d}"
+    return deck
+
+
+def _edit_key_points(deck):
+    deck["slides"][4]["key_points"] = ["Cut to the three strongest points", "Lead with patient outcomes", "Close with ROI"]
+    return deck
+
+
+def _retitle_two(deck):
+    deck["slides"][2]["title"] = "Where Care Breaks Down Today"
+    deck["slides"][7]["title"] = "A Phased Path to Adoption"
+    return deck
+
+
+def _insert_slide(renumber_ids):
+    def refine(deck):
+        new_slide = dict(deck["slides"][3], title="Case Study: Regional Hospital Network",
+                         narrative="A concrete example of the transformation at scale",
+                         slide_id=f"slide_{len(deck['slides']) + 1:03d}")
+        deck["slides"].insert(3, new_slide)
+        return _renumber(deck, renumber_ids)
+    return refine
+
+
+def _delete_slide(deck):
+    del deck["slides"][6]
+    return _renumber(deck, renumber_ids=True)
+
+
+def _swap_slides(deck):
+    deck["slides"][5], deck["slides"][6] = deck["slides"][6], deck["slides"][5]
+    return _renumber(deck, renumber_ids=False)
+
+
+def _change_duration(deck):
+    deck["presentation_duration"] = 20
+    return deck
+
+
+SCENARIOS = [
+    ("edit key points (1 slide)", _edit_key_points),
+    ("retitle 2 slides", _retitle_two),
+    ("insert slide, ids kept", _insert_slide(renumber_ids=False)),
+    ("insert slide, ids shifted", _insert_slide(renumber_ids=True)),
+    ("delete slide, ids shifted", _delete_slide),
+    ("swap two slides", _swap_slides),
+    ("change duration only", _change_duration),
+]
+
+
+def _payload_bytes(message) -> int:
+    return len(json.dumps(message.model_dump(mode="json")).encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(MOCK_STRAWMAN) as f:
+        previous = json.load(f)
+    packager = StreamlinedMessagePackager()
+    context = StateContext(current_state="REFINE_STRAWMAN", session_data={"presentation_strawman": previous})
+
+    print(f"Deck: {len(previous['slides'])} slides")
+    print(f"{'refinement':<28}{'full B':>9}{'partial B':>11}{'saved':>8}{'diff us':>9}")
+
+    total_full = total_partial = 0
+    for name, refine in SCENARIOS:
+        refined = PresentationStrawman(**refine(copy.deepcopy(previous)))
+
+        full = _payload_bytes(packager._full_slide_update("session", refined))
+        partial = _payload_bytes(packager._package_refinement("session", refined, context)[1])
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            diff_strawman(previous, refined)
+        diff_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+        total_full += full
+        total_partial += partial
+        print(f"{name:<28}{full:>9}{partial:>11}{1 - partial / full:>8.0%}{diff_us:>9.0f}")
+
+    print(f"{'total':<28}{total_full:>9}{total_partial:>11}{1 - total_partial / total_full:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
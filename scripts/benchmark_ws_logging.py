@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-message logging overhead of the WebSocket hot path.
+
+Replays the logging one message caused in the handler and session manager,
+measured on the calling (event loop) thread:
+
+- before: the old print(...) calls and eager logger.info(f"[DEBUG ...]")
+          lines, written synchronously by a StreamHandler, including the
+          printed Supabase query result
+- after:  lazy %-style debug calls at LOG_LEVEL=INFO, the non-blocking queue
+          handler and a TurnTrace with TRACE_SAMPLE_RATE=0.1
+
+The same "after" calls are also run through LogfireLogger (the production
+path when LOGFIRE_TOKEN is set), once unfiltered as it used to be and once at
+LOG_LEVEL=INFO. Logfire itself is replaced by an in-memory sink, so those rows
+measure only the formatting and filtering done on the event loop.
+
+Output goes to a temporary file so the numbers do not depend on the terminal;
+a console or a container log pipe is slower, which favours "after" further.
+
+Usage:
+    python scripts/benchmark_ws_logging.py [--messages 2000]
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.utils.logger as logger_module
+from src.utils.logger import LogfireLogger, StandardLogger, get_queue_handler
+from src.utils.tracing import TurnTrace
+
+MOCK_STRAWMAN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test", "mock_strawman.json")
+
+
+class _FakeResult:
+    """Stands in for the Supabase APIResponse whose repr used to be printed."""
+
+    def __init__(self, row):
+        self.data = [row]
+
+    def __repr__(self):
+        return f"data={self.data!r} count=None"
+
+
+class _LogfireSink:
+    """Collects what LogfireLogger would ship, instead of sending it."""
+
+    def __init__(self):
+        self.records = deque(maxlen=1000)
+
+    def _record(self, message, **kwargs):
+        self.records.append(message)
+
+    info = warn = error = debug = _record
+
+
+def _fixtures():
+    with open(MOCK_STRAWMAN) as f:
+        strawman = json.load(f)
+    row = {
+        "id": "session-1", "user_id": "user-1", "current_state": "REFINE_STRAWMAN",
+        "presentation_strawman": strawman,
+        "conversation_history": [{"role": "user", "content": f"message {i}"} for i in range(20)]
+    }
+    message = {"type": "user_message", "data": {"text": "make slide 3 more visual"}}
+    return row, message
+
+
+def before(log: logging.Logger, row, message):
+    user_input = message["data"]["text"]
+    session_id, user_id, state = row["id"], row["user_id"], row["current_state"]
+    log.debug(f"Waiting for message from session {session_id}")
+    log.debug(f"Received raw data: {json.dumps(message)[:100]}...")
+    log.info(f"Received message for session {session_id}: type={message.get('type')}, data keys={list(message.get('data', {}).keys())}")
+    log.info(f"[DEBUG WebSocketHandler] Extracted user input: '{user_input}'")
+    log.info(f"[DEBUG WebSocketHandler] Message data keys: {list(message.get('data', {}).keys())}")
+    log.info(f"[DEBUG WebSocketHandler] Current session state: {state}")
+    log.info(f"[DEBUG WebSocketHandler] Classifying intent for text: '{user_input}' in state: {state}")
+    log.info(f"[DEBUG WebSocketHandler] Intent classified as: Submit_Refinement_Request")
+    log.info(f"[DEBUG WebSocketHandler] Intent confidence: 0.95")
+    log.info(f"[DEBUG WebSocketHandler] Intent extracted_info: {user_input}")
+    log.info(f"Classified intent: Submit_Refinement_Request with confidence 0.95")
+    log.info(f"[DEBUG WebSocketHandler] Determining next state: current={state}, intent=Submit_Refinement_Request")
+    log.info(f"[DEBUG _determine_next_state] Intent: Submit_Refinement_Request -> Next state: {state}")
+    log.info(f"[DEBUG WebSocketHandler] Next state determined: {state}")
+    log.info(f"[DEBUG WebSocketHandler] State remains: {state}")
+    print(f"[DEBUG SessionManager] get_or_create called with session_id={session_id}, user_id={user_id}")
+    print("[DEBUG SessionManager] Checking Supabase for existing session")
+    print(f"[DEBUG SessionManager] Supabase query result: {_FakeResult(row)}")
+    log.debug(f"Session data from DB: {row}")
+    log.info(f"[DEBUG WebSocketHandler] About to process state: {state}")
+    log.info(f"[DEBUG WebSocketHandler] Strawman data available: True")
+    log.info(f"[DEBUG WebSocketHandler] Strawman has {len(row['presentation_strawman']['slides'])} slides")
+    log.info(f"[DEBUG WebSocketHandler] Processing with Director for state: {state}")
+    log.warning(f"[DEBUG WebSocketHandler] Detected PresentationStrawman with {len(row['presentation_strawman']['slides'])} slides")
+    log.warning(f"[DEBUG WebSocketHandler] Strawman saved and session refreshed")
+    for i in range(4):
+        log.debug(f"Sending message {i+1}/4: slide_update")
+    log.info(f"Sent response for session {session_id} in state {state}")
+
+
+def after(log, row, message):
+    user_input = message["data"]["text"]
+    session_id, user_id, state = row["id"], row["user_id"], row["current_state"]
+    trace = TurnTrace(session_id, sample_rate=0.1)
+    trace.phase("receive")
+    log.debug("Received message for session %s: type=%s, %d bytes", session_id, message.get("type"), 64)
+    log.debug("User input in state %s: %r", state, user_input)
+    trace.phase("classify")
+    log.info("Classified intent: %s with confidence %s", "Submit_Refinement_Request", 0.95)
+    log.debug("Intent extracted_info: %s", user_input)
+    trace.set(intent="Submit_Refinement_Request", state=state)
+    trace.phase("state")
+    log.info(f"State remains: {state} (intent: Submit_Refinement_Request)")
+    log.debug("Returning cached session %s for user %s", session_id, user_id)
+    log.debug("Session data from DB: %s", row)
+    trace.phase("director")
+    trace.phase("package")
+    log.debug("Saving strawman with %d slides", len(row["presentation_strawman"]["slides"]))
+    trace.phase("send")
+    for i in range(4):
+        log.debug("Sending message %d/%d: %s", i + 1, 4, "slide_update")
+    log.info(f"Sent response for session {session_id} in state {state}")
+    trace.finish()
+
+
+def _time(fn, messages):
+    samples = []
+    for _ in range(messages):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    row, message = _fixtures()
+    with tempfile.TemporaryDirectory() as tmp:
+        out_path = os.path.join(tmp, "out.log")
+        with open(out_path, "w") as out, contextlib.redirect_stdout(out):
+            old = logging.getLogger("bench.before")
+            old.setLevel(logging.DEBUG)
+            old.propagate = False
+            handler = logging.StreamHandler(out)
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            old.addHandler(handler)
+            before_stats = _time(lambda: before(old, row, message), args.messages)
+
+            new = StandardLogger("bench.after", level="INFO")
+            new.logger.propagate = False
+            # The background writer gets the same destination
+            for listener_handler in get_queue_handler().listener.handlers:
+                listener_handler.setStream(out)
+            after_stats = _time(lambda: after(new, row, message), args.messages)
+
+            # Logfire path, with the SDK replaced by an in-memory sink
+            logger_module.logfire = _LogfireSink()
+            unfiltered = LogfireLogger("bench.logfire", level="DEBUG")
+            filtered = LogfireLogger("bench.logfire", level="INFO")
+            unfiltered_stats = _time(lambda: after(unfiltered, row, message), args.messages)
+            filtered_stats = _time(lambda: after(filtered, row, message), args.messages)
+
+            dropped = get_queue_handler().dropped
+            # Drain the queue into the file before it is closed
+            listener = get_queue_handler().listener
+            listener.stop()
+            for listener_handler in listener.handlers:
+                listener_handler.setStream(sys.stderr)
+            listener.start()
+
+    rows = (
+        ("before", before_stats),
+        ("after", after_stats),
+        ("logfire, unfiltered", unfiltered_stats),
+        ("logfire, INFO", filtered_stats),
+    )
+    print(f"{'':20} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    for name, (mean, p50, p99) in rows:
+        print(f"{name:20} {mean:10.1f} {p50:10.1f} {p99:10.1f}")
+    print(f"\nper-message overhead reduced {before_stats[0] / after_stats[0]:.1f}x "
+          f"({args.messages} messages, {dropped} log records dropped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,18 +21,36 @@ from src.models.design_tokens import ThemeDefinition
 from src.agents.theme_agent import SimplifiedThemeAgent
 from src.agents.content_agent_v7 import ContentAgentV7, ContentManifest
 from src.agents.image_build_agent import generate_image
+from src.utils.asset_channel import asset_reference
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+def _image_entry(image_result: Dict[str, Any]) -> Any:
+    """
+    Reference to a generated image for the content package.
+    
+    Images held by the image store are referenced by asset id/URL and
+    delivered over the asset side-channel; the base64 string is only used
+    when no store is available.
+    """
+    if image_result.get('image_id'):
+        return asset_reference(
+            image_result['image_id'],
+            mime_type=image_result.get('mime_type', 'image/png'),
+            transparent_asset_id=image_result.get('transparent_id')
+        )
+    return image_result.get('image_base64', '')
+
+
 class ContentGenerationResult:
     """Result of content generation for a single slide."""
     def __init__(
         self,
         slide_id: str,
         content_manifest: ContentManifest,
-        generated_images: Optional[Dict[str, str]] = None
+        generated_images: Optional[Dict[str, Any]] = None
     ):
         self.slide_id = slide_id
         self.content_manifest = content_manifest
@@ -142,11 +160,11 @@ class ContentOrchestrator:
                     logger.info(f"  - Generating image for slide {slide.slide_id}")
                     try:
                         image_result = await generate_image(
-                            content_manifest.primary_visual
+                            content_manifest.primary_visual,
+                            inline=False
                         )
                         if image_result.get('success'):
-                            # For now, store base64 - later this should upload to storage
-                            generated_images['primary'] = image_result.get('image_base64', '')
+                            generated_images['primary'] = _image_entry(image_result)
                     except Exception as e:
                         logger.error(f"Image generation failed for slide {slide.slide_id}: {e}")
                 
@@ -186,7 +204,7 @@ class ContentOrchestrator:
         Yields updates as they become available:
         - Theme generation complete
         - Each slide content complete
-        - Each image generation complete
+        - Each image generation complete (asset reference, no inline bytes)
         - Final assembly complete
         """
         try:
@@ -225,13 +243,15 @@ class ContentOrchestrator:
                 if generate_images and content_manifest.primary_visual:
                     try:
                         image_result = await generate_image(
-                            content_manifest.primary_visual
+                            content_manifest.primary_visual,
+                            inline=False
                         )
                         if image_result.get('success'):
                             yield {
                                 "type": "image_ready",
                                 "slide_id": slide.slide_id,
-                                "image_url": image_result.get('url', ''),  # Future: actual URL
+                                "image": _image_entry(image_result),
+                                "image_url": image_result.get('image_url', ''),
                                 "session_id": session_id
                             }
                     except Exception as e:
@@ -95,19 +95,35 @@ class BaseAgent(ABC):
         # Default implementation for SVG
         if "<svg" in content:
             # Apply color replacements
-            replacements = {
-                "#3B82F6": theme.get("primaryColor", "#3B82F6"),
-                "#60A5FA": theme.get("secondaryColor") or "#60A5FA",  # Handle None
-                "#FFFFFF": theme.get("backgroundColor") or "#FFFFFF",  # Handle None
-                "#1F2937": theme.get("textColor", "#1F2937")
-            }
-            
-            for old_color, new_color in replacements.items():
-                if old_color != new_color and new_color:  # Ensure new_color is not None
-                    content = content.replace(old_color, new_color)
+            for old_color, new_color in self.get_theme_color_replacements(theme).items():
+                content = content.replace(old_color, new_color)
         
         return content
     
+    def get_theme_color_replacements(self, theme: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Get the default color replacements for a theme
+        
+        Args:
+            theme: Theme configuration
+            
+        Returns:
+            Mapping of default template colors to theme colors (changed colors only)
+        """
+        replacements = {
+            "#3B82F6": theme.get("primaryColor", "#3B82F6"),
+            "#60A5FA": theme.get("secondaryColor") or "#60A5FA",  # Handle None
+            "#FFFFFF": theme.get("backgroundColor") or "#FFFFFF",  # Handle None
+            "#1F2937": theme.get("textColor", "#1F2937")
+        }
+        
+        # Ensure new_color is not None
+        return {
+            old_color: new_color
+            for old_color, new_color in replacements.items()
+            if old_color != new_color and new_color
+        }
+    
     def extract_data_points(self, request: DiagramRequest) -> List[Dict[str, Any]]:
         """
         Extract data points from request
@@ -24,6 +24,7 @@ from models.response_models import (
 from .base_agent import BaseAgent
 from utils.logger import setup_logger
 from utils.mermaid_renderer import render_mermaid_to_svg
+from utils.llm_client import generate_content
 import uuid
 from playbooks.mermaid_playbook import (
     get_diagram_spec,
@@ -129,9 +130,10 @@ class MermaidAgent(BaseAgent):
             logger.info(f"🚀 Generating {request.diagram_type} with Gemini")
             
             # Generate with Gemini
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt + "\n\nReturn a JSON object with: mermaid_code, confidence (0-1), entities_extracted (list), relationships_count (int), diagram_type_confirmed"
+            response = await generate_content(
+                self.model,
+                prompt + "\n\nReturn a JSON object with: mermaid_code, confidence (0-1), entities_extracted (list), relationships_count (int), diagram_type_confirmed",
+                self.settings
             )
             
             # Parse the response
@@ -164,7 +166,7 @@ class MermaidAgent(BaseAgent):
                         request.theme.dict(),
                         fallback_to_placeholder=False
                     )
-                    if svg_content and svg_content.startswith("<svg"):
+                    if svg_content and "<svg" in svg_content[:200]:
                         logger.info("✅ Rendered to SVG on server")
                         render_success = True
                 except Exception as e:
@@ -23,6 +23,7 @@ from models.response_models import OutputType
 from .base_agent import BaseAgent
 from utils.logger import setup_logger
 from utils.mermaid_renderer import render_mermaid_to_svg
+from utils.llm_client import generate_content
 from utils.mermaid_validator import MermaidValidator
 
 # Import the new playbook
@@ -138,9 +139,10 @@ class MermaidAgentV2(BaseAgent):
             logger.info(f"🚀 Generating {specific_type} with Gemini 2.5 Flash")
             
             # Generate with LLM
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt
+            response = await generate_content(
+                self.model,
+                prompt,
+                self.settings
             )
             
             # Extract Mermaid code from response
@@ -180,7 +182,7 @@ class MermaidAgentV2(BaseAgent):
                         request.theme.dict(),
                         fallback_to_placeholder=False
                     )
-                    if svg_content and svg_content.startswith("<svg"):
+                    if svg_content and "<svg" in svg_content[:200]:
                         render_success = True
                         logger.info("✅ Rendered to SVG on server")
                 except Exception as e:
@@ -14,7 +14,8 @@ from models.response_models import OutputType
 from models.request_models import ColorScheme
 from .base_agent import BaseAgent
 from utils.logger import setup_logger
-from utils.color_utils import SmartColorTheme, MonochromaticTheme, get_contrast_color, extract_colors_from_svg
+from utils.svg_theming import get_compiled_theme
+from utils.svg_template import CompiledSVGTemplate
 
 logger = setup_logger(__name__)
 
@@ -24,6 +25,7 @@ class SVGAgent(BaseAgent):
     Agent for SVG template-based diagram generation
     
     Uses pre-built SVG templates with text and color replacements.
+    Templates are tokenized once at load time, so filling one is a single join.
     """
     
     def __init__(self, settings):
@@ -33,6 +35,7 @@ class SVGAgent(BaseAgent):
             settings.templates_dir
         )
         self.template_cache: Dict[str, str] = {}
+        self.compiled_templates: Dict[str, CompiledSVGTemplate] = {}
     
     async def initialize(self):
         """Initialize SVG agent and load templates"""
@@ -57,7 +60,12 @@ class SVGAgent(BaseAgent):
                 try:
                     with open(template_path, 'r', encoding='utf-8') as f:
                         self.template_cache[template_name] = f.read()
-                        self.supported_types.append(template_name)
+                    self.compiled_templates[template_name] = CompiledSVGTemplate(
+                        template_name,
+                        self.template_cache[template_name],
+                        self._get_template_placeholders(template_name)
+                    )
+                    self.supported_types.append(template_name)
                 except Exception as e:
                     logger.error(f"Error loading template {filename}: {e}")
     
@@ -72,46 +80,40 @@ class SVGAgent(BaseAgent):
         self.validate_request(request)
         
         # Get template
-        template = self.template_cache.get(request.diagram_type)
+        template = self.compiled_templates.get(request.diagram_type)
         if not template:
             raise ValueError(f"No template found for {request.diagram_type}")
         
         # Extract data points
         data_points = self.extract_data_points(request)
+        labels = [point.get("label", "") for point in data_points]
         
-        # Apply replacements with template type context
-        svg_content = self._apply_replacements(
-            template,
-            data_points,
-            request.theme.dict(),
-            request.diagram_type  # Pass template type for specific replacements
-        )
+        # Fill text slots; basic theming only swaps a few default colors, so
+        # it is applied through the color slots in the same join
+        if request.theme.useSmartTheming:
+            colors = None
+        else:
+            colors = self.get_theme_color_replacements(request.theme.dict())
+        svg_content = template.fill(labels, colors)
         
         # Apply theme
         if request.theme.useSmartTheming:
-            # Use intelligent color theming based on selected scheme
+            # Use intelligent color theming based on selected scheme:
+            # monochromatic (single color variations) or complementary
+            # (multiple colors). Color mapping and the design clean-ups
+            # (gradients, borders, titles, text contrast) run in one pass.
             if request.theme.colorScheme == ColorScheme.MONOCHROMATIC:
-                # Use monochromatic theme (single color variations)
-                theme = MonochromaticTheme(request.theme.primaryColor)
+                color_scheme = "monochromatic"
             else:
-                # Use complementary theme (multiple colors)
-                theme = SmartColorTheme(
-                    request.theme.primaryColor,
-                    request.theme.secondaryColor,
-                    request.theme.accentColor,
-                    color_scheme="complementary"
-                )
-            
-            svg_content = theme.apply_to_svg(svg_content)
+                color_scheme = "complementary"
             
-            # Apply additional processing for better design
-            svg_content = self._remove_gradients(svg_content, theme)
-            svg_content = self._remove_borders(svg_content)
-            svg_content = self._remove_titles(svg_content)
-            svg_content = self._apply_smart_text_colors(svg_content)
-        else:
-            # Use basic theme replacement
-            svg_content = self.apply_theme(svg_content, request.theme.dict())
+            theme = get_compiled_theme(
+                request.theme.primaryColor,
+                request.theme.secondaryColor,
+                request.theme.accentColor,
+                color_scheme
+            )
+            svg_content = theme.apply(svg_content)
         
         return {
             # Old format (backward compatibility)
@@ -141,217 +143,6 @@ class SVGAgent(BaseAgent):
             }
         }
     
-    def _apply_replacements(
-        self,
-        template: str,
-        data_points: List[Dict[str, Any]],
-        theme: Dict[str, Any],
-        template_type: str = None
-    ) -> str:
-        """
-        Apply text replacements to template
-        
-        Args:
-            template: SVG template content
-            data_points: Data points to insert
-            theme: Theme configuration
-            template_type: Specific template type for targeted replacements
-            
-        Returns:
-            Modified SVG content
-        """
-        
-        svg_content = template
-        
-        # Get template-specific placeholders
-        placeholders = self._get_template_placeholders(template_type)
-        
-        # Replace each placeholder with corresponding data point
-        for i, point in enumerate(data_points):
-            if i < len(placeholders):
-                placeholder = placeholders[i]
-                label = point.get("label", "")
-                
-                if placeholder and label:
-                    # Handle split text (e.g., "Central\nHub" in tspan elements)
-                    if "\n" in placeholder:
-                        # Replace both the split version and the continuous version
-                        parts = placeholder.split("\n")
-                        # Try replacing as continuous text first
-                        continuous = "".join(parts)
-                        if continuous in svg_content:
-                            svg_content = svg_content.replace(continuous, label)
-                        # Then try replacing parts separately if they appear on different lines
-                        for part in parts:
-                            if part in svg_content:
-                                # Only replace if it's the exact part (avoid partial replacements)
-                                svg_content = svg_content.replace(f">{part}<", f">{label}<")
-                    else:
-                        # Simple replacement for non-split text
-                        svg_content = svg_content.replace(placeholder, label)
-        
-        return svg_content
-    
-    def _remove_gradients(self, svg_content: str, theme) -> str:
-        """Replace gradient fills with solid colors from theme"""
-        import re
-        
-        # First, replace all gradient fill references with solid colors
-        # Pattern to match any fill that references a gradient
-        gradient_fill_pattern = r'fill="url\(#[^)]+\)"'
-        
-        # Counter for varying colors
-        color_index = 0
-        
-        def replace_gradient_fill(match):
-            nonlocal color_index
-            # Cycle through different theme colors for variety
-            if color_index % 4 == 0:
-                color = theme.palette['primary'][min(2, len(theme.palette['primary'])-1)]
-            elif color_index % 4 == 1:
-                color = theme.palette['secondary'][min(2, len(theme.palette['secondary'])-1)]
-            elif color_index % 4 == 2:
-                color = theme.palette['accent'][min(1, len(theme.palette['accent'])-1)]
-            else:
-                color = theme.palette['primary'][min(1, len(theme.palette['primary'])-1)]
-            color_index += 1
-            return f'fill="{color}"'
-        
-        svg_content = re.sub(gradient_fill_pattern, replace_gradient_fill, svg_content)
-        
-        # Remove gradient definitions from defs section
-        # Pattern to remove linearGradient and radialGradient elements
-        svg_content = re.sub(r'<linearGradient[^>]*>.*?</linearGradient>', '', svg_content, flags=re.DOTALL)
-        svg_content = re.sub(r'<radialGradient[^>]*>.*?</radialGradient>', '', svg_content, flags=re.DOTALL)
-        
-        # Clean up empty defs sections
-        svg_content = re.sub(r'<defs>\s*</defs>', '', svg_content)
-        
-        return svg_content
-    
-    def _remove_borders(self, svg_content: str) -> str:
-        """Make borders same color as fill for filled shapes"""
-        import re
-        
-        # Find all elements with both fill and stroke
-        # Pattern to match elements with fill color
-        element_pattern = r'(<(?:rect|circle|path|polygon|ellipse)[^>]*fill="(#[0-9a-fA-F]{6})"[^>]*>)'
-        
-        def update_stroke(match):
-            element = match.group(1)
-            fill_color = match.group(2)
-            
-            # If element has a stroke attribute, replace it with fill color
-            # Otherwise leave element unchanged (for lines, axes, etc.)
-            if 'stroke=' in element:
-                # Replace stroke color with fill color
-                element = re.sub(r'stroke="[^"]*"', f'stroke="{fill_color}"', element)
-            
-            return element
-        
-        # Process elements that have fill colors
-        svg_content = re.sub(element_pattern, update_stroke, svg_content)
-        
-        # Also handle reverse order (stroke before fill)
-        element_pattern2 = r'(<(?:rect|circle|path|polygon|ellipse)[^>]*stroke="[^"]*"[^>]*fill="(#[0-9a-fA-F]{6})"[^>]*>)'
-        
-        def update_stroke2(match):
-            element = match.group(1)
-            fill_color = match.group(2)
-            # Replace stroke color with fill color
-            element = re.sub(r'stroke="[^"]*"', f'stroke="{fill_color}"', element)
-            return element
-        
-        svg_content = re.sub(element_pattern2, update_stroke2, svg_content)
-        
-        return svg_content
-    
-    def _remove_titles(self, svg_content: str) -> str:
-        """Remove title and subtitle text elements"""
-        import re
-        
-        # Remove title elements and their content
-        # Pattern to match title text elements
-        title_pattern = r'<text[^>]*id="[^"]*_title"[^>]*>.*?</text>\s*'
-        svg_content = re.sub(title_pattern, '', svg_content, flags=re.DOTALL)
-        
-        # Remove subtitles (usually the text element right after title)
-        # Pattern for text elements that appear to be subtitles
-        subtitle_patterns = [
-            r'<text[^>]*y="[789]\d"[^>]*font-size="1[234]"[^>]*>.*?</text>\s*',  # Small text near top
-            r'<text[^>]*>.*?(?:Quarterly Milestones|Impact vs Effort|Analysis).*?</text>\s*',  # Common subtitles
-        ]
-        
-        for pattern in subtitle_patterns:
-            svg_content = re.sub(pattern, '', svg_content, flags=re.DOTALL)
-        
-        return svg_content
-    
-    def _apply_smart_text_colors(self, svg_content: str) -> str:
-        """Apply black or white text color based on background luminance"""
-        import re
-        
-        # Extract all unique fill colors from the SVG
-        fill_colors = extract_colors_from_svg(svg_content)
-        
-        # Build a map of element IDs to their fill colors
-        # Pattern to find elements with both id and fill
-        element_pattern = r'<(?:rect|circle|path|polygon)[^>]*id="([^"]+)"[^>]*fill="(#[0-9a-fA-F]{6})"'
-        elements = re.findall(element_pattern, svg_content)
-        
-        # Also check reverse order (fill before id)
-        element_pattern2 = r'<(?:rect|circle|path|polygon)[^>]*fill="(#[0-9a-fA-F]{6})"[^>]*id="([^"]+)"'
-        elements2 = re.findall(element_pattern2, svg_content)
-        
-        # Create mapping of element IDs to colors
-        element_colors = {}
-        for elem_id, color in elements:
-            element_colors[elem_id] = color
-        for color, elem_id in elements2:
-            element_colors[elem_id] = color
-        
-        # Find text elements and determine their background
-        text_pattern = r'(<text[^>]*>)'
-        
-        def replace_text_color(match):
-            text_tag = match.group(1)
-            
-            # Try to determine background color based on position or parent
-            # Default to white background if can't determine
-            bg_color = "#ffffff"
-            
-            # Extract position from text element
-            x_match = re.search(r'x="(\d+)"', text_tag)
-            y_match = re.search(r'y="(\d+)"', text_tag)
-            
-            if x_match and y_match:
-                x, y = int(x_match.group(1)), int(y_match.group(1))
-                
-                # Look for containing elements based on position
-                # This is a simplified approach - checking common patterns
-                for elem_id, color in element_colors.items():
-                    # Check if this text might be inside this element
-                    # (This is a heuristic - proper XML parsing would be better)
-                    if elem_id.replace('_fill', '_text') in text_tag or \
-                       elem_id.replace('_fill', '') in text_tag:
-                        bg_color = color
-                        break
-            
-            # Get contrast color
-            text_color = get_contrast_color(bg_color)
-            
-            # Replace or add fill attribute
-            if 'fill=' in text_tag:
-                text_tag = re.sub(r'fill="[^"]*"', f'fill="{text_color}"', text_tag)
-            else:
-                text_tag = text_tag[:-1] + f' fill="{text_color}">'
-            
-            return text_tag
-        
-        svg_content = re.sub(text_pattern, replace_text_color, svg_content)
-        
-        return svg_content
-    
     def _get_template_placeholders(self, template_type: str) -> List[str]:
         """Get specific placeholders for each template type"""
         
@@ -10,6 +10,7 @@ from typing import Dict, Set, Optional, Any
 from datetime import datetime
 import uuid
 from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 
 from models import (
     WebSocketMessage,
@@ -32,11 +33,14 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.connection_metadata: Dict[str, Dict[str, Any]] = {}
+        # Serializes sends: several requests per session reply concurrently
+        self.send_locks: Dict[str, asyncio.Lock] = {}
     
     async def connect(self, session_id: str, websocket: WebSocket, metadata: Dict[str, Any]):
         """Add new connection"""
         self.active_connections[session_id] = websocket
         self.connection_metadata[session_id] = metadata
+        self.send_locks[session_id] = asyncio.Lock()
         logger.info(f"Connection established: {session_id}")
     
     async def disconnect(self, session_id: str):
@@ -44,13 +48,15 @@ class ConnectionManager:
         if session_id in self.active_connections:
             del self.active_connections[session_id]
             del self.connection_metadata[session_id]
+            self.send_locks.pop(session_id, None)
             logger.info(f"Connection closed: {session_id}")
     
     async def send_message(self, session_id: str, message: WebSocketMessage):
         """Send message to specific connection"""
         if session_id in self.active_connections:
             websocket = self.active_connections[session_id]
-            await websocket.send_json(message.to_json())
+            async with self.send_locks[session_id]:
+                await websocket.send_json(message.to_json())
     
     async def broadcast(self, message: WebSocketMessage, exclude: Optional[Set[str]] = None):
         """Broadcast message to all connections"""
@@ -73,7 +79,13 @@ class WebSocketHandler:
         self.conductor: Optional[DiagramConductor] = None
         self.total_requests = 0
         self.total_errors = 0
-        self.active_requests: Dict[str, asyncio.Task] = {}
+        # In-flight requests per session, keyed by correlation_id
+        self.active_requests: Dict[str, Dict[str, asyncio.Task]] = {}
+        # Bounds concurrent generations per session; extra requests queue
+        self.request_slots: Dict[str, asyncio.Semaphore] = {}
+        self.max_concurrent_requests = getattr(settings, 'max_requests_per_session', 4)
+        self.max_queued_requests = getattr(settings, 'max_queued_requests_per_session', 32)
+        self.max_batch_diagrams = getattr(settings, 'batch_max_diagrams', 50)
     
     async def initialize(self):
         """Initialize handler and dependencies"""
@@ -82,6 +94,7 @@ class WebSocketHandler:
         # Initialize conductor
         self.conductor = DiagramConductor(self.settings)
         await self.conductor.initialize()
+        self.conductor.add_persistence_listener(self._send_diagram_stored)
         
         logger.info("WebSocket handler initialized")
     
@@ -90,8 +103,9 @@ class WebSocketHandler:
         logger.info("Shutting down WebSocket handler...")
         
         # Cancel active requests
-        for task in self.active_requests.values():
-            task.cancel()
+        for tasks in self.active_requests.values():
+            for task in tasks.values():
+                task.cancel()
         
         # Close all connections
         for session_id in list(self.connection_manager.active_connections.keys()):
@@ -122,6 +136,9 @@ class WebSocketHandler:
             }
         )
         
+        self.active_requests[session_id] = {}
+        self.request_slots[session_id] = asyncio.Semaphore(self.max_concurrent_requests)
+        
         # Send connection acknowledgment
         await self._send_connection_ack(session_id)
         
@@ -153,9 +170,9 @@ class WebSocketHandler:
             pass
         finally:
             # Cancel any active requests for this session
-            if session_id in self.active_requests:
-                self.active_requests[session_id].cancel()
-                del self.active_requests[session_id]
+            for task in self.active_requests.pop(session_id, {}).values():
+                task.cancel()
+            self.request_slots.pop(session_id, None)
             
             # Remove connection
             await self.connection_manager.disconnect(session_id)
@@ -167,6 +184,8 @@ class WebSocketHandler:
         
         if message_type == "diagram_request":
             await self._handle_diagram_request(session_id, message_data)
+        elif message_type == "batch_request":
+            await self._handle_batch_request(session_id, message_data)
         elif message_type == "cancel_request":
             await self._handle_cancel_request(session_id, message_data)
         elif message_type == "ping":
@@ -182,22 +201,65 @@ class WebSocketHandler:
         """Handle diagram generation request"""
         
         self.total_requests += 1
-        request_id = message_data.get("correlation_id", str(uuid.uuid4()))
+        request_id = message_data.get("correlation_id") or str(uuid.uuid4())
+        session_requests = self.active_requests.setdefault(session_id, {})
         
-        # Cancel any existing request for this session
-        if session_id in self.active_requests:
-            self.active_requests[session_id].cancel()
+        if request_id in session_requests:
+            await self._send_error(
+                session_id,
+                ERROR_CODES["INVALID_REQUEST"],
+                f"Request {request_id} is already in progress",
+                request_id=request_id
+            )
+            return
         
-        # Create task for diagram generation
+        if len(session_requests) >= self.max_concurrent_requests + self.max_queued_requests:
+            await self._send_error(
+                session_id,
+                ERROR_CODES["RATE_LIMIT"],
+                f"Too many requests in flight (limit "
+                f"{self.max_concurrent_requests + self.max_queued_requests})",
+                request_id=request_id
+            )
+            return
+        
+        # Create task for diagram generation; requests run concurrently
+        # (up to max_concurrent_requests) and reply tagged by correlation_id
         task = asyncio.create_task(
             self._generate_diagram(session_id, request_id, message_data)
         )
-        self.active_requests[session_id] = task
+        session_requests[request_id] = task
         
         # Update connection metadata
         if session_id in self.connection_manager.connection_metadata:
             self.connection_manager.connection_metadata[session_id]["request_count"] += 1
     
+    async def _handle_batch_request(self, session_id: str, message_data: Dict[str, Any]):
+        """
+        Handle a batch of diagram requests
+        
+        The batch is tracked (and cancelled) like a single request under its
+        own correlation_id; each item replies with its own correlation_id.
+        """
+        
+        payload = message_data.get("data", message_data.get("payload", {})) or {}
+        items = payload.get("requests")
+        
+        if not isinstance(items, list) or not items:
+            error = "Batch request needs a non-empty 'requests' list"
+        elif len(items) > self.max_batch_diagrams:
+            error = f"Batch has {len(items)} requests (limit {self.max_batch_diagrams})"
+        else:
+            await self._handle_diagram_request(session_id, message_data)
+            return
+        
+        await self._send_error(
+            session_id,
+            ERROR_CODES["INVALID_REQUEST"],
+            error,
+            request_id=message_data.get("correlation_id")
+        )
+    
     async def _generate_diagram(
         self,
         session_id: str,
@@ -215,45 +277,15 @@ class WebSocketHandler:
                 request_id=request_id
             )
             
-            # Parse request
-            payload = message_data.get("data", message_data.get("payload", {}))
-            diagram_request = DiagramRequest(
-                **payload,
-                session_id=session_id,
-                user_id=self.connection_manager.connection_metadata[session_id]["user_id"],
-                request_id=request_id
-            )
-            
-            # Send generating status
-            await self._send_status(
-                session_id,
-                "generating",
-                STATUS_MESSAGES["generating"],
-                progress=25,
-                request_id=request_id
-            )
-            
-            # Generate diagram
-            if not self.conductor:
-                raise ValueError("Conductor not initialized")
-            
-            result = await self.conductor.generate(diagram_request)
-            
-            # Send response
-            await self._send_diagram_response(
-                session_id,
-                request_id,
-                result
-            )
-            
-            # Send complete status
-            await self._send_status(
-                session_id,
-                "complete",
-                STATUS_MESSAGES["complete"],
-                progress=100,
-                request_id=request_id
-            )
+            slots = self.request_slots.get(session_id)
+            if slots is None:
+                return  # Connection already closed
+            if message_data.get("type") == "batch_request":
+                # Each batch item takes its own permit from the session's slots
+                await self._run_batch_request(session_id, request_id, message_data, slots)
+            else:
+                async with slots:
+                    await self._run_diagram_request(session_id, request_id, message_data)
         
         except asyncio.CancelledError:
             logger.info(f"Request cancelled: {request_id}")
@@ -274,19 +306,174 @@ class WebSocketHandler:
             )
         finally:
             # Remove from active requests
-            if session_id in self.active_requests:
-                del self.active_requests[session_id]
+            self.active_requests.get(session_id, {}).pop(request_id, None)
     
-    async def _handle_cancel_request(self, session_id: str, message_data: Dict[str, Any]):
-        """Handle request cancellation"""
+    async def _run_diagram_request(
+        self,
+        session_id: str,
+        request_id: str,
+        message_data: Dict[str, Any]
+    ):
+        """Parse, generate and send one diagram once a request slot is free"""
+        
+        # Parse request
+        payload = message_data.get("data", message_data.get("payload", {}))
+        diagram_request = DiagramRequest(
+            **payload,
+            session_id=session_id,
+            user_id=self.connection_manager.connection_metadata[session_id]["user_id"],
+            request_id=request_id
+        )
+        
+        # Send generating status
+        await self._send_status(
+            session_id,
+            "generating",
+            STATUS_MESSAGES["generating"],
+            progress=25,
+            request_id=request_id
+        )
+        
+        # Generate diagram
+        if not self.conductor:
+            raise ValueError("Conductor not initialized")
+        
+        result = await self.conductor.generate(diagram_request)
+        
+        # Send response
+        await self._send_diagram_response(
+            session_id,
+            request_id,
+            result
+        )
         
-        if session_id in self.active_requests:
-            self.active_requests[session_id].cancel()
+        # Send complete status
+        await self._send_status(
+            session_id,
+            "complete",
+            STATUS_MESSAGES["complete"],
+            progress=100,
+            request_id=request_id
+        )
+    
+    async def _run_batch_request(
+        self,
+        session_id: str,
+        batch_id: str,
+        message_data: Dict[str, Any],
+        slots: asyncio.Semaphore
+    ):
+        """Generate a batch, sending each diagram as soon as it finishes"""
+        
+        if not self.conductor:
+            raise ValueError("Conductor not initialized")
+        
+        payload = message_data.get("data", message_data.get("payload", {}))
+        items = payload["requests"]
+        user_id = self.connection_manager.connection_metadata[session_id]["user_id"]
+        
+        # Invalid items are reported individually; the rest still run
+        requests = []
+        item_ids = []
+        failed = 0
+        for index, item in enumerate(items):
+            item_id = (item.get("correlation_id") if isinstance(item, dict) else None) \
+                or f"{batch_id}:{index}"
+            try:
+                fields = {k: v for k, v in item.items() if k != "correlation_id"}
+                requests.append(DiagramRequest(
+                    **fields,
+                    session_id=session_id,
+                    user_id=user_id,
+                    request_id=item_id
+                ))
+                item_ids.append(item_id)
+            except (ValidationError, TypeError, AttributeError) as e:
+                failed += 1
+                await self._send_error(
+                    session_id,
+                    ERROR_CODES["INVALID_REQUEST"],
+                    f"Invalid batch item {index}: {e}",
+                    request_id=item_id
+                )
+        
+        await self._send_status(
+            session_id,
+            "generating",
+            STATUS_MESSAGES["generating"],
+            progress=0,
+            request_id=batch_id
+        )
+        
+        completed = 0
+        async for index, result, error in self.conductor.generate_batch(requests, slots):
+            completed += 1
+            if error is None:
+                await self._send_diagram_response(session_id, item_ids[index], result)
+            else:
+                failed += 1
+                self.total_errors += 1
+                await self._send_error(
+                    session_id,
+                    ERROR_CODES["GENERATION_FAILED"],
+                    str(error),
+                    request_id=item_ids[index]
+                )
             await self._send_status(
                 session_id,
-                "idle",
-                "Request cancelled"
+                "generating",
+                f"{completed}/{len(requests)} diagrams ready",
+                progress=int(completed * 100 / len(requests)),
+                request_id=batch_id
             )
+        
+        message = WebSocketMessage(
+            session_id=session_id,
+            type="batch_complete",
+            payload={
+                "total": len(items),
+                "succeeded": len(items) - failed,
+                "failed": failed
+            },
+            correlation_id=batch_id
+        )
+        await self.connection_manager.send_message(session_id, message)
+        
+        await self._send_status(
+            session_id,
+            "complete",
+            STATUS_MESSAGES["complete"],
+            progress=100,
+            request_id=batch_id
+        )
+    
+    async def _handle_cancel_request(self, session_id: str, message_data: Dict[str, Any]):
+        """
+        Handle request cancellation
+        
+        Cancels the request named by correlation_id (top level or in data),
+        or every request of the session if none is given. Cancelled requests
+        report their own "Request cancelled" status.
+        """
+        
+        session_requests = self.active_requests.get(session_id, {})
+        payload = message_data.get("data", message_data.get("payload", {})) or {}
+        request_id = message_data.get("correlation_id") or payload.get("correlation_id")
+        
+        if request_id:
+            task = session_requests.get(request_id)
+            if task:
+                task.cancel()
+            else:
+                await self._send_error(
+                    session_id,
+                    ERROR_CODES["INVALID_REQUEST"],
+                    f"No active request {request_id}",
+                    request_id=request_id
+                )
+        else:
+            for task in list(session_requests.values()):
+                task.cancel()
     
     async def _handle_ping(self, session_id: str):
         """Handle ping message"""
@@ -307,7 +494,9 @@ class WebSocketHandler:
             payload={
                 "status": "connected",
                 "version": "2.0.0",
-                "capabilities": ["svg_template", "mermaid", "python_chart"]
+                "capabilities": ["svg_template", "mermaid", "python_chart"],
+                "max_concurrent_requests": self.max_concurrent_requests,
+                "max_batch_diagrams": self.max_batch_diagrams
             }
         )
         await self.connection_manager.send_message(session_id, message)
@@ -347,7 +536,26 @@ class WebSocketHandler:
     ):
         """Send diagram response"""
         
-        response = DiagramResponse(
+        response = self.build_diagram_response(session_id, request_id, result)
+        
+        message = WebSocketMessage(
+            session_id=session_id,
+            type="diagram_response",
+            payload=response.dict(),
+            correlation_id=request_id
+        )
+        
+        await self.connection_manager.send_message(session_id, message)
+    
+    def build_diagram_response(
+        self,
+        session_id: str,
+        request_id: str,
+        result: Dict[str, Any]
+    ) -> DiagramResponse:
+        """Build the DiagramResponse for a conductor result"""
+        
+        return DiagramResponse(
             diagram_type=result["diagram_type"],
             diagram_id=result.get("diagram_id", ""),
             url=result.get("url", ""),
@@ -358,15 +566,24 @@ class WebSocketHandler:
             session_id=session_id,
             request_id=request_id
         )
+    
+    async def _send_diagram_stored(self, job, url: str, error: Optional[str]):
+        """Tell the client where a background-persisted diagram ended up"""
         
         message = WebSocketMessage(
-            session_id=session_id,
-            type="diagram_response",
-            payload=response.dict(),
-            correlation_id=request_id
+            session_id=job.session_id,
+            type="diagram_stored",
+            payload={
+                "diagram_id": job.diagram_id,
+                "status": "failed" if error else "stored",
+                "url": url,
+                "content_delivery": "url" if url else "inline",
+                "error": error
+            },
+            correlation_id=job.request_id
         )
         
-        await self.connection_manager.send_message(session_id, message)
+        await self.connection_manager.send_message(job.session_id, message)
     
     async def _send_error(
         self,
@@ -403,4 +620,8 @@ class WebSocketHandler:
     
     def active_connections_count(self) -> int:
         """Get active connection count"""
-        return self.connection_manager.get_connection_count()
\ No newline at end of file
+        return self.connection_manager.get_connection_count()
+    
+    def active_requests_count(self) -> int:
+        """Get number of in-flight (running or queued) requests"""
+        return sum(len(tasks) for tasks in self.active_requests.values())
\ No newline at end of file
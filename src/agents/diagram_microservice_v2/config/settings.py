@@ -61,6 +61,63 @@ class Settings(BaseSettings):
         env="CACHE_TTL",
         description="Cache time-to-live in seconds"
     )
+    cache_max_entries: int = Field(
+        default=1000,
+        env="CACHE_MAX_ENTRIES",
+        description="Maximum diagrams held in the in-process (L1) cache"
+    )
+    cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        env="CACHE_MAX_BYTES",
+        description="Byte budget of the in-process (L1) cache"
+    )
+    cache_negative_ttl: int = Field(
+        default=60,
+        env="CACHE_NEGATIVE_TTL",
+        description="Seconds a failed generation is remembered before it is retried"
+    )
+    cache_lock_ttl: int = Field(
+        default=90,
+        env="CACHE_LOCK_TTL",
+        description="Seconds a replica's generation lock is held before it expires"
+    )
+    cache_lock_wait: float = Field(
+        default=30.0,
+        env="CACHE_LOCK_WAIT",
+        description="Seconds to wait for another replica generating the same diagram"
+    )
+    
+    # Background Persistence
+    background_persistence: bool = Field(
+        default=False,
+        env="BACKGROUND_PERSISTENCE",
+        description="Return inline SVG immediately and upload/save diagrams in the background"
+    )
+    persistence_queue_size: int = Field(
+        default=256,
+        env="PERSISTENCE_QUEUE_SIZE",
+        description="Maximum diagrams waiting for background persistence"
+    )
+    persistence_queue_bytes: int = Field(
+        default=32 * 1024 * 1024,
+        env="PERSISTENCE_QUEUE_BYTES",
+        description="Maximum total SVG bytes waiting for background persistence"
+    )
+    persistence_workers: int = Field(
+        default=2,
+        env="PERSISTENCE_WORKERS",
+        description="Concurrent background upload workers"
+    )
+    persistence_max_retries: int = Field(
+        default=3,
+        env="PERSISTENCE_MAX_RETRIES",
+        description="Retries for a failed background upload or metadata save"
+    )
+    persistence_drain_timeout: float = Field(
+        default=30.0,
+        env="PERSISTENCE_DRAIN_TIMEOUT",
+        description="Seconds allowed on shutdown to finish pending background uploads"
+    )
     
     # Logging
     log_level: str = Field(
@@ -95,6 +152,26 @@ class Settings(BaseSettings):
         env="MAX_CONNECTIONS",
         description="Maximum concurrent connections"
     )
+    max_requests_per_session: int = Field(
+        default=4,
+        env="MAX_REQUESTS_PER_SESSION",
+        description="Diagram requests generated concurrently per WebSocket session"
+    )
+    max_queued_requests_per_session: int = Field(
+        default=32,
+        env="MAX_QUEUED_REQUESTS_PER_SESSION",
+        description="Requests a session may queue beyond the concurrent limit"
+    )
+    batch_max_diagrams: int = Field(
+        default=50,
+        env="BATCH_MAX_DIAGRAMS",
+        description="Maximum diagrams accepted in one batch request"
+    )
+    batch_svg_concurrency: int = Field(
+        default=8,
+        env="BATCH_SVG_CONCURRENCY",
+        description="SVG template diagrams generated concurrently within a batch"
+    )
     
     # Security - Simple string that will be split
     cors_origins: str = Field(
@@ -144,12 +221,69 @@ class Settings(BaseSettings):
         env="LLM_MAX_TOKENS",
         description="Maximum tokens for LLM response"
     )
+    llm_max_concurrency: int = Field(
+        default=16,
+        env="LLM_MAX_CONCURRENCY",
+        description="LLM calls in flight at once, per model"
+    )
+    llm_max_queued: int = Field(
+        default=64,
+        env="LLM_MAX_QUEUED",
+        description="LLM calls waiting for a slot, per model, before new calls are rejected"
+    )
+    llm_async_client: bool = Field(
+        default=True,
+        env="LLM_ASYNC_CLIENT",
+        description="Use the async Gemini client (otherwise a dedicated per-model thread pool)"
+    )
+    routing_cache_size: int = Field(
+        default=1024,
+        env="ROUTING_CACHE_SIZE",
+        description="Routing decisions memoized by (type, content hash, data point count)"
+    )
     enable_request_analysis: bool = Field(
         default=True,
         env="ENABLE_REQUEST_ANALYSIS",
         description="Enable request content analysis for LLM context"
     )
     
+    # Mermaid Rendering
+    mermaid_browser_render: bool = Field(
+        default=True,
+        env="MERMAID_BROWSER_RENDER",
+        description="Render Mermaid in a persistent headless browser instead of spawning mmdc"
+    )
+    mermaid_browser_pages: int = Field(
+        default=4,
+        env="MERMAID_BROWSER_PAGES",
+        description="Number of warm browser pages (concurrent Mermaid renders)"
+    )
+    mermaid_render_timeout: float = Field(
+        default=10.0,
+        env="MERMAID_RENDER_TIMEOUT",
+        description="Seconds allowed per Mermaid render"
+    )
+    mermaid_render_queue: int = Field(
+        default=100,
+        env="MERMAID_RENDER_QUEUE",
+        description="Maximum Mermaid renders waiting for a browser page"
+    )
+    mermaid_js_path: Optional[str] = Field(
+        default=None,
+        env="MERMAID_JS_PATH",
+        description="Local mermaid.min.js for the browser renderer"
+    )
+    mermaid_svg_cache_size: int = Field(
+        default=256,
+        env="MERMAID_SVG_CACHE_SIZE",
+        description="Rendered Mermaid SVGs kept in memory (0 disables the cache)"
+    )
+    mermaid_svg_cache_dir: Optional[str] = Field(
+        default=None,
+        env="MERMAID_SVG_CACHE_DIR",
+        description="Directory for the on-disk rendered SVG cache (unset disables it)"
+    )
+    
     # Feature Flags
     enable_cache: bool = Field(
         default=True,
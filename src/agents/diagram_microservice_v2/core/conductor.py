@@ -9,20 +9,54 @@ This is the main orchestrator that:
 """
 
 import asyncio
+import contextlib
+import copy
 import time
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 from datetime import datetime
 
 from models import DiagramRequest, GenerationStrategy, GenerationMethod
 from utils.logger import setup_logger
+from utils.mermaid_renderer import get_mermaid_renderer
+from utils.llm_client import get_llm_metrics, shutdown_llm_limiters
 from .unified_playbook import UnifiedPlaybook
+from .unified_playbook_v2 import UnifiedPlaybookV2
 from agents import SVGAgent, MermaidAgent, PythonChartAgent
-from storage import DiagramStorage, DiagramOperations, CacheManager, DiagramSessionManager
+from storage import (
+    DiagramStorage,
+    DiagramOperations,
+    TieredDiagramCache,
+    DiagramSessionManager,
+    DiagramPersistenceQueue,
+    PersistenceJob
+)
 
 logger = setup_logger(__name__)
 
 
+class _InflightGeneration:
+    """A shared generation task plus the number of callers awaiting it"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False
+    
+    async def wait(self) -> Dict[str, Any]:
+        self.waiters += 1
+        try:
+            return await asyncio.shield(self.task)
+        except asyncio.CancelledError:
+            # Only abandon the generation when nobody is left waiting for it
+            if self.waiters == 1 and not self.task.done():
+                self.abandoned = True
+                self.task.cancel()
+            raise
+        finally:
+            self.waiters -= 1
+
+
 class DiagramConductor:
     """
     Main conductor for diagram generation
@@ -34,6 +68,8 @@ class DiagramConductor:
     def __init__(self, settings):
         self.settings = settings
         self.playbook = UnifiedPlaybook(settings)
+        # Routes batches up front so requests can be grouped by method
+        self.batch_playbook = UnifiedPlaybookV2(settings)
         
         # Initialize agents
         self.agents = {
@@ -45,19 +81,32 @@ class DiagramConductor:
         # Initialize storage components
         self.storage = DiagramStorage(settings)
         self.db_ops = DiagramOperations(self.storage.client)
-        self.cache = CacheManager(
-            ttl_seconds=getattr(settings, 'cache_ttl', 3600),
-            max_size=100
-        )
+        self.cache = TieredDiagramCache.from_settings(settings)
         self.session_manager = DiagramSessionManager(
             storage_client=self.storage,
             db_operations=self.db_ops
         )
         
+        # Uploads and metadata saves off the critical path (optional)
+        self.persistence_queue: Optional[DiagramPersistenceQueue] = None
+        if getattr(settings, 'background_persistence', False):
+            self.persistence_queue = DiagramPersistenceQueue.from_settings(
+                settings, self.storage, self.db_ops
+            )
+            # Registered first, so the cache is final before clients are told
+            self.persistence_queue.add_listener(self._on_persisted)
+        
+        self.mermaid_renderer = None
+        
         # Metrics
         self.generation_count = 0
         self.fallback_count = 0
         self.error_count = 0
+        self.coalesced_count = 0
+        self.batch_count = 0
+        
+        # Generations in progress, keyed by cache key
+        self._inflight: Dict[str, _InflightGeneration] = {}
     
     async def initialize(self):
         """Initialize conductor and agents"""
@@ -65,6 +114,7 @@ class DiagramConductor:
         
         # Initialize playbook
         await self.playbook.initialize()
+        await self.batch_playbook.initialize()
         
         # Initialize agents
         for method, agent in self.agents.items():
@@ -77,6 +127,12 @@ class DiagramConductor:
         # Start cache and session manager
         await self.cache.start()
         await self.session_manager.start()
+        if self.persistence_queue:
+            await self.persistence_queue.start()
+        
+        # Warm the Mermaid browser renderer so the first diagram doesn't pay for the launch
+        self.mermaid_renderer = await get_mermaid_renderer()
+        await self.mermaid_renderer.start()
         
         logger.info("Diagram Conductor initialized")
     
@@ -91,18 +147,64 @@ class DiagramConductor:
             except Exception as e:
                 logger.error(f"Error shutting down {method} agent: {e}")
         
+        # Finish pending background uploads first
+        if self.persistence_queue:
+            await self.persistence_queue.stop(self.settings.persistence_drain_timeout)
+        
         # Stop cache and session manager
         await self.cache.stop()
         await self.session_manager.stop()
         
+        if self.mermaid_renderer:
+            await self.mermaid_renderer.stop()
+        
+        shutdown_llm_limiters()
+        
         logger.info("Diagram Conductor shut down")
     
-    async def generate(self, request: DiagramRequest) -> Dict[str, Any]:
+    def add_persistence_listener(self, listener):
+        """
+        Register a coroutine called with (job, url, error) when a diagram
+        persisted in the background is stored (or given up on).
+        
+        Only the request that generated the diagram is notified; requests
+        coalesced onto it share its diagram_id.
+        """
+        if self.persistence_queue:
+            self.persistence_queue.add_listener(listener)
+    
+    async def _on_persisted(self, job: PersistenceJob, url: str, error: Optional[str]):
+        """
+        Replace the cached "pending" result once its background upload is done.
+        
+        On success the entry gets the stored URL; if persistence gave up, the
+        entry is dropped so the next request regenerates and persists again.
+        """
+        cached = await self.cache.get(job.request_params)
+        if cached is None or cached.get("diagram_id") != job.diagram_id:
+            return
+        
+        if error or not url:
+            await self.cache.delete(job.request_params)
+            return
+        
+        cached["url"] = url
+        cached["content_delivery"] = "url"
+        cached.setdefault("metadata", {})["persistence"] = "stored"
+        await self.cache.set(job.request_params, cached)
+    
+    async def generate(
+        self,
+        request: DiagramRequest,
+        strategy: Optional[GenerationStrategy] = None
+    ) -> Dict[str, Any]:
         """
         Generate diagram based on request
         
         Args:
             request: Diagram generation request
+            strategy: Strategy already chosen for the request (routed by the
+                      playbook on a cache miss if not given)
             
         Returns:
             Generated diagram with metadata
@@ -119,88 +221,270 @@ class DiagramConductor:
                 {"request_id": request.request_id}
             )
             
-            # Check cache first
-            cached = self.cache.get(request.dict())
+            # Check cache first (in-process, then shared across replicas)
+            request_data = request.dict()
+            cached = await self.cache.get(request_data)
             if cached:
                 logger.info("Cache hit - returning cached diagram")
                 cached["metadata"]["cache_hit"] = True
                 return cached
             
-            # Get generation strategy from playbook
-            strategy = await self.playbook.get_strategy(request)
-            logger.info(
-                f"Selected strategy: {strategy.method} "
-                f"(confidence: {strategy.confidence:.2f})"
-            )
-            
-            # Try primary method
-            result = await self._try_generation(request, strategy)
+            # Fail fast if this exact request just failed
+            failure = await self.cache.get_failure(request_data)
+            if failure:
+                raise ValueError(f"Generation recently failed: {failure}")
             
-            if result:
-                # Success with primary method
-                generation_time = int((time.time() - start_time) * 1000)
-                result["metadata"]["generation_time_ms"] = generation_time
-                
-                # Upload to storage and save metadata
-                result = await self._save_to_storage(request, result)
-                
-                # Cache the result
-                self.cache.set(request.dict(), result)
-                
-                # Update session
-                await self.session_manager.update_session(
-                    request.session_id,
-                    result["diagram_id"],
-                    request.diagram_type,
-                    strategy.method.value,
-                    generation_time,
-                    cache_hit=False
+            # Join an identical generation that is already running
+            key = self.cache.cache_key(request_data)
+            inflight = self._inflight.get(key)
+            if inflight is None or inflight.abandoned:
+                inflight = _InflightGeneration(asyncio.ensure_future(
+                    self._generate_shared(request, request_data, start_time, strategy)
+                ))
+                self._inflight[key] = inflight
+                inflight.task.add_done_callback(
+                    lambda _task: self._inflight.pop(key, None)
+                    if self._inflight.get(key) is inflight else None
                 )
-                
-                return result
+                return await inflight.wait()
             
-            # Try fallback methods
-            if self.settings.enable_fallback and strategy.fallback_chain:
-                logger.info("Primary method failed, trying fallbacks...")
-                self.fallback_count += 1
-                
-                for _ in range(len(strategy.fallback_chain)):
-                    strategy = strategy.use_fallback()
-                    logger.info(f"Trying fallback: {strategy.method}")
-                    
-                    result = await self._try_generation(request, strategy)
-                    if result:
-                        generation_time = int((time.time() - start_time) * 1000)
-                        result["metadata"]["generation_time_ms"] = generation_time
-                        result["metadata"]["fallback_used"] = True
-                        
-                        # Upload to storage and save metadata
-                        result = await self._save_to_storage(request, result)
-                        
-                        # Cache the result
-                        self.cache.set(request.dict(), result)
-                        
-                        # Update session
-                        await self.session_manager.update_session(
-                            request.session_id,
-                            result["diagram_id"],
-                            request.diagram_type,
-                            strategy.method.value,
-                            generation_time,
-                            cache_hit=False
-                        )
-                        
-                        return result
+            logger.info(f"Joining in-flight generation for key: {key[:8]}...")
+            self.coalesced_count += 1
+            result = copy.deepcopy(await inflight.wait())
+            result["metadata"]["coalesced"] = True
             
-            # All methods failed
-            self.error_count += 1
-            raise ValueError("All generation methods failed")
+            await self.session_manager.update_session(
+                request.session_id,
+                result["diagram_id"],
+                request.diagram_type,
+                result["metadata"].get("generation_method", "unknown"),
+                int((time.time() - start_time) * 1000),
+                cache_hit=True
+            )
+            
+            return result
         
         except Exception as e:
             self.error_count += 1
             logger.error(f"Generation failed: {e}", exc_info=True)
             raise
     
+    async def _generate_shared(
+        self,
+        request: DiagramRequest,
+        request_data: Dict[str, Any],
+        start_time: float,
+        strategy: Optional[GenerationStrategy] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a cache miss once across all replicas
+        
+        Takes the shared generation lock; if another replica holds it, waits
+        for that replica's result instead of generating the same diagram.
+        Failed generations are recorded for negative caching.
+        
+        Args:
+            request: Diagram request
+            request_data: request.dict()
+            start_time: When the request started
+            strategy: Pre-routed strategy, if any
+            
+        Returns:
+            Generated diagram with metadata
+        """
+        
+        token = await self.cache.acquire_generation_lock(request_data)
+        if token is None:
+            logger.info("Another replica is generating this diagram, waiting for it")
+            shared = await self.cache.wait_for_result(request_data)
+            if shared:
+                shared["metadata"]["cache_hit"] = True
+                return shared
+            failure = await self.cache.get_failure(request_data)
+            if failure:
+                raise ValueError(f"Generation recently failed: {failure}")
+            # Lock holder gave up or timed out: generate here
+            token = await self.cache.acquire_generation_lock(request_data)
+        
+        try:
+            return await self._generate_uncached(request, start_time, strategy)
+        except ValueError as e:
+            await self.cache.set_failure(request_data, str(e))
+            raise
+        finally:
+            if token:
+                await self.cache.release_generation_lock(request_data, token)
+    
+    async def _generate_uncached(
+        self,
+        request: DiagramRequest,
+        start_time: float,
+        strategy: Optional[GenerationStrategy] = None
+    ) -> Dict[str, Any]:
+        """
+        Run strategy selection, generation, fallbacks and storage for a cache miss
+        
+        Runs as a shared task so identical concurrent requests wait on one
+        generation instead of repeating it.
+        
+        Args:
+            request: Diagram request (of the caller that started the generation)
+            start_time: When that caller's request started
+            strategy: Pre-routed strategy (routed here if not given)
+            
+        Returns:
+            Generated diagram with metadata
+        """
+        
+        # Get generation strategy from playbook
+        if strategy is None:
+            strategy = await self.playbook.get_strategy(request)
+        logger.info(
+            f"Selected strategy: {strategy.method} "
+            f"(confidence: {strategy.confidence:.2f})"
+        )
+        
+        # Try primary method
+        result = await self._try_generation(request, strategy)
+        
+        if result:
+            # Success with primary method
+            generation_time = int((time.time() - start_time) * 1000)
+            result["metadata"]["generation_time_ms"] = generation_time
+            
+            # Upload to storage and save metadata
+            result = await self._save_to_storage(request, result)
+            
+            # Cache the result
+            await self.cache.set(request.dict(), result)
+            
+            # Update session
+            await self.session_manager.update_session(
+                request.session_id,
+                result["diagram_id"],
+                request.diagram_type,
+                strategy.method.value,
+                generation_time,
+                cache_hit=False
+            )
+            
+            return result
+        
+        # Try fallback methods
+        if self.settings.enable_fallback and strategy.fallback_chain:
+            logger.info("Primary method failed, trying fallbacks...")
+            self.fallback_count += 1
+            
+            for _ in range(len(strategy.fallback_chain)):
+                strategy = strategy.use_fallback()
+                logger.info(f"Trying fallback: {strategy.method}")
+                
+                result = await self._try_generation(request, strategy)
+                if result:
+                    generation_time = int((time.time() - start_time) * 1000)
+                    result["metadata"]["generation_time_ms"] = generation_time
+                    result["metadata"]["fallback_used"] = True
+                    
+                    # Upload to storage and save metadata
+                    result = await self._save_to_storage(request, result)
+                    
+                    # Cache the result
+                    await self.cache.set(request.dict(), result)
+                    
+                    # Update session
+                    await self.session_manager.update_session(
+                        request.session_id,
+                        result["diagram_id"],
+                        request.diagram_type,
+                        strategy.method.value,
+                        generation_time,
+                        cache_hit=False
+                    )
+                    
+                    return result
+        
+        # All methods failed
+        self.error_count += 1
+        raise ValueError("All generation methods failed")
+    
+    async def generate_batch(
+        self,
+        requests: List[DiagramRequest],
+        request_slots: Optional[asyncio.Semaphore] = None
+    ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Generate a batch of diagrams, yielding each one as it finishes
+        
+        All requests are routed up front in one pass by UnifiedPlaybookV2 and
+        grouped by method. Each group runs with its own concurrency limit
+        sized for its engine (SVG templates are cheap, Mermaid shares the
+        browser page pool, Python charts use worker threads), so a slow group
+        does not hold back the others. Every item still goes through
+        generate(), so caching and in-flight coalescing apply per diagram.
+        
+        Args:
+            requests: Diagram requests
+            request_slots: Caller's per-session limiter; every item holds
+                one permit while it generates, like a single request
+        
+        Yields:
+            (index, result, error) in completion order; index is the
+            request's position in `requests` and exactly one of result and
+            error is set
+        """
+        
+        self.batch_count += 1
+        routed = await self.batch_playbook.route_batch(requests)
+        
+        groups: Dict[GenerationMethod, List[int]] = {}
+        for index, (strategy, _context) in enumerate(routed):
+            groups.setdefault(strategy.method, []).append(index)
+        logger.info(
+            f"Batch of {len(requests)} diagrams: " +
+            ", ".join(f"{method.value}={len(indices)}" for method, indices in groups.items())
+        )
+        
+        tasks = []
+        for method, indices in groups.items():
+            slots = asyncio.Semaphore(self._batch_concurrency(method))
+            for index in indices:
+                tasks.append(asyncio.ensure_future(
+                    self._generate_batch_item(
+                        index, requests[index], routed[index][0], slots, request_slots
+                    )
+                ))
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer went away (e.g. client disconnected): stop the rest
+            for task in tasks:
+                task.cancel()
+    
+    async def _generate_batch_item(
+        self,
+        index: int,
+        request: DiagramRequest,
+        strategy: GenerationStrategy,
+        slots: asyncio.Semaphore,
+        request_slots: Optional[asyncio.Semaphore] = None
+    ) -> Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]:
+        """Generate one batch item within its method group's and the session's limits"""
+        async with slots, (request_slots or contextlib.nullcontext()):
+            try:
+                return index, await self.generate(request, strategy), None
+            except Exception as e:
+                return index, None, e
+    
+    def _batch_concurrency(self, method: GenerationMethod) -> int:
+        """Concurrent generations per method group within a batch"""
+        if method == GenerationMethod.MERMAID:
+            return max(1, self.settings.mermaid_browser_pages)
+        if method == GenerationMethod.PYTHON_CHART:
+            return max(1, self.settings.max_workers)
+        return max(1, self.settings.batch_svg_concurrency)
+    
     async def _try_generation(
         self,
         request: DiagramRequest,
@@ -292,6 +576,11 @@ class DiagramConductor:
         """
         Save diagram to storage and database.
         
+        With background persistence enabled the result is returned at once
+        with a pre-assigned diagram_id and inline content; the upload and
+        metadata save happen on the persistence queue. If that queue is
+        full, the diagram is saved synchronously as before.
+        
         Args:
             request: Original request
             result: Generation result
@@ -300,6 +589,26 @@ class DiagramConductor:
             Updated result with URL and diagram ID
         """
         
+        if self.persistence_queue:
+            diagram_id = str(uuid.uuid4())
+            job = PersistenceJob(
+                diagram_id=diagram_id,
+                svg_content=result["content"],
+                diagram_type=request.diagram_type,
+                session_id=request.session_id or "default",
+                user_id=request.user_id or "anonymous",
+                request_id=request.request_id,
+                request_params=request.dict(),
+                metadata=copy.deepcopy(result.get("metadata", {}))
+            )
+            if self.persistence_queue.submit(job):
+                result["diagram_id"] = diagram_id
+                result["url"] = ""
+                result["content_delivery"] = "inline"
+                result["metadata"]["persistence"] = "pending"
+                return result
+            logger.warning("Persistence queue full - saving diagram synchronously")
+        
         try:
             # Upload to storage
             url = await self.storage.upload_diagram(
@@ -344,6 +653,9 @@ class DiagramConductor:
             "generation_count": self.generation_count,
             "fallback_count": self.fallback_count,
             "error_count": self.error_count,
+            "coalesced_count": self.coalesced_count,
+            "batch_count": self.batch_count,
+            "inflight_generations": len(self._inflight),
             "fallback_rate": (
                 self.fallback_count / self.generation_count
                 if self.generation_count > 0 else 0
@@ -353,5 +665,13 @@ class DiagramConductor:
                 if self.generation_count > 0 else 0
             ),
             "cache_stats": self.cache.get_statistics(),
-            "session_stats": self.session_manager.get_global_statistics()
+            "session_stats": self.session_manager.get_global_statistics(),
+            "routing": self.batch_playbook.get_statistics(),
+            "llm": get_llm_metrics(),
+            "persistence": (
+                self.persistence_queue.get_statistics() if self.persistence_queue else None
+            ),
+            "mermaid_renderer": (
+                self.mermaid_renderer.get_metrics() if self.mermaid_renderer else None
+            )
         }
\ No newline at end of file
@@ -19,6 +19,7 @@ load_dotenv()
 from models import DiagramRequest, GenerationStrategy, GenerationMethod
 from config import SUPPORTED_DIAGRAM_TYPES
 from utils.logger import setup_logger
+from utils.llm_client import generate_content
 
 logger = setup_logger(__name__)
 
@@ -145,9 +146,10 @@ class UnifiedPlaybook:
             
             # Generate routing decision
             prompt = routing_context + "\n\nReturn a JSON object with: primary_method (svg_template, mermaid, or python_chart), confidence (0-1), reasoning (string), content_analysis (dict)"
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt
+            response = await generate_content(
+                self.model,
+                prompt,
+                self.settings
             )
             
             # Parse response
@@ -12,7 +12,9 @@ Version: 2.0
 
 import os
 import json
-from typing import Dict, List, Optional, Any, Tuple
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple, FrozenSet
 from pydantic import BaseModel, Field
 import asyncio
 import google.generativeai as genai
@@ -39,6 +41,7 @@ from playbooks.svg_playbook import (
 from models import DiagramRequest, GenerationStrategy, GenerationMethod
 from config import SUPPORTED_DIAGRAM_TYPES
 from utils.logger import setup_logger
+from utils.llm_client import generate_content
 
 logger = setup_logger(__name__)
 
@@ -78,6 +81,20 @@ class UnifiedPlaybookV2:
         self.mermaid_type_map = self._build_mermaid_mappings()
         self.svg_templates = get_svg_templates()
         
+        # Routing index (built by initialize(), or on first use)
+        self._index_built = False
+        self._mermaid_contexts: Dict[str, Dict[str, Any]] = {}
+        self._template_info: Dict[str, Dict[str, Any]] = {}
+        self._svg_candidates: Dict[str, Tuple[str, ...]] = {}
+        self._templates_by_count: Dict[int, FrozenSet[str]] = {}
+        self._flexible_templates: FrozenSet[str] = frozenset()
+        self._routing_prompt_prefix = ""
+        
+        # Memoized decisions keyed on (type, content hash, data point count)
+        self._routing_memo: OrderedDict = OrderedDict()
+        self._routing_memo_size = getattr(settings, "routing_cache_size", 1024)
+        self.stats = {"memo_hits": 0, "memo_misses": 0}
+        
         # Initialize Gemini router if available
         self.router_enabled = False
         if settings.google_api_key:
@@ -131,6 +148,111 @@ class UnifiedPlaybookV2:
             "decision_tree": "flowchart"
         }
     
+    @staticmethod
+    def _normalize_type(diagram_type: str) -> str:
+        """Normalize a diagram type name for index lookups"""
+        return diagram_type.strip().lower().replace(" ", "_").replace("-", "_")
+    
+    def _build_index(self):
+        """
+        Build the routing index.
+        
+        Resolves every Mermaid alias to its context, caches template info,
+        precomputes the SVG templates each known name can match and buckets
+        templates by required data point count, and renders the static part
+        of the routing prompt once.
+        """
+        
+        self._mermaid_contexts = {}
+        for alias, mermaid_type in self.mermaid_type_map.items():
+            spec = get_mermaid_spec(mermaid_type)
+            if spec:
+                self._mermaid_contexts[self._normalize_type(alias)] = {
+                    "method": "mermaid",
+                    "specific_type": mermaid_type,
+                    "complete_example": spec.get("complete_example"),
+                    "key_syntax": spec.get("key_syntax"),
+                    "description": spec.get("description"),
+                    "best_for": spec.get("best_for")
+                }
+        
+        self._template_info = {
+            template: get_template_info(template) for template in self.svg_templates
+        }
+        self._flexible_templates = frozenset(
+            template for template, info in self._template_info.items()
+            if info and info.get("data_points_required") == "flexible"
+        )
+        counts = {
+            info.get("data_points_required") for info in self._template_info.values()
+            if info and isinstance(info.get("data_points_required"), int)
+        }
+        self._templates_by_count = {
+            count: frozenset(get_templates_for_data_count(count)) for count in counts
+        }
+        
+        self._svg_candidates = {}
+        for template in self.svg_templates:
+            self._svg_candidates_for(template)
+        
+        self._routing_prompt_prefix = f"""Route this diagram request to the best generation method and specific type.
+
+AVAILABLE MERMAID TYPES:
+{json.dumps(get_mermaid_types(), indent=2)}
+
+AVAILABLE SVG TEMPLATES:
+{json.dumps(self.svg_templates, indent=2)}
+
+ROUTING RULES:
+1. For Mermaid: Choose if request needs complex relationships, decision logic, or specific diagram types like ER, Gantt, Kanban
+2. For SVG: Choose if request matches a template exactly and has the right number of data points
+3. For Python: Choose if request needs data visualization with numbers, charts, or graphs
+
+Select the best method and the EXACT type/template name."""
+        
+        self._index_built = True
+    
+    def _svg_candidates_for(self, diagram_type: str) -> Tuple[str, ...]:
+        """
+        SVG templates a diagram type can match, in playbook order.
+        
+        A template matches when either name contains the other. Computed
+        once per distinct type; unknown types are remembered up to a bound
+        so arbitrary client input cannot grow the index without limit.
+        """
+        
+        candidates = self._svg_candidates.get(diagram_type)
+        if candidates is None:
+            candidates = tuple(
+                template for template in self.svg_templates
+                if diagram_type in template or template in diagram_type
+            )
+            if len(self._svg_candidates) < len(self.svg_templates) + self._routing_memo_size:
+                self._svg_candidates[diagram_type] = candidates
+        return candidates
+    
+    def _routing_key(self, request: DiagramRequest) -> Tuple[str, str, int]:
+        """Memo key: normalized type, content hash and data point count"""
+        return (
+            self._normalize_type(request.diagram_type),
+            hashlib.sha256((request.content or "").encode("utf-8")).hexdigest(),
+            len(request.data_points) if request.data_points else 0
+        )
+    
+    def _remember_decision(
+        self,
+        key: Tuple[str, str, int],
+        strategy: GenerationStrategy,
+        context: Dict[str, Any]
+    ):
+        """Memoize a routing decision, evicting the least recently used"""
+        if self._routing_memo_size <= 0:
+            return
+        self._routing_memo[key] = (strategy.copy(deep=True), dict(context))
+        self._routing_memo.move_to_end(key)
+        while len(self._routing_memo) > self._routing_memo_size:
+            self._routing_memo.popitem(last=False)
+    
     async def get_strategy_with_context(
         self, 
         request: DiagramRequest
@@ -138,6 +260,10 @@ class UnifiedPlaybookV2:
         """
         Get generation strategy with complete context for the agent.
         
+        Rule-based routing is an index lookup. Decisions that need semantic
+        routing are memoized on (type, content hash, data point count);
+        fallback decisions are not, so a failed semantic routing is retried.
+        
         Returns:
             Tuple of (GenerationStrategy, context_dict)
         """
@@ -152,9 +278,18 @@ class UnifiedPlaybookV2:
         
         # Otherwise, use semantic routing if available
         if self.router_enabled and self.model:
+            key = self._routing_key(request)
+            memo = self._routing_memo.get(key)
+            if memo is not None:
+                self._routing_memo.move_to_end(key)
+                self.stats["memo_hits"] += 1
+                return memo[0].copy(deep=True), dict(memo[1])
+            self.stats["memo_misses"] += 1
+            
             try:
                 strategy, context = await self._semantic_routing(request)
                 logger.info(f"✅ Semantic routing: {strategy.method} -> {context.get('specific_type')}")
+                self._remember_decision(key, strategy, context)
                 return strategy, context
             except Exception as e:
                 logger.error(f"Semantic routing failed: {e}")
@@ -170,64 +305,51 @@ class UnifiedPlaybookV2:
         self, 
         request: DiagramRequest
     ) -> Tuple[Optional[GenerationStrategy], Optional[Dict[str, Any]]]:
-        """Try simple rule-based routing first"""
+        """Try simple rule-based routing first (index lookups)"""
         
-        diagram_type = request.diagram_type.lower().replace(" ", "_")
+        if not self._index_built:
+            self._build_index()
+        
+        diagram_type = self._normalize_type(request.diagram_type)
         
         # Check if it's a known Mermaid type
-        mermaid_type = self.mermaid_type_map.get(diagram_type)
-        if mermaid_type:
-            # Get Mermaid context
-            spec = get_mermaid_spec(mermaid_type)
-            if spec:
+        mermaid_context = self._mermaid_contexts.get(diagram_type)
+        if mermaid_context:
+            mermaid_type = mermaid_context["specific_type"]
+            strategy = GenerationStrategy(
+                method=GenerationMethod.MERMAID,
+                confidence=0.9,
+                reasoning=f"Direct match to Mermaid {mermaid_type} diagram",
+                fallback_chain=[],
+                estimated_time_ms=1000,
+                quality_estimate="high"
+            )
+            return strategy, dict(mermaid_context)
+        
+        # Check if it matches an SVG template with the right data point count
+        provided_points = len(request.data_points) if request.data_points else 0
+        fitting = self._templates_by_count.get(provided_points, self._flexible_templates)
+        for template in self._svg_candidates_for(diagram_type):
+            if template in fitting:
+                template_info = self._template_info[template]
                 strategy = GenerationStrategy(
-                    method=GenerationMethod.MERMAID,
-                    confidence=0.9,
-                    reasoning=f"Direct match to Mermaid {mermaid_type} diagram",
+                    method=GenerationMethod.SVG_TEMPLATE,
+                    confidence=0.85,
+                    reasoning=f"Direct match to SVG template {template}",
                     fallback_chain=[],
-                    estimated_time_ms=1000,
+                    estimated_time_ms=200,
                     quality_estimate="high"
                 )
                 
                 context = {
-                    "method": "mermaid",
-                    "specific_type": mermaid_type,
-                    "complete_example": spec.get("complete_example"),
-                    "key_syntax": spec.get("key_syntax"),
-                    "description": spec.get("description"),
-                    "best_for": spec.get("best_for")
+                    "method": "svg_template",
+                    "specific_type": template,
+                    "template_info": template_info,
+                    "data_points_required": template_info.get("data_points_required")
                 }
                 
                 return strategy, context
         
-        # Check if it matches an SVG template
-        for template in self.svg_templates:
-            if diagram_type in template or template in diagram_type:
-                template_info = get_template_info(template)
-                if template_info:
-                    # Check data points match
-                    required_points = template_info.get("data_points_required")
-                    provided_points = len(request.data_points) if request.data_points else 0
-                    
-                    if required_points == "flexible" or required_points == provided_points:
-                        strategy = GenerationStrategy(
-                            method=GenerationMethod.SVG_TEMPLATE,
-                            confidence=0.85,
-                            reasoning=f"Direct match to SVG template {template}",
-                            fallback_chain=[],
-                            estimated_time_ms=200,
-                            quality_estimate="high"
-                        )
-                        
-                        context = {
-                            "method": "svg_template",
-                            "specific_type": template,
-                            "template_info": template_info,
-                            "data_points_required": required_points
-                        }
-                        
-                        return strategy, context
-        
         return None, None
     
     async def _semantic_routing(
@@ -240,9 +362,10 @@ class UnifiedPlaybookV2:
         prompt = self._build_routing_prompt(request)
         
         # Get routing decision from LLM
-        response = await asyncio.to_thread(
-            self.model.generate_content,
-            prompt + "\n\nReturn JSON with: primary_method, specific_type, confidence, reasoning, content_features"
+        response = await generate_content(
+            self.model,
+            prompt + "\n\nReturn JSON with: primary_method, specific_type, confidence, reasoning, content_features",
+            self.settings
         )
         
         # Parse response
@@ -279,33 +402,17 @@ class UnifiedPlaybookV2:
         return strategy, context
     
     def _build_routing_prompt(self, request: DiagramRequest) -> str:
-        """Build comprehensive routing prompt"""
+        """Build routing prompt: the pre-rendered catalog prefix plus the request"""
         
-        # Get available options
-        mermaid_types = get_mermaid_types()
-        svg_templates = get_svg_templates()
+        if not self._index_built:
+            self._build_index()
         
-        prompt = f"""Route this diagram request to the best generation method and specific type.
+        return f"""{self._routing_prompt_prefix}
 
 DIAGRAM REQUEST:
 - Type: {request.diagram_type}
 - Content: {request.content[:500] if request.content else "No content"}
-- Data Points: {len(request.data_points) if request.data_points else 0}
-
-AVAILABLE MERMAID TYPES:
-{json.dumps(mermaid_types, indent=2)}
-
-AVAILABLE SVG TEMPLATES:
-{json.dumps(svg_templates, indent=2)}
-
-ROUTING RULES:
-1. For Mermaid: Choose if request needs complex relationships, decision logic, or specific diagram types like ER, Gantt, Kanban
-2. For SVG: Choose if request matches a template exactly and has the right number of data points
-3. For Python: Choose if request needs data visualization with numbers, charts, or graphs
-
-Select the best method and the EXACT type/template name."""
-        
-        return prompt
+- Data Points: {len(request.data_points) if request.data_points else 0}"""
     
     def _build_context(
         self, 
@@ -425,8 +532,59 @@ Select the best method and the EXACT type/template name."""
         strategy, context = await self.get_strategy_with_context(request)
         return strategy
     
+    async def route_batch(
+        self,
+        requests: List[DiagramRequest]
+    ) -> List[Tuple[GenerationStrategy, Dict[str, Any]]]:
+        """
+        Route a batch of requests in one pass.
+        
+        Identical requests (same type, content and data point count) are
+        routed once; the remaining requests are routed concurrently, so
+        semantic routing calls overlap instead of running one per slide.
+        
+        Args:
+            requests: Diagram requests
+        
+        Returns:
+            (GenerationStrategy, context) per request, in request order
+        """
+        
+        unique: Dict[Tuple[str, str, int], int] = {}
+        slots = []
+        for request in requests:
+            key = (
+                request.diagram_type,
+                request.content,
+                len(request.data_points) if request.data_points else 0
+            )
+            slots.append(unique.setdefault(key, len(unique)))
+        
+        representatives: Dict[int, DiagramRequest] = {}
+        for request, slot in zip(requests, slots):
+            representatives.setdefault(slot, request)
+        
+        routed = await asyncio.gather(*(
+            self.get_strategy_with_context(representatives[slot])
+            for slot in range(len(unique))
+        ))
+        
+        logger.info(f"Routed batch of {len(requests)} requests ({len(unique)} unique)")
+        return [routed[slot] for slot in slots]
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get routing memo statistics"""
+        total = self.stats["memo_hits"] + self.stats["memo_misses"]
+        return {
+            **self.stats,
+            "memo_hit_rate": round(self.stats["memo_hits"] / total, 2) if total > 0 else 0,
+            "memo_size": len(self._routing_memo),
+            "indexed_types": len(self._mermaid_contexts) + len(self._svg_candidates)
+        }
+    
     async def initialize(self):
-        """Initialize the playbook"""
+        """Initialize the playbook and build the routing index"""
+        self._build_index()
         logger.info("UnifiedPlaybookV2 initialized")
         logger.info(f"  Mermaid types: {len(get_mermaid_types())}")
         logger.info(f"  SVG templates: {len(self.svg_templates)}")
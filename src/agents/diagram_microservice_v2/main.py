@@ -6,6 +6,7 @@ A self-contained WebSocket-based microservice for diagram generation.
 """
 
 import asyncio
+import json
 import logging
 import signal
 import sys
@@ -13,11 +14,13 @@ from typing import Optional
 import uvicorn
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 import argparse
 
 # Local imports
-from config import get_settings
+from config import get_settings, ERROR_CODES
+from models import BatchDiagramRequest
 from api.websocket_handler import WebSocketHandler
 from utils.logger import setup_logger
 
@@ -167,12 +170,72 @@ async def metrics():
         "active_connections": ws_handler.active_connections_count() if ws_handler else 0,
         "total_requests": ws_handler.total_requests if ws_handler else 0,
         "total_errors": ws_handler.total_errors if ws_handler else 0,
-        # TODO: Add more metrics
+        "active_requests": ws_handler.active_requests_count() if ws_handler else 0,
     }
     
+    if ws_handler and ws_handler.conductor:
+        metrics_data["conductor"] = ws_handler.conductor.get_metrics()
+    
     return metrics_data
 
 
+@app.post("/diagrams/batch")
+async def generate_batch(batch: BatchDiagramRequest, api_key: Optional[str] = None):
+    """
+    Batch diagram generation endpoint
+    
+    Generates every diagram of a batch (e.g. a whole deck) and streams one
+    NDJSON line per diagram as it finishes, in completion order:
+    
+    - {"index", "request_id", "status": "success", "diagram": DiagramResponse}
+    - {"index", "request_id", "status": "error", "error_code", "error_message"}
+    
+    `index` is the request's position in the batch; `request_id` is the
+    request's own request_id, or "<session_id>:<index>" if it has none.
+    """
+    settings = get_settings()
+    if settings.api_key and settings.api_key.strip() and api_key != settings.api_key:
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    
+    if not ws_handler or not ws_handler.conductor:
+        raise HTTPException(status_code=503, detail="Service not initialized")
+    
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch contains no requests")
+    if len(batch.requests) > settings.batch_max_diagrams:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(batch.requests)} requests (limit {settings.batch_max_diagrams})"
+        )
+    
+    import uuid
+    session_id = batch.session_id or str(uuid.uuid4())
+    user_id = batch.user_id or "anonymous"
+    requests = [
+        request.copy(update={
+            "session_id": session_id,
+            "user_id": user_id,
+            "request_id": request.request_id or f"{session_id}:{index}"
+        })
+        for index, request in enumerate(batch.requests)
+    ]
+    
+    async def stream_results():
+        async for index, result, error in ws_handler.conductor.generate_batch(requests):
+            request_id = requests[index].request_id
+            line = {"index": index, "request_id": request_id}
+            if error is None:
+                line["status"] = "success"
+                line["diagram"] = ws_handler.build_diagram_response(session_id, request_id, result)
+            else:
+                line["status"] = "error"
+                line["error_code"] = ERROR_CODES["GENERATION_FAILED"]
+                line["error_message"] = str(error)
+            yield json.dumps(jsonable_encoder(line)) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
@@ -4,6 +4,7 @@ Data Models for Diagram Microservice v2
 
 from .request_models import (
     DiagramRequest,
+    BatchDiagramRequest,
     DiagramTheme,
     DataPoint,
     DiagramConstraints
@@ -32,6 +33,7 @@ from .websocket_models import (
 __all__ = [
     # Request models
     'DiagramRequest',
+    'BatchDiagramRequest',
     'DiagramTheme', 
     'DataPoint',
     'DiagramConstraints',
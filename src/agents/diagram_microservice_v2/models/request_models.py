@@ -177,4 +177,20 @@ class DiagramRequest(BaseModel):
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+class BatchDiagramRequest(BaseModel):
+    """Batch of diagram requests, e.g. every diagram of a deck"""
+    
+    requests: List[DiagramRequest] = Field(
+        description="Diagram requests; results are returned as they finish"
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Session ID applied to every request in the batch"
+    )
+    user_id: Optional[str] = Field(
+        default=None,
+        description="User ID applied to every request in the batch"
+    )
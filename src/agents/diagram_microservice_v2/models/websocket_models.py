@@ -14,6 +14,7 @@ class MessageType(str, Enum):
     
     # Client -> Server
     DIAGRAM_REQUEST = "diagram_request"
+    BATCH_REQUEST = "batch_request"
     USER_INPUT = "user_input"
     CANCEL_REQUEST = "cancel_request"
     PING = "ping"
@@ -22,6 +23,8 @@ class MessageType(str, Enum):
     DIAGRAM_RESPONSE = "diagram_response"
     STATUS_UPDATE = "status_update"
     ERROR_RESPONSE = "error_response"
+    BATCH_COMPLETE = "batch_complete"
+    DIAGRAM_STORED = "diagram_stored"
     PONG = "pong"
     
     # Bidirectional
@@ -90,6 +93,7 @@ class WebSocketMessage(BaseModel):
         """Validate message type"""
         valid_types = [
             "diagram_request", "diagram_response",
+            "batch_request", "batch_complete", "diagram_stored",
             "status_update", "error_response",
             "user_input", "cancel_request",
             "connection_init", "connection_ack", "connection_close",
@@ -7,11 +7,16 @@ Handles Supabase storage, database operations, caching, and session management.
 from .supabase_client import DiagramStorage
 from .diagram_operations import DiagramOperations
 from .cache_manager import CacheManager
+from .tiered_cache import TieredDiagramCache
 from .session_manager import DiagramSessionManager
+from .persistence_queue import DiagramPersistenceQueue, PersistenceJob
 
 __all__ = [
     'DiagramStorage',
     'DiagramOperations',
     'CacheManager',
-    'DiagramSessionManager'
+    'TieredDiagramCache',
+    'DiagramSessionManager',
+    'DiagramPersistenceQueue',
+    'PersistenceJob'
 ]
\ No newline at end of file
@@ -3,11 +3,21 @@ Cache Management for Diagrams and Templates
 
 Provides in-memory caching for frequently used diagrams and templates
 to improve performance and reduce redundant generation.
+
+Cached results are packed before storage: the SVG that agents return
+under both `content` and `svg.content` is kept once, and every dict/list
+is copied so neither the caller that stored a result nor the callers that
+read it can mutate the cached entry. Reads hand out fresh containers that
+share the (immutable) strings with the cache, so a hit costs a walk over
+the result's small dict skeleton, never a copy of the SVG.
 """
 
 from typing import Dict, Any, Optional, List
 import hashlib
+import heapq
 import json
+import sys
+import time
 from datetime import datetime, timedelta
 from collections import OrderedDict
 import asyncio
@@ -15,28 +25,115 @@ from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Rough per-container/per-item overhead used by the size estimate
+_CONTAINER_OVERHEAD = 64
+_ITEM_OVERHEAD = 16
+
+
+def _copy_containers(value: Any) -> Any:
+    """Copy dicts and lists recursively; share immutable leaves (str, numbers)."""
+    if isinstance(value, dict):
+        return {k: _copy_containers(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_copy_containers(v) for v in value]
+    return value
+
+
+def pack_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pack a generation result for caching.
+
+    Copies the containers and drops `svg.content` when it duplicates
+    `content`; unpack_result restores it.
+
+    Args:
+        result: Generation result
+
+    Returns:
+        Packed result (flagged with _svg_is_content when deduplicated)
+    """
+    packed = _copy_containers(result)
+    svg = packed.get("svg")
+    if isinstance(svg, dict) and "content" in svg and svg["content"] == packed.get("content"):
+        del svg["content"]
+        packed["_svg_is_content"] = True
+    return packed
+
+
+def unpack_result(packed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuild a result from pack_result output.
+
+    Args:
+        packed: Packed result
+
+    Returns:
+        Fresh result the caller may mutate freely
+    """
+    result = _copy_containers(packed)
+    if result.pop("_svg_is_content", False):
+        result["svg"]["content"] = result.get("content")
+    return result
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory held by a packed result without serializing it.
+
+    Args:
+        value: Packed result (or any nested value)
+
+    Returns:
+        Estimated bytes
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return _CONTAINER_OVERHEAD + sum(
+            _ITEM_OVERHEAD + len(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return _CONTAINER_OVERHEAD + sum(_ITEM_OVERHEAD + estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
 
 class CacheManager:
     """
     Manages in-memory cache for diagrams and templates.
     
-    Uses LRU (Least Recently Used) eviction policy when cache is full.
+    Uses LRU (Least Recently Used) eviction policy when cache is full,
+    either by entry count or by the estimated byte budget. Expiry uses a
+    min-heap of deadlines, so cleanup only touches expired entries.
     """
     
-    def __init__(self, ttl_seconds: int = 3600, max_size: int = 100):
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        max_size: int = 100,
+        max_bytes: Optional[int] = None
+    ):
         """
         Initialize cache manager.
         
         Args:
             ttl_seconds: Time-to-live for cache entries in seconds
             max_size: Maximum number of entries in cache
+            max_bytes: Maximum estimated size of cached results (None for no limit)
         """
         self.ttl = ttl_seconds
         self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
         
         # Main cache for diagram results (LRU)
         self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
         
+        # Expiry heap of (expires_at, key); entries replaced or evicted
+        # before expiring are skipped when popped
+        self._expiry_heap: List[tuple] = []
+        
         # Template cache (permanent during runtime)
         self.template_cache: Dict[str, str] = {}
         
@@ -73,7 +170,7 @@ class CacheManager:
         
         Args:
             request_data: Request parameters
-            
+        
         Returns:
             MD5 hash as cache key
         """
@@ -91,36 +188,46 @@ class CacheManager:
         # Generate MD5 hash
         return hashlib.md5(key_str.encode()).hexdigest()
     
+    def cache_key(self, request_data: Dict[str, Any]) -> str:
+        """
+        Get the cache key for request data.
+        
+        Args:
+            request_data: Request parameters
+        
+        Returns:
+            Cache key
+        """
+        return self._generate_key(request_data)
+    
     def get(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Get cached diagram if exists and not expired.
         
         Args:
             request_data: Request parameters
-            
+        
         Returns:
-            Cached result or None
+            Fresh copy of the cached result (safe to mutate) or None
         """
         key = self._generate_key(request_data)
+        entry = self.cache.get(key)
         
-        if key in self.cache:
-            entry = self.cache[key]
-            
+        if entry is not None:
             # Check expiration
-            if datetime.utcnow() < entry["expires_at"]:
+            if time.monotonic() < entry["expires_at"]:
                 # Move to end (most recently used)
                 self.cache.move_to_end(key)
                 
                 # Update statistics
                 entry["hit_count"] += 1
-                entry["last_accessed"] = datetime.utcnow()
                 self.stats["hits"] += 1
                 
                 logger.debug(f"Cache hit for key: {key[:8]}... (hits: {entry['hit_count']})")
-                return entry["data"]
+                return unpack_result(entry["data"])
             else:
                 # Expired, remove
-                del self.cache[key]
+                self._remove(key)
                 self.stats["expirations"] += 1
                 logger.debug(f"Cache entry expired for key: {key[:8]}...")
         
@@ -131,70 +238,108 @@ class CacheManager:
         """
         Cache diagram result.
         
+        The result is packed (copied, SVG stored once), so later changes to
+        `result` by the caller do not reach the cache.
+        
         Args:
             request_data: Request parameters
             result: Generation result to cache
         """
         key = self._generate_key(request_data)
+        packed = pack_result(result)
+        size = estimate_size(packed)
+        
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.debug(f"Result too large to cache ({size} bytes): {key[:8]}...")
+            return
         
-        # Check cache size limit
-        if len(self.cache) >= self.max_size:
-            # Evict least recently used (first item)
+        if key in self.cache:
+            self._remove(key)
+        
+        # Evict least recently used (first items) until the new entry fits
+        while self.cache and (
+            len(self.cache) >= self.max_size or
+            (self.max_bytes is not None and self.current_bytes + size > self.max_bytes)
+        ):
             evicted_key = next(iter(self.cache))
-            del self.cache[evicted_key]
+            self._remove(evicted_key)
             self.stats["evictions"] += 1
             logger.debug(f"Evicted cache entry: {evicted_key[:8]}...")
         
         # Add new entry (at end)
+        expires_at = time.monotonic() + self.ttl
         self.cache[key] = {
-            "data": result,
-            "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl),
+            "data": packed,
+            "size_bytes": size,
+            "expires_at": expires_at,
             "created_at": datetime.utcnow(),
-            "last_accessed": datetime.utcnow(),
             "hit_count": 0
         }
+        self.current_bytes += size
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        
+        # Drop stale heap entries once they outnumber live ones
+        if len(self._expiry_heap) > 2 * len(self.cache) + 64:
+            self._rebuild_expiry_heap()
         
-        logger.debug(f"Cached result for key: {key[:8]}...")
+        logger.debug(f"Cached result for key: {key[:8]}... ({size} bytes)")
     
     def invalidate(self, request_data: Optional[Dict[str, Any]] = None):
         """
         Invalidate cache entries.
         
         Args:
-            request_data: If provided, invalidate specific entry. 
+            request_data: If provided, invalidate specific entry.
                          If None, clear all cache.
         """
         if request_data:
             key = self._generate_key(request_data)
             if key in self.cache:
-                del self.cache[key]
+                self._remove(key)
                 logger.debug(f"Invalidated cache entry: {key[:8]}...")
         else:
             count = len(self.cache)
             self.cache.clear()
+            self._expiry_heap.clear()
+            self.current_bytes = 0
             logger.info(f"Cleared all {count} cache entries")
     
     def clear_expired(self) -> int:
         """
         Remove expired entries.
         
+        Pops deadlines off the expiry heap, so the cost is proportional to
+        the number of expired (or stale) heap entries, not the cache size.
+        
         Returns:
             Number of entries removed
         """
-        now = datetime.utcnow()
-        expired_keys = [
-            k for k, v in self.cache.items() 
-            if v["expires_at"] < now
-        ]
+        now = time.monotonic()
+        removed = 0
         
-        for key in expired_keys:
-            del self.cache[key]
-            self.stats["expirations"] += 1
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self.cache.get(key)
+            # Skip heap entries for keys that were replaced or evicted
+            if entry is not None and entry["expires_at"] == expires_at:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                removed += 1
         
-        if expired_keys:
-            logger.debug(f"Cleared {len(expired_keys)} expired cache entries")
+        if removed:
+            logger.debug(f"Cleared {removed} expired cache entries")
         
-        return len(expired_keys)
+        return removed
+    
+    def _remove(self, key: str):
+        """Remove an entry and release its bytes."""
+        entry = self.cache.pop(key)
+        self.current_bytes -= entry["size_bytes"]
+    
+    def _rebuild_expiry_heap(self):
+        """Rebuild the expiry heap from live entries."""
+        self._expiry_heap = [(entry["expires_at"], key) for key, entry in self.cache.items()]
+        heapq.heapify(self._expiry_heap)
     
     async def _periodic_cleanup(self):
         """Background task to periodically clean expired entries."""
@@ -224,7 +369,7 @@ class CacheManager:
         
         Args:
             template_name: Name of template
-            
+        
         Returns:
             Template content or None
         """
@@ -248,6 +393,8 @@ class CacheManager:
             "expirations": self.stats["expirations"],
             "current_size": len(self.cache),
             "max_size": self.max_size,
+            "current_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
             "template_count": len(self.template_cache)
         }
     
@@ -258,13 +405,16 @@ class CacheManager:
         Returns:
             List of cache entry information
         """
+        now = time.monotonic()
         info = []
         for key, entry in self.cache.items():
             info.append({
                 "key": key[:8] + "...",
                 "created_at": entry["created_at"].isoformat(),
-                "expires_at": entry["expires_at"].isoformat(),
+                "expires_at": (
+                    datetime.utcnow() + timedelta(seconds=entry["expires_at"] - now)
+                ).isoformat(),
                 "hit_count": entry["hit_count"],
-                "size_bytes": len(json.dumps(entry["data"]))
+                "size_bytes": entry["size_bytes"]
             })
-        return info
\ No newline at end of file
+        return info
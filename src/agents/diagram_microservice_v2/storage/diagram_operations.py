@@ -4,6 +4,7 @@ Database Operations for Diagram Metadata
 Manages storing and retrieving diagram metadata in Supabase database tables.
 """
 
+import asyncio
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import uuid
@@ -44,7 +45,8 @@ class DiagramOperations:
         url: str,
         generation_method: str,
         request_params: Dict[str, Any],
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        diagram_id: Optional[str] = None
     ) -> str:
         """
         Save diagram metadata to database.
@@ -57,6 +59,7 @@ class DiagramOperations:
             generation_method: Method used (svg_template, mermaid, python_chart)
             request_params: Original request parameters
             metadata: Generation metadata
+            diagram_id: ID to save under (generated if not provided)
             
         Returns:
             Diagram ID
@@ -65,7 +68,7 @@ class DiagramOperations:
             Exception: If save fails
         """
         
-        diagram_id = str(uuid.uuid4())
+        diagram_id = diagram_id or str(uuid.uuid4())
         
         # Return ID without saving if database is not available
         if not self.enabled:
@@ -103,7 +106,9 @@ class DiagramOperations:
         }
         
         try:
-            result = self.client.table(self.table).insert(data).execute()
+            result = await asyncio.to_thread(
+                self.client.table(self.table).insert(data).execute
+            )
             logger.info(f"Saved diagram metadata: {diagram_id}")
             
             # Also update cache table if this was a cache miss
@@ -326,26 +331,16 @@ class DiagramOperations:
             cache_key = self._generate_cache_key(request_params)
             expires_at = (datetime.utcnow() + timedelta(hours=24)).isoformat()
             
-            # Try to update existing entry
-            existing = self.client.table(self.cache_table).select("*").eq("cache_key", cache_key).execute()
-            
-            if existing.data:
-                # Update existing
-                self.client.table(self.cache_table).update({
-                    "diagram_id": diagram_id,
-                    "expires_at": expires_at,
-                    "last_accessed": datetime.utcnow().isoformat()
-                }).eq("cache_key", cache_key).execute()
-            else:
-                # Create new entry
-                self.client.table(self.cache_table).insert({
+            # Single upsert instead of select-then-update; hit_count keeps its
+            # current value (or the column default for new entries)
+            await asyncio.to_thread(
+                self.client.table(self.cache_table).upsert({
                     "cache_key": cache_key,
                     "diagram_id": diagram_id,
-                    "hit_count": 0,
                     "expires_at": expires_at,
-                    "created_at": datetime.utcnow().isoformat(),
                     "last_accessed": datetime.utcnow().isoformat()
-                }).execute()
-                
+                }, on_conflict="cache_key").execute
+            )
+            
         except Exception as e:
             logger.warning(f"Failed to update cache entry: {e}")
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+Background Persistence Queue for Generated Diagrams
+
+Uploads diagrams to Supabase Storage and saves their metadata off the
+request's critical path. The conductor returns the inline SVG right away
+with a pre-assigned diagram ID; workers persist it with retries and report
+the final URL through listeners (the WebSocket handler turns that into a
+follow-up "diagram_stored" message).
+
+Memory is bounded by both the number of pending jobs and their total SVG
+size; when either limit is reached submit() refuses the job and the caller
+persists synchronously instead. stop() drains pending jobs (up to a
+timeout) before shutting the workers down.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class PersistenceJob:
+    """One diagram waiting to be uploaded and recorded"""
+    
+    def __init__(
+        self,
+        diagram_id: str,
+        svg_content: str,
+        diagram_type: str,
+        session_id: str,
+        user_id: str,
+        request_id: Optional[str],
+        request_params: Dict[str, Any],
+        metadata: Dict[str, Any]
+    ):
+        self.diagram_id = diagram_id
+        self.svg_content = svg_content
+        self.diagram_type = diagram_type
+        self.session_id = session_id
+        self.user_id = user_id
+        self.request_id = request_id
+        self.request_params = request_params
+        self.metadata = metadata
+        self.size_bytes = len(svg_content)
+        self.attempts = 0
+        # Set once the upload succeeded, so a retry only repeats the DB write
+        self.url: Optional[str] = None
+
+
+# Called with (job, url, error); error is None on success
+PersistenceListener = Callable[[PersistenceJob, str, Optional[str]], Awaitable[None]]
+
+
+class DiagramPersistenceQueue:
+    """
+    Bounded background queue that uploads diagrams and saves their metadata
+    """
+    
+    def __init__(
+        self,
+        storage,
+        db_ops,
+        max_pending: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        workers: int = 2,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0
+    ):
+        """
+        Initialize persistence queue.
+        
+        Args:
+            storage: DiagramStorage used for uploads
+            db_ops: DiagramOperations used for metadata
+            max_pending: Maximum jobs queued or in progress
+            max_bytes: Maximum total SVG bytes queued or in progress
+            workers: Concurrent upload workers
+            max_retries: Retries per job after the first attempt
+            retry_backoff: Base delay in seconds, doubled per retry
+        """
+        self.storage = storage
+        self.db_ops = db_ops
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.worker_count = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._listeners: List[PersistenceListener] = []
+        self._accepting = False
+        
+        self.pending = 0
+        self.pending_bytes = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retries": 0,
+            "rejected": 0
+        }
+    
+    @classmethod
+    def from_settings(cls, settings, storage, db_ops) -> "DiagramPersistenceQueue":
+        """Build the queue from service settings"""
+        return cls(
+            storage,
+            db_ops,
+            max_pending=settings.persistence_queue_size,
+            max_bytes=settings.persistence_queue_bytes,
+            workers=settings.persistence_workers,
+            max_retries=settings.persistence_max_retries
+        )
+    
+    def add_listener(self, listener: PersistenceListener):
+        """Register a coroutine called when each job completes or fails"""
+        self._listeners.append(listener)
+    
+    async def start(self):
+        """Start the upload workers."""
+        if not self._workers:
+            self._accepting = True
+            self._workers = [
+                asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+            ]
+            logger.info(f"Persistence queue started with {self.worker_count} workers")
+    
+    async def stop(self, drain_timeout: float = 30.0):
+        """
+        Stop accepting jobs, drain the queue, then stop the workers.
+        
+        Args:
+            drain_timeout: Seconds to wait for pending jobs to finish
+        """
+        if not self._workers:
+            return
+        
+        self._accepting = False
+        if self.pending:
+            logger.info(f"Draining {self.pending} pending diagram uploads...")
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Persistence drain timed out; {self.pending} diagrams not persisted")
+        
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Persistence queue stopped")
+    
+    def submit(self, job: PersistenceJob) -> bool:
+        """
+        Queue a job for background persistence.
+        
+        Args:
+            job: Job to persist
+        
+        Returns:
+            True if queued; False if the queue is stopped or full
+        """
+        if not self._accepting or (
+            self.pending >= self.max_pending or
+            self.pending_bytes + job.size_bytes > self.max_bytes
+        ):
+            self.stats["rejected"] += 1
+            return False
+        
+        self.pending += 1
+        self.pending_bytes += job.size_bytes
+        self.stats["submitted"] += 1
+        self._queue.put_nowait(job)
+        return True
+    
+    async def _worker(self, number: int):
+        """Persist jobs until cancelled"""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._persist(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Persistence worker {number} error: {e}", exc_info=True)
+            finally:
+                self.pending -= 1
+                self.pending_bytes -= job.size_bytes
+                self._queue.task_done()
+    
+    async def _persist(self, job: PersistenceJob):
+        """Upload and save one job, retrying with exponential backoff"""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            job.attempts = attempt + 1
+            try:
+                if job.url is None:
+                    job.url = await self.storage.upload_diagram(
+                        svg_content=job.svg_content,
+                        diagram_type=job.diagram_type,
+                        session_id=job.session_id,
+                        user_id=job.user_id,
+                        metadata=job.metadata
+                    )
+                await self.db_ops.save_diagram_metadata(
+                    session_id=job.session_id,
+                    user_id=job.user_id,
+                    diagram_type=job.diagram_type,
+                    url=job.url,
+                    generation_method=job.metadata.get("generation_method", "unknown"),
+                    request_params=job.request_params,
+                    metadata=job.metadata,
+                    diagram_id=job.diagram_id
+                )
+                self.stats["completed"] += 1
+                logger.info(f"Persisted diagram {job.diagram_id} in background: {job.url}")
+                await self._notify(job, job.url, None)
+                return
+            except Exception as e:
+                error = str(e)
+                if attempt < self.max_retries:
+                    self.stats["retries"] += 1
+                    delay = self.retry_backoff * (2 ** attempt)
+                    logger.warning(
+                        f"Persisting diagram {job.diagram_id} failed ({e}), retrying in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
+        
+        self.stats["failed"] += 1
+        logger.error(f"Giving up persisting diagram {job.diagram_id}: {error}")
+        await self._notify(job, job.url or "", error)
+    
+    async def _notify(self, job: PersistenceJob, url: str, error: Optional[str]):
+        for listener in self._listeners:
+            try:
+                await listener(job, url, error)
+            except Exception as e:
+                logger.warning(f"Persistence listener failed: {e}")
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get queue statistics.
+        
+        Returns:
+            Statistics dictionary
+        """
+        return {
+            **self.stats,
+            "pending": self.pending,
+            "pending_bytes": self.pending_bytes,
+            "max_pending": self.max_pending,
+            "max_bytes": self.max_bytes,
+            "accepting": self._accepting
+        }
@@ -5,6 +5,7 @@ Handles diagram storage in Supabase Storage buckets and provides
 a singleton client for database operations.
 """
 
+import asyncio
 from typing import Optional, Dict, Any
 from supabase import create_client, Client
 import uuid
@@ -123,6 +124,9 @@ class DiagramStorage:
         """
         Upload SVG diagram to Supabase Storage and return public URL.
         
+        The Supabase client is synchronous, so the upload and URL calls run
+        in a worker thread instead of blocking the event loop.
+        
         Args:
             svg_content: SVG content as string
             diagram_type: Type of diagram (e.g., 'cycle_3_step')
@@ -158,24 +162,13 @@ class DiagramStorage:
             if metadata:
                 file_options["x-metadata"] = str(metadata)
             
-            # Upload to storage
-            response = self.client.storage.from_(self.bucket_name).upload(
+            url = await asyncio.to_thread(
+                self._upload_and_get_url,
                 file_name,
-                svg_content.encode('utf-8'),
+                svg_content,
                 file_options
             )
             
-            # Get public URL
-            if self.is_public:
-                url = self.client.storage.from_(self.bucket_name).get_public_url(file_name)
-            else:
-                # For private buckets, generate signed URL
-                url_response = self.client.storage.from_(self.bucket_name).create_signed_url(
-                    file_name,
-                    expires_in=3600  # 1 hour expiry
-                )
-                url = url_response.get('signedURL', '')
-            
             logger.info(f"Uploaded diagram to: {url}")
             return url
             
@@ -183,6 +176,33 @@ class DiagramStorage:
             logger.error(f"Failed to upload diagram: {e}")
             raise
     
+    def _upload_and_get_url(
+        self,
+        file_name: str,
+        svg_content: str,
+        file_options: Dict[str, str]
+    ) -> str:
+        """Upload a file and return its URL (blocking Supabase calls)."""
+        bucket = self.client.storage.from_(self.bucket_name)
+        
+        # Upload to storage
+        bucket.upload(
+            file_name,
+            svg_content.encode('utf-8'),
+            file_options
+        )
+        
+        # Get public URL
+        if self.is_public:
+            return bucket.get_public_url(file_name)
+        
+        # For private buckets, generate signed URL
+        url_response = bucket.create_signed_url(
+            file_name,
+            expires_in=3600  # 1 hour expiry
+        )
+        return url_response.get('signedURL', '')
+    
     async def download_diagram(self, file_path: str) -> Optional[str]:
         """
         Download diagram from storage.
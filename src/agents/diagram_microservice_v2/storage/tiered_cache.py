@@ -0,0 +1,405 @@
+"""
+Two-Tier Diagram Cache
+
+L1 is the in-process CacheManager (LRU with a byte budget). L2 is a store
+shared by every replica, so a diagram generated on one replica is served
+from cache on all of them:
+
+- RedisCacheStore:       Redis (CACHE_TYPE=redis, REDIS_URL)
+- LocalSharedCacheStore: in-process stand-in with the same semantics, used
+                         for development, tests and single-replica deploys
+
+The L2 store also provides:
+
+- Stampede protection: a short-lived lock per key, so only one replica
+  generates a missing diagram while the others wait for its result
+- Negative caching: failed generations are remembered for a short TTL so
+  repeated identical requests fail fast instead of re-running every agent
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from utils.logger import setup_logger
+from .cache_manager import CacheManager, pack_result, unpack_result
+
+logger = setup_logger(__name__)
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+
+
+KEY_PREFIX = "diagram:v1"
+
+# Compare-and-delete so a replica never releases a lock it no longer holds
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LocalSharedCacheStore:
+    """
+    In-process stand-in for the shared store
+
+    Mirrors the Redis store's semantics (TTL values, SET NX locks) so the
+    tiered cache behaves the same with or without Redis.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: int):
+        self._values[key] = (value, time.monotonic() + ttl)
+
+    async def set_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        self._values.pop(key, None)
+
+    async def delete_if_equal(self, key: str, value: str):
+        if await self.get(key) == value:
+            del self._values[key]
+
+    async def close(self):
+        self._values.clear()
+
+
+class RedisCacheStore:
+    """Shared store backed by Redis"""
+
+    name = "redis"
+
+    def __init__(self, redis_url: str):
+        self.client = redis_asyncio.from_url(redis_url, decode_responses=True)
+        self._release_lock = self.client.register_script(_RELEASE_LOCK_SCRIPT)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def set_if_absent(self, key: str, value: str, ttl: int) -> bool:
+        return bool(await self.client.set(key, value, ex=ttl, nx=True))
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+    async def delete_if_equal(self, key: str, value: str):
+        await self._release_lock(keys=[key], args=[value])
+
+    async def close(self):
+        await self.client.close()
+
+
+class _TierStats:
+    """Hit/miss counts and lookup latency for one cache tier"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.total_latency = 0.0
+
+    def record(self, hit: bool, started: float):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.total_latency += time.perf_counter() - started
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0,
+            "avg_latency_ms": round(self.total_latency / lookups * 1000, 3) if lookups else 0
+        }
+
+
+class TieredDiagramCache:
+    """
+    L1 (in-process) + L2 (shared) cache for diagram results
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        max_size: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        shared_store=None,
+        negative_ttl: int = 60,
+        lock_ttl: int = 90,
+        lock_wait: float = 30.0
+    ):
+        """
+        Initialize tiered cache.
+
+        Args:
+            ttl_seconds: Time-to-live for cached diagrams (both tiers)
+            max_size: Maximum L1 entries
+            max_bytes: L1 byte budget
+            shared_store: L2 store (LocalSharedCacheStore if None)
+            negative_ttl: Seconds a failed generation is remembered
+            lock_ttl: Seconds a generation lock is held before it expires
+            lock_wait: Seconds to wait for another replica's generation
+        """
+        self.ttl = ttl_seconds
+        self.l1 = CacheManager(ttl_seconds=ttl_seconds, max_size=max_size, max_bytes=max_bytes)
+        self.l2 = shared_store or LocalSharedCacheStore()
+        self.negative_ttl = negative_ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+
+        self.l1_stats = _TierStats()
+        self.l2_stats = _TierStats()
+        self.stats = {
+            "negative_hits": 0,
+            "negative_sets": 0,
+            "lock_waits": 0,
+            "lock_wait_hits": 0,
+            "lock_wait_timeouts": 0
+        }
+
+    @classmethod
+    def from_settings(cls, settings) -> "TieredDiagramCache":
+        """
+        Build the cache from settings (CACHE_TYPE=redis selects Redis for L2).
+        """
+        shared_store = None
+        if getattr(settings, 'cache_type', 'memory') == "redis":
+            if REDIS_AVAILABLE and getattr(settings, 'redis_url', None):
+                shared_store = RedisCacheStore(settings.redis_url)
+            else:
+                logger.warning("CACHE_TYPE=redis but redis is unavailable, using local shared store")
+
+        return cls(
+            ttl_seconds=getattr(settings, 'cache_ttl', 3600),
+            max_size=getattr(settings, 'cache_max_entries', 1000),
+            max_bytes=getattr(settings, 'cache_max_bytes', 64 * 1024 * 1024),
+            shared_store=shared_store,
+            negative_ttl=getattr(settings, 'cache_negative_ttl', 60),
+            lock_ttl=getattr(settings, 'cache_lock_ttl', 90),
+            lock_wait=getattr(settings, 'cache_lock_wait', 30.0)
+        )
+
+    async def start(self):
+        """Start L1 background cleanup"""
+        await self.l1.start()
+        logger.info(f"Tiered cache started (L2: {self.l2.name})")
+
+    async def stop(self):
+        """Stop L1 cleanup and close the L2 connection"""
+        await self.l1.stop()
+        try:
+            await self.l2.close()
+        except Exception as e:
+            logger.warning(f"Error closing shared cache: {e}")
+
+    def cache_key(self, request_data: Dict[str, Any]) -> str:
+        """Cache key for request data (same in both tiers and across replicas)"""
+        return self.l1.cache_key(request_data)
+
+    async def get(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached diagram, checking L1 then L2 (L2 hits are promoted to L1).
+
+        Args:
+            request_data: Request parameters
+
+        Returns:
+            Cached result or None
+        """
+        started = time.perf_counter()
+        result = self.l1.get(request_data)
+        self.l1_stats.record(result is not None, started)
+        if result is not None:
+            return result
+
+        key = self.cache_key(request_data)
+        result = await self._l2_get_result(key)
+        if result is not None:
+            self.l1.set(request_data, result)
+        return result
+
+    async def set(self, request_data: Dict[str, Any], result: Dict[str, Any]):
+        """
+        Cache a diagram in both tiers.
+
+        Args:
+            request_data: Request parameters
+            result: Generation result
+        """
+        self.l1.set(request_data, result)
+        key = self.cache_key(request_data)
+        try:
+            await self.l2.set(
+                f"{KEY_PREFIX}:result:{key}",
+                json.dumps(pack_result(result), default=str),
+                self.ttl
+            )
+        except Exception as e:
+            self.l2_stats.errors += 1
+            logger.warning(f"Shared cache write failed for key {key[:8]}...: {e}")
+
+    async def get_failure(self, request_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Check whether this request failed recently.
+
+        Returns:
+            The recorded error message, or None
+        """
+        key = self.cache_key(request_data)
+        try:
+            error = await self.l2.get(f"{KEY_PREFIX}:failed:{key}")
+        except Exception as e:
+            self.l2_stats.errors += 1
+            logger.warning(f"Shared cache read failed for key {key[:8]}...: {e}")
+            return None
+        if error is not None:
+            self.stats["negative_hits"] += 1
+        return error
+
+    async def set_failure(self, request_data: Dict[str, Any], error: str):
+        """
+        Remember a failed generation for negative_ttl seconds.
+        """
+        key = self.cache_key(request_data)
+        try:
+            await self.l2.set(f"{KEY_PREFIX}:failed:{key}", error, self.negative_ttl)
+            self.stats["negative_sets"] += 1
+        except Exception as e:
+            self.l2_stats.errors += 1
+            logger.warning(f"Shared cache write failed for key {key[:8]}...: {e}")
+
+    async def acquire_generation_lock(self, request_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Try to become the replica that generates this diagram.
+
+        Returns:
+            Lock token if acquired (pass to release_generation_lock), None if
+            another replica holds the lock. If the shared store is unreachable
+            a local token is returned so generation is never blocked.
+        """
+        key = self.cache_key(request_data)
+        token = uuid.uuid4().hex
+        try:
+            if await self.l2.set_if_absent(f"{KEY_PREFIX}:lock:{key}", token, self.lock_ttl):
+                return token
+            return None
+        except Exception as e:
+            self.l2_stats.errors += 1
+            logger.warning(f"Shared cache lock failed for key {key[:8]}...: {e}")
+            return token
+
+    async def release_generation_lock(self, request_data: Dict[str, Any], token: str):
+        """Release a lock taken by acquire_generation_lock"""
+        key = self.cache_key(request_data)
+        try:
+            await self.l2.delete_if_equal(f"{KEY_PREFIX}:lock:{key}", token)
+        except Exception as e:
+            self.l2_stats.errors += 1
+            logger.warning(f"Shared cache unlock failed for key {key[:8]}...: {e}")
+
+    async def wait_for_result(self, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Wait for another replica to finish generating this diagram.
+
+        Polls L2 until the result (or a recorded failure) appears, the lock
+        is released, or lock_wait expires.
+
+        Returns:
+            The shared result, or None if the caller should generate itself
+        """
+        key = self.cache_key(request_data)
+        self.stats["lock_waits"] += 1
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.05
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+            try:
+                raw = await self.l2.get(f"{KEY_PREFIX}:result:{key}")
+                if raw is not None:
+                    result = unpack_result(json.loads(raw))
+                    self.stats["lock_wait_hits"] += 1
+                    self.l1.set(request_data, result)
+                    return result
+                if await self.l2.get(f"{KEY_PREFIX}:failed:{key}") is not None:
+                    return None
+                if await self.l2.get(f"{KEY_PREFIX}:lock:{key}") is None:
+                    return None
+            except Exception:
+                return None
+
+        self.stats["lock_wait_timeouts"] += 1
+        return None
+
+    def invalidate(self, request_data: Optional[Dict[str, Any]] = None):
+        """Invalidate L1 entries (L2 entries expire by TTL)"""
+        self.l1.invalidate(request_data)
+
+    async def delete(self, request_data: Dict[str, Any]):
+        """Remove a cached diagram from both tiers"""
+        self.l1.invalidate(request_data)
+        key = self.cache_key(request_data)
+        try:
+            await self.l2.delete(f"{KEY_PREFIX}:result:{key}")
+        except Exception as e:
+            self.l2_stats.errors += 1
+            logger.warning(f"Shared cache delete failed for key {key[:8]}...: {e}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get per-tier cache statistics.
+
+        Returns:
+            Statistics dictionary
+        """
+        return {
+            "l1": {**self.l1.get_statistics(), **self.l1_stats.to_dict()},
+            "l2": {"backend": self.l2.name, **self.l2_stats.to_dict()},
+            **self.stats
+        }
+
+    async def _l2_get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read and decode a result from L2, recording tier stats"""
+        started = time.perf_counter()
+        try:
+            raw = await self.l2.get(f"{KEY_PREFIX}:result:{key}")
+        except Exception as e:
+            self.l2_stats.errors += 1
+            logger.warning(f"Shared cache read failed for key {key[:8]}...: {e}")
+            return None
+        self.l2_stats.record(raw is not None, started)
+        return unpack_result(json.loads(raw)) if raw is not None else None
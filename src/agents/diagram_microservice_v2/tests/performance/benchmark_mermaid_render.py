@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Mermaid rendering throughput, browser service vs. mmdc CLI.
+
+Renders the same set of diagrams through both paths of MermaidRenderer and
+reports diagrams/sec:
+
+- cli:     one mmdc process (and Chromium launch) per diagram
+- browser: persistent Chromium with a warm page pool (utils/mermaid_browser.py)
+
+Requires mmdc on PATH for the CLI path and playwright for the browser path;
+a path whose dependency is missing is skipped.
+
+Usage:
+    python tests/performance/benchmark_mermaid_render.py [--diagrams 20] [--concurrency 4]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config import get_settings
+from utils.mermaid_browser import PLAYWRIGHT_AVAILABLE
+from utils.mermaid_renderer import MermaidRenderer
+
+DIAGRAMS = [
+    """flowchart TD
+    A[Start] --> B{Decision}
+    B -->|Yes| C[Ship it]
+    B -->|No| D[Iterate]
+    D --> B""",
+    """sequenceDiagram
+    participant U as User
+    participant S as Service
+    U->>S: Request
+    S-->>U: Response""",
+    """gantt
+    title Launch Plan
+    dateFormat YYYY-MM-DD
+    section Build
+    Design :a1, 2024-01-01, 10d
+    Implement :after a1, 20d""",
+    """erDiagram
+    CUSTOMER ||--o{ ORDER : places
+    ORDER ||--|{ LINE_ITEM : contains""",
+]
+
+
+async def run(render, diagrams, concurrency):
+    """Render all diagrams with bounded concurrency, return (seconds, failures)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one(code):
+        nonlocal failures
+        async with semaphore:
+            try:
+                await render(code)
+            except Exception:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(code) for code in diagrams))
+    return time.perf_counter() - start, failures
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diagrams", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.mermaid_browser_pages = args.concurrency
+    settings.mermaid_svg_cache_size = 0  # Measure rendering, not cache hits
+    renderer = MermaidRenderer(settings)
+    diagrams = [DIAGRAMS[i % len(DIAGRAMS)] for i in range(args.diagrams)]
+
+    print(f"{args.diagrams} diagrams, concurrency {args.concurrency}")
+    print(f"{'path':<10}{'seconds':>10}{'diagrams/sec':>15}{'failures':>10}")
+
+    if shutil.which(renderer.mmdc_path):
+        seconds, failures = await run(renderer.render_with_cli, diagrams, args.concurrency)
+        print(f"{'cli':<10}{seconds:>10.2f}{args.diagrams / seconds:>15.2f}{failures:>10}")
+    else:
+        print(f"{'cli':<10}  skipped (mmdc not on PATH)")
+
+    if PLAYWRIGHT_AVAILABLE:
+        launch_start = time.perf_counter()
+        await renderer.start()
+        if not renderer.browser.available:
+            print(f"{'browser':<10}  skipped (browser failed to start)")
+            return
+        print(f"  browser launch + page warm-up: {time.perf_counter() - launch_start:.2f}s (paid once)")
+        seconds, failures = await run(renderer.render_to_svg, diagrams, args.concurrency)
+        print(f"{'browser':<10}{seconds:>10.2f}{args.diagrams / seconds:>15.2f}{failures:>10}")
+        await renderer.stop()
+    else:
+        print(f"{'browser':<10}  skipped (playwright not installed)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
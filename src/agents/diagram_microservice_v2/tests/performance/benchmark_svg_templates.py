@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SVG template filling, per-placeholder str.replace vs. compiled templates.
+
+Fills every template in templates/ with labels for all of its placeholders and
+reports microseconds per fill for each path:
+
+- replace:  rescans the SVG with str.replace per placeholder and per default
+            theme color (the approach SVGAgent used before templates were
+            compiled)
+- compiled: CompiledSVGTemplate.fill, one join over the pre-tokenized segments
+- etree:    ET.parse from disk plus a find() tree walk per element id (the
+            diagram_utils SVG agent before templates were cached)
+
+Usage:
+    python tests/performance/benchmark_svg_templates.py [--iterations 200]
+"""
+import argparse
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config import get_settings
+from agents.svg_agent import SVGAgent
+
+THEME = {"primaryColor": "#7C3AED", "secondaryColor": "#A78BFA", "textColor": "#111827"}
+
+
+def replace_fill(source, placeholders, labels, colors):
+    """Per-placeholder str.replace, then per-color str.replace"""
+    svg_content = source
+    for placeholder, label in zip(placeholders, labels):
+        if placeholder and label:
+            svg_content = svg_content.replace(placeholder, label)
+    for old_color, new_color in colors.items():
+        svg_content = svg_content.replace(old_color, new_color)
+    return svg_content
+
+
+def etree_fill(path, element_ids, labels):
+    """Parse from disk and look up each element id with a tree walk"""
+    root = ET.parse(path).getroot()
+    for element_id, label in zip(element_ids, labels):
+        elem = root.find(f".//*[@id='{element_id}']")
+        if elem is not None:
+            elem.text = label
+    return ET.tostring(root, encoding="unicode")
+
+
+def time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    agent = SVGAgent(get_settings())
+    agent._load_templates()
+    colors = agent.get_theme_color_replacements(THEME)
+
+    print(f"{len(agent.compiled_templates)} templates, {args.iterations} fills each (us per fill)")
+    print(f"{'template':<24}{'slots':>7}{'replace':>10}{'compiled':>10}{'etree':>10}{'speedup':>9}")
+
+    totals = {"replace": 0.0, "compiled": 0.0, "etree": 0.0}
+    for name, template in sorted(agent.compiled_templates.items()):
+        placeholders = template.placeholders
+        labels = [f"Label {i + 1}" for i in range(len(placeholders))]
+        path = os.path.join(agent.templates_dir, f"{name}.svg")
+        element_ids = [elem.get("id") for elem in ET.parse(path).getroot().iter("{http://www.w3.org/2000/svg}text")
+                       if elem.get("id")][:len(labels)]
+
+        if replace_fill(template.source, placeholders, labels, colors) != template.fill(labels, colors):
+            print(f"{name:<24}  output mismatch between replace and compiled")
+
+        results = {
+            "replace": time_per_call(lambda: replace_fill(template.source, placeholders, labels, colors), args.iterations),
+            "compiled": time_per_call(lambda: template.fill(labels, colors), args.iterations),
+            "etree": time_per_call(lambda: etree_fill(path, element_ids, labels), args.iterations),
+        }
+        for key, value in results.items():
+            totals[key] += value
+        print(
+            f"{name:<24}{template.slot_count:>7}{results['replace']:>10.1f}{results['compiled']:>10.1f}"
+            f"{results['etree']:>10.1f}{results['replace'] / results['compiled']:>8.1f}x"
+        )
+
+    count = len(agent.compiled_templates)
+    print(
+        f"{'mean':<24}{'':>7}{totals['replace'] / count:>10.1f}{totals['compiled'] / count:>10.1f}"
+        f"{totals['etree'] / count:>10.1f}{totals['replace'] / totals['compiled']:>8.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Load test: LLM call throughput, asyncio.to_thread vs. the LLM call limiter.
+
+Runs many concurrent "diagram generations" that each make one LLM call and
+compares how they are executed:
+
+- to_thread:        asyncio.to_thread(model.generate_content), the previous
+                    approach; shares the default executor (min(32, cpus + 4)
+                    threads) with every other to_thread user
+- limiter-async:    utils.llm_client.LLMCallLimiter awaiting
+                    generate_content_async; no thread held per call
+- limiter-executor: LLMCallLimiter on its dedicated per-model thread pool
+
+While the load runs, an unrelated to_thread probe (a 1ms blocking task, like
+the render cache's disk reads) is timed to show whether it queues behind
+LLM calls.
+
+By default the LLM is simulated with a fixed latency so the test is
+repeatable and free; --live uses gemini-2.0-flash-lite (needs
+GOOGLE_API_KEY, and costs one request per diagram).
+
+Usage:
+    python tests/performance/load_test_llm_calls.py [--diagrams 400] [--latency 0.5] [--concurrency 128]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.llm_client import LLMCallLimiter
+
+
+class SimulatedResponse:
+    text = '{"primary_method": "mermaid", "confidence": 0.9}'
+
+
+class SimulatedModel:
+    """Stands in for genai.GenerativeModel with a fixed response latency"""
+
+    model_name = "models/simulated"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return SimulatedResponse()
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self.latency)
+        return SimulatedResponse()
+
+
+async def probe_latencies(stop: asyncio.Event):
+    """Time a 1ms to_thread task every 20ms until stopped"""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.to_thread(time.sleep, 0.001)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.02)
+    return latencies
+
+
+async def run(call, diagrams):
+    """Run all calls concurrently; return (seconds, failures, probe latencies)"""
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_latencies(stop))
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        try:
+            await call(f"diagram {i}")
+        except Exception:
+            failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(diagrams)))
+    seconds = time.perf_counter() - start
+    stop.set()
+    return seconds, failures, await probe
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diagrams", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=128, help="Limiter concurrency per model")
+    parser.add_argument("--live", action="store_true", help="Call Gemini instead of the simulation")
+    args = parser.parse_args()
+
+    if args.live:
+        import google.generativeai as genai
+        from config import get_settings
+        genai.configure(api_key=get_settings().google_api_key)
+        model = genai.GenerativeModel("gemini-2.0-flash-lite")
+    else:
+        model = SimulatedModel(args.latency)
+
+    default_threads = min(32, (os.cpu_count() or 1) + 4)
+    print(
+        f"{args.diagrams} diagrams, LLM latency {'live' if args.live else f'{args.latency}s'}, "
+        f"default executor {default_threads} threads, limiter concurrency {args.concurrency}"
+    )
+    print(f"{'mode':<18}{'seconds':>9}{'diagrams/sec':>14}{'failures':>10}{'probe p50 ms':>14}{'probe max ms':>14}")
+
+    limiters = {
+        "limiter-async": LLMCallLimiter("bench-async", args.concurrency, args.diagrams, use_async_client=True),
+        "limiter-executor": LLMCallLimiter("bench-executor", args.concurrency, args.diagrams, use_async_client=False),
+    }
+    modes = {
+        "to_thread": lambda prompt: asyncio.to_thread(model.generate_content, prompt),
+        "limiter-async": lambda prompt: limiters["limiter-async"].generate_content(model, prompt),
+        "limiter-executor": lambda prompt: limiters["limiter-executor"].generate_content(model, prompt),
+    }
+
+    for mode, call in modes.items():
+        seconds, failures, probes = await run(call, args.diagrams)
+        print(
+            f"{mode:<18}{seconds:>9.2f}{args.diagrams / seconds:>14.1f}{failures:>10}"
+            f"{statistics.median(probes) if probes else 0:>14.1f}{max(probes) if probes else 0:>14.1f}"
+        )
+
+    for limiter in limiters.values():
+        limiter.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
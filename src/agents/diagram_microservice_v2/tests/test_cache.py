@@ -0,0 +1,61 @@
+"""
+Unit tests for the diagram result caches
+"""
+
+import asyncio
+
+import pytest
+
+from storage.cache_manager import CacheManager
+from storage.tiered_cache import TieredDiagramCache
+
+REQUEST = {"diagram_type": "pyramid_3_level", "content": "Foundation, Middle, Top"}
+
+
+def _result(svg: str = "<svg>pyramid</svg>"):
+    return {
+        "diagram_id": "diagram-1",
+        "content": svg,
+        "svg": {"content": svg, "width": 800},
+        "metadata": {"generation_method": "svg_template"}
+    }
+
+
+def test_cached_result_is_isolated_from_the_caller():
+    cache = CacheManager(ttl_seconds=60, max_size=10)
+    result = _result()
+    cache.set(REQUEST, result)
+
+    result["metadata"]["cache_hit"] = True
+    first = cache.get(REQUEST)
+    first["svg"]["width"] = 100
+    first["metadata"]["coalesced"] = True
+
+    assert cache.get(REQUEST) == _result()
+    assert first["svg"]["content"] == first["content"]
+
+
+@pytest.mark.asyncio
+async def test_recent_failure_is_served_until_it_expires():
+    cache = TieredDiagramCache(ttl_seconds=60, negative_ttl=0.05)
+
+    assert await cache.get_failure(REQUEST) is None
+    await cache.set_failure(REQUEST, "All generation methods failed")
+
+    assert await cache.get_failure(REQUEST) == "All generation methods failed"
+    assert cache.stats["negative_hits"] == 1
+
+    await asyncio.sleep(0.1)
+    assert await cache.get_failure(REQUEST) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_both_tiers():
+    cache = TieredDiagramCache(ttl_seconds=60)
+    await cache.set(REQUEST, _result())
+    cache.invalidate(REQUEST)
+
+    assert await cache.get(REQUEST) == _result()  # promoted back from L2
+
+    await cache.delete(REQUEST)
+    assert await cache.get(REQUEST) is None
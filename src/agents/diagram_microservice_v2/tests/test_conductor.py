@@ -0,0 +1,109 @@
+"""
+Unit tests for DiagramConductor request coalescing, negative caching and
+background persistence updates
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core.conductor import DiagramConductor
+from storage import PersistenceJob, TieredDiagramCache
+
+
+def _conductor(generated):
+    """Conductor with a real cache and a fake generation step"""
+    conductor = DiagramConductor.__new__(DiagramConductor)
+    conductor.cache = TieredDiagramCache(ttl_seconds=60, negative_ttl=0.05)
+    conductor.session_manager = AsyncMock()
+    conductor.generation_count = 0
+    conductor.error_count = 0
+    conductor.coalesced_count = 0
+    conductor._inflight = {}
+    conductor.release = asyncio.Event()
+    conductor.calls = 0
+
+    async def generate_uncached(request, start_time, strategy=None):
+        conductor.calls += 1
+        await conductor.release.wait()
+        return generated()
+
+    conductor._generate_uncached = generate_uncached
+    return conductor
+
+
+def _result():
+    return {"diagram_id": "diagram-1", "url": "", "metadata": {"persistence": "pending"}}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_follower_does_not_cancel_the_leader(sample_diagram_request):
+    conductor = _conductor(_result)
+
+    leader = asyncio.create_task(conductor.generate(sample_diagram_request))
+    follower = asyncio.create_task(conductor.generate(sample_diagram_request))
+    await asyncio.sleep(0.01)
+    follower.cancel()
+    await asyncio.sleep(0.01)
+    conductor.release.set()
+
+    assert (await leader)["diagram_id"] == "diagram-1"
+    assert follower.cancelled()
+    assert conductor.calls == 1
+    assert conductor.coalesced_count == 1
+
+
+@pytest.mark.asyncio
+async def test_generation_is_abandoned_when_every_caller_cancels(sample_diagram_request):
+    conductor = _conductor(_result)
+
+    only = asyncio.create_task(conductor.generate(sample_diagram_request))
+    await asyncio.sleep(0.01)
+    inflight = next(iter(conductor._inflight.values()))
+    only.cancel()
+    await asyncio.sleep(0.01)
+
+    assert inflight.abandoned
+    assert inflight.task.cancelled()
+    assert conductor._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_recent_failure_fails_fast_until_it_expires(sample_diagram_request):
+    conductor = _conductor(_result)
+    conductor.release.set()
+    await conductor.cache.set_failure(sample_diagram_request.dict(), "All generation methods failed")
+
+    with pytest.raises(ValueError, match="recently failed"):
+        await conductor.generate(sample_diagram_request)
+    assert conductor.calls == 0
+
+    await asyncio.sleep(0.1)
+    assert (await conductor.generate(sample_diagram_request))["diagram_id"] == "diagram-1"
+    assert conductor.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_persisted_url_replaces_the_pending_cache_entry(sample_diagram_request):
+    conductor = _conductor(_result)
+    request_data = sample_diagram_request.dict()
+    await conductor.cache.set(request_data, _result())
+    job = PersistenceJob(
+        diagram_id="diagram-1",
+        svg_content="<svg/>",
+        diagram_type=sample_diagram_request.diagram_type,
+        session_id="session-456",
+        user_id="user-789",
+        request_id="test-123",
+        request_params=request_data,
+        metadata={}
+    )
+
+    await conductor._on_persisted(job, "https://cdn/diagram-1.svg", None)
+    cached = await conductor.cache.get(request_data)
+    assert cached["url"] == "https://cdn/diagram-1.svg"
+    assert cached["metadata"]["persistence"] == "stored"
+
+    await conductor._on_persisted(job, "", "storage unavailable")
+    assert await conductor.cache.get(request_data) is None
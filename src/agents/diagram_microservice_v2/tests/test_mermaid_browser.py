@@ -0,0 +1,101 @@
+"""
+Unit tests for the Mermaid browser page pool
+"""
+
+import asyncio
+
+import pytest
+
+from utils.mermaid_browser import MermaidBrowserService, PlaywrightError
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.context = FakeContext(browser)
+        self.viewport_size = {"width": 800, "height": 600}
+        self.handlers = {}
+        self.closed = False
+        self.crash_on_render = False
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    async def set_content(self, html):
+        pass
+
+    async def add_script_tag(self, **kwargs):
+        pass
+
+    async def wait_for_function(self, expression):
+        pass
+
+    async def evaluate(self, script, args):
+        if self.crash_on_render:
+            # Playwright emits "crash" and fails the pending call; the page stays open
+            self.handlers["crash"](self)
+            raise PlaywrightError("Target crashed")
+        return "<svg/>"
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.pages = []
+
+    def is_connected(self):
+        return True
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+
+async def _service(pool_size=1):
+    service = MermaidBrowserService(pool_size=pool_size, render_timeout=1, queue_timeout=1)
+    service._browser = FakeBrowser()
+    for _ in range(pool_size):
+        service._pages.put_nowait(await service._new_page())
+    return service
+
+
+async def _render(service):
+    return await service._render_with_page("graph TD; A-->B", {}, 800, 600, "white")
+
+
+@pytest.mark.asyncio
+async def test_crashed_page_is_replaced():
+    service = await _service()
+    crashed = service._browser.pages[0]
+    crashed.crash_on_render = True
+
+    with pytest.raises(PlaywrightError):
+        await _render(service)
+    await asyncio.sleep(0)
+
+    assert crashed.closed
+    assert service._pages.qsize() == 1
+    assert service._crashed == set()
+    assert await _render(service) == "<svg/>"
+    assert service._browser.pages[-1] is not crashed
+
+
+@pytest.mark.asyncio
+async def test_healthy_page_returns_to_the_pool():
+    service = await _service()
+    page = service._browser.pages[0]
+
+    assert await _render(service) == "<svg/>"
+
+    assert not page.closed
+    assert service._pages.get_nowait() is page
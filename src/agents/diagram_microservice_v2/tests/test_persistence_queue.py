@@ -0,0 +1,72 @@
+"""
+Unit tests for the background persistence queue
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from storage.persistence_queue import DiagramPersistenceQueue, PersistenceJob
+
+URL = "https://test.supabase.co/storage/v1/object/public/test/diagram-1.svg"
+
+
+def _job():
+    return PersistenceJob(
+        diagram_id="diagram-1",
+        svg_content="<svg>pyramid</svg>",
+        diagram_type="pyramid_3_level",
+        session_id="session-456",
+        user_id="user-789",
+        request_id="test-123",
+        request_params={"diagram_type": "pyramid_3_level"},
+        metadata={"generation_method": "svg_template"}
+    )
+
+
+async def _persist(storage, db_ops, max_retries=2):
+    queue = DiagramPersistenceQueue(
+        storage, db_ops, workers=1, max_retries=max_retries, retry_backoff=0.001
+    )
+    notified = []
+
+    async def listener(job, url, error):
+        notified.append((job.diagram_id, url, error))
+
+    queue.add_listener(listener)
+    await queue.start()
+    assert queue.submit(_job())
+    await queue.stop(drain_timeout=5)
+    return queue, notified
+
+
+@pytest.mark.asyncio
+async def test_failed_metadata_save_is_retried_without_reuploading():
+    storage = AsyncMock()
+    storage.upload_diagram.return_value = URL
+    db_ops = AsyncMock()
+    db_ops.save_diagram_metadata.side_effect = [RuntimeError("db unavailable"), None]
+
+    queue, notified = await _persist(storage, db_ops)
+
+    assert storage.upload_diagram.await_count == 1
+    assert db_ops.save_diagram_metadata.await_count == 2
+    assert notified == [("diagram-1", URL, None)]
+    assert queue.stats["retries"] == 1
+    assert queue.stats["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_persistence_gives_up_after_max_retries():
+    storage = AsyncMock()
+    storage.upload_diagram.side_effect = RuntimeError("storage unavailable")
+    db_ops = AsyncMock()
+
+    queue, notified = await _persist(storage, db_ops, max_retries=2)
+
+    assert storage.upload_diagram.await_count == 3
+    db_ops.save_diagram_metadata.assert_not_awaited()
+    assert notified == [("diagram-1", "", "storage unavailable")]
+    assert queue.stats["failed"] == 1
+    assert queue.pending == 0
+    assert queue.pending_bytes == 0
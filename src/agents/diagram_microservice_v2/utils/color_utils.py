@@ -10,6 +10,10 @@ from typing import Dict, List, Tuple, Optional, Any
 import re
 
 
+# Template colors are always 6-digit hex; matched once and looked up in a dict
+HEX_COLOR_PATTERN = re.compile(r'#[0-9a-fA-F]{6}')
+
+
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     """Convert hex color to RGB tuple"""
     hex_color = hex_color.lstrip('#')
@@ -88,6 +92,27 @@ def get_analogous(hex_color: str) -> Tuple[str, str]:
     return rgb_to_hex(r1, g1, b1), rgb_to_hex(r2, g2, b2)
 
 
+def build_color_lookup(color_map: Dict[str, str]) -> Dict[str, str]:
+    """
+    Build a replacement lookup covering the lower- and upper-case spelling of
+    each mapped color (upper-case sources get upper-case replacements)
+    """
+    lookup = {}
+    for old_color, new_color in color_map.items():
+        lookup[old_color.upper()] = new_color.upper()
+    for old_color, new_color in color_map.items():
+        lookup[old_color] = new_color
+    return lookup
+
+
+def replace_colors(svg_content: str, color_lookup: Dict[str, str]) -> str:
+    """Replace every mapped hex color in a single pass over the SVG"""
+    return HEX_COLOR_PATTERN.sub(
+        lambda match: color_lookup.get(match.group(0), match.group(0)),
+        svg_content
+    )
+
+
 def get_triadic(hex_color: str) -> Tuple[str, str]:
     """Get two triadic colors (120 degrees apart on color wheel)"""
     r, g, b = hex_to_rgb(hex_color)
@@ -117,6 +142,7 @@ class MonochromaticTheme:
         self.accent = None     # Not used in monochromatic
         self.palette = self._generate_palette()
         self.color_map = self._create_color_map()
+        self.color_lookup = build_color_lookup(self.color_map)
     
     def _generate_palette(self) -> Dict[str, List[str]]:
         """Generate monochromatic palette with various shades"""
@@ -284,14 +310,7 @@ class MonochromaticTheme:
     
     def apply_to_svg(self, svg_content: str) -> str:
         """Apply monochromatic theme to SVG content"""
-        result = svg_content
-        sorted_colors = sorted(self.color_map.keys(), key=len, reverse=True)
-        
-        for old_color, new_color in [(c, self.color_map[c]) for c in sorted_colors]:
-            result = result.replace(old_color, new_color)
-            result = result.replace(old_color.upper(), new_color.upper())
-        
-        return result
+        return replace_colors(svg_content, self.color_lookup)
     
     def get_theme_dict(self) -> Dict[str, Any]:
         """Get theme as dictionary for API response"""
@@ -337,6 +356,7 @@ class SmartColorTheme:
         
         # Create mapping for all template colors
         self.color_map = self._create_color_map()
+        self.color_lookup = build_color_lookup(self.color_map)
     
     def _generate_palette(self) -> Dict[str, List[str]]:
         """Generate complete color palette from provided colors"""
@@ -543,17 +563,8 @@ class SmartColorTheme:
     
     def apply_to_svg(self, svg_content: str) -> str:
         """Apply theme colors to SVG content"""
-        result = svg_content
-        
-        # Sort by length to avoid partial replacements
-        sorted_colors = sorted(self.color_map.keys(), key=len, reverse=True)
-        
-        for old_color, new_color in [(c, self.color_map[c]) for c in sorted_colors]:
-            # Replace both lowercase and uppercase versions
-            result = result.replace(old_color, new_color)
-            result = result.replace(old_color.upper(), new_color.upper())
-        
-        return result
+        # One scan; each color is replaced once, so mapped colors never chain
+        return replace_colors(svg_content, self.color_lookup)
     
     def get_theme_dict(self) -> Dict[str, str]:
         """Get theme as dictionary for API response"""
@@ -0,0 +1,210 @@
+"""
+LLM Call Limiter
+
+Runs Gemini generate_content calls without borrowing threads from the
+default executor. Each model gets its own limiter:
+
+- async-native: awaits model.generate_content_async (gRPC asyncio client),
+  so a call in flight holds no thread at all
+- executor:     if the async client is unavailable or disabled, the
+                synchronous call runs on a dedicated thread pool sized to the
+                model's concurrency limit, never on the default executor
+
+Calls beyond the concurrency limit wait in a bounded queue; when the queue
+is full new calls fail fast with LLMOverloadedError instead of piling up.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a model's LLM call queue is full"""
+
+
+class LLMCallLimiter:
+    """
+    Bounded concurrency, queueing and metrics for one model's LLM calls
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 16,
+        max_queued: int = 64,
+        use_async_client: bool = True
+    ):
+        """
+        Args:
+            name: Model name (used in logs and metrics)
+            max_concurrency: Calls in flight at once
+            max_queued: Calls allowed to wait for a slot before rejecting
+            use_async_client: Prefer generate_content_async when available
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.use_async_client = use_async_client
+
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.in_flight = 0
+        self.queued = 0
+        self.stats = {
+            "calls": 0,
+            "async_calls": 0,
+            "executor_calls": 0,
+            "errors": 0,
+            "rejected": 0,
+            "peak_in_flight": 0,
+            "peak_queued": 0,
+            "total_queue_wait_ms": 0.0,
+            "total_call_ms": 0.0
+        }
+
+    async def generate_content(self, model: Any, prompt: Any, **kwargs) -> Any:
+        """
+        Call model.generate_content within the limiter.
+
+        Args:
+            model: genai.GenerativeModel (or anything with generate_content)
+            prompt: Prompt passed to generate_content
+            **kwargs: Extra generate_content arguments
+
+        Returns:
+            The model response
+
+        Raises:
+            LLMOverloadedError: If the wait queue is full
+        """
+        if self._slots.locked() and self.queued >= self.max_queued:
+            self.stats["rejected"] += 1
+            raise LLMOverloadedError(
+                f"LLM queue for {self.name} is full "
+                f"({self.in_flight} in flight, {self.queued} queued)"
+            )
+
+        queued_at = time.perf_counter()
+        self.queued += 1
+        self.stats["peak_queued"] = max(self.stats["peak_queued"], self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.stats["total_queue_wait_ms"] += (started_at - queued_at) * 1000
+        self.in_flight += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+        self.stats["calls"] += 1
+        try:
+            if self.use_async_client and hasattr(model, "generate_content_async"):
+                self.stats["async_calls"] += 1
+                return await model.generate_content_async(prompt, **kwargs)
+
+            self.stats["executor_calls"] += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(),
+                lambda: model.generate_content(prompt, **kwargs)
+            )
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.stats["total_call_ms"] += (time.perf_counter() - started_at) * 1000
+            self._slots.release()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f"llm-{self.name}"
+            )
+        return self._executor
+
+    def shutdown(self):
+        """Release the dedicated executor (if one was started)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get limiter metrics"""
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "total_queue_wait_ms": round(self.stats["total_queue_wait_ms"], 2),
+            "total_call_ms": round(self.stats["total_call_ms"], 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queued": self.max_queued,
+            "avg_queue_wait_ms": round(self.stats["total_queue_wait_ms"] / calls, 2) if calls else 0,
+            "avg_call_ms": round(self.stats["total_call_ms"] / calls, 2) if calls else 0
+        }
+
+
+# One limiter per model, shared by every agent and router in the process
+_limiters: Dict[str, LLMCallLimiter] = {}
+
+
+def get_llm_limiter(model: Any, settings=None) -> LLMCallLimiter:
+    """
+    Get the shared limiter for a model.
+
+    Args:
+        model: genai.GenerativeModel (keyed by its model_name)
+        settings: Settings for limits (loaded if not provided)
+
+    Returns:
+        LLMCallLimiter for the model
+    """
+    name = getattr(model, "model_name", None) or "default"
+    name = name.split("/")[-1]
+
+    limiter = _limiters.get(name)
+    if limiter is None:
+        if settings is None:
+            from config import get_settings
+            settings = get_settings()
+        limiter = LLMCallLimiter(
+            name,
+            max_concurrency=settings.llm_max_concurrency,
+            max_queued=settings.llm_max_queued,
+            use_async_client=settings.llm_async_client
+        )
+        _limiters[name] = limiter
+        logger.info(
+            f"LLM limiter for {name}: {limiter.max_concurrency} concurrent, "
+            f"{limiter.max_queued} queued"
+        )
+    return limiter
+
+
+async def generate_content(model: Any, prompt: Any, settings=None, **kwargs) -> Any:
+    """
+    Call model.generate_content through the model's shared limiter.
+
+    Drop-in replacement for asyncio.to_thread(model.generate_content, prompt).
+    """
+    return await get_llm_limiter(model, settings).generate_content(model, prompt, **kwargs)
+
+
+def get_llm_metrics() -> Dict[str, Any]:
+    """Get metrics for every model limiter"""
+    return {name: limiter.get_metrics() for name, limiter in _limiters.items()}
+
+
+def shutdown_llm_limiters():
+    """Shut down the dedicated executors of all limiters"""
+    for limiter in _limiters.values():
+        limiter.shutdown()
@@ -0,0 +1,390 @@
+"""
+Mermaid Browser Render Service
+
+Keeps one headless Chromium alive with mermaid.js preloaded and renders
+diagrams by page evaluation, instead of spawning the mmdc CLI (and with it a
+fresh Puppeteer/Chromium) for every diagram.
+
+- Page pool: a fixed number of warm pages, each renders one diagram at a time
+- Queue: callers wait for a free page; the number of waiting renders is bounded
+- Timeout: each render is bounded; a page that times out is replaced
+- Crash recovery: a crashed page is replaced, a disconnected browser is
+  relaunched and the render retried once
+
+Requires the optional `playwright` package. When it is missing (or Chromium
+cannot be launched) the service reports itself unavailable and callers fall
+back to the CLI path.
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    async_playwright = None
+    PlaywrightError = Exception
+    PLAYWRIGHT_AVAILABLE = False
+
+
+# mermaid.js shipped with the globally installed mermaid-cli (see Dockerfile)
+DEFAULT_MERMAID_JS_PATHS = [
+    "/usr/local/lib/node_modules/@mermaid-js/mermaid-cli/node_modules/mermaid/dist/mermaid.min.js",
+    "/usr/lib/node_modules/@mermaid-js/mermaid-cli/node_modules/mermaid/dist/mermaid.min.js",
+]
+MERMAID_CDN_URL = "https://cdn.jsdelivr.net/npm/mermaid@10.6.1/dist/mermaid.min.js"
+
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-accelerated-2d-canvas",
+    "--no-first-run",
+    "--disable-gpu"
+]
+
+# Same steps mmdc performs: initialize with the config, render into a
+# container, force the background and serialize as XML.
+RENDER_SCRIPT = """
+async ({ code, config, background, id }) => {
+    mermaid.initialize({ startOnLoad: false, ...config });
+    const container = document.getElementById('container');
+    try {
+        const { svg } = await mermaid.render(id, code, container);
+        container.innerHTML = svg;
+        const svgElement = container.getElementsByTagName('svg')[0];
+        svgElement.style.backgroundColor = background;
+        return new XMLSerializer().serializeToString(svgElement);
+    } finally {
+        container.innerHTML = '';
+        const leftover = document.getElementById('d' + id);
+        if (leftover) leftover.remove();
+    }
+}
+"""
+
+
+class BrowserUnavailableError(RuntimeError):
+    """Raised when the browser service cannot render (not installed or not running)"""
+
+
+class MermaidRenderError(RuntimeError):
+    """Raised when mermaid.js rejects a diagram or a render times out"""
+
+
+class MermaidBrowserService:
+    """
+    Long-lived headless browser with a pool of mermaid.js pages
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 4,
+        render_timeout: float = 10.0,
+        max_queue: int = 100,
+        queue_timeout: float = 30.0,
+        mermaid_js_path: Optional[str] = None,
+        executable_path: Optional[str] = None
+    ):
+        """
+        Args:
+            pool_size: Number of warm pages (concurrent renders)
+            render_timeout: Seconds allowed per render
+            max_queue: Maximum renders waiting for a page
+            queue_timeout: Seconds a render may wait for a free page
+            mermaid_js_path: Local mermaid.min.js (CDN used if not found)
+            executable_path: Chromium binary
+        """
+        self.pool_size = max(1, pool_size)
+        self.render_timeout = render_timeout
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.mermaid_js_path = mermaid_js_path
+        self.executable_path = executable_path or os.getenv(
+            "PUPPETEER_EXECUTABLE_PATH", "/usr/bin/chromium"
+        )
+
+        self._playwright = None
+        self._browser = None
+        self._pages: asyncio.Queue = asyncio.Queue()
+        # Pages whose renderer crashed; Playwright keeps them open, so they
+        # have to be tracked to be replaced instead of returned to the pool
+        self._crashed: set = set()
+        self._start_lock = asyncio.Lock()
+        self._render_counter = 0
+        self._waiting = 0
+        self._started = False
+        self._disabled_reason: Optional[str] = None
+
+        # Metrics
+        self.renders = 0
+        self.render_errors = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.total_render_time = 0.0
+
+    @property
+    def available(self) -> bool:
+        """True if the service is running or may still be started"""
+        return PLAYWRIGHT_AVAILABLE and self._disabled_reason is None
+
+    async def start(self) -> bool:
+        """
+        Launch the browser and warm the page pool
+
+        Returns:
+            True if the service is ready
+        """
+        if not PLAYWRIGHT_AVAILABLE:
+            self._disabled_reason = "playwright not installed"
+            logger.warning("Mermaid browser renderer disabled: playwright not installed")
+            return False
+
+        async with self._start_lock:
+            if self._started and self._browser and self._browser.is_connected():
+                return True
+            try:
+                await self._launch()
+                self._started = True
+                logger.info(
+                    f"Mermaid browser renderer started ({self.pool_size} pages, "
+                    f"{self.render_timeout}s timeout)"
+                )
+                return True
+            except Exception as e:
+                self._disabled_reason = str(e)
+                logger.error(f"Mermaid browser renderer failed to start: {e}")
+                await self._close_browser()
+                return False
+
+    async def stop(self):
+        """Close the browser and release the page pool"""
+        async with self._start_lock:
+            self._started = False
+            await self._close_browser()
+            logger.info("Mermaid browser renderer stopped")
+
+    async def render(
+        self,
+        mermaid_code: str,
+        config: Dict[str, Any],
+        width: int = 800,
+        height: int = 600,
+        background: str = "transparent"
+    ) -> str:
+        """
+        Render Mermaid code to an SVG string
+
+        Args:
+            mermaid_code: Mermaid diagram code
+            config: Mermaid config (theme, themeVariables, ...)
+            width: Viewport width
+            height: Viewport height
+            background: SVG background color
+
+        Returns:
+            Serialized SVG
+
+        Raises:
+            BrowserUnavailableError: Service not installed or cannot start
+            MermaidRenderError: Invalid diagram, full queue or render timeout
+        """
+        if not self.available:
+            raise BrowserUnavailableError(self._disabled_reason or "playwright not installed")
+        if not self._started and not await self.start():
+            raise BrowserUnavailableError(self._disabled_reason or "browser not running")
+
+        if self._waiting >= self.max_queue:
+            raise MermaidRenderError(f"Render queue full ({self.max_queue} waiting)")
+
+        try:
+            return await self._render_with_page(mermaid_code, config, width, height, background)
+        except PlaywrightError as e:
+            if self._browser is not None and self._browser.is_connected():
+                raise MermaidRenderError(self._error_message(e)) from e
+            # Browser died underneath us: relaunch and retry once
+            logger.warning(f"Mermaid browser disconnected, restarting: {e}")
+            await self._restart()
+            try:
+                return await self._render_with_page(mermaid_code, config, width, height, background)
+            except PlaywrightError as retry_error:
+                raise MermaidRenderError(self._error_message(retry_error)) from retry_error
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get render service metrics"""
+        return {
+            "available": self.available,
+            "running": self._started,
+            "pool_size": self.pool_size,
+            "idle_pages": self._pages.qsize(),
+            "queued": self._waiting,
+            "renders": self.renders,
+            "render_errors": self.render_errors,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "avg_render_ms": (
+                self.total_render_time / self.renders * 1000 if self.renders else 0
+            )
+        }
+
+    async def _render_with_page(
+        self,
+        mermaid_code: str,
+        config: Dict[str, Any],
+        width: int,
+        height: int,
+        background: str
+    ) -> str:
+        """Borrow a page, render, and return (or replace) the page"""
+        self._waiting += 1
+        try:
+            page = await asyncio.wait_for(self._pages.get(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise MermaidRenderError(f"No render page free after {self.queue_timeout} seconds")
+        finally:
+            self._waiting -= 1
+
+        healthy = True
+        start_time = time.perf_counter()
+        try:
+            if page.viewport_size != {"width": width, "height": height}:
+                await page.set_viewport_size({"width": width, "height": height})
+
+            self._render_counter += 1
+            svg = await asyncio.wait_for(
+                page.evaluate(RENDER_SCRIPT, {
+                    "code": mermaid_code,
+                    "config": config,
+                    "background": background,
+                    "id": f"mermaid-{self._render_counter}"
+                }),
+                timeout=self.render_timeout
+            )
+            self.renders += 1
+            self.total_render_time += time.perf_counter() - start_time
+            return svg
+        except asyncio.TimeoutError:
+            # The page may still be busy in mermaid.js; never reuse it
+            healthy = False
+            self.timeouts += 1
+            raise MermaidRenderError(
+                f"Mermaid rendering timeout after {self.render_timeout} seconds"
+            )
+        except PlaywrightError:
+            healthy = not page.is_closed()
+            self.render_errors += 1
+            raise
+        finally:
+            # Pages from a browser that has since been relaunched are dropped
+            if self._owns(page):
+                if healthy and not page.is_closed() and page not in self._crashed:
+                    self._pages.put_nowait(page)
+                else:
+                    asyncio.create_task(self._replace_page(page))
+
+    async def _launch(self):
+        """Start Chromium and open the page pool"""
+        self._playwright = await async_playwright().start()
+        launch_options = {"headless": True, "args": CHROMIUM_ARGS}
+        if self.executable_path and Path(self.executable_path).exists():
+            launch_options["executable_path"] = self.executable_path
+        self._browser = await self._playwright.chromium.launch(**launch_options)
+        self._browser.on("disconnected", lambda _: logger.warning("Mermaid browser disconnected"))
+
+        pages = await asyncio.gather(*(self._new_page() for _ in range(self.pool_size)))
+        for page in pages:
+            self._pages.put_nowait(page)
+
+    async def _new_page(self):
+        """Open a page with mermaid.js loaded"""
+        page = await self._browser.new_page()
+        page.on("crash", self._on_crash)
+        await page.set_content('<!DOCTYPE html><html><body><div id="container"></div></body></html>')
+        script_path = self._resolve_mermaid_js()
+        if script_path:
+            await page.add_script_tag(path=script_path)
+        else:
+            await page.add_script_tag(url=MERMAID_CDN_URL)
+        await page.wait_for_function("typeof window.mermaid !== 'undefined'")
+        return page
+
+    def _on_crash(self, page):
+        """Mark a page whose renderer crashed so it is replaced when released"""
+        logger.error("Mermaid render page crashed")
+        self._crashed.add(page)
+
+    async def _replace_page(self, page):
+        """Close a broken page and put a fresh one in the pool"""
+        browser = self._browser
+        self._crashed.discard(page)
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception:
+            pass
+        try:
+            if browser is not None and browser.is_connected():
+                new_page = await self._new_page()
+                if self._owns(new_page):
+                    self._pages.put_nowait(new_page)
+        except Exception as e:
+            logger.error(f"Failed to replace Mermaid render page: {e}")
+
+    def _owns(self, page) -> bool:
+        """True if the page belongs to the current browser"""
+        return self._browser is not None and page.context.browser is self._browser
+
+    async def _restart(self):
+        """Relaunch the browser after a crash"""
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return  # Another caller already restarted it
+            self.restarts += 1
+            await self._close_browser()
+            try:
+                await self._launch()
+            except Exception as e:
+                self._started = False
+                self._disabled_reason = str(e)
+                raise BrowserUnavailableError(f"Browser restart failed: {e}") from e
+
+    async def _close_browser(self):
+        """Close browser and playwright driver, ignoring errors"""
+        while not self._pages.empty():
+            self._pages.get_nowait()
+        self._crashed.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def _resolve_mermaid_js(self) -> Optional[str]:
+        """Find a local mermaid.min.js"""
+        candidates = [self.mermaid_js_path] if self.mermaid_js_path else []
+        candidates.extend(DEFAULT_MERMAID_JS_PATHS)
+        for candidate in candidates:
+            if candidate and Path(candidate).exists():
+                return candidate
+        return None
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        """Strip Playwright's call log from evaluation errors"""
+        message = str(error).split("\n=====", 1)[0].strip()
+        return f"Mermaid rendering failed: {message}"
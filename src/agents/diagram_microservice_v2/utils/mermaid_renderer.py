@@ -1,7 +1,9 @@
 """
 Mermaid Renderer Module
 
-Renders Mermaid diagrams to SVG using the Mermaid CLI.
+Renders Mermaid diagrams to SVG. Uses the persistent headless-browser
+service (utils.mermaid_browser) when available and falls back to spawning
+the Mermaid CLI per diagram. Rendered output is cached (utils.render_cache).
 """
 
 import asyncio
@@ -13,6 +15,8 @@ from pathlib import Path
 import subprocess
 
 from utils.logger import setup_logger
+from utils.mermaid_browser import MermaidBrowserService, BrowserUnavailableError
+from utils.render_cache import SVGRenderCache, render_cache_key
 
 logger = setup_logger(__name__)
 
@@ -20,9 +24,44 @@ logger = setup_logger(__name__)
 class MermaidRenderer:
     """Renders Mermaid diagrams to SVG format"""
     
-    def __init__(self):
+    def __init__(self, settings=None):
         self.mmdc_path = "mmdc"  # Assumes mmdc is in PATH
         self._check_mermaid_cli()
+        
+        self.browser = None
+        if settings is None or getattr(settings, 'mermaid_browser_render', True):
+            self.browser = MermaidBrowserService(
+                pool_size=getattr(settings, 'mermaid_browser_pages', 4),
+                render_timeout=getattr(settings, 'mermaid_render_timeout', 10.0),
+                max_queue=getattr(settings, 'mermaid_render_queue', 100),
+                mermaid_js_path=getattr(settings, 'mermaid_js_path', None)
+            )
+        
+        self.cache = None
+        cache_size = getattr(settings, 'mermaid_svg_cache_size', 256)
+        if cache_size > 0:
+            self.cache = SVGRenderCache(
+                max_entries=cache_size,
+                disk_dir=getattr(settings, 'mermaid_svg_cache_dir', None)
+            )
+    
+    async def start(self):
+        """Start the browser render service (renders fall back to mmdc if it cannot start)"""
+        if self.browser:
+            await self.browser.start()
+    
+    async def stop(self):
+        """Stop the browser render service"""
+        if self.browser:
+            await self.browser.stop()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get renderer metrics"""
+        return {
+            "backend": "browser" if self.browser and self.browser.available else "cli",
+            "browser": self.browser.get_metrics() if self.browser else None,
+            "svg_cache": self.cache.get_statistics() if self.cache else None
+        }
     
     def _check_mermaid_cli(self):
         """Check if Mermaid CLI is available"""
@@ -51,6 +90,55 @@ class MermaidRenderer:
         """
         Render Mermaid code to SVG
         
+        Args:
+            mermaid_code: Mermaid diagram code
+            theme: Theme configuration
+            width: SVG width
+            height: SVG height
+            
+        Returns:
+            SVG string (cleaned; served from cache when already rendered)
+        """
+        
+        config = self._create_mermaid_config(theme)
+        cache_key = None
+        if self.cache:
+            cache_key = render_cache_key(mermaid_code, config, width, height)
+            cached_svg = await self.cache.get(cache_key)
+            if cached_svg is not None:
+                logger.debug(f"SVG cache hit for key: {cache_key[:8]}...")
+                return cached_svg
+        
+        svg = None
+        if self.browser and self.browser.available:
+            try:
+                svg_content = await self.browser.render(
+                    mermaid_code,
+                    config,
+                    width=width,
+                    height=height
+                )
+                svg = self._clean_svg(svg_content)
+            except BrowserUnavailableError as e:
+                logger.warning(f"Browser renderer unavailable, using Mermaid CLI: {e}")
+        
+        if svg is None:
+            svg = await self.render_with_cli(mermaid_code, theme, width, height)
+        
+        if cache_key:
+            await self.cache.set(cache_key, svg)
+        return svg
+    
+    async def render_with_cli(
+        self,
+        mermaid_code: str,
+        theme: Optional[Dict[str, Any]] = None,
+        width: int = 800,
+        height: int = 600
+    ) -> str:
+        """
+        Render Mermaid code to SVG by spawning the Mermaid CLI
+        
         Args:
             mermaid_code: Mermaid diagram code
             theme: Theme configuration
@@ -277,7 +365,8 @@ async def get_mermaid_renderer() -> MermaidRenderer:
     """Get or create the singleton Mermaid renderer"""
     global _renderer_instance
     if _renderer_instance is None:
-        _renderer_instance = MermaidRenderer()
+        from config import get_settings
+        _renderer_instance = MermaidRenderer(get_settings())
     return _renderer_instance
 
 
@@ -301,7 +390,7 @@ async def render_mermaid_to_svg(
     renderer = await get_mermaid_renderer()
     
     try:
-        # Try to render with Mermaid CLI
+        # Try to render on the server (browser service or Mermaid CLI)
         svg = await renderer.render_to_svg(mermaid_code, theme)
         logger.info("Mermaid diagram rendered successfully")
         return svg
@@ -13,6 +13,7 @@ import asyncio
 from typing import Dict, Any, List, Tuple, Optional
 import google.generativeai as genai
 from utils.logger import setup_logger
+from utils.llm_client import generate_content
 
 logger = setup_logger(__name__)
 
@@ -102,9 +103,10 @@ class MermaidValidator:
         try:
             prompt = self._build_gantt_fix_prompt(code, basic_issues)
             
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt
+            response = await generate_content(
+                self.model,
+                prompt,
+                self.settings
             )
             
             fixed_code = self._extract_mermaid_from_response(response.text)
@@ -0,0 +1,163 @@
+"""
+Rendered SVG Cache
+
+Caches the cleaned SVG output of Mermaid rendering so the same source is
+only rendered (and cleaned) once. Entries are keyed on the
+whitespace-normalized Mermaid code, the Mermaid config derived from the
+theme, and the output size.
+
+Tiers:
+- memory: LRU of up to max_entries SVG strings
+- disk:   optional directory of <key>.svg files shared across restarts
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def normalize_mermaid_code(mermaid_code: str) -> str:
+    """
+    Normalize Mermaid code for cache keys.
+
+    Trailing whitespace, blank lines and line endings are dropped; leading
+    indentation is kept because some diagram types (mindmap) depend on it.
+    """
+    lines = [line.rstrip() for line in mermaid_code.strip().splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+def render_cache_key(
+    mermaid_code: str,
+    config: Dict[str, Any],
+    width: int,
+    height: int
+) -> str:
+    """
+    Build the cache key for a render.
+
+    Args:
+        mermaid_code: Mermaid diagram code
+        config: Mermaid config (from MermaidRenderer._create_mermaid_config)
+        width: SVG width
+        height: SVG height
+
+    Returns:
+        Hex SHA-256 key
+    """
+    raw = json.dumps(
+        [normalize_mermaid_code(mermaid_code), config, width, height],
+        sort_keys=True
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SVGRenderCache:
+    """
+    Two-tier (memory LRU + optional disk) cache of rendered SVG strings
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None):
+        """
+        Args:
+            max_entries: Maximum SVGs held in memory
+            disk_dir: Directory for the disk tier (None disables it)
+        """
+        self.max_entries = max_entries
+        self.memory: OrderedDict[str, str] = OrderedDict()
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a rendered SVG.
+
+        Args:
+            key: Key from render_cache_key
+
+        Returns:
+            Cleaned SVG or None
+        """
+        svg = self.memory.get(key)
+        if svg is not None:
+            self.memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return svg
+
+        if self.disk_dir:
+            svg = await asyncio.to_thread(self._read, key)
+            if svg is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, svg)
+                return svg
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, svg: str):
+        """
+        Store a rendered SVG in both tiers.
+
+        Args:
+            key: Key from render_cache_key
+            svg: Cleaned SVG
+        """
+        self._remember(key, svg)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write, key, svg)
+            except OSError as e:
+                logger.warning(f"Failed to write SVG cache entry {key[:8]}...: {e}")
+
+    def clear(self):
+        """Clear the memory tier"""
+        self.memory.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / total, 2) if total > 0 else 0,
+            "current_size": len(self.memory),
+            "max_entries": self.max_entries,
+            "disk_enabled": self.disk_dir is not None
+        }
+
+    def _remember(self, key: str, svg: str):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self.memory[key] = svg
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _read(self, key: str) -> Optional[str]:
+        path = self.disk_dir / f"{key}.svg"
+        try:
+            return path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, svg: str):
+        path = self.disk_dir / f"{key}.svg"
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(svg, encoding="utf-8")
+        os.replace(tmp_path, path)
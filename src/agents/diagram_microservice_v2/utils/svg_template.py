@@ -0,0 +1,114 @@
+"""
+Pre-tokenized SVG Templates
+
+A template is split once, at startup, into literal segments and slots:
+
+- text slots:  every occurrence of the template's placeholder labels
+- color slots: every hex color in the template
+
+Filling a template then replaces slot values in a copy of the segment list
+and joins it, instead of rescanning the whole SVG with str.replace for every
+placeholder and color.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+_HEX_COLOR = r'#[0-9a-fA-F]{6}'
+
+
+class CompiledSVGTemplate:
+    """
+    An SVG template tokenized into literal segments, text slots and color slots
+    """
+
+    def __init__(self, name: str, source: str, placeholders: List[str]):
+        """
+        Args:
+            name: Template name (diagram type)
+            source: Raw SVG template
+            placeholders: Placeholder labels, in data point order
+        """
+        self.name = name
+        self.source = source
+        self.placeholders = placeholders
+
+        self._parts: List[str] = []
+        # (index in _parts, placeholder index, text to keep when unfilled)
+        self._text_slots: List[Tuple[int, int, str]] = []
+        # (index in _parts, original color)
+        self._color_slots: List[Tuple[int, str]] = []
+        self._tokenize()
+
+    def _tokenize(self):
+        # Split placeholders ("Central\nHub") match either as continuous text
+        # or as separate ">part<" text nodes
+        alternatives: Dict[str, Tuple[int, str, str, str]] = {}
+        for index, placeholder in enumerate(self.placeholders):
+            if not placeholder:
+                continue
+            if "\n" in placeholder:
+                parts = placeholder.split("\n")
+                alternatives.setdefault("".join(parts), (index, "".join(parts), "", ""))
+                for part in parts:
+                    alternatives.setdefault(f">{part}<", (index, part, ">", "<"))
+            else:
+                alternatives.setdefault(placeholder, (index, placeholder, "", ""))
+
+        # Longest first, so a placeholder never matches inside a longer one
+        texts = sorted(alternatives, key=len, reverse=True)
+        pattern = re.compile(
+            "|".join([re.escape(text) for text in texts] + [_HEX_COLOR])
+        )
+
+        position = 0
+        for match in pattern.finditer(self.source):
+            self._parts.append(self.source[position:match.start()])
+            position = match.end()
+            token = match.group(0)
+            slot = alternatives.get(token)
+            if slot is None:
+                self._color_slots.append((len(self._parts), token))
+                self._parts.append(token)
+            else:
+                index, default, prefix, suffix = slot
+                if prefix:
+                    self._parts.append(prefix)
+                self._text_slots.append((len(self._parts), index, default))
+                self._parts.append(default)
+                if suffix:
+                    self._parts.append(suffix)
+        self._parts.append(self.source[position:])
+
+    @property
+    def slot_count(self) -> int:
+        """Number of text and color slots"""
+        return len(self._text_slots) + len(self._color_slots)
+
+    def fill(
+        self,
+        labels: List[str],
+        colors: Optional[Dict[str, str]] = None
+    ) -> str:
+        """
+        Fill the template.
+
+        Args:
+            labels: Label per placeholder, in order; missing or empty labels
+                leave the placeholder text in place
+            colors: Optional replacement per template color (exact spelling)
+
+        Returns:
+            Filled SVG content
+        """
+        parts = self._parts.copy()
+        label_count = len(labels)
+        for part_index, placeholder_index, default in self._text_slots:
+            if placeholder_index < label_count and labels[placeholder_index]:
+                parts[part_index] = labels[placeholder_index]
+        if colors:
+            for part_index, color in self._color_slots:
+                replacement = colors.get(color)
+                if replacement:
+                    parts[part_index] = replacement
+        return "".join(parts)
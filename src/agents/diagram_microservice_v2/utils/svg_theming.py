@@ -0,0 +1,240 @@
+"""
+Compiled SVG Theming
+
+Applies a smart color theme to an SVG template in a single scan. The scan
+covers the template color mapping and the design clean-ups the SVG agent
+applies on top of it:
+
+- gradient fills become solid theme colors and gradient definitions are dropped
+- strokes of filled shapes take the shape's fill color (no borders)
+- title and subtitle text elements are removed
+- text gets black or white fill depending on its background
+
+Compiled themes are cached by (primary, secondary, accent, scheme), so the
+palette and color map are built once per theme rather than per request.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from utils.color_utils import (
+    MonochromaticTheme,
+    SmartColorTheme,
+    build_color_lookup,
+    get_contrast_color
+)
+
+# Everything the pipeline rewrites, in one alternation; text between matches
+# is copied through unchanged
+_TOKEN_PATTERN = re.compile(
+    r'(?P<gradient><(?P<gradient_kind>linear|radial)Gradient[^>]*>.*?</(?P=gradient_kind)Gradient>)'
+    r'|(?P<title><text[^>]*id="[^"]*_title"[^>]*>.*?</text>\s*)'
+    r'|(?P<subtitle><text[^>]*y="[789]\d"[^>]*font-size="1[234]"[^>]*>.*?</text>\s*)'
+    r'|(?P<caption><text[^>]*>(?:(?!</text>).)*?'
+    r'(?:Quarterly Milestones|Impact vs Effort|Analysis).*?</text>\s*)'
+    r'|(?P<text><text[^>]*>)'
+    r'|(?P<shape><(?:rect|circle|path|polygon|ellipse)[^>]*>)'
+    r'|(?P<defs_open><defs>)'
+    r'|(?P<defs_close></defs>)'
+    r'|(?P<gradient_fill>fill="url\(#[^)]+\)")'
+    r'|(?P<color>#[0-9a-fA-F]{6})',
+    re.DOTALL
+)
+
+_HEX_COLOR = re.compile(r'#[0-9a-fA-F]{6}')
+_GRADIENT_FILL = re.compile(r'fill="url\(#[^)]+\)"')
+_SHAPE_FILL = re.compile(r'<(?:rect|circle|path|polygon|ellipse)[^>]*fill="(#[0-9a-fA-F]{6})"')
+_STROKE_ATTR = re.compile(r'stroke="[^"]*"')
+_ID_THEN_FILL = re.compile(r'<(?:rect|circle|path|polygon)[^>]*id="([^"]+)"[^>]*fill="(#[0-9a-fA-F]{6})"')
+_FILL_THEN_ID = re.compile(r'<(?:rect|circle|path|polygon)[^>]*fill="(#[0-9a-fA-F]{6})"[^>]*id="([^"]+)"')
+_TEXT_X = re.compile(r'x="(\d+)"')
+_TEXT_Y = re.compile(r'y="(\d+)"')
+_FILL_ATTR = re.compile(r'fill="[^"]*"')
+
+
+class CompiledSVGTheme:
+    """
+    A color theme with its replacement tables precomputed
+
+    Instances are immutable and shared between requests; use
+    get_compiled_theme() to obtain one.
+    """
+
+    def __init__(self, theme):
+        """
+        Args:
+            theme: SmartColorTheme or MonochromaticTheme to compile
+        """
+        self.theme = theme
+        self.palette = theme.palette
+        self.color_lookup = build_color_lookup(theme.color_map)
+
+        # Gradient fills are flattened by cycling through these in document order
+        primary = theme.palette['primary']
+        secondary = theme.palette['secondary']
+        accent = theme.palette['accent']
+        self.gradient_colors = (
+            primary[min(2, len(primary) - 1)],
+            secondary[min(2, len(secondary) - 1)],
+            accent[min(1, len(accent) - 1)],
+            primary[min(1, len(primary) - 1)]
+        )
+
+    def apply(self, svg_content: str) -> str:
+        """
+        Theme an SVG and apply the design clean-ups in one scan.
+
+        Args:
+            svg_content: SVG with template colors and text already filled in
+
+        Returns:
+            Themed SVG content
+        """
+        parts: List[str] = []
+        text_tag_indexes: List[int] = []
+        id_fills: List[Tuple[str, str]] = []
+        fill_ids: List[Tuple[str, str]] = []
+        gradient_count = 0
+        defs_start: Optional[int] = None
+        position = 0
+
+        def next_gradient_color(match) -> str:
+            nonlocal gradient_count
+            color = self.gradient_colors[gradient_count % 4]
+            gradient_count += 1
+            return f'fill="{color}"'
+
+        for match in _TOKEN_PATTERN.finditer(svg_content):
+            parts.append(svg_content[position:match.start()])
+            position = match.end()
+            kind = match.lastgroup
+            token = match.group(kind)
+
+            if kind == "color":
+                parts.append(self.color_lookup.get(token, token))
+            elif kind in ("shape", "text"):
+                tag = self._map_colors(token)
+                if 'fill="url(' in tag:
+                    tag = _GRADIENT_FILL.sub(next_gradient_color, tag)
+                if kind == "shape":
+                    tag = self._match_stroke_to_fill(tag)
+                    id_fills.extend(_ID_THEN_FILL.findall(tag))
+                    fill_ids.extend(_FILL_THEN_ID.findall(tag))
+                else:
+                    text_tag_indexes.append(len(parts))
+                parts.append(tag)
+            elif kind == "gradient_fill":
+                parts.append(next_gradient_color(match))
+            elif kind == "defs_open":
+                defs_start = len(parts)
+                parts.append(token)
+            elif kind == "defs_close":
+                if defs_start is not None and not "".join(parts[defs_start + 1:]).strip():
+                    # Only gradients were defined; drop the now-empty <defs>
+                    del parts[defs_start:]
+                else:
+                    parts.append(token)
+                defs_start = None
+            else:
+                # Gradient definitions and titles are dropped, but gradient
+                # fills inside them still advance the color cycle
+                gradient_count += token.count('fill="url(')
+
+        parts.append(svg_content[position:])
+
+        # Text colors depend on shapes anywhere in the document, so they are
+        # resolved once the scan has seen every shape
+        element_colors: Dict[str, str] = {}
+        for elem_id, color in id_fills:
+            element_colors[elem_id] = color
+        for color, elem_id in fill_ids:
+            element_colors[elem_id] = color
+        backgrounds = [
+            (elem_id.replace('_fill', '_text'), elem_id.replace('_fill', ''), color)
+            for elem_id, color in element_colors.items()
+        ]
+        for index in text_tag_indexes:
+            parts[index] = self._color_text_tag(parts[index], backgrounds)
+
+        return "".join(parts)
+
+    def _map_colors(self, fragment: str) -> str:
+        lookup = self.color_lookup
+        return _HEX_COLOR.sub(lambda m: lookup.get(m.group(0), m.group(0)), fragment)
+
+    @staticmethod
+    def _match_stroke_to_fill(tag: str) -> str:
+        """Give a filled shape a stroke of the same color (no visible border)"""
+        if 'stroke=' not in tag:
+            return tag
+        fill = _SHAPE_FILL.match(tag)
+        if not fill:
+            return tag
+        return _STROKE_ATTR.sub(f'stroke="{fill.group(1)}"', tag)
+
+    @staticmethod
+    def _color_text_tag(text_tag: str, backgrounds: List[Tuple[str, str, str]]) -> str:
+        """Set a black or white fill on a text tag based on its background"""
+        # Default to white background if it can't be determined
+        bg_color = "#ffffff"
+        if _TEXT_X.search(text_tag) and _TEXT_Y.search(text_tag):
+            # Heuristic: the text's id or attributes reference its shape's id
+            for text_id, bare_id, color in backgrounds:
+                if text_id in text_tag or bare_id in text_tag:
+                    bg_color = color
+                    break
+
+        text_color = _contrast_color(bg_color)
+        if 'fill=' in text_tag:
+            return _FILL_ATTR.sub(f'fill="{text_color}"', text_tag)
+        return text_tag[:-1] + f' fill="{text_color}">'
+
+
+@lru_cache(maxsize=1024)
+def _contrast_color(background: str) -> str:
+    return get_contrast_color(background)
+
+
+@lru_cache(maxsize=128)
+def _compile_theme(
+    primary: str,
+    secondary: Optional[str],
+    accent: Optional[str],
+    color_scheme: str
+) -> CompiledSVGTheme:
+    if color_scheme == "monochromatic":
+        theme = MonochromaticTheme(primary)
+    else:
+        theme = SmartColorTheme(primary, secondary, accent, color_scheme="complementary")
+    return CompiledSVGTheme(theme)
+
+
+def get_compiled_theme(
+    primary: str,
+    secondary: Optional[str] = None,
+    accent: Optional[str] = None,
+    color_scheme: str = "complementary"
+) -> CompiledSVGTheme:
+    """
+    Get the cached compiled theme for a set of theme colors.
+
+    Args:
+        primary: Primary color
+        secondary: Secondary color (complementary scheme only)
+        accent: Accent color (complementary scheme only)
+        color_scheme: "monochromatic" or "complementary"
+
+    Returns:
+        Shared CompiledSVGTheme
+    """
+    color_scheme = str(getattr(color_scheme, "value", color_scheme)).lower()
+    if color_scheme == "monochromatic":
+        # Monochromatic themes only use the primary color
+        secondary = accent = None
+    return _compile_theme(
+        primary.lower(),
+        secondary.lower() if secondary else None,
+        accent.lower() if accent else None,
+        color_scheme
+    )
@@ -12,6 +12,7 @@ Date: 2024
 Version: 1.0
 """
 
+import copy
 import logging
 from typing import Dict, Any, List, Optional
 from pathlib import Path
@@ -44,6 +45,8 @@ class SVGDiagramAgent:
     def __init__(self):
         """Initialize the SVG diagram agent."""
         self.template_base = Path(__file__).parent / "templates"
+        # Parsed templates, keyed by path; copied per request before editing
+        self._template_trees: Dict[str, ET.Element] = {}
         try:
             self.agent = self._create_agent()
         except Exception as e:
@@ -185,13 +188,17 @@ class SVGDiagramAgent:
         context: SVGContext
     ) -> str:
         """Apply the template specification to generate SVG."""
-        # Load template
-        tree = ET.parse(template_path)
-        root = tree.getroot()
+        # Load template (parsed once, then copied so edits don't leak between requests)
+        root = copy.deepcopy(self._load_template_tree(template_path))
+        
+        # Index elements by id in one walk instead of a tree search per id
+        elements_by_id = {}
+        for elem in root.findall(".//*[@id]"):
+            elements_by_id.setdefault(elem.get('id'), elem)
         
         # Apply color replacements first to determine text colors
         for element_id, color in spec.color_replacements.items():
-            elem = root.find(f".//*[@id='{element_id}']")
+            elem = elements_by_id.get(element_id)
             if elem is not None:
                 elem.set('fill', color)
                 # Also set stroke if it exists
@@ -201,7 +208,7 @@ class SVGDiagramAgent:
         # Apply text replacements
         wrapped_elements = set()  # Track which elements we wrapped
         for element_id, text in spec.text_replacements.items():
-            elem = root.find(f".//*[@id='{element_id}']")
+            elem = elements_by_id.get(element_id)
             if elem is not None:
                 # Handle text elements
                 if elem.tag.endswith('text'):
@@ -259,7 +266,7 @@ class SVGDiagramAgent:
         
         # Apply style overrides
         for element_id, styles in spec.style_overrides.items():
-            elem = root.find(f".//*[@id='{element_id}']")
+            elem = elements_by_id.get(element_id)
             if elem is not None:
                 style_str = "; ".join([f"{k}: {v}" for k, v in styles.items()])
                 elem.set('style', style_str)
@@ -272,6 +279,15 @@ class SVGDiagramAgent:
         
         return svg_str
     
+    def _load_template_tree(self, template_path: Path) -> ET.Element:
+        """Parse a template once and keep its root element."""
+        key = str(template_path)
+        root = self._template_trees.get(key)
+        if root is None:
+            root = ET.parse(template_path).getroot()
+            self._template_trees[key] = root
+        return root
+    
     def _clean_svg_namespaces(self, svg_str: str) -> str:
         """Clean up SVG namespaces for better compatibility."""
         # Remove namespace prefixes
@@ -3,21 +3,27 @@ Director Agent for managing presentation creation workflow.
 """
 import os
 import json
-from typing import Union
-from pydantic_ai import Agent
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic_ai import Agent, NativeOutput, PromptedOutput
+from pydantic_ai.messages import TextPart, ToolCallPart
 from pydantic_ai.settings import ModelSettings
 from pydantic_ai.exceptions import ModelHTTPError
 from pydantic_ai.models.google import GoogleModel, GoogleModelSettings
 from pydantic_ai.providers.google import GoogleProvider
 from src.models.agents import (
     StateContext, ClarifyingQuestions, ConfirmationPlan, 
-    PresentationStrawman, Slide
+    PresentationStrawman, Slide, RefinedSlides
 )
 from src.utils.logger import setup_logger
 from src.utils.logfire_config import instrument_agents
 from src.utils.context_builder import ContextBuilder
 from src.utils.token_tracker import TokenTracker
+from src.utils.metrics_store import get_metrics_store
+from src.utils.token_counter import get_token_counter
 from src.utils.asset_formatter import AssetFormatter
+from src.utils.strawman_stream import StrawmanStreamParser
+from src.utils.refinement_planner import plan_refinement
 
 logger = setup_logger(__name__)
 
@@ -57,9 +63,13 @@ class DirectorAgent:
         self._init_agents_with_embedded_prompts(model, model_turbo)
         
         # Initialize context builder and token tracker
-        self.context_builder = ContextBuilder()
+        self.token_counter = get_token_counter()
+        self.context_builder = ContextBuilder(self.token_counter, settings.CONTEXT_TOKEN_BUDGET)
         self.token_tracker = TokenTracker()
         
+        # Process-wide latency, token and streaming metrics
+        self.metrics = get_metrics_store()
+        
         logger.info(f"DirectorAgent initialized with {type(model).__name__ if hasattr(model, '__class__') else model} model")
     
     def _load_modular_prompt(self, state: str) -> str:
@@ -77,7 +87,8 @@ class DirectorAgent:
             'ASK_CLARIFYING_QUESTIONS': 'ask_clarifying_questions.md',
             'CREATE_CONFIRMATION_PLAN': 'create_confirmation_plan.md',
             'GENERATE_STRAWMAN': 'generate_strawman.md',
-            'REFINE_STRAWMAN': 'refine_strawman.md'
+            'REFINE_STRAWMAN': 'refine_strawman.md',
+            'REFINE_SLIDES': 'refine_slides.md'
         }
         
         state_file = state_prompt_map.get(state)
@@ -99,14 +110,26 @@ class DirectorAgent:
         plan_prompt = self._load_modular_prompt("CREATE_CONFIRMATION_PLAN")
         strawman_prompt = self._load_modular_prompt("GENERATE_STRAWMAN")
         refine_prompt = self._load_modular_prompt("REFINE_STRAWMAN")
+        refine_slides_prompt = self._load_modular_prompt("REFINE_SLIDES")
+        
+        # System prompts for each state (token counts are cached by the counter)
+        self.state_prompts = {
+            "PROVIDE_GREETING": greeting_prompt,
+            "ASK_CLARIFYING_QUESTIONS": questions_prompt,
+            "CREATE_CONFIRMATION_PLAN": plan_prompt,
+            "GENERATE_STRAWMAN": strawman_prompt,
+            "REFINE_STRAWMAN": refine_prompt,
+            "REFINE_SLIDES": refine_slides_prompt
+        }
         
-        # Store system prompt tokens for each state (for tracking)
-        self.state_prompt_tokens = {
-            "PROVIDE_GREETING": len(greeting_prompt) // 4,
-            "ASK_CLARIFYING_QUESTIONS": len(questions_prompt) // 4,
-            "CREATE_CONFIRMATION_PLAN": len(plan_prompt) // 4,
-            "GENERATE_STRAWMAN": len(strawman_prompt) // 4,
-            "REFINE_STRAWMAN": len(refine_prompt) // 4
+        # Structured output of each state; its schema is part of every request
+        self.state_output_types = {
+            "PROVIDE_GREETING": str,
+            "ASK_CLARIFYING_QUESTIONS": ClarifyingQuestions,
+            "CREATE_CONFIRMATION_PLAN": ConfirmationPlan,
+            "GENERATE_STRAWMAN": PresentationStrawman,
+            "REFINE_STRAWMAN": PresentationStrawman,
+            "REFINE_SLIDES": RefinedSlides
         }
         
         # Initialize greeting agent
@@ -145,6 +168,22 @@ class DirectorAgent:
             name="director_strawman"
         )
         
+        # Streaming strawman agent: the strawman is produced as JSON text
+        # rather than a tool call, so slides can be picked out as they arrive
+        # (Gemini streams native structured output; other providers are
+        # prompted for JSON)
+        if isinstance(model_turbo, GoogleModel):
+            stream_output = NativeOutput(PresentationStrawman)
+        else:
+            stream_output = PromptedOutput(PresentationStrawman)
+        self.strawman_stream_agent = Agent(
+            model=model_turbo,
+            output_type=stream_output,
+            system_prompt=strawman_prompt,
+            retries=2,
+            name="director_strawman_stream"
+        )
+        
         # Initialize refine strawman agent (NEW)
         self.refine_strawman_agent = Agent(
             model=model_turbo,
@@ -153,49 +192,39 @@ class DirectorAgent:
             retries=2,
             name="director_refine_strawman"
         )
+        
+        # Initialize targeted slide refinement agent (regenerates only the
+        # slides the feedback refers to)
+        self.refine_slides_agent = Agent(
+            model=model_turbo,
+            output_type=RefinedSlides,
+            system_prompt=refine_slides_prompt,
+            retries=2,
+            name="director_refine_slides"
+        )
     
-    async def process(self, state_context: StateContext) -> Union[str, ClarifyingQuestions, 
-                                                                   ConfirmationPlan, PresentationStrawman]:
+    async def process(self, state_context: StateContext,
+                      prepared: Optional[Tuple[str, int]] = None) -> Union[str, ClarifyingQuestions,
+                                                                           ConfirmationPlan, PresentationStrawman]:
         """
         Process based on current state following PydanticAI best practices.
         
         Args:
             state_context: The current state context
+            prepared: Result of prepare_user_prompt for this turn, if the
+                caller already built (and tracked) the prompt
             
         Returns:
             Response appropriate for the current state
         """
         try:
-            session_id = state_context.session_data.get("id", "unknown")
-            
-            # Build context for the user prompt (system prompts are already embedded in agents)
-            context, user_prompt = self.context_builder.build_context(
-                state=state_context.current_state,
-                session_data={
-                    "id": session_id,
-                    "user_initial_request": state_context.session_data.get("user_initial_request"),
-                    "clarifying_answers": state_context.session_data.get("clarifying_answers"),
-                    "conversation_history": state_context.conversation_history
-                },
-                user_intent=state_context.user_intent.dict() if hasattr(state_context, 'user_intent') and state_context.user_intent else None
-            )
+            if state_context.current_state == "REFINE_STRAWMAN":
+                response = await self._refine_targeted_slides(state_context)
+                if response is not None:
+                    return response
             
-            # Track token usage
-            user_tokens = len(user_prompt) // 4
-            system_tokens = self.state_prompt_tokens.get(state_context.current_state, 0)
-            
-            await self.token_tracker.track_modular(
-                session_id,
-                state_context.current_state,
-                user_tokens,
-                system_tokens
-            )
-            
-            logger.info(
-                f"Processing - State: {state_context.current_state}, "
-                f"User Tokens: {user_tokens}, System Tokens: {system_tokens}, "
-                f"Total: {user_tokens + system_tokens}"
-            )
+            user_prompt, prompt_tokens = prepared or await self.prepare_user_prompt(state_context)
+            start = time.perf_counter()
             
             # Route to appropriate agent based on state
             if state_context.current_state == "PROVIDE_GREETING":
@@ -252,6 +281,7 @@ class DirectorAgent:
             else:
                 raise ValueError(f"Unknown state: {state_context.current_state}")
             
+            self._track_run(state_context.current_state, start, result, prompt_tokens)
             return response
                 
         except ModelHTTPError as e:
@@ -271,6 +301,243 @@ class DirectorAgent:
                 logger.error(f"Error processing state {state_context.current_state}: {error_msg}")
             raise
     
+    @property
+    def state_prompt_tokens(self) -> Dict[str, int]:
+        """System prompt tokens for each state."""
+        return {
+            state: self.token_counter.count_static(prompt)
+            for state, prompt in self.state_prompts.items()
+        }
+    
+    async def prepare_user_prompt(self, state_context: StateContext) -> Tuple[str, int]:
+        """
+        Build the user prompt for the current state and track its token usage.
+        
+        Returns:
+            The user prompt and the prompt tokens (system + user) of the call
+        """
+        session_id = state_context.session_data.get("id", "unknown")
+        
+        # Build context for the user prompt (system prompts are already embedded in agents)
+        context, user_prompt = self.context_builder.build_context(
+            state=state_context.current_state,
+            session_data={
+                "id": session_id,
+                "user_initial_request": state_context.session_data.get("user_initial_request"),
+                "clarifying_answers": state_context.session_data.get("clarifying_answers"),
+                "presentation_strawman": state_context.session_data.get("presentation_strawman"),
+                "user_message": state_context.session_data.get("user_message"),
+                "conversation_summary": state_context.session_data.get("conversation_summary"),
+                "conversation_history": state_context.conversation_history
+            },
+            user_intent=state_context.user_intent.dict() if hasattr(state_context, 'user_intent') and state_context.user_intent else None
+        )
+        
+        # Track token usage
+        user_tokens = self.token_counter.count(user_prompt)
+        system_tokens = self.token_counter.count_static(self.state_prompts[state_context.current_state])
+        
+        await self.token_tracker.track_modular(
+            session_id,
+            state_context.current_state,
+            user_tokens,
+            system_tokens
+        )
+        
+        # Context size before and after budgeted compaction
+        report = context.get("context_tokens")
+        if report:
+            await self.token_tracker.track_baseline(
+                session_id, state_context.current_state, report["before"], system_tokens
+            )
+            await self.token_tracker.track_optimized(
+                session_id, state_context.current_state, report["after"], system_tokens
+            )
+        
+        logger.info(
+            f"Processing - State: {state_context.current_state}, "
+            f"User Tokens: {user_tokens}, System Tokens: {system_tokens}, "
+            f"Total: {user_tokens + system_tokens}"
+        )
+        
+        return user_prompt, user_tokens + system_tokens
+    
+    async def _refine_targeted_slides(self, state_context: StateContext):
+        """
+        Refine only the slides the feedback targets and splice them into the stored strawman.
+        
+        Returns:
+            The refined PresentationStrawman, or None when the refinement needs
+            a full regeneration (global change, no target found, or the
+            targeted run failed)
+        """
+        session_id = state_context.session_data.get("id", "unknown")
+        strawman = state_context.session_data.get("presentation_strawman")
+        feedback = state_context.session_data.get("user_message")
+        if not isinstance(strawman, dict) or not feedback:
+            return None
+        
+        plan = plan_refinement(feedback, strawman)
+        logger.info(f"Refinement plan: {plan}")
+        if not plan.is_targeted:
+            return None
+        
+        user_prompt = self.context_builder.build_slide_refinement_prompt(strawman, plan.target_slides, feedback)
+        user_tokens = self.token_counter.count(user_prompt)
+        system_tokens = self.token_counter.count_static(self.state_prompts["REFINE_SLIDES"])
+        await self.token_tracker.track_modular(session_id, "REFINE_STRAWMAN", user_tokens, system_tokens)
+        logger.info(
+            f"Refining {len(plan.target_slides)} of {len(strawman['slides'])} slides - "
+            f"User Tokens: {user_tokens}, System Tokens: {system_tokens}"
+        )
+        
+        try:
+            start = time.perf_counter()
+            result = await self.refine_slides_agent.run(
+                user_prompt,
+                model_settings=ModelSettings(
+                    temperature=0.4,
+                    max_tokens=min(8000, 2000 * len(plan.target_slides))
+                )
+            )
+            self._track_run("REFINE_SLIDES", start, result, user_tokens + system_tokens)
+            refined = {slide.slide_id: slide for slide in result.output.slides}
+            missing = [slide_id for slide_id in plan.target_slides if slide_id not in refined]
+            if missing:
+                raise ValueError(f"refined slides missing {missing}")
+            
+            slides = []
+            for slide_data in strawman["slides"]:
+                slide = refined.get(slide_data.get("slide_id"))
+                if slide is None:
+                    slides.append(Slide.model_validate(slide_data))
+                else:
+                    # Position stays with the stored strawman
+                    slide.slide_number = slide_data.get("slide_number", slide.slide_number)
+                    slides.append(AssetFormatter.format_slide(slide))
+            response = PresentationStrawman.model_validate({**strawman, "slides": slides})
+        except Exception as e:
+            logger.warning(f"Targeted refinement failed, regenerating the full strawman: {e}")
+            return None
+        
+        logger.info(f"Refined slides {plan.target_slides} ({plan.reason})")
+        return response
+    
+    async def stream_strawman(
+        self,
+        state_context: StateContext,
+        prepared: Optional[Tuple[str, int]] = None
+    ) -> AsyncIterator[Union[Slide, PresentationStrawman]]:
+        """
+        Generate the strawman, yielding each slide as soon as the model has produced it.
+        
+        Slides are validated and asset-formatted one at a time. The last item
+        yielded is always the complete, formatted PresentationStrawman.
+        
+        Args:
+            state_context: The current state context (GENERATE_STRAWMAN)
+            prepared: Result of prepare_user_prompt for this turn, if the
+                caller already built (and tracked) the prompt
+            
+        Yields:
+            Slide objects in order, then the PresentationStrawman
+        """
+        user_prompt, prompt_tokens = prepared or await self.prepare_user_prompt(state_context)
+        
+        logger.info("Streaming strawman presentation")
+        parser = StrawmanStreamParser()
+        start = time.perf_counter()
+        first_slide_ms = None
+        streamed_ids = set()
+        
+        async with self.strawman_stream_agent.run_stream(
+            user_prompt,
+            model_settings=ModelSettings(temperature=0.4, max_tokens=8000)
+        ) as result:
+            async for message, is_last in result.stream_responses(debounce_by=None):
+                for slide_data in self._extract_stream_slides(parser, message.parts, is_last):
+                    try:
+                        slide = AssetFormatter.format_slide(Slide.model_validate(slide_data))
+                    except Exception as e:
+                        # Left for the final strawman to deliver
+                        logger.debug(f"Streamed slide failed validation: {e}")
+                        continue
+                    if first_slide_ms is None:
+                        first_slide_ms = (time.perf_counter() - start) * 1000
+                        logger.info(f"First strawman slide streamed after {first_slide_ms:.0f}ms")
+                    streamed_ids.add(slide.slide_id)
+                    yield slide
+            
+            response = AssetFormatter.format_strawman(await result.get_output())
+            self._track_run(state_context.current_state, start, result, prompt_tokens, response)
+        
+        total_ms = (time.perf_counter() - start) * 1000
+        
+        # Slides the parser could not pick out of (or validate from) the stream
+        # are sent with the final strawman
+        for slide in response.slides:
+            if slide.slide_id in streamed_ids:
+                continue
+            if first_slide_ms is None:
+                first_slide_ms = total_ms
+            streamed_ids.add(slide.slide_id)
+            yield slide
+        
+        self.metrics.observe("strawman_first_slide_ms", first_slide_ms or total_ms,
+                             description="Time until the first streamed strawman slide")
+        self.metrics.observe("strawman_stream_ms", total_ms,
+                             description="Total time to stream a strawman")
+        logger.info(
+            f"Streamed strawman with {len(response.slides)} slides - "
+            f"first slide: {first_slide_ms or total_ms:.0f}ms, total: {total_ms:.0f}ms"
+        )
+        
+        yield response
+    
+    @staticmethod
+    def _extract_stream_slides(parser: StrawmanStreamParser, parts, is_last: bool) -> List[dict]:
+        """Feed the latest streamed response parts to the parser."""
+        for part in parts:
+            if isinstance(part, TextPart):
+                return parser.feed(part.content)
+            if isinstance(part, ToolCallPart):
+                if isinstance(part.args, dict):
+                    return parser.feed_object(part.args, final=is_last)
+                return parser.feed(part.args or "")
+        return []
+    
+    def _track_run(self, state: str, start: float, result, prompt_tokens: int, output=None) -> None:
+        """
+        Record latency and tokens of a model run, preferring provider usage.
+        
+        The provider's prompt token count also calibrates the local counter,
+        compared against the prompts plus the output schema the provider counts.
+        """
+        latency_ms = (time.perf_counter() - start) * 1000
+        usage = result.usage()
+        schema_tokens = self.token_counter.count_schema(self.state_output_types.get(state))
+        self.token_counter.observe_usage(
+            prompt_tokens + schema_tokens, usage.input_tokens, getattr(usage, "requests", 1)
+        )
+        output_tokens = usage.output_tokens
+        if not output_tokens:
+            # Providers that report no usage: count the output locally
+            output_tokens = self.token_counter.count_output(result.output if output is None else output)
+        self.token_tracker.track_response(state, latency_ms, output_tokens, usage.input_tokens or None)
+    
+    def get_streaming_report(self) -> dict:
+        """Get time-to-first-slide statistics for streamed strawmen."""
+        histograms = self.metrics.histograms
+        first = histograms.get("strawman_first_slide_ms", {}).get("all")
+        total = histograms.get("strawman_stream_ms", {}).get("all")
+        if first is None:
+            return {"count": 0}
+        return {
+            "count": first.count,
+            "time_to_first_slide_ms": first.summary(),
+            "total_ms": total.summary()
+        }
+    
     def get_token_report(self, session_id: str) -> dict:
         """Get token usage report for a specific session."""
         return self.token_tracker.get_savings_report(session_id)
@@ -10,6 +10,9 @@ Features:
 - Background removal for icons and symbols
 - Base64 encoding
 - Transparent PNG support
+- Shared client with bounded concurrency and per-request timeout
+- Offline stub provider (IMAGE_PROVIDER=stub)
+- Result cache with deduplication of identical in-flight requests
 
 Author: AI Assistant
 Date: 2024
@@ -17,9 +20,14 @@ Version: 1.0
 """
 
 import os
+import zlib
 import base64
+import struct
+import asyncio
+import hashlib
 import logging
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 
 # Load environment variables from .env file
@@ -56,6 +64,9 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("rembg not installed. Advanced background removal will not be available.")
 
+from src.storage.image_store import get_image_store, image_cache_key
+from src.utils.asset_channel import asset_url
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -211,6 +222,305 @@ def should_remove_background(archetype: str) -> bool:
     return archetype in bg_removal_archetypes
 
 
+# ============================================================================
+# IMAGE PROVIDERS
+# ============================================================================
+
+# Maximum number of Imagen calls in flight per process
+IMAGEN_MAX_CONCURRENCY = int(os.getenv("IMAGEN_MAX_CONCURRENCY", "4"))
+
+# Per-request timeout for a single Imagen call (seconds)
+IMAGEN_TIMEOUT_SECONDS = float(os.getenv("IMAGEN_TIMEOUT_SECONDS", "60"))
+
+# Worker threads for CPU-bound post-processing (base64, background removal)
+IMAGE_POSTPROCESS_WORKERS = int(os.getenv("IMAGE_POSTPROCESS_WORKERS", "2"))
+
+
+class ImageProviderError(Exception):
+    """Raised when an image provider cannot produce image bytes."""
+    pass
+
+
+class ImagenProvider:
+    """
+    Imagen provider backed by a single shared google.genai client.
+    
+    The client (and its underlying HTTP connection pool) is created once and
+    reused for every request. Calls go through the SDK's async surface
+    (client.aio) when available so the event loop is never blocked.
+    """
+    
+    name = "imagen"
+    
+    def __init__(self, api_key: str):
+        self.client = google_genai.Client(api_key=api_key)
+    
+    async def generate(self, prompt: str, aspect_ratio: str) -> Dict[str, Any]:
+        """
+        Generate a single image.
+        
+        Returns:
+            Dictionary with image_bytes and metadata
+        """
+        try:
+            image_bytes = await self._generate_images(
+                model='imagen-3.0-generate-002',
+                prompt=prompt,
+                config=genai_types.GenerateImagesConfig(
+                    number_of_images=1,
+                    aspect_ratio=aspect_ratio,
+                )
+            )
+            return {
+                "image_bytes": image_bytes,
+                "metadata": {
+                    "model": "imagen-3.0-generate-002",
+                    "aspect_ratio": aspect_ratio,
+                    "prompt_used": prompt
+                }
+            }
+        except ImageProviderError:
+            raise
+        except Exception as e:
+            logger.error(f"Imagen 3 generation failed: {e}")
+            
+            # Try Imagen 4 if Imagen 3 is not available
+            if "imagen-3" not in str(e).lower() and "not found" not in str(e).lower():
+                raise
+            
+            logger.info("Trying Imagen 4 instead...")
+            try:
+                image_bytes = await self._generate_images(
+                    model='imagen-4.0-generate-preview-06-06',
+                    prompt=prompt,
+                    config=genai_types.GenerateImagesConfig(
+                        number_of_images=1,
+                    )
+                )
+            except Exception as e2:
+                logger.error(f"Imagen 4 fallback failed: {e2}")
+                raise ImageProviderError(f"Both Imagen 3 and 4 failed: {str(e)}")
+            
+            return {
+                "image_bytes": image_bytes,
+                "metadata": {
+                    "model": "imagen-4.0-generate-preview",
+                    "aspect_ratio": "default",
+                    "prompt_used": prompt
+                }
+            }
+    
+    async def _generate_images(self, **kwargs) -> bytes:
+        """Call generate_images without blocking the event loop."""
+        aio = getattr(self.client, "aio", None)
+        if aio is not None:
+            response = await aio.models.generate_images(**kwargs)
+        else:
+            # Older SDKs have no async surface; keep the call off the loop
+            response = await asyncio.to_thread(self.client.models.generate_images, **kwargs)
+        
+        if not getattr(response, 'generated_images', None):
+            logger.warning("No generated_images in response")
+            raise ImageProviderError("No images generated")
+        
+        logger.info(f"Successfully generated {len(response.generated_images)} image(s)")
+        generated_image = response.generated_images[0]
+        
+        if not hasattr(generated_image, 'image'):
+            logger.error("No image attribute found in generated_image")
+            raise ImageProviderError("No image data in response")
+        
+        if not hasattr(generated_image.image, 'image_bytes'):
+            logger.error("No image_bytes attribute found")
+            raise ImageProviderError("Unable to extract image bytes")
+        
+        return generated_image.image.image_bytes
+
+
+class StubImageProvider:
+    """
+    Offline provider that returns a deterministic solid-color PNG.
+    
+    Enabled with IMAGE_PROVIDER=stub. Useful for tests and local development
+    without network access or API keys.
+    """
+    
+    name = "stub"
+    
+    # Output sizes per aspect ratio (kept small on purpose)
+    SIZES = {
+        "16:9": (64, 36),
+        "9:16": (36, 64),
+        "4:3": (64, 48),
+        "3:4": (48, 64),
+        "1:1": (48, 48),
+    }
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+    
+    async def generate(self, prompt: str, aspect_ratio: str) -> Dict[str, Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        width, height = self.SIZES.get(aspect_ratio, self.SIZES["16:9"])
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return {
+            "image_bytes": _solid_png(width, height, digest[0], digest[1], digest[2]),
+            "metadata": {
+                "model": "stub",
+                "aspect_ratio": aspect_ratio,
+                "prompt_used": prompt
+            }
+        }
+
+
+def _solid_png(width: int, height: int, r: int, g: int, b: int) -> bytes:
+    """Encode a solid-color RGB PNG using only the standard library."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+    
+    row = b"\x00" + bytes((r, g, b)) * width
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+_provider = None
+_provider_key = None
+_provider_override = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop = None
+_postprocess_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_image_provider():
+    """
+    Return the process-wide image provider, creating it on first use.
+    
+    Returns:
+        Provider instance, or None if Imagen is not usable (check logs)
+    """
+    global _provider, _provider_key
+    
+    if _provider_override is not None:
+        return _provider_override
+    
+    if os.getenv("IMAGE_PROVIDER", "imagen").lower() == "stub":
+        if not isinstance(_provider, StubImageProvider):
+            _provider = StubImageProvider(latency=float(os.getenv("IMAGE_STUB_LATENCY", "0")))
+            _provider_key = None
+        return _provider
+    
+    if not GOOGLE_GENAI_AVAILABLE:
+        logger.error("google-genai not installed. Run: pip install google-genai")
+        return None
+    
+    api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        logger.error("GOOGLE_API_KEY not found in environment")
+        return None
+    
+    # Reuse the client (and its connection pool) unless the key changed
+    if not isinstance(_provider, ImagenProvider) or _provider_key != api_key:
+        logger.info("Creating shared google.genai client for Imagen")
+        _provider = ImagenProvider(api_key)
+        _provider_key = api_key
+    return _provider
+
+
+def set_image_provider(provider) -> None:
+    """Override the process-wide image provider (None restores the default)."""
+    global _provider_override
+    _provider_override = provider
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Concurrency limiter for Imagen calls, bound to the running loop."""
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(IMAGEN_MAX_CONCURRENCY)
+        _semaphore_loop = loop
+    return _semaphore
+
+
+def _get_postprocess_executor() -> ThreadPoolExecutor:
+    global _postprocess_executor
+    if _postprocess_executor is None:
+        _postprocess_executor = ThreadPoolExecutor(
+            max_workers=IMAGE_POSTPROCESS_WORKERS,
+            thread_name_prefix="image-postprocess"
+        )
+    return _postprocess_executor
+
+
+def _remove_background_for_archetype(image_bytes: bytes, archetype: str) -> Optional[bytes]:
+    """
+    CPU-bound background removal. Runs in the post-processing executor.
+    
+    Returns:
+        Transparent PNG bytes, or None if not applicable or removal failed
+    """
+    if not should_remove_background(archetype):
+        return None
+    
+    logger.info(f"Applying background removal for archetype: {archetype}")
+    try:
+        # For minimalist vector art, use simple white removal
+        if archetype == 'minimalist_vector_art':
+            transparent_bytes = remove_white_background(image_bytes)
+        else:
+            # For other archetypes, use advanced removal
+            transparent_bytes = remove_background_advanced(image_bytes)
+        logger.info("Background removal successful")
+        return transparent_bytes
+    except Exception as e:
+        logger.error(f"Background removal failed: {e}")
+        return None
+
+
+def _encode_image_result(generation: Dict[str, Any], archetype: str, inline: bool) -> Dict[str, Any]:
+    """
+    Build the public result for a generation record.
+    
+    Base64 encoding is CPU-bound, so inline results are built in the
+    post-processing executor. Asset references (image_id / image_url) are
+    included whenever the image store holds the bytes.
+    """
+    image_bytes = generation["image_bytes"]
+    transparent_bytes = generation["transparent_bytes"]
+    
+    result = {
+        "success": True,
+        "metadata": dict(generation["metadata"])
+    }
+    
+    if generation.get("image_id"):
+        result["image_id"] = generation["image_id"]
+        result["image_url"] = asset_url(generation["image_id"])
+        result["mime_type"] = "image/png"
+        if generation.get("transparent_id"):
+            result["transparent_id"] = generation["transparent_id"]
+            result["transparent_url"] = asset_url(generation["transparent_id"])
+    
+    if inline or not generation.get("image_id"):
+        logger.info(f"Image bytes extracted: {len(image_bytes)} bytes")
+        result["base64"] = base64.b64encode(image_bytes).decode('utf-8')
+        if transparent_bytes is not None:
+            result["transparent_base64"] = base64.b64encode(transparent_bytes).decode('utf-8')
+    
+    if should_remove_background(archetype):
+        result["has_transparent"] = transparent_bytes is not None
+    
+    return result
+
+
 class ImageBuildAgent:
     """Agent for building images using Imagen 3."""
     
@@ -234,165 +544,153 @@ async def _generate_image_with_imagen3_impl(
 
 
 async def generate_image_with_imagen3(
-    image_spec: ImageContentV4
+    image_spec: ImageContentV4,
+    timeout: Optional[float] = None,
+    inline: bool = True
 ) -> Dict[str, Any]:
     """
     Call Google's imagen-3.0-generate-002 API using google.genai SDK.
     
+    Results are cached in the image store keyed by prompt + archetype +
+    aspect ratio, and identical concurrent requests share one generation.
+    At most IMAGEN_MAX_CONCURRENCY calls run at once; the rest wait their
+    turn. The generation is cancelled once every caller waiting on it has
+    been cancelled.
+    
+    Args:
+        image_spec: Image specification
+        timeout: Per-request timeout in seconds (default IMAGEN_TIMEOUT_SECONDS)
+        inline: Include base64 payloads. When False and the image store is
+            enabled, only asset references (image_id / image_url) are returned.
+    
     Returns:
         Dictionary with image data and metadata
     """
-    try:
-        # Check if google.genai is available
+    provider = get_image_provider()
+    if provider is None:
         if not GOOGLE_GENAI_AVAILABLE:
-            logger.error("google-genai not installed. Run: pip install google-genai")
             return {"success": False, "error": "google-genai not installed"}
-        
-        # Check for API key
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            logger.error("GOOGLE_API_KEY not found in environment")
-            return {"success": False, "error": "GOOGLE_API_KEY or GEMINI_API_KEY not configured"}
-        
-        logger.info("Using google.genai for Imagen 3 generation")
-        
+        return {"success": False, "error": "GOOGLE_API_KEY or GEMINI_API_KEY not configured"}
+    
+    timeout = IMAGEN_TIMEOUT_SECONDS if timeout is None else timeout
+    aspect_ratio = image_spec.imagen_config.get("aspectRatio", "16:9")
+    key = image_cache_key(
+        image_spec.imagen_prompt, image_spec.archetype, aspect_ratio, provider.name
+    )
+    
+    inflight = _inflight.get(key)
+    if inflight is None or inflight.abandoned:
+        inflight = _InflightGeneration(asyncio.ensure_future(
+            _generate_or_fetch(provider, image_spec, aspect_ratio, timeout, key)
+        ))
+        _inflight[key] = inflight
+        inflight.task.add_done_callback(
+            lambda _task: _inflight.pop(key, None) if _inflight.get(key) is inflight else None
+        )
+    else:
+        logger.info(f"Joining in-flight image generation {key[:12]}")
+    
+    generation = await inflight.wait()
+    if not generation.get("success"):
+        return dict(generation)
+    
+    if inline or not generation.get("image_id"):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_postprocess_executor(), _encode_image_result, generation, image_spec.archetype, True
+        )
+    return _encode_image_result(generation, image_spec.archetype, False)
+
+
+class _InflightGeneration:
+    """A shared generation task plus the number of callers awaiting it."""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False
+    
+    async def wait(self) -> Dict[str, Any]:
+        self.waiters += 1
         try:
-            # Initialize client
-            client = google_genai.Client(api_key=api_key)
-            
-            # Get aspect ratio from config
-            aspect_ratio = image_spec.imagen_config.get("aspectRatio", "16:9")
-            
-            # Generate image
+            return await asyncio.shield(self.task)
+        except asyncio.CancelledError:
+            # Only abandon the generation when nobody is left waiting for it
+            if self.waiters == 1 and not self.task.done():
+                self.abandoned = True
+                self.task.cancel()
+            raise
+        finally:
+            self.waiters -= 1
+
+
+_inflight: Dict[str, _InflightGeneration] = {}
+
+
+async def _generate_or_fetch(
+    provider,
+    image_spec: ImageContentV4,
+    aspect_ratio: str,
+    timeout: float,
+    key: str
+) -> Dict[str, Any]:
+    """
+    Serve from the image store, or generate, post-process and store.
+    
+    Returns:
+        Generation record with raw bytes and asset ids, or an error result
+    """
+    loop = asyncio.get_running_loop()
+    store = get_image_store()
+    
+    try:
+        if store is not None:
+            cached = await store.get(key)
+            if cached is not None:
+                logger.info(f"Image cache hit {key[:12]}")
+                return {
+                    "success": True,
+                    "image_bytes": cached["image_bytes"],
+                    "transparent_bytes": cached["transparent_bytes"],
+                    "image_id": cached["image_id"],
+                    "transparent_id": cached["transparent_id"],
+                    "metadata": {**cached["metadata"], "cache_hit": True}
+                }
+        
+        async with _get_semaphore():
             logger.info(f"Generating image with prompt: {image_spec.imagen_prompt[:100]}...")
-            
-            # Use the latest Imagen model
-            response = client.models.generate_images(
-                model='imagen-3.0-generate-002',
-                prompt=image_spec.imagen_prompt,
-                config=genai_types.GenerateImagesConfig(
-                    number_of_images=1,
-                    aspect_ratio=aspect_ratio,
-                )
+            generated = await asyncio.wait_for(
+                provider.generate(image_spec.imagen_prompt, aspect_ratio),
+                timeout=timeout
             )
-            
-            # Check for generated images
-            if hasattr(response, 'generated_images') and response.generated_images:
-                logger.info(f"Successfully generated {len(response.generated_images)} image(s)")
-                
-                # Extract first image
-                generated_image = response.generated_images[0]
-                
-                if hasattr(generated_image, 'image'):
-                    image_obj = generated_image.image
-                    
-                    # Get image bytes
-                    if hasattr(image_obj, 'image_bytes'):
-                        image_bytes = image_obj.image_bytes
-                        logger.info(f"Image bytes extracted: {len(image_bytes)} bytes")
-                        
-                        # Convert to base64
-                        img_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                        
-                        result = {
-                            "success": True,
-                            "base64": img_base64,
-                            "metadata": {
-                                "model": "imagen-3.0-generate-002",
-                                "aspect_ratio": aspect_ratio,
-                                "prompt_used": image_spec.imagen_prompt
-                            }
-                        }
-                        
-                        # Check if background removal should be applied
-                        if should_remove_background(image_spec.archetype):
-                            logger.info(f"Applying background removal for archetype: {image_spec.archetype}")
-                            try:
-                                # For minimalist vector art, use simple white removal
-                                if image_spec.archetype == 'minimalist_vector_art':
-                                    transparent_bytes = remove_white_background(image_bytes)
-                                else:
-                                    # For other archetypes, use advanced removal
-                                    transparent_bytes = remove_background_advanced(image_bytes)
-                                
-                                # Convert transparent version to base64
-                                transparent_base64 = base64.b64encode(transparent_bytes).decode('utf-8')
-                                result["transparent_base64"] = transparent_base64
-                                result["has_transparent"] = True
-                                logger.info("Background removal successful")
-                            except Exception as e:
-                                logger.error(f"Background removal failed: {e}")
-                                result["has_transparent"] = False
-                        
-                        return result
-                    else:
-                        logger.error("No image_bytes attribute found")
-                        return {"success": False, "error": "Unable to extract image bytes"}
-                else:
-                    logger.error("No image attribute found in generated_image")
-                    return {"success": False, "error": "No image data in response"}
-            else:
-                logger.warning("No generated_images in response")
-                return {"success": False, "error": "No images generated"}
-                
-        except Exception as e:
-            logger.error(f"Imagen 3 generation failed: {e}")
-            
-            # Try Imagen 4 if Imagen 3 fails
-            if "imagen-3" in str(e).lower() or "not found" in str(e).lower():
-                logger.info("Trying Imagen 4 instead...")
-                try:
-                    response = client.models.generate_images(
-                        model='imagen-4.0-generate-preview-06-06',
-                        prompt=image_spec.imagen_prompt,
-                        config=genai_types.GenerateImagesConfig(
-                            number_of_images=1,
-                        )
-                    )
-                    
-                    if hasattr(response, 'generated_images') and response.generated_images:
-                        generated_image = response.generated_images[0]
-                        if hasattr(generated_image.image, 'image_bytes'):
-                            image_bytes = generated_image.image.image_bytes
-                            img_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                            
-                            result = {
-                                "success": True,
-                                "base64": img_base64,
-                                "metadata": {
-                                    "model": "imagen-4.0-generate-preview",
-                                    "aspect_ratio": "default",
-                                    "prompt_used": image_spec.imagen_prompt
-                                }
-                            }
-                            
-                            # Apply background removal for Imagen 4 as well
-                            if should_remove_background(image_spec.archetype):
-                                logger.info(f"Applying background removal for archetype: {image_spec.archetype}")
-                                try:
-                                    if image_spec.archetype == 'minimalist_vector_art':
-                                        transparent_bytes = remove_white_background(image_bytes)
-                                    else:
-                                        transparent_bytes = remove_background_advanced(image_bytes)
-                                    
-                                    transparent_base64 = base64.b64encode(transparent_bytes).decode('utf-8')
-                                    result["transparent_base64"] = transparent_base64
-                                    result["has_transparent"] = True
-                                    logger.info("Background removal successful")
-                                except Exception as e:
-                                    logger.error(f"Background removal failed: {e}")
-                                    result["has_transparent"] = False
-                            
-                            return result
-                    
-                    return {"success": False, "error": "Imagen 4 also failed"}
-                    
-                except Exception as e2:
-                    logger.error(f"Imagen 4 fallback failed: {e2}")
-                    return {"success": False, "error": f"Both Imagen 3 and 4 failed: {str(e)}"}
-            
-            return {"success": False, "error": str(e)}
-            
+        
+        image_bytes = generated["image_bytes"]
+        transparent_bytes = await loop.run_in_executor(
+            _get_postprocess_executor(),
+            _remove_background_for_archetype,
+            image_bytes,
+            image_spec.archetype
+        )
+        
+        entry = {}
+        if store is not None:
+            try:
+                entry = await store.put(key, image_bytes, transparent_bytes, generated["metadata"])
+            except Exception as e:
+                logger.warning(f"Failed to cache generated image: {e}")
+        
+        return {
+            "success": True,
+            "image_bytes": image_bytes,
+            "transparent_bytes": transparent_bytes,
+            "image_id": entry.get("image"),
+            "transparent_id": entry.get("transparent"),
+            "metadata": {**generated["metadata"], "cache_hit": False}
+        }
+    
+    except asyncio.TimeoutError:
+        logger.error(f"Image generation timed out after {timeout}s")
+        return {"success": False, "error": f"Image generation timed out after {timeout}s"}
     except Exception as e:
         logger.error(f"Image generation error: {e}")
         return {"success": False, "error": str(e)}
@@ -455,20 +753,23 @@ def convert_visual_spec_to_image_content(visual_spec) -> ImageContentV4:
     )
 
 
-async def generate_image(image_spec) -> Dict[str, Any]:
+async def generate_image(image_spec, inline: bool = True) -> Dict[str, Any]:
     """
     Main entry point for image generation.
     Handles both ImageContentV4 and VisualSpec inputs.
     
     Args:
         image_spec: Either ImageContentV4 or VisualSpec object
+        inline: Include base64 payloads (set False to get asset references only)
         
     Returns:
         Dictionary with:
         - success: bool
-        - base64: Base64 encoded image (if successful)
+        - base64: Base64 encoded image (if successful and inline)
         - image_base64: Alias for base64 (for compatibility)
         - transparent_base64: Base64 encoded transparent version (if applicable)
+        - image_id / transparent_id: Asset ids in the image store (if enabled)
+        - image_url / transparent_url: Fetch URLs for the assets
         - metadata: Generation metadata
         - error: Error message (if failed)
     """
@@ -485,7 +786,7 @@ async def generate_image(image_spec) -> Dict[str, Any]:
             # Convert VisualSpec to ImageContentV4
             image_spec = convert_visual_spec_to_image_content(image_spec)
     
-    result = await generate_image_with_imagen3(image_spec)
+    result = await generate_image_with_imagen3(image_spec, inline=inline)
     
     # Add image_base64 alias for compatibility
     if result.get('success') and 'base64' in result:
@@ -2,6 +2,7 @@
 Intent Router for classifying user messages.
 """
 import json
+import time
 from typing import Dict, Any
 from pydantic_ai import Agent
 from pydantic_ai.settings import ModelSettings
@@ -9,9 +10,21 @@ from pydantic_ai.models.google import GoogleModel, GoogleModelSettings
 from pydantic_ai.providers.google import GoogleProvider
 from src.models.agents import UserIntent
 from src.utils.logger import setup_logger
+from src.utils.metrics_store import get_metrics_store
+from src.utils.intent_rules import action_ids_from_context, classify_by_action, classify_by_rules
 
 logger = setup_logger(__name__)
 
+# Fast path statistics across all IntentRouter instances
+_metrics: Dict[str, Any] = {
+    "total": 0,
+    "local": 0,
+    "llm": 0,
+    "rules": {},
+    "local_ms": 0.0,
+    "llm_ms": 0.0
+}
+
 
 class IntentRouter:
     """Classifies user intent for natural conversation flow."""
@@ -44,6 +57,12 @@ class IntentRouter:
             name="intent_router"
         )
         logger.info(f"IntentRouter initialized with {type(model).__name__ if hasattr(model, '__class__') else model}")
+        
+        # Local fast path for button clicks and obvious messages
+        self.fast_path_enabled = settings.INTENT_FAST_PATH
+        self.local_confidence = settings.INTENT_LOCAL_CONFIDENCE
+        # Shared by all routers (one per connection), so stats are process-wide
+        self.metrics = _metrics
     
     def _get_router_prompt(self) -> str:
         """Get the system prompt for intent classification."""
@@ -127,6 +146,20 @@ Note: extracted_info should be null when no extra information needs to be extrac
         Returns:
             Classified UserIntent
         """
+        self.metrics["total"] += 1
+        current_state = context.get('current_state', 'PROVIDE_GREETING')
+        
+        if self.fast_path_enabled:
+            start = time.perf_counter()
+            intent, rule = self._classify_locally(user_message, current_state, context)
+            if intent is not None and intent.confidence >= self.local_confidence:
+                self.metrics["local"] += 1
+                self.metrics["local_ms"] += (time.perf_counter() - start) * 1000
+                self.metrics["rules"][rule] = self.metrics["rules"].get(rule, 0) + 1
+                logger.info(f"Classified intent locally ({rule}): {intent.intent_type} (confidence: {intent.confidence})")
+                return intent
+        
+        start = time.perf_counter()
         try:
             # Build prompt with context - provide structured input format
             prompt = f"""{{
@@ -142,6 +175,8 @@ Note: extracted_info should be null when no extra information needs to be extrac
             
             intent = result.data
             
+            self.metrics["llm"] += 1
+            self.metrics["llm_ms"] += (time.perf_counter() - start) * 1000
             logger.info(f"Classified intent: {intent.intent_type} (confidence: {intent.confidence}, extracted_info: {intent.extracted_info})")
             
             return intent
@@ -153,4 +188,49 @@ Note: extracted_info should be null when no extra information needs to be extrac
                 intent_type="Ask_Help_Or_Question",
                 confidence=0.5,
                 extracted_info=None  # Changed to match new type
-            )
\ No newline at end of file
+            )
+    
+    @staticmethod
+    def _classify_locally(user_message: str, current_state: str, context: Dict[str, Any]):
+        """Try button actions, then state rules. Returns (intent, rule name) or (None, None)."""
+        intent = classify_by_action(action_ids_from_context(user_message, context), current_state)
+        if intent is not None:
+            return intent, "action"
+        
+        matched = classify_by_rules(user_message, current_state)
+        if matched is not None:
+            return matched
+        return None, None
+    
+    @staticmethod
+    def get_metrics() -> Dict[str, Any]:
+        """
+        Get fast path statistics for this process.
+        
+        Latency saved is estimated from the average LLM classification time.
+        """
+        total = _metrics["total"]
+        local = _metrics["local"]
+        llm = _metrics["llm"]
+        avg_llm_ms = _metrics["llm_ms"] / llm if llm else None
+        return {
+            "total": total,
+            "local": local,
+            "llm": llm,
+            "local_fraction": round(local / total, 3) if total else 0.0,
+            "rules": dict(_metrics["rules"]),
+            "avg_local_ms": round(_metrics["local_ms"] / local, 3) if local else None,
+            "avg_llm_ms": round(avg_llm_ms, 1) if avg_llm_ms is not None else None,
+            "estimated_ms_saved": round(local * avg_llm_ms) if avg_llm_ms is not None else None
+        }
+
+
+def _prometheus_samples():
+    """Fast path statistics as (name, labels, value) samples for /metrics."""
+    yield "intent_classifications", {"path": "local"}, _metrics["local"]
+    yield "intent_classifications", {"path": "llm"}, _metrics["llm"]
+    for rule, count in _metrics["rules"].items():
+        yield "intent_rule_matches", {"rule": rule}, count
+
+
+get_metrics_store().register_collector(_prometheus_samples)
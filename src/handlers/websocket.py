@@ -1,39 +1,36 @@
 """
 WebSocket handler for Deckster.
 """
-print("[DEBUG] Starting websocket.py imports")
 import json
-import asyncio
 import random
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from fastapi import WebSocket
 
-print("[DEBUG] Importing logger")
 from src.utils.logger import setup_logger
 
-print("[DEBUG] Importing agents")
 from src.agents.intent_router import IntentRouter
 from src.agents.director import DirectorAgent
 from src.agents.content_orchestrator import ContentOrchestrator
 
-print("[DEBUG] Importing utils")
 from src.utils.session_manager import SessionManager
 from src.utils.message_packager import MessagePackager
 from src.utils.streamlined_packager import StreamlinedMessagePackager
 
-print("[DEBUG] Importing storage and models")
 from src.storage.supabase import get_supabase_client
-from src.models.agents import UserIntent, StateContext
+from src.storage.image_store import get_image_store
+from src.utils.asset_channel import encode_asset_frame
+from src.utils.speculation import SpeculativeRun
+from src.utils.context_budget import SUMMARY_STATES, update_conversation_summary
+from src.utils.tracing import TurnTrace
+from src.utils.outbound_writer import OutboundWriter
+from src.models.agents import UserIntent, StateContext, PresentationStrawman
 from src.models.websocket_messages import StreamlinedMessage
 
-print("[DEBUG] Importing workflows and settings")
 from src.workflows.state_machine import WorkflowOrchestrator
 from config.settings import get_settings
 
-print("[DEBUG] Setting up logger")
 logger = setup_logger(__name__)
-print("[DEBUG] websocket.py imports complete")
 
 
 class WebSocketHandler:
@@ -41,52 +38,37 @@ class WebSocketHandler:
     
     def __init__(self):
         """Initialize handler components."""
-        print("[DEBUG WebSocketHandler] Starting __init__")
         logger.info("Initializing WebSocketHandler...")
         
         # Get settings
-        print("[DEBUG WebSocketHandler] Getting settings")
         self.settings = get_settings()
-        print(f"[DEBUG WebSocketHandler] Settings loaded: streamlined={self.settings.USE_STREAMLINED_PROTOCOL}")
         logger.info(f"Settings loaded: streamlined={self.settings.USE_STREAMLINED_PROTOCOL}, percentage={self.settings.STREAMLINED_PROTOCOL_PERCENTAGE}")
         
         # Initialize Supabase client
-        print("[DEBUG WebSocketHandler] Initializing Supabase client")
         try:
             self.supabase = get_supabase_client()
-            print("[DEBUG WebSocketHandler] Supabase client created")
             logger.info("Supabase client initialized successfully")
         except Exception as e:
-            print(f"[DEBUG WebSocketHandler] Failed to initialize Supabase: {str(e)}")
             logger.error(f"Failed to initialize Supabase client: {str(e)}", exc_info=True)
             raise
         
         # Initialize components
-        print("[DEBUG WebSocketHandler] Initializing components")
         logger.info("Initializing handler components...")
         
-        print("[DEBUG WebSocketHandler] Creating IntentRouter")
         self.intent_router = IntentRouter()
         
-        print("[DEBUG WebSocketHandler] Creating DirectorAgent")
         self.director = DirectorAgent()
         
-        print("[DEBUG WebSocketHandler] Creating SessionManager")
         self.sessions = SessionManager(self.supabase)
         
-        print("[DEBUG WebSocketHandler] Creating MessagePackager")
         self.packager = MessagePackager()
         
-        print("[DEBUG WebSocketHandler] Creating StreamlinedMessagePackager")
         self.streamlined_packager = StreamlinedMessagePackager()
         
-        print("[DEBUG WebSocketHandler] Creating WorkflowOrchestrator")
         self.workflow = WorkflowOrchestrator()
         
-        print("[DEBUG WebSocketHandler] Creating ContentOrchestrator for content generation")
         self.content_orchestrator = None  # Will be initialized when needed
         
-        print("[DEBUG WebSocketHandler] All components initialized")
         logger.info("WebSocketHandler initialized successfully with streamlined protocol: %s", 
                    self.settings.USE_STREAMLINED_PROTOCOL)
     
@@ -117,43 +99,71 @@ class WebSocketHandler:
         hash_value = hash(session_id) % 100
         return hash_value < self.settings.STREAMLINED_PROTOCOL_PERCENTAGE
     
-    async def _send_messages(self, websocket: WebSocket, messages: List[StreamlinedMessage]):
+    async def _send_messages(self, websocket: OutboundWriter, messages: List[StreamlinedMessage]):
         """
-        Send multiple streamlined messages with small delays.
+        Send multiple streamlined messages as one batch.
+        
+        They are written back to back (or as a single batch frame); any
+        pacing between them is left to the client's animation.
         
         Args:
-            websocket: WebSocket connection
+            websocket: Outbound writer of the connection
             messages: List of streamlined messages to send
         """
-        for i, message in enumerate(messages):
-            # Use model_dump with mode='json' for proper serialization
-            message_data = message.model_dump(mode='json')
-            logger.debug(f"Sending message {i+1}/{len(messages)}: {message_data.get('type')}")
-            await websocket.send_json(message_data)
-            
-            # Add small delay between messages for better UX
-            if i < len(messages) - 1:
-                await asyncio.sleep(0.1)
+        # Use model_dump with mode='json' for proper serialization
+        batch = [message.model_dump(mode='json') for message in messages]
+        logger.debug("Sending %d messages: %s", len(batch), [message.get('type') for message in batch])
+        await websocket.send_batch(batch)
+    
+    async def _send_asset(self, websocket: OutboundWriter, update: Dict[str, Any]):
+        """
+        Deliver a generated image over the binary side-channel.
+        
+        The JSON stream only ever carries the asset reference; the bytes go
+        in a separate binary frame (see src/utils/asset_channel.py). If the
+        bytes are not available the client can still fetch the asset URL.
+        
+        Args:
+            websocket: Outbound writer of the connection
+            update: image_ready update from the content orchestrator
+        """
+        image = update.get("image")
+        if not isinstance(image, dict) or not image.get("asset_id"):
+            return
+        
+        store = get_image_store()
+        data = await store.get_blob(image["asset_id"]) if store else None
+        if data is None:
+            logger.warning(f"Asset {image['asset_id']} not in image store; client must fetch {image['url']}")
+            return
+        
+        await websocket.send_bytes(encode_asset_frame(
+            {
+                "asset_id": image["asset_id"],
+                "mime_type": image.get("mime_type", "image/png"),
+                "url": image["url"],
+                "slide_id": update.get("slide_id"),
+                "session_id": update.get("session_id")
+            },
+            data
+        ))
     
     async def send_message(self, message: Dict[str, Any]):
         """
         Send a message through the current WebSocket connection.
         Used by Director OUT for progressive updates.
         """
-        logger.info(f"[DEBUG WebSocketHandler] send_message called with type: {message.get('type', 'unknown')}")
-        
         if hasattr(self, 'current_websocket'):
-            logger.info(f"[DEBUG WebSocketHandler] Has current_websocket attribute: {self.current_websocket is not None}")
             if self.current_websocket:
                 try:
                     await self.current_websocket.send_json(message)
-                    logger.info(f"[DEBUG WebSocketHandler] Successfully sent {message['type']} message")
+                    logger.debug("Sent %s message", message.get('type', 'unknown'))
                 except Exception as e:
-                    logger.error(f"[DEBUG WebSocketHandler] Failed to send message: {e}", exc_info=True)
+                    logger.error(f"Failed to send message: {e}", exc_info=True)
             else:
-                logger.error("[DEBUG WebSocketHandler] current_websocket is None")
+                logger.error("send_message called while current_websocket is None")
         else:
-            logger.error("[DEBUG WebSocketHandler] No current_websocket attribute")
+            logger.error("send_message called before a connection was stored")
     
     async def handle_connection(self, websocket: WebSocket, session_id: str, user_id: str):
         """
@@ -164,27 +174,28 @@ class WebSocketHandler:
             session_id: The session ID from query parameter
             user_id: The user ID from query parameter
         """
-        print(f"[DEBUG handle_connection] Started with session_id={session_id}, user_id={user_id}")
+        
+        # All outbound frames go through one ordered, bounded queue
+        writer = OutboundWriter(
+            websocket,
+            queue_size=self.settings.WS_SEND_QUEUE_SIZE,
+            send_timeout=self.settings.WS_SEND_TIMEOUT,
+            batch_frames=self.settings.WS_BATCH_FRAMES,
+            reveal_interval_ms=self.settings.WS_REVEAL_INTERVAL_MS
+        )
         
         try:
-            # Store user_id and websocket for use in other methods
+            # Store user_id and writer for use in other methods
             self.current_user_id = user_id
-            self.current_websocket = websocket
-            print(f"[DEBUG handle_connection] Set current_user_id={self.current_user_id}")
-            logger.info(f"[DEBUG WebSocketHandler] WebSocket connection stored: {self.current_websocket is not None}")
-        
-            print("[DEBUG handle_connection] About to log info message")
+            self.current_websocket = writer
+            
             logger.info(f"Starting handle_connection for user: {user_id}, session: {session_id}")
-            print("[DEBUG handle_connection] Logger info called successfully")
             
             # Get or create session with user_id
-            print("[DEBUG handle_connection] About to get_or_create session")
             try:
                 session = await self.sessions.get_or_create(session_id, user_id)
-                print(f"[DEBUG handle_connection] Session created/retrieved: state={session.current_state}")
                 logger.info(f"Session {session_id} initialized for user {user_id} with state: {session.current_state}")
             except Exception as session_error:
-                print(f"[DEBUG handle_connection] Session error: {str(session_error)}")
                 logger.error(f"Failed to create/get session {session_id} for user {user_id}: {str(session_error)}", exc_info=True)
                 raise  # Re-raise the exception to properly handle the error
             
@@ -192,7 +203,7 @@ class WebSocketHandler:
             if session.current_state == "PROVIDE_GREETING":
                 logger.info(f"Session {session_id} is new, sending greeting")
                 try:
-                    await self._send_greeting(websocket, session)
+                    await self._send_greeting(writer, session)
                     logger.info(f"Greeting sent successfully for session {session_id}")
                 except Exception as greeting_error:
                     logger.error(f"Failed to send greeting for session {session_id}: {str(greeting_error)}", exc_info=True)
@@ -204,31 +215,30 @@ class WebSocketHandler:
             logger.info(f"Entering message loop for session {session_id}")
             while True:
                 # Receive message
-                logger.debug(f"Waiting for message from session {session_id}")
                 data = await websocket.receive_text()
-                logger.debug(f"Received raw data: {data[:100]}...")  # First 100 chars
+                trace = TurnTrace(session_id, self.settings.TRACE_SAMPLE_RATE, self.settings.TRACE_SLOW_TURN_MS)
+                trace.phase("receive")
                 message = json.loads(data)
-                logger.info(f"Received message for session {session_id}: type={message.get('type')}, data keys={list(message.get('data', {}).keys())}")
+                logger.debug("Received message for session %s: type=%s, %d bytes", session_id, message.get('type'), len(data))
                 
                 # Process message
-                await self._handle_message(websocket, session, message)
+                await self._handle_message(writer, session, message, trace)
                 
         except Exception as e:
-            print(f"[DEBUG handle_connection] Inner exception: {str(e)}")
             logger.error(f"Error in WebSocket handler for session {session_id}: {str(e)}", exc_info=True)
             # Don't try to close if already disconnected
             if websocket.client_state.value <= 2:  # CONNECTING=0, CONNECTED=1, DISCONNECTED=2
                 try:
-                    await websocket.close()
+                    await writer.close()
                 except Exception:
                     pass  # Ignore errors when closing
         except Exception as outer_e:
-            print(f"[DEBUG handle_connection] OUTER EXCEPTION: {str(outer_e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Unhandled error closing WebSocket for session {session_id}: {outer_e}", exc_info=True)
             raise
+        finally:
+            writer.stop()
     
-    async def _send_greeting(self, websocket: WebSocket, session: Any):
+    async def _send_greeting(self, websocket: OutboundWriter, session: Any):
         """Send initial greeting message."""
         logger.info(f"Starting _send_greeting for session {session.id}")
         try:
@@ -274,41 +284,50 @@ class WebSocketHandler:
             # Re-raise to ensure connection handler knows about the failure
             raise
     
-    async def _handle_message(self, websocket: WebSocket, session: Any, message: Dict[str, Any]):
+    async def _handle_message(self, websocket: OutboundWriter, session: Any, message: Dict[str, Any],
+                              trace: Optional[TurnTrace] = None):
         """
         Handle an incoming message.
         
         Args:
-            websocket: The WebSocket connection
+            websocket: Outbound writer of the connection
             session: The session object
             message: The incoming message
+            trace: Trace of this turn (phases are marked as processing goes)
         """
+        trace = trace or TurnTrace(session.id)
+        trace.set(state=session.current_state)
+        trace_status = "ok"
+        speculation = None
         try:
             # Validate we have user_id
             if not hasattr(self, 'current_user_id') or not self.current_user_id:
                 raise RuntimeError("User ID not set in handler - connection not properly initialized")
             # Extract user input
             user_input = message.get('data', {}).get('text', '')
-            logger.info(f"[DEBUG WebSocketHandler] Extracted user input: '{user_input}'")
-            logger.info(f"[DEBUG WebSocketHandler] Message data keys: {list(message.get('data', {}).keys())}")
-            logger.info(f"[DEBUG WebSocketHandler] Current session state: {session.current_state}")
+            logger.debug("User input in state %s: %r", session.current_state, user_input)
+            
+            # STEP 0: Optionally start the Director for the likely next state
+            # while the intent is being classified
+            if self.settings.SPECULATIVE_DIRECTOR and SpeculativeRun.supports(session.current_state):
+                speculation = SpeculativeRun(self.director, session.current_state, user_input, session)
             
             # STEP 1: Classify user intent - all messages go through the router
-            logger.info(f"[DEBUG WebSocketHandler] Classifying intent for text: '{user_input}' in state: {session.current_state}")
+            trace.phase("classify")
             intent = await self.intent_router.classify(
                 user_message=user_input,
                 context={
                     'current_state': session.current_state,
-                    'recent_history': session.conversation_history[-3:] if session.conversation_history else []
+                    'recent_history': session.conversation_history[-3:] if session.conversation_history else [],
+                    'frontend_actions': message.get('data', {}).get('frontend_actions') or []
                 }
             )
-            logger.info(f"[DEBUG WebSocketHandler] Intent classified as: {intent.intent_type}")
-            logger.info(f"[DEBUG WebSocketHandler] Intent confidence: {intent.confidence}")
-            logger.info(f"[DEBUG WebSocketHandler] Intent extracted_info: {intent.extracted_info}")
-            
-            logger.info(f"Classified intent: {intent.intent_type} with confidence {intent.confidence}")
+            logger.info("Classified intent: %s with confidence %s", intent.intent_type, intent.confidence)
+            logger.debug("Intent extracted_info: %s", intent.extracted_info)
+            trace.set(intent=intent.intent_type)
             
             # STEP 2: Handle intent-based actions
+            trace.phase("state")
             if intent.intent_type == "Change_Topic":
                 # Clear context and reset to questions
                 await self.sessions.clear_context(session.id, self.current_user_id)
@@ -341,7 +360,7 @@ class WebSocketHandler:
                 )
                 logger.info(f"Saved initial topic for session {session.id}: {user_input}")
                 session = await self.sessions.get_or_create(session.id, self.current_user_id)  # Refresh session
-                logger.debug(f"After refresh - user_initial_request: {session.user_initial_request}")
+                logger.debug("After refresh - user_initial_request: %s", session.user_initial_request)
                 
             elif intent.intent_type == "Submit_Clarification_Answers":
                 # Save clarifying answers
@@ -358,26 +377,39 @@ class WebSocketHandler:
                 session = await self.sessions.get_or_create(session.id, self.current_user_id)  # Refresh session
             
             # STEP 3: Determine next state BEFORE processing (for intent-based routing)
-            logger.info(f"[DEBUG WebSocketHandler] Determining next state: current={session.current_state}, intent={intent.intent_type}")
             next_state = self._determine_next_state(
                 session.current_state, 
                 intent, 
                 None,  # No response yet
                 session  # Pass session to check if questions have been asked
             )
-            logger.info(f"[DEBUG WebSocketHandler] Next state determined: {next_state}")
+            
+            if speculation is not None and not speculation.matches(intent.intent_type, next_state):
+                await speculation.discard()
+                speculation = None
             
             # Update state if it changed
             if next_state != session.current_state:
-                logger.info(f"[DEBUG WebSocketHandler] Pre-processing state change: {session.current_state} -> {next_state}")
                 await self.sessions.update_state(session.id, self.current_user_id, next_state)
                 session.current_state = next_state
-                logger.info(f"[DEBUG WebSocketHandler] State successfully changed to: {session.current_state}")
-            else:
-                logger.info(f"[DEBUG WebSocketHandler] State remains: {session.current_state}")
+            trace.set(state=session.current_state)
             
             # STEP 4: Build state context with the NEW state
-            logger.debug(f"Building StateContext - user_initial_request: {session.user_initial_request}")
+            logger.debug("Building StateContext - user_initial_request: %s", session.user_initial_request)
+            
+            # Extend the rolling summary with turns that left the recent window
+            # (only states that put it in the prompt pay for the write)
+            if session.current_state in SUMMARY_STATES:
+                summary = update_conversation_summary(session.conversation_summary, session.conversation_history or [])
+                if summary is not session.conversation_summary:
+                    await self.sessions.save_session_data(
+                        session.id,
+                        self.current_user_id,
+                        'conversation_summary',
+                        summary
+                    )
+                    session.conversation_summary = summary
+            
             state_context = StateContext(
                 current_state=session.current_state,
                 user_intent=intent,
@@ -386,7 +418,9 @@ class WebSocketHandler:
                     'user_initial_request': session.user_initial_request,
                     'clarifying_answers': session.clarifying_answers,
                     'confirmation_plan': session.confirmation_plan,
-                    'presentation_strawman': session.presentation_strawman
+                    'presentation_strawman': session.presentation_strawman,
+                    'conversation_summary': session.conversation_summary,
+                    'user_message': user_input
                 }
             )
             
@@ -398,25 +432,18 @@ class WebSocketHandler:
                     state=session.current_state
                 )
                 await websocket.send_json(pre_status.model_dump(mode='json'))
-                await asyncio.sleep(0.1)  # Small delay before processing
             
             # STEP 5: Process with Director based on NEW state and intent
             # Special handling for CONTENT_GENERATION state
-            logger.info(f"[DEBUG WebSocketHandler] About to process state: {session.current_state}")
-            logger.info(f"[DEBUG WebSocketHandler] Strawman data available: {session.presentation_strawman is not None}")
-            if session.presentation_strawman:
-                logger.info(f"[DEBUG WebSocketHandler] Strawman has {len(session.presentation_strawman.get('slides', []))} slides")
+            trace.phase("director")
             
             if session.current_state == "CONTENT_GENERATION":
-                logger.info("[DEBUG WebSocketHandler] Entering CONTENT_GENERATION state handler")
                 # Initialize Content Orchestrator if needed
                 if not self.content_orchestrator:
-                    logger.info("[DEBUG WebSocketHandler] Creating ContentOrchestrator")
                     self.content_orchestrator = ContentOrchestrator()
-                    logger.info("[DEBUG WebSocketHandler] ContentOrchestrator created")
                 
                 # Process content generation
-                logger.info(f"[DEBUG WebSocketHandler] Starting content generation for session {session.id}")
+                logger.info(f"Starting content generation for session {session.id}")
                 try:
                     # Get strawman from session
                     from src.models.agents import PresentationStrawman
@@ -456,7 +483,10 @@ class WebSocketHandler:
                                     text=f"Generated content for slide {update['slide_index'] + 1}",
                                     progress=update.get('progress', 0)
                                 )
-                                await websocket.send_json(msg.model_dump(mode='json'))
+                                # Progress can be skipped for a client that is behind
+                                await websocket.send_json(msg.model_dump(mode='json'), droppable=True)
+                            elif update["type"] == "image_ready":
+                                await self._send_asset(websocket, update)
                             elif update["type"] == "complete":
                                 response = {
                                     'status': 'complete',
@@ -476,9 +506,9 @@ class WebSocketHandler:
                             'content': result
                         }
                     
-                    logger.info(f"[DEBUG WebSocketHandler] Content generation completed")
+                    logger.info(f"Content generation completed for session {session.id}")
                 except Exception as e:
-                    logger.error(f"[DEBUG WebSocketHandler] Content generation failed: {e}", exc_info=True)
+                    logger.error(f"Content generation failed: {e}", exc_info=True)
                     # Create error response
                     response = {
                         'status': 'error',
@@ -493,12 +523,23 @@ class WebSocketHandler:
                             text=f"Content generation failed: {str(e)}"
                         )
                         await websocket.send_json(error_msg.model_dump(mode='json'))
+            elif (use_streamlined and self.settings.STREAM_STRAWMAN
+                    and session.current_state == "GENERATE_STRAWMAN"):
+                response = await self._stream_strawman(websocket, session, state_context)
+            elif speculation is not None:
+                # The speculative call was for exactly this state and input
+                try:
+                    response = await speculation.commit()
+                except Exception as e:
+                    logger.warning(f"Speculative Director call failed, processing normally: {e}")
+                    response = await self.director.process(state_context)
+                speculation = None
             else:
                 # Normal Director processing
-                logger.info(f"[DEBUG WebSocketHandler] Processing with Director for state: {session.current_state}")
                 response = await self.director.process(state_context)
             
             # Store in history
+            trace.phase("package")
             await self.sessions.add_to_history(session.id, self.current_user_id, {
                 'role': 'user',
                 'content': user_input,
@@ -514,7 +555,7 @@ class WebSocketHandler:
             if session.current_state in ["GENERATE_STRAWMAN", "REFINE_STRAWMAN"]:
                 # Check if response is a PresentationStrawman object
                 if response.__class__.__name__ == 'PresentationStrawman':
-                    logger.warning(f"[DEBUG WebSocketHandler] Detected PresentationStrawman with {len(response.slides)} slides")
+                    logger.debug("Saving strawman with %d slides", len(response.slides))
                     await self.sessions.save_session_data(
                         session.id,
                         self.current_user_id,
@@ -523,9 +564,8 @@ class WebSocketHandler:
                     )
                     # Refresh session to get updated data
                     session = await self.sessions.get_or_create(session.id, self.current_user_id)
-                    logger.warning(f"[DEBUG WebSocketHandler] Strawman saved and session refreshed")
                 else:
-                    logger.warning(f"[DEBUG WebSocketHandler] Response is not PresentationStrawman, it's {response.__class__.__name__}")
+                    logger.warning(f"Expected PresentationStrawman in {session.current_state}, got {response.__class__.__name__}")
             
             # Package and send response based on protocol
             use_streamlined = self._should_use_streamlined(session.id)
@@ -538,7 +578,9 @@ class WebSocketHandler:
                     agent_output=response,
                     context=state_context
                 )
+                trace.phase("send")
                 await self._send_messages(websocket, messages)
+                await websocket.flush()
             else:
                 # Use legacy protocol
                 ws_message = self.packager.package(
@@ -546,12 +588,17 @@ class WebSocketHandler:
                     session_id=session.id,
                     current_state=session.current_state
                 )
+                trace.phase("send")
                 await websocket.send_json(ws_message)
+                await websocket.flush()
             
             logger.info(f"Sent response for session {session.id} in state {session.current_state}")
             
         except Exception as e:
+            trace_status = "error"
             logger.error(f"Error handling message: {str(e)}", exc_info=True)
+            if speculation is not None:
+                await speculation.discard()
             # Send error message based on protocol
             use_streamlined = self._should_use_streamlined(session.id)
             
@@ -567,6 +614,32 @@ class WebSocketHandler:
                     session_id=session.id
                 )
                 await websocket.send_json(error_message)
+        finally:
+            trace.finish(trace_status)
+    
+    async def _stream_strawman(self, websocket: OutboundWriter, session: Any, state_context: StateContext):
+        """
+        Generate the strawman with the Director, sending each slide as soon as it is ready.
+        
+        Returns the complete strawman, which is then packaged and sent as usual
+        (full_update + action request). If streaming fails before any slide was
+        sent, falls back to regular non-streaming generation with the same
+        prompt, so the turn's prompt tokens are tracked once.
+        """
+        prepared = await self.director.prepare_user_prompt(state_context)
+        slides_sent = 0
+        try:
+            async for item in self.director.stream_strawman(state_context, prepared):
+                if isinstance(item, PresentationStrawman):
+                    return item
+                append = self.streamlined_packager.create_slide_append(session.id, item)
+                await websocket.send_json(append.model_dump(mode='json'))
+                slides_sent += 1
+        except Exception as e:
+            if slides_sent:
+                raise
+            logger.warning(f"Strawman streaming failed, falling back to regular generation: {e}")
+        return await self.director.process(state_context, prepared)
     
     def _determine_next_state(self, current_state: str, intent: UserIntent, 
                              response: Any, session: Any = None) -> str:
@@ -598,7 +671,6 @@ class WebSocketHandler:
         
         # Get next state from mapping
         next_state = intent_to_next_state.get(intent.intent_type, current_state)
-        logger.info(f"[DEBUG _determine_next_state] Intent: {intent.intent_type} -> Next state: {next_state}")
         
         # Log the transition
         if next_state != current_state:
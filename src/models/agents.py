@@ -116,6 +116,11 @@ class Slide(BaseModel):
         return suggestions if suggestions else None
 
 
+class RefinedSlides(BaseModel):
+    """Slides regenerated by a targeted refinement, to be spliced into the strawman."""
+    slides: List[Slide]
+
+
 class PresentationStrawman(BaseModel):
     """Simplified presentation strawman structure."""
     type: Literal["PresentationStrawman"] = "PresentationStrawman"
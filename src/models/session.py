@@ -23,5 +23,6 @@ class Session(BaseModel):
     confirmation_plan: Optional[Dict[str, Any]] = None
     presentation_strawman: Optional[Dict[str, Any]] = None
     refinement_feedback: Optional[str] = None
+    conversation_summary: Optional[Dict[str, Any]] = None  # Rolling summary of older turns
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
@@ -70,10 +70,22 @@ class SlideData(BaseModel):
 
 class SlideUpdatePayload(BaseModel):
     """Payload for slide update messages"""
-    operation: Literal["full_update", "partial_update"] = Field(..., description="Update type")
-    metadata: SlideMetadata = Field(..., description="Presentation metadata")
+    operation: Literal["full_update", "partial_update", "append"] = Field(..., description="Update type")
+    metadata: Optional[SlideMetadata] = Field(
+        None,
+        description="Presentation metadata (omitted for streamed appends, sent with the final full_update)"
+    )
     slides: List[SlideData] = Field(..., description="List of slides to update")
     affected_slides: Optional[List[str]] = Field(None, description="IDs of affected slides for partial updates")
+    slide_patches: Optional[List[Dict[str, Any]]] = Field(
+        None,
+        description="Changed fields of existing slides for partial updates (slide_id, optional from_slide_id, fields)"
+    )
+    removed_slides: Optional[List[str]] = Field(None, description="IDs of slides removed by a partial update")
+    slide_order: Optional[List[str]] = Field(
+        None,
+        description="Complete slide ID order after a partial update; only sent when the deck structure changed"
+    )
 
 
 class StatusLevel(str, Enum):
@@ -258,11 +270,14 @@ def create_action_request(
 
 def create_slide_update(
     session_id: str,
-    operation: Literal["full_update", "partial_update"],
-    metadata: Dict[str, Any],
+    operation: Literal["full_update", "partial_update", "append"],
+    metadata: Optional[Dict[str, Any]],
     slides: List[Dict[str, Any]],
     message_id: Optional[str] = None,
-    affected_slides: Optional[List[str]] = None
+    affected_slides: Optional[List[str]] = None,
+    slide_patches: Optional[List[Dict[str, Any]]] = None,
+    removed_slides: Optional[List[str]] = None,
+    slide_order: Optional[List[str]] = None
 ) -> SlideUpdate:
     """Helper function to create a slide update"""
     import uuid
@@ -271,9 +286,12 @@ def create_slide_update(
         session_id=session_id,
         payload=SlideUpdatePayload(
             operation=operation,
-            metadata=SlideMetadata(**metadata),
+            metadata=SlideMetadata(**metadata) if metadata is not None else None,
             slides=[SlideData(**slide) for slide in slides],
-            affected_slides=affected_slides
+            affected_slides=affected_slides,
+            slide_patches=slide_patches,
+            removed_slides=removed_slides,
+            slide_order=slide_order
         )
     )
 
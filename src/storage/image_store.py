@@ -0,0 +1,333 @@
+"""
+Content-addressed image store for generated images.
+
+Image bytes are stored once under the SHA-256 of their content
+(blobs/<sha256>.png). A small JSON index entry maps a generation request key
+(prompt + archetype + aspect ratio + provider) to the blob hashes of the raw
+image and its transparent variant, so repeat requests never reach Imagen.
+
+Backends:
+- local:    files under IMAGE_CACHE_DIR (default .cache/images), capped at
+            IMAGE_CACHE_MAX_MB (default 512); least recently used blobs are
+            evicted first and index entries pointing at them become misses
+- supabase: objects in the IMAGE_CACHE_BUCKET storage bucket
+- off:      caching disabled
+
+Select with IMAGE_CACHE_BACKEND (default: local).
+"""
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def image_cache_key(
+    prompt: str,
+    archetype: str,
+    aspect_ratio: str,
+    provider: str = "imagen"
+) -> str:
+    """
+    Build the request key for an image generation.
+
+    Args:
+        prompt: Imagen prompt (whitespace is normalized)
+        archetype: Image archetype (decides background removal)
+        aspect_ratio: Requested aspect ratio
+        provider: Provider name, so stub and real images never mix
+
+    Returns:
+        Hex SHA-256 key
+    """
+    normalized_prompt = " ".join(prompt.split())
+    raw = json.dumps([provider, archetype, aspect_ratio, normalized_prompt])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    """Return the content address of a blob."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class LocalImageStore:
+    """Image store backed by the local filesystem."""
+
+    name = "local"
+
+    # Eviction stops once the blobs fit in this fraction of the budget
+    EVICT_TO = 0.9
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = Path(root or os.getenv("IMAGE_CACHE_DIR", ".cache/images"))
+        self.blob_dir = self.root / "blobs"
+        self.index_dir = self.root / "index"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("IMAGE_CACHE_MAX_MB", "512")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(path.stat().st_size for path in self.blob_dir.glob("*.png"))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached generation.
+
+        Returns:
+            Dict with image_bytes, transparent_bytes (or None) and metadata,
+            or None on a miss
+        """
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(
+        self,
+        key: str,
+        image_bytes: bytes,
+        transparent_bytes: Optional[bytes],
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Store a generation and return its index entry.
+        """
+        return await asyncio.to_thread(self._put, key, image_bytes, transparent_bytes, metadata)
+
+    async def get_blob(self, blob_id: str) -> Optional[bytes]:
+        """Fetch raw blob bytes by content hash."""
+        return await asyncio.to_thread(self._read_blob, blob_id)
+
+    async def put_blob(self, data: bytes) -> str:
+        """Store raw bytes and return their content hash."""
+        return await asyncio.to_thread(self._write_blob, data)
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        index_path = self.index_dir / f"{key}.json"
+        if not index_path.exists():
+            return None
+        try:
+            entry = json.loads(index_path.read_text())
+            image_bytes = self._read_blob(entry["image"])
+            transparent_bytes = None
+            if entry.get("transparent"):
+                transparent_bytes = self._read_blob(entry["transparent"])
+                if transparent_bytes is None:
+                    image_bytes = None
+            if image_bytes is None:
+                # A blob was evicted; drop the stale entry so it is regenerated
+                index_path.unlink(missing_ok=True)
+                return None
+            return {
+                "image_bytes": image_bytes,
+                "transparent_bytes": transparent_bytes,
+                "image_id": entry["image"],
+                "transparent_id": entry.get("transparent"),
+                "metadata": entry.get("metadata", {})
+            }
+        except Exception as e:
+            logger.warning(f"Image cache entry {key} unreadable: {e}")
+            return None
+
+    def _put(
+        self,
+        key: str,
+        image_bytes: bytes,
+        transparent_bytes: Optional[bytes],
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        entry = {
+            "image": self._write_blob(image_bytes),
+            "transparent": self._write_blob(transparent_bytes) if transparent_bytes else None,
+            "metadata": metadata
+        }
+        self._atomic_write(self.index_dir / f"{key}.json", json.dumps(entry).encode("utf-8"))
+        return entry
+
+    def _read_blob(self, blob_id: str) -> Optional[bytes]:
+        path = self.blob_dir / f"{blob_id}.png"
+        try:
+            data = path.read_bytes()
+            # mtime doubles as the last-use time for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def _write_blob(self, data: bytes) -> str:
+        blob_id = content_hash(data)
+        path = self.blob_dir / f"{blob_id}.png"
+        with self._lock:
+            # Concurrent puts of the same image write and count it once
+            if path.exists():
+                os.utime(path)
+                return blob_id
+            self._atomic_write(path, data)
+            self._total_bytes += len(data)
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self._evict(keep=path)
+        return blob_id
+
+    def _evict(self, keep: Path) -> None:
+        """Delete least recently used blobs until the store is back under budget."""
+        with self._lock:
+            blobs = []
+            for path in self.blob_dir.glob("*.png"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in blobs)
+            target = self.max_bytes * self.EVICT_TO
+            evicted = 0
+            for _, size, path in sorted(blobs, key=lambda blob: blob[0]):
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                evicted += 1
+            self._total_bytes = total
+        if evicted:
+            logger.info(f"Image cache evicted {evicted} blobs ({total} bytes kept)")
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        # Unique per call: puts run in worker threads of the same process
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+class SupabaseImageStore:
+    """Image store backed by a Supabase storage bucket."""
+
+    name = "supabase"
+
+    def __init__(self, bucket: Optional[str] = None):
+        from src.storage.supabase import get_supabase_client
+
+        self.bucket = bucket or os.getenv("IMAGE_CACHE_BUCKET", "generated-images")
+        self.storage = get_supabase_client().storage.from_(self.bucket)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(
+        self,
+        key: str,
+        image_bytes: bytes,
+        transparent_bytes: Optional[bytes],
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._put, key, image_bytes, transparent_bytes, metadata)
+
+    async def get_blob(self, blob_id: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._download, f"blobs/{blob_id}.png")
+
+    async def put_blob(self, data: bytes) -> str:
+        return await asyncio.to_thread(self._write_blob, data)
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._download(f"index/{key}.json")
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+            image_bytes = self._download(f"blobs/{entry['image']}.png")
+            if image_bytes is None:
+                return None
+            transparent_bytes = None
+            if entry.get("transparent"):
+                transparent_bytes = self._download(f"blobs/{entry['transparent']}.png")
+            return {
+                "image_bytes": image_bytes,
+                "transparent_bytes": transparent_bytes,
+                "image_id": entry["image"],
+                "transparent_id": entry.get("transparent"),
+                "metadata": entry.get("metadata", {})
+            }
+        except Exception as e:
+            logger.warning(f"Image cache entry {key} unreadable: {e}")
+            return None
+
+    def _put(
+        self,
+        key: str,
+        image_bytes: bytes,
+        transparent_bytes: Optional[bytes],
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        entry = {
+            "image": self._write_blob(image_bytes),
+            "transparent": self._write_blob(transparent_bytes) if transparent_bytes else None,
+            "metadata": metadata
+        }
+        self._upload(f"index/{key}.json", json.dumps(entry).encode("utf-8"), "application/json")
+        return entry
+
+    def _write_blob(self, data: bytes) -> str:
+        blob_id = content_hash(data)
+        self._upload(f"blobs/{blob_id}.png", data, "image/png")
+        return blob_id
+
+    def _download(self, path: str) -> Optional[bytes]:
+        try:
+            return self.storage.download(path)
+        except Exception:
+            return None
+
+    def _upload(self, path: str, data: bytes, content_type: str) -> None:
+        self.storage.upload(
+            path,
+            data,
+            {"content-type": content_type, "upsert": "true"}
+        )
+
+
+_image_store = None
+_image_store_initialized = False
+
+
+def get_image_store():
+    """
+    Get the process-wide image store.
+
+    Returns:
+        Store instance, or None if caching is disabled or unavailable
+    """
+    global _image_store, _image_store_initialized
+
+    if _image_store_initialized:
+        return _image_store
+
+    backend = os.getenv("IMAGE_CACHE_BACKEND", "local").lower()
+    try:
+        if backend == "off":
+            _image_store = None
+        elif backend == "supabase":
+            _image_store = SupabaseImageStore()
+        else:
+            _image_store = LocalImageStore()
+        if _image_store is not None:
+            logger.info(f"Image cache enabled ({_image_store.name})")
+    except Exception as e:
+        logger.warning(f"Image cache unavailable, continuing without it: {e}")
+        _image_store = None
+
+    _image_store_initialized = True
+    return _image_store
+
+
+def set_image_store(store) -> None:
+    """Override the process-wide image store (None disables caching)."""
+    global _image_store, _image_store_initialized
+    _image_store = store
+    _image_store_initialized = True
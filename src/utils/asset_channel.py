@@ -0,0 +1,102 @@
+"""
+Asset side-channel for binary payloads (generated images).
+
+Large binaries are never inlined into JSON messages. Content packages carry
+small asset references instead, and the bytes travel separately:
+
+- HTTP:      GET {ASSET_BASE_URL}/{asset_id}   (served by main.py)
+- WebSocket: a binary frame laid out as
+
+      [4-byte big-endian header length][UTF-8 JSON header][raw bytes]
+
+  where the header holds type="asset", asset_id, mime_type, size and any
+  routing fields (e.g. slide_id).
+
+Asset ids are the SHA-256 content hashes used by the image store.
+"""
+import os
+import re
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+ASSET_BASE_URL = os.getenv("ASSET_BASE_URL", "/assets").rstrip("/")
+
+_ASSET_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_HEADER_LENGTH = struct.Struct(">I")
+
+
+def asset_url(asset_id: str) -> str:
+    """Return the fetch URL for an asset."""
+    return f"{ASSET_BASE_URL}/{asset_id}"
+
+
+def is_valid_asset_id(asset_id: str) -> bool:
+    """Check that an asset id is a well-formed content hash."""
+    return bool(_ASSET_ID_PATTERN.match(asset_id or ""))
+
+
+def asset_reference(
+    asset_id: str,
+    mime_type: str = "image/png",
+    transparent_asset_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build the manifest entry that replaces an inlined base64 payload.
+
+    Args:
+        asset_id: Content hash of the primary image
+        mime_type: MIME type of the asset
+        transparent_asset_id: Content hash of the transparent variant, if any
+
+    Returns:
+        Small JSON-serializable reference
+    """
+    reference = {
+        "asset_id": asset_id,
+        "url": asset_url(asset_id),
+        "mime_type": mime_type
+    }
+    if transparent_asset_id:
+        reference["transparent_asset_id"] = transparent_asset_id
+        reference["transparent_url"] = asset_url(transparent_asset_id)
+    return reference
+
+
+def encode_asset_frame(header: Dict[str, Any], data: bytes) -> bytes:
+    """
+    Pack an asset into a single binary WebSocket frame.
+
+    Args:
+        header: Routing metadata (asset_id, slide_id, ...)
+        data: Raw asset bytes
+
+    Returns:
+        Frame bytes
+    """
+    header = {"type": "asset", "size": len(data), **header}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return b"".join((_HEADER_LENGTH.pack(len(header_bytes)), header_bytes, data))
+
+
+def decode_asset_frame(frame: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Unpack a frame produced by encode_asset_frame.
+
+    Returns:
+        (header, data)
+
+    Raises:
+        ValueError: If the frame is truncated or malformed
+    """
+    if len(frame) < _HEADER_LENGTH.size:
+        raise ValueError("Asset frame too short")
+    (header_length,) = _HEADER_LENGTH.unpack_from(frame)
+    header_end = _HEADER_LENGTH.size + header_length
+    if len(frame) < header_end:
+        raise ValueError("Asset frame header truncated")
+    header = json.loads(frame[_HEADER_LENGTH.size:header_end].decode("utf-8"))
+    data = frame[header_end:]
+    if header.get("size") is not None and header["size"] != len(data):
+        raise ValueError("Asset frame payload truncated")
+    return header, data
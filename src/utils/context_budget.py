@@ -0,0 +1,185 @@
+"""
+Token-budgeted prompt assembly and rolling conversation summaries.
+
+A state's user prompt is assembled from sections. Each section has one or
+more renderings, from most to least detailed, and a priority:
+
+1. every section uses its most detailed rendering that fits its own cap
+   (the last rendering is truncated to the cap if none fits)
+2. while the prompt is over budget, the section with the highest priority
+   number that can still shrink moves to its next rendering; optional
+   sections are only dropped when no section has a shorter rendering left
+
+The conversation summary condenses older turns into one line each. It is
+stored in the session and extended incrementally: only turns added since the
+last update are summarized, and only on turns whose state uses it.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.token_counter import TokenCounter
+
+# States whose prompt includes the summary; it is only brought up to date there
+SUMMARY_STATES = ("REFINE_STRAWMAN",)
+# Messages at the end of the history that stay out of the summary
+RECENT_MESSAGES = 4
+# Lines kept in the stored summary (older ones are counted, not kept)
+MAX_SUMMARY_LINES = 20
+_WORDS_PER_LINE = 25
+
+
+class ContextSection:
+    """One part of a prompt with progressively shorter renderings."""
+
+    def __init__(
+        self,
+        name: str,
+        renderings: List[str],
+        priority: int = 0,
+        max_tokens: Optional[int] = None,
+        required: bool = True
+    ):
+        """
+        Args:
+            name: Section name (for the token report)
+            renderings: Section texts from most to least detailed
+            priority: Shrink order; higher numbers are shrunk first, 0 never
+            max_tokens: Cap for this section, if any
+            required: Whether the section is kept (at its last rendering)
+                when the prompt is over budget
+        """
+        self.name = name
+        self.renderings = [text for text in renderings if text]
+        self.priority = priority
+        self.max_tokens = max_tokens
+        self.required = required
+        self.level = 0
+
+    @property
+    def text(self) -> str:
+        return self.renderings[self.level] if self.level < len(self.renderings) else ""
+
+    def can_shrink(self) -> bool:
+        if self.priority == 0:
+            return False
+        last = len(self.renderings) - 1 if self.required else len(self.renderings)
+        return self.level < last
+
+
+def assemble_sections(
+    sections: List[ContextSection],
+    counter: TokenCounter,
+    budget: int,
+    separator: str = "\n\n"
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Join the sections in order, shrinking low-priority sections to fit the budget.
+
+    Returns:
+        The prompt and a report with tokens before and after compaction and
+        the tokens of each section
+    """
+    sections = [section for section in sections if section.renderings]
+    before = sum(counter.count(section.renderings[0]) for section in sections)
+
+    tokens = {}
+    for section in sections:
+        if section.max_tokens:
+            _fit_section(section, counter)
+        tokens[section.name] = counter.count(section.text)
+
+    while sum(tokens.values()) > budget:
+        shrinkable = [section for section in sections if section.can_shrink()]
+        if not shrinkable:
+            break
+        # Dropping a section is the last resort
+        section = max(shrinkable, key=lambda s: (s.level + 1 < len(s.renderings), s.priority))
+        section.level += 1
+        tokens[section.name] = counter.count(section.text)
+
+    prompt = separator.join(section.text for section in sections if section.text)
+    return prompt, {
+        "before": before,
+        "after": sum(tokens.values()),
+        "budget": budget,
+        "sections": {name: count for name, count in tokens.items() if count}
+    }
+
+
+def _fit_section(section: ContextSection, counter: TokenCounter):
+    """Use the most detailed rendering within the section cap, truncating the last one if needed."""
+    for level, text in enumerate(section.renderings):
+        if counter.count(text) <= section.max_tokens:
+            section.level = level
+            return
+    section.renderings = [truncate_to_tokens(section.renderings[-1], section.max_tokens, counter)]
+    section.level = 0
+
+
+def truncate_to_tokens(text: str, max_tokens: int, counter: TokenCounter) -> str:
+    """Cut text to about max_tokens, marking the cut."""
+    tokens = counter.count(text)
+    if tokens <= max_tokens:
+        return text
+    keep = int(len(text) * max_tokens / tokens * 0.95)
+    return text[:keep].rstrip() + " …[truncated]"
+
+
+def update_conversation_summary(
+    summary: Optional[Dict[str, Any]],
+    history: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Extend the stored summary with the turns added since it was last updated.
+
+    Args:
+        summary: Stored summary ({"covered", "omitted", "lines"}) or None
+        history: Full conversation history
+
+    Returns:
+        The updated summary; the stored one (or None if there is nothing to
+        summarize yet) when no new turns need summarizing
+    """
+    summary = summary or {"covered": 0, "omitted": 0, "lines": []}
+    end = max(0, len(history) - RECENT_MESSAGES)
+    covered = summary.get("covered", 0)
+    if end <= covered:
+        return summary if summary.get("lines") else None
+
+    lines = list(summary.get("lines", []))
+    lines.extend(_summarize_message(message) for message in history[covered:end])
+    omitted = summary.get("omitted", 0) + max(0, len(lines) - MAX_SUMMARY_LINES)
+    return {
+        "covered": end,
+        "omitted": omitted,
+        "lines": lines[-MAX_SUMMARY_LINES:]
+    }
+
+
+def render_summary(summary: Optional[Dict[str, Any]], max_lines: Optional[int] = None) -> str:
+    """Conversation summary as prompt text."""
+    if not summary or not summary.get("lines"):
+        return ""
+    lines = summary["lines"]
+    omitted = summary.get("omitted", 0)
+    if max_lines is not None and len(lines) > max_lines:
+        omitted += len(lines) - max_lines
+        lines = lines[-max_lines:]
+    header = f"({omitted} earlier messages omitted)\n" if omitted else ""
+    return header + "\n".join(f"- {line}" for line in lines)
+
+
+def _summarize_message(message: Dict[str, Any]) -> str:
+    role = "User" if message.get("role") == "user" else "Assistant"
+    content = message.get("content")
+    if isinstance(content, dict):
+        if "slides" in content:
+            return (f"{role}: presented strawman '{content.get('main_title', '')}' "
+                    f"({len(content.get('slides') or [])} slides)")
+        if "questions" in content:
+            return f"{role}: asked {len(content.get('questions') or [])} clarifying questions"
+        if "proposed_slide_count" in content:
+            return f"{role}: proposed a plan with {content.get('proposed_slide_count')} slides"
+        content = content.get("text") or content.get("type") or ""
+    words = str(content or "").split()
+    text = " ".join(words[:_WORDS_PER_LINE]) + (" …" if len(words) > _WORDS_PER_LINE else "")
+    return f"{role}: {text}"
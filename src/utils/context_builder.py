@@ -8,6 +8,20 @@ import json
 from abc import ABC, abstractmethod
 from datetime import datetime
 
+from src.utils.context_budget import ContextSection, assemble_sections, render_summary
+from src.utils.logger import setup_logger
+from src.utils.token_counter import TokenCounter, get_token_counter
+
+logger = setup_logger(__name__)
+
+# User prompt budget and per-section caps (tokens)
+DEFAULT_TOKEN_BUDGET = 12000
+REQUEST_MAX_TOKENS = 1000
+ANSWERS_MAX_TOKENS = 1500
+PLAN_MAX_TOKENS = 2000
+SUMMARY_MAX_TOKENS = 600
+SUMMARY_SHORT_LINES = 5
+
 
 class StateContextStrategy(ABC):
     """Abstract base for state-specific context strategies"""
@@ -96,19 +110,21 @@ class RefineStrawmanStrategy(StateContextStrategy):
         # Get last 3 messages for refinement context
         recent_history = session_data.get("conversation_history", [])[-3:]
         
-        # Extract refinement request
-        refinement_request = ""
-        for msg in reversed(recent_history):
-            if msg.get("role") == "user":
-                refinement_request = msg.get("content", "")
-                break
+        # Extract refinement request (the current message is not in the history yet)
+        refinement_request = session_data.get("user_message") or ""
+        if not refinement_request:
+            for msg in reversed(recent_history):
+                if msg.get("role") == "user":
+                    refinement_request = msg.get("content", "")
+                    break
         
         # Extract current strawman (Phase 1: from conversation history)
         current_strawman = self._extract_strawman_from_session(session_data)
         
         return {
             "current_strawman": current_strawman,  # FULL strawman, not summary!
-            "refinement_request": refinement_request
+            "refinement_request": refinement_request,
+            "conversation_summary": session_data.get("conversation_summary")
         }
     
     def get_required_fields(self) -> List[str]:
@@ -181,10 +197,24 @@ class LayoutGenerationStrategy(StateContextStrategy):
         return {}
 
 
+def _compact_json(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _json_section(name: str, label: str, data: Any, max_tokens: int, priority: int) -> ContextSection:
+    """A labelled JSON section: indented, then compact"""
+    return ContextSection(name, [
+        f"{label}: {json.dumps(data, indent=2)}",
+        f"{label}: {_compact_json(data)}"
+    ], priority=priority, max_tokens=max_tokens)
+
+
 class ContextBuilder:
     """State-aware context builder - Phase 1 Core Component"""
     
-    def __init__(self):
+    def __init__(self, token_counter: Optional[TokenCounter] = None, token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self.token_counter = token_counter or get_token_counter()
+        self.token_budget = token_budget
         self.strategies = {
             "PROVIDE_GREETING": GreetingStrategy(),
             "ASK_CLARIFYING_QUESTIONS": ClarifyingQuestionsStrategy(),
@@ -221,46 +251,128 @@ class ContextBuilder:
     
     
     def _generate_prompt(self, state: str, context: Dict[str, Any]) -> str:
-        """Generate state-specific prompts with minimal context"""
+        """Generate state-specific prompts with minimal context, within the token budget"""
         
         if state == "PROVIDE_GREETING":
             return "Provide a warm greeting and ask what presentation the user wants to create."
         
-        elif state == "ASK_CLARIFYING_QUESTIONS":
-            return f"""The user wants to create a presentation about:
-{context.get('user_initial_request')}
-
-Ask 3-5 clarifying questions about audience, duration, key messages, and focus areas."""
+        sections = self._prompt_sections(state, context)
+        if sections is None:
+            return json.dumps(context)
+        
+        prompt, report = assemble_sections(sections, self.token_counter, self.token_budget)
+        context["context_tokens"] = report
+        if report["after"] < report["before"]:
+            logger.info(
+                f"Compacted {state} context from {report['before']} to {report['after']} tokens "
+                f"(budget {report['budget']})"
+            )
+        return prompt
+    
+    def _prompt_sections(self, state: str, context: Dict[str, Any]) -> Optional[List[ContextSection]]:
+        """Prompt sections for a state, in output order (see context_budget)"""
+        request = ContextSection(
+            "user_initial_request",
+            [str(context.get('user_initial_request'))],
+            max_tokens=REQUEST_MAX_TOKENS
+        )
+        answers = context.get('clarifying_answers', {})
+        
+        if state == "ASK_CLARIFYING_QUESTIONS":
+            request.renderings[0] = f"The user wants to create a presentation about:\n{request.renderings[0]}"
+            return [
+                request,
+                ContextSection("instructions", [
+                    "Ask 3-5 clarifying questions about audience, duration, key messages, and focus areas."
+                ])
+            ]
         
         elif state == "CREATE_CONFIRMATION_PLAN":
-            return f"""Create a presentation plan based on:
-Topic: {context.get('user_initial_request')}
-Details: {json.dumps(context.get('clarifying_answers', {}), indent=2)}
-
-Include title, 5-7 slides with key points, duration, and themes."""
+            request.renderings[0] = f"Topic: {request.renderings[0]}"
+            return [
+                ContextSection("instructions", ["Create a presentation plan based on:"]),
+                request,
+                _json_section("clarifying_answers", "Details", answers, ANSWERS_MAX_TOKENS, priority=1),
+                ContextSection("output", ["Include title, 5-7 slides with key points, duration, and themes."])
+            ]
         
         elif state == "GENERATE_STRAWMAN":
-            return f"""Generate a complete presentation based on:
-
-Original Request: {context.get('user_initial_request')}
-User Requirements: {json.dumps(context.get('clarifying_answers', {}), indent=2)}
-Approved Plan: {json.dumps(context.get('confirmation_plan', {}), indent=2)}
-
-Create detailed content for each slide that incorporates all the above context."""
+            request.renderings[0] = f"Original Request: {request.renderings[0]}"
+            return [
+                ContextSection("instructions", ["Generate a complete presentation based on:"]),
+                request,
+                _json_section("clarifying_answers", "User Requirements", answers, ANSWERS_MAX_TOKENS, priority=1),
+                _json_section("confirmation_plan", "Approved Plan", context.get('confirmation_plan', {}),
+                              PLAN_MAX_TOKENS, priority=1),
+                ContextSection("output", [
+                    "Create detailed content for each slide that incorporates all the above context."
+                ])
+            ]
         
         elif state == "REFINE_STRAWMAN":
             strawman = context.get('current_strawman', {})
-            return f"""Refine the presentation based on user feedback.
+            summary = context.get('conversation_summary')
+            without_notes = dict(strawman, slides=[
+                {key: value for key, value in slide.items() if key != "speaker_notes"}
+                for slide in strawman.get("slides", [])
+            ]) if strawman else strawman
+            return [
+                ContextSection("instructions", ["Refine the presentation based on user feedback."]),
+                # Earlier turns are least important: the current strawman already reflects them
+                ContextSection("conversation_summary", [
+                    f"Conversation so far:\n{render_summary(summary)}",
+                    f"Conversation so far:\n{render_summary(summary, max_lines=SUMMARY_SHORT_LINES)}"
+                ] if render_summary(summary) else [], priority=3, max_tokens=SUMMARY_MAX_TOKENS, required=False),
+                ContextSection("current_strawman", [
+                    f"Current presentation:\n{json.dumps(strawman, indent=2)}",
+                    f"Current presentation:\n{_compact_json(strawman)}",
+                    f"Current presentation (speaker notes omitted):\n{_compact_json(without_notes)}"
+                ], priority=2),
+                ContextSection("refinement_request", [
+                    f"User's refinement request: {context.get('refinement_request')}"
+                ], max_tokens=REQUEST_MAX_TOKENS),
+                ContextSection("output", [
+                    "Make the requested changes while maintaining the overall structure and quality."
+                ])
+            ]
+        
+        return None
+    
+    def build_slide_refinement_prompt(
+        self,
+        strawman: Dict[str, Any],
+        target_slides: List[str],
+        refinement_request: str
+    ) -> str:
+        """
+        Build the prompt for a targeted refinement.
+        
+        Only the target slides are included in full; the rest of the deck is
+        reduced to a one-line outline per slide.
+        """
+        outline = [
+            f"{slide.get('slide_number')}. [{slide.get('slide_id')}] {slide.get('title')} "
+            f"({slide.get('slide_type')}, {slide.get('structure_preference') or 'no layout'})"
+            for slide in strawman.get("slides", [])
+        ]
+        targets = [slide for slide in strawman.get("slides", []) if slide.get("slide_id") in target_slides]
+        
+        return f"""Refine only the target slides based on user feedback.
 
-Current presentation:
-{json.dumps(strawman, indent=2)}
+Presentation: {strawman.get('main_title')}
+Theme: {strawman.get('overall_theme')}
+Audience: {strawman.get('target_audience')} ({strawman.get('presentation_duration')} minutes)
 
-User's refinement request: {context.get('refinement_request')}
+Outline:
+{chr(10).join(outline)}
 
-Make the requested changes while maintaining the overall structure and quality."""
-        
-        return json.dumps(context)
+Target slides:
+{json.dumps(targets, indent=2)}
+
+User's refinement request: {refinement_request}
+
+Return the updated target slides only, keeping their slide_id and slide_number."""
     
     def estimate_tokens(self, text: str) -> int:
-        """Simple token estimation"""
-        return len(text) // 4
\ No newline at end of file
+        """Token count of a prompt (see TokenCounter)"""
+        return self.token_counter.count(text)
\ No newline at end of file
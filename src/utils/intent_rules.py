@@ -0,0 +1,152 @@
+"""
+Deterministic intent rules for the IntentRouter fast path.
+
+Many messages do not need an LLM to classify: button clicks carry the action
+value from the action_request that produced them, and within a given state a
+plain "yes, looks good" or a clear change request is unambiguous. These rules
+return a UserIntent with a confidence; the IntentRouter only calls the LLM when
+no rule matches or the confidence is below its threshold.
+
+Rules never guess intents that need extracted_info (Change_Topic,
+Change_Parameter); those always go to the LLM.
+"""
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.models.agents import UserIntent
+
+# Action values sent by the buttons in StreamlinedMessagePackager action requests
+ACTION_INTENTS = {
+    "accept_plan": "Accept_Plan",
+    "reject_plan": "Reject_Plan",
+    "accept_strawman": "Accept_Strawman",
+    "request_refinement": "Submit_Refinement_Request",
+}
+
+_APPROVAL_PHRASE = (
+    r"(yes|yep|yeah|yup|sure|ok(ay)?|perfect|great|excellent|awesome|approved?|lgtm|thanks|thank\s+you|"
+    r"((it|this|that)\s+)?(looks?|sounds?)\s+(good|great|perfect|fine)|"
+    r"(let'?s\s+)?(go\s+ahead|proceed|do\s+it)|that'?s\s+(good|great|perfect|fine)|"
+    r"(i'?m\s+)?happy\s+with\s+(it|this|that)|all\s+done|we'?re\s+done)"
+)
+# A message that is nothing but approval phrases ("Yes, looks good, go ahead!")
+_AFFIRMATIVE = re.compile(
+    rf"^\s*{_APPROVAL_PHRASE}([\s,.!;]+((and|so)\s+)?{_APPROVAL_PHRASE})*[\s,.!]*$"
+)
+# An approval phrase followed by something else ("ok, now add a slide"): mixed, left to the LLM
+_AFFIRMATIVE_LEAD = re.compile(rf"^\s*{_APPROVAL_PHRASE}\b")
+# Words that turn an approval into a change request
+_RESERVATION = re.compile(r"\b(but|except|however|change|instead|not|don'?t|no|wrong|should|could|would|can you|please make)\b")
+_NEGATIVE = re.compile(r"^\s*(no|nope|not\s+(quite|really)|that'?s\s+not|i\s+don'?t\s+(like|think))\b")
+_CHANGE_REQUEST = re.compile(
+    r"\b(make|change|update|add|remove|delete|replace|rewrite|rephrase|shorten|expand|"
+    r"combine|merge|split|move|swap|reorder|improve|simplify|fix|tweak|adjust|include|drop)\b"
+)
+_SLIDE_REFERENCE = re.compile(r"\bslides?\b|\b(title|narrative|chart|visual|diagram|image|table|key points?)\b")
+_HELP_QUESTION = re.compile(
+    r"^\s*(help\b|how\s+(long|does|do\s+(i|you|we))|what\s+(is|are|does|do\s+you\s+mean)\b|"
+    r"why\s+(do|does|is)\b|what'?s\s+(a|an|the)\b)"
+)
+# Possible topic or parameter changes; these need the LLM to extract what changed
+_REDIRECT = re.compile(
+    r"\b(actually|instead|forget|scrap|start\s+over|new\s+topic|different\s+topic|"
+    r"change\s+the\s+(topic|subject|audience|number|length|duration))\b"
+)
+_GREETING_ONLY = re.compile(r"^\s*(hi|hello|hey|good\s+(morning|afternoon|evening))\b[\s!.]*$")
+
+# Minimum number of words for free-form answers to count as content
+_MIN_CONTENT_WORDS = 4
+
+
+def classify_by_action(action_ids: Iterable[str], current_state: str) -> Optional[UserIntent]:
+    """
+    Map a button click to its intent.
+
+    Args:
+        action_ids: Action values from the message (frontend_actions or the raw text)
+        current_state: Current workflow state
+
+    Returns:
+        UserIntent, or None if no known action applies to the state
+    """
+    for action_id in action_ids:
+        intent_type = ACTION_INTENTS.get((action_id or "").strip().lower())
+        if intent_type and _allowed_in_state(intent_type, current_state):
+            return UserIntent(intent_type=intent_type, confidence=1.0, extracted_info=None)
+    return None
+
+
+def classify_by_rules(user_message: str, current_state: str) -> Optional[Tuple[UserIntent, str]]:
+    """
+    Classify a free-text message with state-conditioned rules.
+
+    Args:
+        user_message: The user's message
+        current_state: Current workflow state
+
+    Returns:
+        (UserIntent, rule name), or None if no rule matches
+    """
+    text = (user_message or "").strip().lower()
+    if not text:
+        return None
+
+    # Before the topic and the answers are in, a question is usually the content
+    if current_state not in ("PROVIDE_GREETING", "ASK_CLARIFYING_QUESTIONS") and _HELP_QUESTION.match(text):
+        return _intent("Ask_Help_Or_Question", 0.85), "help_question"
+
+    if _REDIRECT.search(text):
+        return None
+
+    words = len(text.split())
+    approval = bool(_AFFIRMATIVE.match(text)) and not _RESERVATION.search(text)
+    mixed_approval = not approval and bool(_AFFIRMATIVE_LEAD.match(text))
+
+    if current_state == "PROVIDE_GREETING":
+        if _GREETING_ONLY.match(text) or text.endswith("?"):
+            return None
+        if words >= _MIN_CONTENT_WORDS:
+            return _intent("Submit_Initial_Topic", 0.9), "topic_after_greeting"
+
+    elif current_state == "ASK_CLARIFYING_QUESTIONS":
+        if words >= _MIN_CONTENT_WORDS and not text.endswith("?"):
+            return _intent("Submit_Clarification_Answers", 0.88), "answers_to_questions"
+
+    elif current_state == "CREATE_CONFIRMATION_PLAN":
+        if approval:
+            return _intent("Accept_Plan", 0.95), "plan_approval"
+        if mixed_approval:
+            return None
+        if _NEGATIVE.match(text):
+            return _intent("Reject_Plan", 0.9), "plan_rejection"
+
+    elif current_state in ("GENERATE_STRAWMAN", "REFINE_STRAWMAN"):
+        if approval:
+            return _intent("Accept_Strawman", 0.95), "strawman_approval"
+        if mixed_approval:
+            return None
+        if _CHANGE_REQUEST.search(text) and _SLIDE_REFERENCE.search(text):
+            return _intent("Submit_Refinement_Request", 0.9), "slide_change_request"
+
+    return None
+
+
+def action_ids_from_context(user_message: str, context: Dict[str, Any]) -> list:
+    """Collect action values from frontend_actions and a bare action value as text."""
+    ids = [
+        action.get("action_id") or action.get("button_id")
+        for action in context.get("frontend_actions") or []
+        if isinstance(action, dict)
+    ]
+    ids.append(user_message)
+    return ids
+
+
+def _intent(intent_type: str, confidence: float) -> UserIntent:
+    return UserIntent(intent_type=intent_type, confidence=confidence, extracted_info=None)
+
+
+def _allowed_in_state(intent_type: str, current_state: str) -> bool:
+    if intent_type in ("Accept_Plan", "Reject_Plan"):
+        return current_state == "CREATE_CONFIRMATION_PLAN"
+    return current_state in ("GENERATE_STRAWMAN", "REFINE_STRAWMAN")
@@ -1,8 +1,20 @@
 """
 Logging configuration for Deckster using Logfire.
+
+Without Logfire, records go through a bounded in-memory queue and are written
+to stderr by a background thread, so logging never blocks the event loop on
+console I/O. When the queue is full, records are dropped and counted.
 """
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+# Records buffered for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = 10000
+
 # Try to configure Logfire once at module import
 LOGFIRE_CONFIGURED = False
 
@@ -46,65 +58,99 @@ except Exception as e:
 class LogfireLogger:
     """Wrapper to make Logfire work like standard Python logging."""
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, level: Optional[str] = None):
         self.name = name
+        self.setLevel(level or os.getenv("LOG_LEVEL", "DEBUG"))
     
     def info(self, message, *args, **kwargs):
-        # Handle % formatting if args provided
-        if args:
-            message = message % args
-        logfire.info(f"[{self.name}] {message}", **kwargs)
+        if self.level <= logging.INFO:
+            logfire.info(self._format(message, args), **kwargs)
     
     def warn(self, message, *args, **kwargs):
-        if args:
-            message = message % args
-        logfire.warn(f"[{self.name}] {message}", **kwargs)
+        if self.level <= logging.WARNING:
+            logfire.warn(self._format(message, args), **kwargs)
     
     def warning(self, message, *args, **kwargs):
         # Alias for warn
         self.warn(message, *args, **kwargs)
     
     def error(self, message, *args, **kwargs):
-        if args:
-            message = message % args
-        logfire.error(f"[{self.name}] {message}", **kwargs)
+        if self.level <= logging.ERROR:
+            logfire.error(self._format(message, args), **kwargs)
     
     def debug(self, message, *args, **kwargs):
-        if args:
-            message = message % args
-        logfire.debug(f"[{self.name}] {message}", **kwargs)
+        if self.level <= logging.DEBUG:
+            logfire.debug(self._format(message, args), **kwargs)
     
     def critical(self, message, *args, **kwargs):
-        if args:
-            message = message % args
-        logfire.error(f"[{self.name}] CRITICAL: {message}", **kwargs)
+        if self.level <= logging.CRITICAL:
+            logfire.error(self._format(message, args, "CRITICAL: "), **kwargs)
     
     def exception(self, message, *args, **kwargs):
+        if self.level <= logging.ERROR:
+            logfire.error(self._format(message, args, "EXCEPTION: "), **kwargs)
+    
+    def setLevel(self, level):
+        # Filtered here, before any formatting or shipping
+        self.level = level if isinstance(level, int) else logging.getLevelName(str(level).upper())
+        if not isinstance(self.level, int):
+            self.level = logging.DEBUG
+    
+    def isEnabledFor(self, level):
+        return self.level <= level
+    
+    def _format(self, message, args, prefix: str = "") -> str:
+        # Handle % formatting if args provided
         if args:
             message = message % args
-        logfire.error(f"[{self.name}] EXCEPTION: {message}", **kwargs)
+        return f"[{self.name}] {prefix}{message}"
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
     
-    def setLevel(self, level):
-        # No-op for compatibility
-        pass
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener: Optional[QueueListener] = None
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: Optional[_DroppingQueueHandler] = None
+
+
+def get_queue_handler() -> _DroppingQueueHandler:
+    """The shared handler feeding the background log writer (started on first use)."""
+    global _queue_handler
+    if _queue_handler is None:
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+        listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _queue_handler = _DroppingQueueHandler(log_queue)
+        _queue_handler.listener = listener
+    return _queue_handler
 
 
 class StandardLogger:
     """Standard Python logger when Logfire is not configured."""
     
-    def __init__(self, name: str):
-        import logging
+    def __init__(self, name: str, level: Optional[str] = None):
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel((level or os.getenv("LOG_LEVEL", "DEBUG")).upper())
         
-        # Add console handler if not already present
+        # Add the non-blocking console handler if not already present
         if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
+            self.logger.addHandler(get_queue_handler())
     
     def info(self, message, *args, **kwargs):
         self.logger.info(message, *args, **{k: v for k, v in kwargs.items() if k != 'exc_info'})
@@ -130,6 +176,9 @@ class StandardLogger:
     
     def setLevel(self, level):
         self.logger.setLevel(level)
+    
+    def isEnabledFor(self, level):
+        return self.logger.isEnabledFor(level)
 
 
 def setup_logger(name: str, level: Optional[str] = None):
@@ -138,15 +187,15 @@ def setup_logger(name: str, level: Optional[str] = None):
     
     Args:
         name: Logger name (usually __name__)
-        level: Logging level (used for standard logger)
+        level: Logging level (defaults to LOG_LEVEL)
         
     Returns:
         LogfireLogger or StandardLogger instance
     """
     if LOGFIRE_CONFIGURED:
-        return LogfireLogger(name)
+        return LogfireLogger(name, level)
     else:
-        return StandardLogger(name)
+        return StandardLogger(name, level)
 
 
 # Create a default logger for the package
@@ -0,0 +1,220 @@
+"""
+Process-wide metrics store.
+
+Director calls, token usage and streaming timings are aggregated here in
+fixed-size structures, so memory depends on the number of metrics and states,
+never on the number of sessions:
+
+- counters: monotonically increasing totals
+- histograms: fixed buckets (Prometheus-style cumulative counts) plus a
+  rolling window of the most recent observations for percentiles
+
+Labels are limited to a small set of values per metric (workflow states);
+anything beyond MAX_LABEL_VALUES is folded into "other".
+
+The store is exported as Prometheus text (GET /metrics) and flushed
+periodically to Logfire and, if configured, a JSON file on disk.
+"""
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# Observations kept per histogram for percentiles
+WINDOW_SIZE = 256
+# Distinct label values per metric
+MAX_LABEL_VALUES = 32
+
+# Extra (name, labels, value) samples contributed by other modules
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+
+class Histogram:
+    """Fixed-bucket histogram with a rolling window of recent values."""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int = WINDOW_SIZE):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile over the rolling window."""
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 1),
+            "avg": round(self.sum / self.count, 1) if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max_recent": max(self.recent) if self.recent else None
+        }
+
+
+class MetricsStore:
+    """Counters and histograms keyed by metric name and state."""
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[str, float]] = {}
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self.descriptions: Dict[str, str] = {}
+        self.collectors: List[Collector] = []
+        self.started = time.time()
+
+    def increment(self, name: str, amount: float = 1, state: str = "all", description: str = ""):
+        """Add to a counter."""
+        values = self.counters.setdefault(name, {})
+        state = self._label(values, state)
+        values[state] = values.get(state, 0) + amount
+        if description:
+            self.descriptions.setdefault(name, description)
+
+    def observe(self, name: str, value: float, state: str = "all", description: str = ""):
+        """
+        Record a value in a histogram.
+
+        Buckets are chosen by name: *_ms metrics use latency buckets, anything
+        else token buckets.
+        """
+        series = self.histograms.setdefault(name, {})
+        state = self._label(series, state)
+        histogram = series.get(state)
+        if histogram is None:
+            histogram = series[state] = Histogram(
+                LATENCY_BUCKETS_MS if name.endswith("_ms") else TOKEN_BUCKETS
+            )
+        histogram.observe(value)
+        if description:
+            self.descriptions.setdefault(name, description)
+
+    def register_collector(self, collector: Collector):
+        """Add samples computed elsewhere (e.g. module-level stats) to the export."""
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view of all counters and histogram summaries."""
+        return {
+            "timestamp": datetime.utcnow().isoformat(),
+            "uptime_s": round(time.time() - self.started),
+            "counters": {name: dict(values) for name, values in self.counters.items()},
+            "histograms": {
+                name: {state: histogram.summary() for state, histogram in series.items()}
+                for name, series in self.histograms.items()
+            }
+        }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, values in sorted(self.counters.items()):
+            metric = f"deckster_{name}_total"
+            lines.extend(self._header(metric, name, "counter"))
+            for state, value in sorted(values.items()):
+                lines.append(f'{metric}{{state="{state}"}} {_number(value)}')
+
+        for name, series in sorted(self.histograms.items()):
+            metric = f"deckster_{name}"
+            lines.extend(self._header(metric, name, "histogram"))
+            for state, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{state="{state}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{state="{state}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{state="{state}"}} {_number(histogram.sum)}')
+                lines.append(f'{metric}_count{{state="{state}"}} {histogram.count}')
+
+        typed = set()
+        for collector in self.collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+                continue
+            for name, labels, value in samples:
+                metric = f"deckster_{name}"
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} gauge")
+                label_text = ",".join(f'{key}="{val}"' for key, val in sorted(labels.items()))
+                lines.append(f"{metric}{{{label_text}}} {_number(value)}" if label_text else f"{metric} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    async def flush(self, export_path: Optional[str] = None):
+        """Send a snapshot to Logfire and, if export_path is set, write it to disk."""
+        snapshot = self.snapshot()
+        try:
+            import logfire
+            logfire.info("metrics_snapshot", **snapshot)
+        except Exception as e:
+            logger.debug(f"Metrics snapshot not sent to Logfire: {e}")
+        if export_path:
+            await asyncio.to_thread(_write_json, export_path, snapshot)
+
+    async def run_flush_loop(self, interval: float, export_path: Optional[str] = None):
+        """Flush every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush(export_path)
+            except Exception as e:
+                logger.warning(f"Metrics flush failed: {e}")
+
+    def _header(self, metric: str, name: str, kind: str) -> List[str]:
+        header = []
+        if name in self.descriptions:
+            header.append(f"# HELP {metric} {self.descriptions[name]}")
+        header.append(f"# TYPE {metric} {kind}")
+        return header
+
+    @staticmethod
+    def _label(existing: Dict[str, Any], state: str) -> str:
+        state = state or "unknown"
+        if state in existing or len(existing) < MAX_LABEL_VALUES:
+            return state
+        return "other"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.3f}"
+
+
+def _write_json(path: str, snapshot: Dict[str, Any]):
+    # Write then rename so readers never see a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+_store = MetricsStore()
+
+
+def get_metrics_store() -> MetricsStore:
+    """The process-wide metrics store."""
+    return _store
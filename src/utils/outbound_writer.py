@@ -0,0 +1,143 @@
+"""
+Per-connection outbound writer for the Director WebSocket.
+
+Every frame for a connection goes through one bounded queue drained by one
+task, so frames keep their order regardless of who sends them (the handler,
+Director progress updates, content generation) and a turn's messages leave
+back to back instead of being spaced out by server-side sleeps.
+
+- Batching: send_batch() takes the messages of one turn. With batching
+  enabled they are coalesced into a single frame
+
+      {"type": "batch", "messages": [...], "reveal_interval_ms": N}
+
+  and the client reveals them one after another (reveal_interval_ms is only
+  a pacing hint for its animation). Otherwise they are written back to back.
+- Backpressure: producers wait for queue space; droppable frames (progress
+  status updates) are discarded instead when the queue is full. A frame the
+  client does not take within send_timeout marks it as stalled: the
+  connection is closed and further sends raise ConnectionError.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.logger import setup_logger
+from src.utils.metrics_store import get_metrics_store
+
+logger = setup_logger(__name__)
+
+# Close code for clients that stop reading ("Try Again Later")
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+
+class OutboundWriter:
+    """Ordered, bounded send queue in front of a WebSocket."""
+
+    def __init__(
+        self,
+        websocket,
+        queue_size: int = 256,
+        send_timeout: float = 10.0,
+        batch_frames: bool = False,
+        reveal_interval_ms: int = 100
+    ):
+        """
+        Start the writer task.
+
+        Args:
+            websocket: The accepted WebSocket
+            queue_size: Frames buffered before producers wait
+            send_timeout: Seconds a single frame may take before the client is
+                considered stalled
+            batch_frames: Coalesce a turn's messages into one batch frame
+            reveal_interval_ms: Pacing hint sent with batch frames
+        """
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.batch_frames = batch_frames
+        self.reveal_interval_ms = reveal_interval_ms
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+        self.dropped = 0
+        self.task = asyncio.create_task(self._run())
+
+    @property
+    def client_state(self):
+        return self.websocket.client_state
+
+    async def receive_text(self) -> str:
+        return await self.websocket.receive_text()
+
+    async def send_json(self, data: Dict[str, Any], droppable: bool = False):
+        """Queue a JSON frame; droppable frames are skipped when the queue is full."""
+        await self._put(("json", data), droppable)
+
+    async def send_bytes(self, data: bytes):
+        """Queue a binary frame."""
+        await self._put(("bytes", data))
+
+    async def send_batch(self, messages: List[Dict[str, Any]]):
+        """Queue the messages of one turn, as one batch frame if batching is enabled."""
+        if self.batch_frames and len(messages) > 1:
+            await self.send_json({
+                "type": "batch",
+                "messages": messages,
+                "reveal_interval_ms": self.reveal_interval_ms
+            })
+            return
+        for message in messages:
+            await self.send_json(message)
+
+    async def flush(self):
+        """Wait until every queued frame has been written (or dropped after a failure)."""
+        await self.queue.join()
+        self._raise_if_failed()
+
+    async def close(self, code: int = 1000):
+        """Write what is queued, stop the writer and close the socket."""
+        if not self.task.done():
+            try:
+                await asyncio.wait_for(self.queue.join(), self.send_timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.stop()
+        await self.websocket.close(code=code)
+
+    def stop(self):
+        """Stop the writer task without closing the socket."""
+        if not self.task.done():
+            self.task.cancel()
+
+    async def _put(self, item: Tuple[str, Any], droppable: bool = False):
+        self._raise_if_failed()
+        if droppable and self.queue.full():
+            self.dropped += 1
+            get_metrics_store().increment("ws_frames_dropped", description="Droppable frames skipped for slow clients")
+            return
+        await self.queue.put(item)
+
+    def _raise_if_failed(self):
+        if self.error is not None:
+            raise ConnectionError(f"WebSocket writer stopped: {self.error}") from self.error
+
+    async def _run(self):
+        while True:
+            kind, data = await self.queue.get()
+            try:
+                # After a failure the queue is still drained so producers never block
+                if self.error is None:
+                    send = self.websocket.send_json(data) if kind == "json" else self.websocket.send_bytes(data)
+                    await asyncio.wait_for(send, self.send_timeout)
+            except asyncio.TimeoutError:
+                self.error = TimeoutError(f"client did not read a frame within {self.send_timeout}s")
+                logger.warning(f"Closing stalled WebSocket client: {self.error}")
+                get_metrics_store().increment("ws_slow_clients_closed", description="Connections closed for not reading")
+                try:
+                    await self.websocket.close(code=SLOW_CLIENT_CLOSE_CODE)
+                except Exception:
+                    pass
+            except Exception as e:
+                self.error = e
+                logger.debug("WebSocket send failed: %s", e)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,144 @@
+"""
+Refinement planner for REFINE_STRAWMAN.
+
+Decides from the user's feedback whether a refinement targets specific slides
+(which can be regenerated on their own and spliced back into the strawman) or
+needs the whole strawman regenerated. The classification is rule-based, so it
+costs no model call:
+
+- structural requests (add, remove, merge, reorder slides) and deck-wide
+  requests ("all slides", "the whole deck") are global
+- otherwise the targets are the slides named in the feedback, by number,
+  ordinal, position ("last slide"), role ("title slide") or title
+- feedback that names no slide, or more than half of the deck, is global
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+_ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+    "eleventh": 11, "twelfth": 12,
+}
+
+_GLOBAL_PATTERNS = [
+    # Structural changes renumber the deck
+    re.compile(r"\b(add|insert|create|include)\s+(a|an|one|another|two|three|\d+)?\s*(new|extra|additional|more)?\s*slides?\b"),
+    re.compile(r"\b(remove|delete|drop|cut|get rid of)\s+(the\s+)?(\w+\s+)?slides?\b"),
+    re.compile(r"\b(combine|merge|split|reorder|rearrange|swap|move|shuffle)\b"),
+    re.compile(r"\b(fewer|less|more)\s+slides\b"),
+    re.compile(r"\b(shorter|longer)\s+(presentation|deck)\b"),
+    # Deck-wide changes
+    re.compile(r"\b(all|every|each)\s+(of\s+the\s+)?slides?\b"),
+    re.compile(r"\b(whole|entire|overall)\b"),
+    re.compile(r"\b(throughout|across)\s+the\s+(deck|presentation)\b"),
+]
+
+_NUMBER_LIST = r"\d+(?:\s*(?:,|and|&|or|-|to|through)\s*\d+)*"
+_SLIDE_NUMBERS = re.compile(rf"\bslides?\s*(?:#|no\.?|number)?\s*({_NUMBER_LIST})\b")
+_NUMBER_RANGE = re.compile(r"(\d+)\s*(?:-|to|through)\s*(\d+)")
+_ORDINAL_SLIDE = re.compile(
+    r"\b(" + "|".join(_ORDINALS) + r"|\d+(?:st|nd|rd|th)|last|final|penultimate)\s+slide\b"
+)
+_ROLE_SLIDE = re.compile(r"\b(title|opening|intro(?:duction)?|closing|conclusion|summary|final)\s+slide\b")
+
+# Slide titles shorter than this are too generic to match on
+_MIN_TITLE_LENGTH = 8
+
+
+class RefinementPlan:
+    """How a refinement request should be carried out."""
+
+    def __init__(self, target_slides: Optional[List[str]] = None, reason: str = ""):
+        """
+        Args:
+            target_slides: Ids of the slides to regenerate; empty for a full regeneration
+            reason: Why the plan was chosen (for logging)
+        """
+        self.target_slides = target_slides or []
+        self.reason = reason
+
+    @property
+    def is_targeted(self) -> bool:
+        """Whether only the target slides need to be regenerated."""
+        return bool(self.target_slides)
+
+    def __repr__(self) -> str:
+        return f"RefinementPlan(target_slides={self.target_slides}, reason={self.reason!r})"
+
+
+def plan_refinement(feedback: str, strawman: Dict[str, Any]) -> RefinementPlan:
+    """
+    Plan a refinement from the user's feedback.
+
+    Args:
+        feedback: The user's refinement request
+        strawman: The current strawman (as stored in the session)
+
+    Returns:
+        RefinementPlan with the target slide ids, or none for a full regeneration
+    """
+    slides = strawman.get("slides") or []
+    if not feedback or not slides:
+        return RefinementPlan(reason="no feedback or no slides")
+
+    text = feedback.lower()
+    for pattern in _GLOBAL_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return RefinementPlan(reason=f"global change ('{match.group(0)}')")
+
+    targets = _find_targets(text, slides)
+    if not targets:
+        return RefinementPlan(reason="no specific slide referenced")
+    if len(targets) * 2 > len(slides):
+        return RefinementPlan(reason=f"{len(targets)} of {len(slides)} slides referenced")
+
+    target_ids = [slide.get("slide_id") for index, slide in enumerate(slides) if index in targets]
+    return RefinementPlan(target_ids, reason="specific slides referenced")
+
+
+def _find_targets(text: str, slides: List[Dict[str, Any]]) -> set:
+    """Indexes of the slides the feedback refers to."""
+    count = len(slides)
+    targets = set()
+
+    def add_number(number: int):
+        if 1 <= number <= count:
+            targets.add(number - 1)
+
+    for match in _SLIDE_NUMBERS.finditer(text):
+        numbers = match.group(1)
+        for start, end in _NUMBER_RANGE.findall(numbers):
+            for number in range(int(start), min(int(end), count) + 1):
+                add_number(number)
+        for number in re.findall(r"\d+", _NUMBER_RANGE.sub(" ", numbers)):
+            add_number(int(number))
+
+    for match in _ORDINAL_SLIDE.finditer(text):
+        word = match.group(1)
+        if word in ("last", "final"):
+            targets.add(count - 1)
+        elif word == "penultimate":
+            add_number(count - 1)
+        elif word in _ORDINALS:
+            add_number(_ORDINALS[word])
+        else:
+            add_number(int(re.match(r"\d+", word).group(0)))
+
+    for match in _ROLE_SLIDE.finditer(text):
+        if match.group(1) in ("title", "opening", "intro", "introduction"):
+            wanted = "title_slide"
+            fallback = 0
+        else:
+            wanted = "conclusion_slide"
+            fallback = count - 1
+        typed = [index for index, slide in enumerate(slides) if slide.get("slide_type") == wanted]
+        targets.update(typed or [fallback])
+
+    for index, slide in enumerate(slides):
+        title = (slide.get("title") or "").lower()
+        if len(title) >= _MIN_TITLE_LENGTH and title in text:
+            targets.add(index)
+
+    return targets
@@ -35,29 +35,24 @@ class SessionManager:
         Returns:
             Session object
         """
-        print(f"[DEBUG SessionManager] get_or_create called with session_id={session_id}, user_id={user_id}")
-        
         # Check cache first
         cache_key = f"{user_id}:{session_id}"
         if cache_key in self.cache:
-            print(f"[DEBUG SessionManager] Found in cache: {cache_key}")
-            logger.debug(f"Returning cached session {session_id} for user {user_id}")
+            logger.debug("Returning cached session %s for user %s", session_id, user_id)
             return self.cache[cache_key]
         
         # Try to fetch from Supabase
-        print("[DEBUG SessionManager] Checking Supabase for existing session")
         try:
             result = self.supabase.table(self.table_name).select("*").eq("id", session_id).eq("user_id", user_id).execute()
-            print(f"[DEBUG SessionManager] Supabase query result: {result}")
             
             if result.data:
                 # Session exists
                 session_data = result.data[0]
-                logger.debug(f"Session data from DB: {session_data}")
+                logger.debug("Session data from DB: %s", session_data)
                 session = Session(**session_data)
                 self.cache[cache_key] = session
                 logger.info(f"Retrieved existing session {session_id} for user {user_id}")
-                logger.debug(f"Session user_initial_request: {session.user_initial_request}")
+                logger.debug("Session user_initial_request: %s", session.user_initial_request)
                 return session
         except Exception as e:
             logger.warning(f"Error fetching session {session_id}: {str(e)}")
@@ -167,6 +162,7 @@ class SessionManager:
         session.presentation_strawman = None
         session.refinement_feedback = None
         session.conversation_history = []  # Clear history for fresh start
+        session.conversation_summary = None
         session.updated_at = datetime.utcnow()
         
         # Update in Supabase
@@ -178,6 +174,7 @@ class SessionManager:
                 'presentation_strawman': None,
                 'refinement_feedback': None,
                 'conversation_history': [],
+                'conversation_summary': None,
                 'updated_at': session.updated_at.isoformat()
             }).eq('id', session_id).eq('user_id', user_id).execute()
             logger.info(f"Cleared context for session {session_id}")
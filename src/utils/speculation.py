@@ -0,0 +1,194 @@
+"""
+Speculative Director execution.
+
+For the dominant early transitions the next state is predictable from the
+current one (a message after the greeting is nearly always the topic, a
+message after the clarifying questions nearly always the answers). With
+SPECULATIVE_DIRECTOR enabled, the handler starts the Director call for the
+predicted state while the intent is still being classified:
+
+- if the classified intent and next state match the prediction, the
+  speculative result is used (hit)
+- otherwise the call is cancelled and processing continues as usual (miss)
+
+Every hit records the latency saved, and every miss records the prompt tokens
+spent (plus output tokens if the call had already finished), per transition.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.models.agents import StateContext
+from src.utils.logger import setup_logger
+from src.utils.metrics_store import get_metrics_store
+
+logger = setup_logger(__name__)
+
+# current state -> (predicted intent, predicted next state)
+SPECULATIVE_TRANSITIONS = {
+    "PROVIDE_GREETING": ("Submit_Initial_Topic", "ASK_CLARIFYING_QUESTIONS"),
+    "ASK_CLARIFYING_QUESTIONS": ("Submit_Clarification_Answers", "CREATE_CONFIRMATION_PLAN"),
+}
+
+# Per-transition statistics for this process
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+class SpeculativeRun:
+    """A Director call started before the intent of the message is known."""
+
+    def __init__(self, director, current_state: str, user_input: str, session: Any):
+        """
+        Start the speculative call.
+
+        Args:
+            director: DirectorAgent
+            current_state: State the session is in before this message
+            user_input: The user's message
+            session: Session object (for the data the predicted state needs)
+        """
+        self.predicted_intent, self.predicted_state = SPECULATIVE_TRANSITIONS[current_state]
+        self.transition = f"{current_state}->{self.predicted_state}"
+        self.state_context = self._predicted_context(user_input, session)
+        self.token_counter = director.token_counter
+        self.prompt_tokens = self._estimate_prompt_tokens(director)
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.task = asyncio.create_task(self._run(director))
+
+    @staticmethod
+    def supports(current_state: str) -> bool:
+        """Whether the next state after current_state is predictable."""
+        return current_state in SPECULATIVE_TRANSITIONS
+
+    def matches(self, intent_type: str, next_state: str) -> bool:
+        """Whether the classified outcome is the one that was predicted."""
+        return intent_type == self.predicted_intent and next_state == self.predicted_state
+
+    async def commit(self) -> Any:
+        """
+        Use the speculative result.
+
+        Returns:
+            The Director response for the predicted state
+
+        Raises:
+            Whatever the speculative call raised
+        """
+        committed = time.perf_counter()
+        try:
+            response = await self.task
+        except Exception:
+            stats = _transition_stats(self.transition)
+            stats["misses"] += 1
+            stats["wasted_tokens"] += self.prompt_tokens
+            raise
+        # Serial processing would have started the call at commit time
+        process_ms = (self.finished - self.started) * 1000
+        finish_ms = (max(committed, self.finished) - self.started) * 1000
+        saved_ms = (committed - self.started) * 1000 + process_ms - finish_ms
+
+        stats = _transition_stats(self.transition)
+        stats["hits"] += 1
+        stats["latency_saved_ms"] += saved_ms
+        logger.info(f"Speculation hit for {self.transition}: saved {saved_ms:.0f}ms")
+        return response
+
+    async def discard(self):
+        """Cancel the speculative call and account for the wasted tokens."""
+        wasted = self.prompt_tokens
+        if self.task.done():
+            if not self.task.cancelled() and self.task.exception() is None:
+                wasted += self.token_counter.count_output(self.task.result())
+        else:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        stats = _transition_stats(self.transition)
+        stats["misses"] += 1
+        stats["wasted_tokens"] += wasted
+        logger.info(f"Speculation miss for {self.transition}: ~{wasted} tokens wasted")
+
+    async def _run(self, director) -> Any:
+        try:
+            return await director.process(self.state_context)
+        finally:
+            self.finished = time.perf_counter()
+
+    def _predicted_context(self, user_input: str, session: Any) -> StateContext:
+        """The StateContext the handler would build if the prediction holds."""
+        session_data = {
+            'user_initial_request': session.user_initial_request,
+            'clarifying_answers': session.clarifying_answers,
+            'confirmation_plan': session.confirmation_plan,
+            'presentation_strawman': session.presentation_strawman,
+            'conversation_summary': session.conversation_summary,
+            'user_message': user_input
+        }
+        if self.predicted_intent == "Submit_Initial_Topic":
+            session_data['user_initial_request'] = user_input
+        elif self.predicted_intent == "Submit_Clarification_Answers":
+            session_data['clarifying_answers'] = {
+                "raw_answers": user_input,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        return StateContext(
+            current_state=self.predicted_state,
+            conversation_history=session.conversation_history or [],
+            session_data=session_data
+        )
+
+    def _estimate_prompt_tokens(self, director) -> int:
+        try:
+            _, user_prompt = director.context_builder.build_context(
+                state=self.predicted_state,
+                session_data={**self.state_context.session_data,
+                              "conversation_history": self.state_context.conversation_history}
+            )
+        except Exception:
+            user_prompt = ""
+        return (self.token_counter.count(user_prompt)
+                + self.token_counter.count_static(director.state_prompts[self.predicted_state]))
+
+
+def _transition_stats(transition: str) -> Dict[str, float]:
+    return _stats.setdefault(transition, {
+        "hits": 0,
+        "misses": 0,
+        "latency_saved_ms": 0.0,
+        "wasted_tokens": 0
+    })
+
+
+def get_speculation_metrics() -> Dict[str, Any]:
+    """Hit rate, latency saved and tokens wasted per speculated transition."""
+    report = {}
+    for transition, stats in _stats.items():
+        runs = stats["hits"] + stats["misses"]
+        report[transition] = {
+            "runs": runs,
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_rate": round(stats["hits"] / runs, 3) if runs else 0.0,
+            "latency_saved_ms": round(stats["latency_saved_ms"]),
+            "avg_latency_saved_ms": round(stats["latency_saved_ms"] / stats["hits"]) if stats["hits"] else None,
+            "wasted_tokens": stats["wasted_tokens"]
+        }
+    return report
+
+
+def _prometheus_samples():
+    """Speculation statistics as (name, labels, value) samples for /metrics."""
+    for transition, stats in _stats.items():
+        labels = {"transition": transition}
+        yield "speculation_hits", labels, stats["hits"]
+        yield "speculation_misses", labels, stats["misses"]
+        yield "speculation_latency_saved_ms", labels, stats["latency_saved_ms"]
+        yield "speculation_wasted_tokens", labels, stats["wasted_tokens"]
+
+
+get_metrics_store().register_collector(_prometheus_samples)
@@ -0,0 +1,226 @@
+"""
+Structural diff between two versions of a presentation strawman.
+
+Used to package refinements as partial updates: instead of resending the whole
+deck, only changed fields of existing slides, new slides, removed slide ids and
+(when the structure changed) the new slide order are sent.
+
+Slides are matched between versions in passes, so that a refinement which
+inserts a slide and renumbers the ids after it is still recognized as one
+insertion rather than a rewrite of every following slide:
+
+1. same slide_id and same content
+2. same content under a different slide_id (moved or re-numbered)
+3. same slide_id (edited in place)
+4. same title under a different slide_id (re-numbered and edited)
+
+Whatever is left over in the refined deck was inserted; whatever is left over
+in the previous deck was removed.
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from src.models.agents import PresentationStrawman
+
+METADATA_FIELDS = (
+    "main_title",
+    "overall_theme",
+    "design_suggestions",
+    "target_audience",
+    "presentation_duration",
+)
+
+# Fields that identify or position a slide rather than describe its content
+_POSITION_FIELDS = ("slide_id", "slide_number")
+
+StrawmanLike = Union[PresentationStrawman, Dict[str, Any]]
+
+
+class StrawmanDiff:
+    """Differences between a previous and a refined strawman."""
+
+    def __init__(self):
+        # New slide_id -> {field: new value} for matched slides whose fields changed
+        self.slide_changes: Dict[str, Dict[str, Any]] = {}
+        # New slide_id -> previous slide_id, for matched slides whose id changed
+        self.renamed: Dict[str, str] = {}
+        # New slide_ids without a counterpart in the previous deck
+        self.inserted: List[str] = []
+        # Previous slide_ids without a counterpart in the refined deck
+        self.removed: List[str] = []
+        # New slide_ids of matched slides whose relative order changed
+        self.moved: List[str] = []
+        # Presentation-level fields that changed, with their new values
+        self.metadata_changes: Dict[str, Any] = {}
+        # Slide ids of the refined deck, in order
+        self.order: List[str] = []
+
+    @property
+    def structure_changed(self) -> bool:
+        """Whether slides were inserted, removed, moved or re-identified."""
+        return bool(self.inserted or self.removed or self.moved or self.renamed)
+
+    @property
+    def content_changes(self) -> Dict[str, List[str]]:
+        """Changed content fields per slide (ignoring pure re-numbering)."""
+        changes = {}
+        for slide_id, fields in self.slide_changes.items():
+            content_fields = [name for name in fields if name not in _POSITION_FIELDS]
+            if content_fields:
+                changes[slide_id] = content_fields
+        return changes
+
+    @property
+    def affected_slides(self) -> List[str]:
+        """Ids of inserted slides and slides with content changes, in deck order."""
+        affected = set(self.inserted) | set(self.content_changes)
+        return [slide_id for slide_id in self.order if slide_id in affected]
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the two versions are identical."""
+        return not (self.slide_changes or self.metadata_changes or self.structure_changed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary suitable for logging."""
+        return {
+            "changed": self.content_changes,
+            "inserted": self.inserted,
+            "removed": self.removed,
+            "moved": self.moved,
+            "renamed": self.renamed,
+            "metadata": list(self.metadata_changes),
+        }
+
+
+def diff_strawman(previous: StrawmanLike, refined: StrawmanLike) -> StrawmanDiff:
+    """
+    Compute the structural diff between two strawman versions.
+
+    Args:
+        previous: Strawman the client currently shows (model or stored dict)
+        refined: Refined strawman
+
+    Returns:
+        StrawmanDiff describing how to get from previous to refined
+    """
+    previous = _as_dict(previous)
+    refined = _as_dict(refined)
+    diff = StrawmanDiff()
+
+    for name in METADATA_FIELDS:
+        if previous.get(name) != refined.get(name):
+            diff.metadata_changes[name] = refined.get(name)
+
+    old_slides = previous.get("slides") or []
+    new_slides = refined.get("slides") or []
+    diff.order = [slide.get("slide_id") for slide in new_slides]
+
+    old_content = [_content_key(slide) for slide in old_slides]
+    new_content = [_content_key(slide) for slide in new_slides]
+
+    # match[new index] = old index
+    match: Dict[int, int] = {}
+    unmatched_old = set(range(len(old_slides)))
+
+    def pair(predicate):
+        for new_index in range(len(new_slides)):
+            if new_index in match:
+                continue
+            for old_index in sorted(unmatched_old):
+                if predicate(old_index, new_index):
+                    match[new_index] = old_index
+                    unmatched_old.discard(old_index)
+                    break
+
+    same_id = lambda o, n: old_slides[o].get("slide_id") == new_slides[n].get("slide_id")
+    same_content = lambda o, n: old_content[o] == new_content[n]
+    same_title = lambda o, n: (
+        old_slides[o].get("title") is not None
+        and old_slides[o].get("title") == new_slides[n].get("title")
+    )
+
+    pair(lambda o, n: same_id(o, n) and same_content(o, n))
+    pair(same_content)
+    pair(same_id)
+    pair(same_title)
+
+    for new_index, new_slide in enumerate(new_slides):
+        slide_id = new_slide.get("slide_id")
+        if new_index not in match:
+            diff.inserted.append(slide_id)
+            continue
+
+        old_slide = old_slides[match[new_index]]
+        if old_slide.get("slide_id") != slide_id:
+            diff.renamed[slide_id] = old_slide.get("slide_id")
+
+        changes = {
+            name: new_slide.get(name)
+            for name in _field_names(old_slide, new_slide)
+            if name != "slide_id" and old_slide.get(name) != new_slide.get(name)
+        }
+        if changes:
+            diff.slide_changes[slide_id] = changes
+
+    diff.removed = [old_slides[old_index].get("slide_id") for old_index in sorted(unmatched_old)]
+
+    diff.moved = _moved_slides(
+        [(new_slides[n].get("slide_id"), match[n]) for n in range(len(new_slides)) if n in match]
+    )
+    return diff
+
+
+def _as_dict(strawman: Optional[StrawmanLike]) -> Dict[str, Any]:
+    if strawman is None:
+        return {}
+    if isinstance(strawman, BaseModel):
+        return strawman.model_dump()
+    return strawman
+
+
+def _field_names(old_slide: Dict[str, Any], new_slide: Dict[str, Any]) -> List[str]:
+    names = list(new_slide)
+    names.extend(name for name in old_slide if name not in new_slide)
+    return names
+
+
+def _content_key(slide: Dict[str, Any]) -> str:
+    # Missing and None fields are equivalent (stored strawmen may predate a field)
+    content = {
+        name: value for name, value in slide.items()
+        if name not in _POSITION_FIELDS and value is not None
+    }
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+def _moved_slides(matched: List[tuple]) -> List[str]:
+    """
+    Find slides whose relative order changed.
+
+    The longest run of matched slides that kept their previous relative order
+    stays put; every other matched slide counts as moved.
+    """
+    old_positions = [old_index for _, old_index in matched]
+    count = len(old_positions)
+    if count < 2:
+        return []
+
+    # Longest increasing subsequence of previous positions (O(n^2), decks are small)
+    lengths = [1] * count
+    previous = [-1] * count
+    for i in range(count):
+        for j in range(i):
+            if old_positions[j] < old_positions[i] and lengths[j] + 1 > lengths[i]:
+                lengths[i] = lengths[j] + 1
+                previous[i] = j
+
+    stable = set()
+    index = max(range(count), key=lambda i: lengths[i])
+    while index != -1:
+        stable.add(index)
+        index = previous[index]
+
+    return [matched[i][0] for i in range(count) if i not in stable]
@@ -0,0 +1,142 @@
+"""
+Incremental slide extraction from a streaming strawman.
+
+The strawman is one JSON document, and pydantic can only validate it once the
+trailing fields (design_suggestions, target_audience, ...) have arrived. The
+slides, however, close one by one long before that. StrawmanStreamParser
+scans the growing JSON text and returns each object of the top-level
+"slides" array as soon as its closing brace arrives, so it can be validated
+and sent on its own.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class StrawmanStreamParser:
+    """Extracts completed slide objects from a partial strawman JSON document."""
+
+    def __init__(self, array_key: str = "slides"):
+        """
+        Initialize the parser.
+
+        Args:
+            array_key: Top-level key of the array whose items are emitted
+        """
+        self.array_key = array_key
+        self.reset()
+
+    def reset(self):
+        """Forget everything scanned so far."""
+        self._text = ""
+        self._position = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._skip = 0
+        self.items_emitted = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Scan newly arrived text.
+
+        Args:
+            text: The whole document received so far (a growing prefix of
+                the final JSON)
+
+        Returns:
+            Slide dicts completed since the previous call, in order
+        """
+        if not text.startswith(self._text):
+            # The model restarted its output (e.g. a retry); start over but
+            # keep counting, so already-emitted slides are not repeated
+            emitted = self.items_emitted
+            self.reset()
+            self._skip = emitted
+            self.items_emitted = emitted
+        self._text = text
+
+        completed = []
+        stack = self._stack
+        for index in range(self._position, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:index]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char == ":" and len(stack) == 1:
+                self._current_key = self._last_string
+            elif char in "{[":
+                if (char == "{" and self._array_depth is not None
+                        and len(stack) == self._array_depth):
+                    self._item_start = index
+                stack.append(char)
+                if (char == "[" and len(stack) == 2
+                        and self._current_key == self.array_key):
+                    self._array_depth = len(stack)
+            elif char in "}]":
+                if not stack:
+                    continue
+                stack.pop()
+                if (char == "}" and self._item_start is not None
+                        and len(stack) == self._array_depth):
+                    item = self._decode(text[self._item_start:index + 1])
+                    self._item_start = None
+                    if item is not None:
+                        completed.append(item)
+                elif char == "]" and self._array_depth is not None and len(stack) < self._array_depth:
+                    self._array_depth = None
+
+        self._position = len(text)
+
+        if self._skip:
+            dropped = min(self._skip, len(completed))
+            completed = completed[dropped:]
+            self._skip -= dropped
+        self.items_emitted += len(completed)
+        return completed
+
+    def feed_object(self, document: Dict[str, Any], final: bool = False) -> List[Dict[str, Any]]:
+        """
+        Handle providers that deliver already-parsed arguments.
+
+        Args:
+            document: Partial or complete strawman as a dict
+            final: Whether the document is complete
+
+        Returns:
+            Slide dicts not returned before, in order
+        """
+        items = document.get(self.array_key) or []
+        # The last item may still be growing unless the document is final
+        ready = len(items) if final else len(items) - 1
+        completed = items[self.items_emitted:max(ready, self.items_emitted)]
+        self.items_emitted += len(completed)
+        return [item for item in completed if isinstance(item, dict)]
+
+    @staticmethod
+    def _decode(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(fragment)
+        except json.JSONDecodeError as e:
+            logger.debug(f"Skipping undecodable slide fragment: {e}")
+            return None
+        return item if isinstance(item, dict) else None
@@ -26,8 +26,13 @@ from src.models.agents import (
     ClarifyingQuestions,
     ConfirmationPlan,
     PresentationStrawman,
+    Slide,
     StateContext
 )
+from src.utils.logger import setup_logger
+from src.utils.strawman_diff import StrawmanDiff, diff_strawman
+
+logger = setup_logger(__name__)
 
 
 class StreamlinedMessagePackager:
@@ -157,22 +162,7 @@ class StreamlinedMessagePackager:
         # This is handled by create_pre_generation_status method
         
         # Message 1: Slide update with structured slide data
-        slide_data = self._convert_slides_to_data(strawman)
-        
-        messages.append(
-            create_slide_update(
-                session_id=session_id,
-                operation="full_update",
-                metadata={
-                    "main_title": strawman.main_title,
-                    "overall_theme": strawman.overall_theme,
-                    "design_suggestions": strawman.design_suggestions,
-                    "target_audience": strawman.target_audience,
-                    "presentation_duration": strawman.presentation_duration
-                },
-                slides=slide_data
-            )
-        )
+        messages.append(self._full_slide_update(session_id, strawman))
         
         # Message 2: Action request
         messages.append(
@@ -217,30 +207,17 @@ class StreamlinedMessagePackager:
             )
         )
         
-        # Message 2: Partial slide update
-        # Note: In real implementation, we'd compare with previous version
-        # and only send changed slides
-        affected_slide_ids = self._get_affected_slides(refined_strawman, context)
-        slide_data = self._convert_slides_to_data(
-            refined_strawman,
-            only_slides=affected_slide_ids
-        )
-        
-        messages.append(
-            create_slide_update(
-                session_id=session_id,
-                operation="partial_update",
-                metadata={
-                    "main_title": refined_strawman.main_title,
-                    "overall_theme": refined_strawman.overall_theme,
-                    "design_suggestions": refined_strawman.design_suggestions,
-                    "target_audience": refined_strawman.target_audience,
-                    "presentation_duration": refined_strawman.presentation_duration
-                },
-                slides=slide_data,
-                affected_slides=affected_slide_ids
-            )
-        )
+        # Message 2: Partial slide update with only what changed since the
+        # strawman the client currently shows
+        previous = context.session_data.get("presentation_strawman") if context else None
+        if not previous:
+            messages.append(self._full_slide_update(session_id, refined_strawman))
+            change_summary = ["Regenerated the presentation with your requested changes"]
+        else:
+            diff = diff_strawman(previous, refined_strawman)
+            logger.info(f"Refinement diff: {diff.to_dict()}")
+            messages.append(self._partial_slide_update(session_id, refined_strawman, diff))
+            change_summary = self._describe_changes(diff)
         
         # Message 3: Explanation of changes
         messages.append(
@@ -248,10 +225,7 @@ class StreamlinedMessagePackager:
                 session_id=session_id,
                 text="I've updated your presentation based on your feedback.",
                 sub_title="Changes made:",
-                list_items=[
-                    f"Updated slide {slide_id.split('_')[1]} with your requested changes"
-                    for slide_id in affected_slide_ids
-                ]
+                list_items=change_summary
             )
         )
         
@@ -279,6 +253,94 @@ class StreamlinedMessagePackager:
         
         return messages
     
+    def _full_slide_update(
+        self,
+        session_id: str,
+        strawman: PresentationStrawman
+    ) -> SlideUpdate:
+        """Create a full_update carrying every slide and the presentation metadata."""
+        return create_slide_update(
+            session_id=session_id,
+            operation="full_update",
+            metadata=self._metadata(strawman),
+            slides=self._convert_slides_to_data(strawman)
+        )
+    
+    def _partial_slide_update(
+        self,
+        session_id: str,
+        strawman: PresentationStrawman,
+        diff: StrawmanDiff
+    ) -> SlideUpdate:
+        """
+        Create a partial_update from a structural diff.
+        
+        Inserted slides are sent in full; existing slides only carry their
+        changed fields as patches. Metadata is only sent if it changed, and the
+        slide order only if the deck structure changed.
+        """
+        inserted = set(diff.inserted)
+        slides = []
+        patches = []
+        for slide in strawman.slides:
+            if slide.slide_id in inserted:
+                slides.append(self._slide_to_data(slide))
+                continue
+            
+            changes = diff.slide_changes.get(slide.slide_id, {})
+            renamed_from = diff.renamed.get(slide.slide_id)
+            slide_data = self._slide_to_data(slide)
+            patch = {name: slide_data[name] for name in changes if name in slide_data}
+            if patch or renamed_from:
+                patch["slide_id"] = slide.slide_id
+                if renamed_from:
+                    patch["from_slide_id"] = renamed_from
+                patches.append(patch)
+        
+        return create_slide_update(
+            session_id=session_id,
+            operation="partial_update",
+            metadata=self._metadata(strawman) if diff.metadata_changes else None,
+            slides=slides,
+            affected_slides=diff.affected_slides,
+            slide_patches=patches or None,
+            removed_slides=diff.removed or None,
+            slide_order=diff.order if diff.structure_changed else None
+        )
+    
+    @staticmethod
+    def _metadata(strawman: PresentationStrawman) -> Dict[str, Any]:
+        """Presentation metadata for slide updates."""
+        return {
+            "main_title": strawman.main_title,
+            "overall_theme": strawman.overall_theme,
+            "design_suggestions": strawman.design_suggestions,
+            "target_audience": strawman.target_audience,
+            "presentation_duration": strawman.presentation_duration
+        }
+    
+    @staticmethod
+    def _describe_changes(diff: StrawmanDiff) -> List[str]:
+        """Human-readable list of changes for the refinement chat message."""
+        def number(slide_id: str) -> str:
+            return slide_id.split('_')[-1].lstrip('0') or '0'
+        
+        items = []
+        content_changes = diff.content_changes
+        for slide_id in diff.order:
+            if slide_id in diff.inserted:
+                items.append(f"Added slide {number(slide_id)}")
+            elif slide_id in content_changes:
+                fields = ", ".join(name.replace('_', ' ') for name in content_changes[slide_id])
+                items.append(f"Updated slide {number(slide_id)} ({fields})")
+        for slide_id in diff.removed:
+            items.append(f"Removed former slide {number(slide_id)}")
+        if diff.moved:
+            items.append("Reordered slides")
+        if diff.metadata_changes:
+            items.append("Updated presentation details")
+        return items or ["No slide content needed to change"]
+    
     def _convert_slides_to_data(
         self,
         strawman: PresentationStrawman,
@@ -301,36 +363,26 @@ class StreamlinedMessagePackager:
             if only_slides and slide.slide_id not in only_slides:
                 continue
             
-            slide_data.append({
-                "slide_id": slide.slide_id,
-                "slide_number": slide.slide_number,
-                "slide_type": slide.slide_type,
-                "title": slide.title,
-                "narrative": slide.narrative,
-                "key_points": slide.key_points,
-                "analytics_needed": slide.analytics_needed,
-                "visuals_needed": slide.visuals_needed,
-                "diagrams_needed": slide.diagrams_needed,
-                "structure_preference": slide.structure_preference
-            })
+            slide_data.append(self._slide_to_data(slide))
         
         return slide_data
     
+    @staticmethod
+    def _slide_to_data(slide: Slide) -> Dict[str, Any]:
+        """Convert a single Slide object to its message dictionary."""
+        return {
+            "slide_id": slide.slide_id,
+            "slide_number": slide.slide_number,
+            "slide_type": slide.slide_type,
+            "title": slide.title,
+            "narrative": slide.narrative,
+            "key_points": slide.key_points,
+            "analytics_needed": slide.analytics_needed,
+            "visuals_needed": slide.visuals_needed,
+            "diagrams_needed": slide.diagrams_needed,
+            "structure_preference": slide.structure_preference
+        }
     
-    def _get_affected_slides(
-        self,
-        refined_strawman: PresentationStrawman,
-        context: Optional[StateContext] = None
-    ) -> List[str]:
-        """
-        Determine which slides were affected by refinement.
-        
-        In production, this would compare with previous version
-        to identify actual changes.
-        """
-        # Placeholder: assume slides 3 and 5 were changed
-        # In real implementation, would do actual comparison
-        return ["slide_003", "slide_005"]
     
     def create_status_message(
         self,
@@ -407,6 +459,32 @@ class StreamlinedMessagePackager:
                 progress=0
             )
     
+    def create_slide_append(
+        self,
+        session_id: str,
+        slide: Slide
+    ) -> SlideUpdate:
+        """
+        Create a slide update for one slide streamed during strawman generation.
+        
+        Appends carry no presentation metadata; the complete strawman still
+        follows as a full_update once generation finishes.
+        
+        Args:
+            session_id: Session identifier
+            slide: The newly generated slide
+            
+        Returns:
+            Slide update message with operation "append"
+        """
+        return create_slide_update(
+            session_id=session_id,
+            operation="append",
+            metadata=None,
+            slides=[self._slide_to_data(slide)],
+            affected_slides=[slide.slide_id]
+        )
+    
     def create_progress_update(
         self,
         session_id: str,
@@ -0,0 +1,148 @@
+"""
+Token counting for prompt budgeting and usage tracking.
+
+Counts come from, in order of preference:
+
+1. Provider usage metadata (pydantic-ai `result.usage()`), which is exact but
+   only available after a call. Every single-request call feeds the ratio
+   between the provider count and the local count of the same input (prompts
+   plus the structured output schema) back into the counter, so pre-call
+   estimates converge on the provider's tokenizer.
+2. A local tokenizer (tiktoken, if installed and its encoding loads).
+3. A character-class heuristic that, unlike len(text) // 4, accounts for
+   JSON punctuation and non-Latin scripts.
+
+Counts of static text (system prompts) are cached.
+"""
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Words, digit runs, line breaks with indentation, CJK characters, other
+# non-ASCII runs, single symbols
+_PIECES = re.compile(
+    r"[A-Za-z]+|[0-9]+|\n\s*|[぀-ヿ㐀-鿿가-힯]|[^\x00-\x7f぀-ヿ㐀-鿿가-힯]+|[^\sA-Za-z0-9]"
+)
+_CJK = re.compile(r"[぀-ヿ㐀-鿿가-힯]")
+
+# Bounds and smoothing of the provider/local calibration ratio
+_MIN_RATIO, _MAX_RATIO = 0.5, 2.0
+_SMOOTHING = 0.2
+
+
+def estimate_tokens_heuristic(text: str) -> int:
+    """Approximate BPE token count from character classes."""
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif first == "\n" or _CJK.match(first) or len(piece) == 1:
+            tokens += 1
+        else:
+            # Accented/Cyrillic/Greek/... runs: roughly two characters per token
+            tokens += math.ceil(len(piece) / 2)
+    return tokens
+
+
+def _load_tiktoken(encoding_name: str) -> Optional[Callable[[str], int]]:
+    if not encoding_name:
+        return None
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding '{encoding_name}' unavailable, using heuristic token counts: {e}")
+        return None
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class TokenCounter:
+    """Counts tokens with a local backend, calibrated against provider usage."""
+
+    def __init__(self, backend: Optional[Callable[[str], int]] = None, name: str = "heuristic"):
+        """
+        Args:
+            backend: Function returning the token count of a text; the
+                heuristic is used if None
+            name: Backend name (for logs and reports)
+        """
+        self.backend = backend or estimate_tokens_heuristic
+        self.name = name
+        self.ratio = 1.0
+        self._count_static = lru_cache(maxsize=128)(self._raw_count)
+
+    def count(self, text: str) -> int:
+        """Calibrated token count of a text."""
+        return round(self._raw_count(text) * self.ratio)
+
+    def count_static(self, text: str) -> int:
+        """Calibrated token count of text that does not change (cached)."""
+        return round(self._count_static(text) * self.ratio)
+
+    def count_output(self, output: Any) -> int:
+        """Token count of a model output (string or pydantic model)."""
+        if hasattr(output, "model_dump_json"):
+            output = output.model_dump_json()
+        return self.count(str(output))
+
+    def count_schema(self, output_type: Any) -> int:
+        """Calibrated token count of the JSON schema sent for a structured output type."""
+        if not hasattr(output_type, "model_json_schema"):
+            return 0
+        return self.count_static(json.dumps(output_type.model_json_schema()))
+
+    def observe_usage(self, estimated_tokens: int, provider_tokens: Optional[int], requests: int = 1):
+        """
+        Calibrate against the prompt tokens the provider reported for a call.
+
+        Args:
+            estimated_tokens: Calibrated local count of the same input
+                (prompts and output schema)
+            provider_tokens: input_tokens from the provider usage (None or 0
+                when the provider reports none)
+            requests: Model requests behind provider_tokens; runs with
+                validation retries sum several requests and are skipped
+        """
+        if not provider_tokens or estimated_tokens <= 0 or requests != 1:
+            return
+        observed = self.ratio * provider_tokens / estimated_tokens
+        observed = min(_MAX_RATIO, max(_MIN_RATIO, observed))
+        self.ratio += _SMOOTHING * (observed - self.ratio)
+
+    def _raw_count(self, text: str) -> int:
+        if not text:
+            return 0
+        try:
+            return self.backend(text)
+        except Exception as e:
+            logger.debug(f"Token backend '{self.name}' failed: {e}")
+            return estimate_tokens_heuristic(text)
+
+
+_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """The process-wide token counter (tiktoken if available, else the heuristic)."""
+    global _counter
+    if _counter is None:
+        from config.settings import get_settings
+        encoding_name = get_settings().TOKEN_COUNTER_ENCODING
+        backend = _load_tiktoken(encoding_name)
+        _counter = TokenCounter(backend, encoding_name) if backend else TokenCounter()
+    return _counter
+
+
+def set_token_counter(counter: TokenCounter):
+    """Replace the process-wide token counter (e.g. with a provider tokenizer)."""
+    global _counter
+    _counter = counter
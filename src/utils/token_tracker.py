@@ -5,22 +5,78 @@ Tracks token usage for before/after comparison to measure context reduction effe
 
 from typing import Dict, Any, Optional
 from datetime import datetime
+import hashlib
 import json
-from collections import defaultdict
+from collections import OrderedDict
 import logfire
 
+from src.utils.metrics_store import get_metrics_store
+
+# Sessions kept for per-session reports (least recently tracked are dropped)
+MAX_TRACKED_SESSIONS = 256
+
+# Size of the filter that remembers which sessions were already counted (128 KiB)
+SEEN_SESSIONS_BITS = 1 << 20
+_SEEN_SESSIONS_HASHES = 4
+
+
+class _SeenSessions:
+    """Bloom filter of session ids, to count distinct sessions in fixed memory.
+    
+    A false positive (a new session taken for a known one) makes the count a
+    slight undercount, under 1% after 100k sessions.
+    """
+    
+    def __init__(self, bits: int = SEEN_SESSIONS_BITS):
+        self.bits = bits
+        self._bitmap = bytearray(bits // 8)
+    
+    def add(self, session_id: str) -> bool:
+        """Remember a session; True if it had not been seen before."""
+        digest = hashlib.blake2b(session_id.encode(), digest_size=4 * _SEEN_SESSIONS_HASHES).digest()
+        new = False
+        for i in range(_SEEN_SESSIONS_HASHES):
+            bit = int.from_bytes(digest[4 * i:4 * i + 4], "little") % self.bits
+            mask = 1 << (bit & 7)
+            if not self._bitmap[bit >> 3] & mask:
+                self._bitmap[bit >> 3] |= mask
+                new = True
+        return new
+
 
 class TokenTracker:
-    """Track token usage for before/after comparison"""
+    """Track token usage for before/after comparison
     
-    def __init__(self):
-        # Track usage by session and state
-        self.baseline_usage: Dict[str, Dict[str, int]] = defaultdict(dict)  # Before context builder
-        self.optimized_usage: Dict[str, Dict[str, int]] = defaultdict(dict)  # After context builder
-        
-        # Track timestamps for reporting
-        self.session_start_times: Dict[str, datetime] = {}
-        self.session_end_times: Dict[str, datetime] = {}
+    Per-session usage is kept for the most recently active sessions only;
+    aggregates live in the process-wide MetricsStore, so memory does not grow
+    with the number of sessions.
+    """
+    
+    def __init__(self, max_sessions: int = MAX_TRACKED_SESSIONS):
+        # session_id -> {"baseline": {state: usage}, "optimized": {state: usage}, "started", "ended"}
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_sessions = max_sessions
+        self.metrics = get_metrics_store()
+        # Sessions evicted from the LRU and tracked again are not counted twice
+        self._seen = _SeenSessions()
+    
+    def _session(self, session_id: str) -> Dict[str, Any]:
+        """Get (or start) the usage record of a session, evicting the oldest if full."""
+        record = self.sessions.get(session_id)
+        if record is None:
+            record = self.sessions[session_id] = {
+                "baseline": {},
+                "optimized": {},
+                "started": datetime.utcnow(),
+                "ended": None
+            }
+            if self._seen.add(session_id):
+                self.metrics.increment("sessions_tracked", description="Sessions with tracked token usage")
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session_id)
+        return record
     
     async def track_baseline(self, session_id: str, state: str, user_tokens: int, system_tokens: int = 0) -> None:
         """Track token usage before optimization
@@ -32,15 +88,13 @@ class TokenTracker:
             system_tokens: Tokens in system prompt
         """
         total_tokens = user_tokens + system_tokens
-        self.baseline_usage[session_id][state] = {
+        self._session(session_id)["baseline"][state] = {
             "user": user_tokens,
             "system": system_tokens,
             "total": total_tokens
         }
-        
-        # Record session start time if first tracking
-        if session_id not in self.session_start_times:
-            self.session_start_times[session_id] = datetime.utcnow()
+        self.metrics.increment("baseline_tokens", total_tokens, state=state,
+                               description="Prompt tokens with the full (unoptimized) context")
         
         # Log to Logfire
         logfire.info(
@@ -63,19 +117,23 @@ class TokenTracker:
             system_tokens: Tokens in system prompt
         """
         total_tokens = user_tokens + system_tokens
-        self.optimized_usage[session_id][state] = {
+        record = self._session(session_id)
+        record["optimized"][state] = {
             "user": user_tokens,
             "system": system_tokens,
             "total": total_tokens
         }
+        self.metrics.increment("optimized_tokens", total_tokens, state=state,
+                               description="Prompt tokens with the state-specific context")
         
         # Update session end time
-        self.session_end_times[session_id] = datetime.utcnow()
+        record["ended"] = datetime.utcnow()
     
     def get_savings_report(self, session_id: str) -> Dict[str, Any]:
         """Calculate token savings for a specific session"""
-        baseline = self.baseline_usage.get(session_id, {})
-        optimized = self.optimized_usage.get(session_id, {})
+        record = self.sessions.get(session_id, {})
+        baseline = record.get("baseline", {})
+        optimized = record.get("optimized", {})
         
         # Calculate totals
         total_baseline = sum(
@@ -156,24 +214,16 @@ class TokenTracker:
     def get_aggregate_report(self) -> Dict[str, Any]:
         """Get aggregate report across all sessions"""
         
-        # Aggregate by state across all sessions
-        state_totals_baseline = defaultdict(int)
-        state_totals_optimized = defaultdict(int)
-        
-        for session_id in self.baseline_usage:
-            for state, tokens in self.baseline_usage[session_id].items():
-                state_totals_baseline[state] += tokens
-        
-        for session_id in self.optimized_usage:
-            for state, tokens in self.optimized_usage[session_id].items():
-                state_totals_optimized[state] += tokens
+        # Aggregate by state across all sessions (running totals)
+        state_totals_baseline = self.metrics.counters.get("baseline_tokens", {})
+        state_totals_optimized = self.metrics.counters.get("optimized_tokens", {})
         
         # Calculate aggregate stats
         total_baseline = sum(state_totals_baseline.values())
         total_optimized = sum(state_totals_optimized.values())
         
         report = {
-            "total_sessions": len(set(self.baseline_usage.keys()) | set(self.optimized_usage.keys())),
+            "total_sessions": int(self.metrics.counters.get("sessions_tracked", {}).get("all", 0)),
             "states": {},
             "total_baseline_tokens": total_baseline,
             "total_optimized_tokens": total_optimized,
@@ -268,6 +318,8 @@ class TokenTracker:
         system_tokens: int
     ):
         """Track token usage for modular system"""
+        self.metrics.observe("prompt_tokens", user_tokens + system_tokens, state=state,
+                             description="Prompt tokens (system + user) per Director call")
         logfire.info(
             "modular_token_usage",
             session_id=session_id,
@@ -278,6 +330,29 @@ class TokenTracker:
             prompt_type="modular"
         )
     
+    def track_response(
+        self,
+        state: str,
+        latency_ms: float,
+        output_tokens: int,
+        input_tokens: Optional[int] = None
+    ) -> None:
+        """Track the latency and response size of a Director call
+        
+        Args:
+            state: Current state
+            latency_ms: Model call latency
+            output_tokens: Response tokens
+            input_tokens: Prompt tokens reported by the provider, if any
+        """
+        self.metrics.observe("director_latency_ms", latency_ms, state=state,
+                             description="Director model call latency in milliseconds")
+        self.metrics.observe("response_tokens", output_tokens, state=state,
+                             description="Response tokens per Director call")
+        if input_tokens:
+            self.metrics.observe("provider_prompt_tokens", input_tokens, state=state,
+                                 description="Prompt tokens reported by the provider per Director call")
+
     async def track_quality_metrics(
         self,
         session_id: str,
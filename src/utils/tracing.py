@@ -0,0 +1,100 @@
+"""
+Per-turn tracing for the WebSocket handler.
+
+A turn (one incoming message) is split into consecutive phases:
+
+    receive -> classify -> state -> director -> package -> send
+
+Starting a phase ends the previous one, so the handler marks phase
+boundaries without nesting its code in context managers. When the turn
+finishes:
+
+- every phase duration (and the turn total) is recorded in the metrics
+  store, per workflow state, for every turn
+- a sampled fraction of turns (TRACE_SAMPLE_RATE), and every turn slower
+  than TRACE_SLOW_TURN_MS, is logged as one structured line
+
+Nothing is formatted for turns that are not logged.
+"""
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.logger import get_queue_handler, setup_logger
+from src.utils.metrics_store import get_metrics_store
+
+logger = setup_logger(__name__)
+
+PHASES = ("receive", "classify", "state", "director", "package", "send")
+
+
+class TurnTrace:
+    """Phase timings and attributes of one WebSocket turn."""
+
+    def __init__(self, session_id: str, sample_rate: float = 0.0, slow_turn_ms: int = 0):
+        """
+        Args:
+            session_id: Session the turn belongs to
+            sample_rate: Probability that the turn is logged
+            slow_turn_ms: Turns at least this slow are always logged (0 disables)
+        """
+        self.session_id = session_id
+        self.sampled = random.random() < sample_rate
+        self.slow_turn_ms = slow_turn_ms
+        self.attributes: Dict[str, Any] = {}
+        self.spans: List[Tuple[str, float]] = []
+        self.started = time.perf_counter()
+        self._phase: Optional[str] = None
+        self._phase_started = self.started
+        self._finished = False
+
+    def phase(self, name: str):
+        """End the current phase (if any) and start the next one."""
+        now = time.perf_counter()
+        self._close(now)
+        self._phase = name
+        self._phase_started = now
+
+    def set(self, **attributes: Any):
+        """Attach attributes (state, intent, ...) to the turn."""
+        self.attributes.update(attributes)
+
+    def finish(self, status: str = "ok"):
+        """Close the turn, record its timings and log it if sampled or slow."""
+        if self._finished:
+            return
+        self._finished = True
+        now = time.perf_counter()
+        self._close(now)
+        total_ms = (now - self.started) * 1000
+
+        state = self.attributes.get("state", "unknown")
+        metrics = get_metrics_store()
+        for name, ms in self.spans:
+            metrics.observe(f"ws_{name}_ms", ms, state=state, description=f"WebSocket turn '{name}' phase latency")
+        metrics.observe("ws_turn_ms", total_ms, state=state, description="WebSocket turn latency")
+        if status != "ok":
+            metrics.increment("ws_turn_errors", state=state, description="WebSocket turns that failed")
+
+        if self.sampled or (self.slow_turn_ms and total_ms >= self.slow_turn_ms):
+            logger.info("turn %s", json.dumps({
+                "session_id": self.session_id,
+                "status": status,
+                "total_ms": round(total_ms, 1),
+                "spans": {name: round(ms, 1) for name, ms in self.spans},
+                **self.attributes
+            }, default=str))
+
+    def _close(self, now: float):
+        if self._phase is not None:
+            self.spans.append((self._phase, (now - self._phase_started) * 1000))
+            self._phase = None
+
+
+def _prometheus_samples():
+    """Log records dropped by the non-blocking log handler, for /metrics."""
+    yield "log_records_dropped", {}, get_queue_handler().dropped
+
+
+get_metrics_store().register_collector(_prometheus_samples)
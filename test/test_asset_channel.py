@@ -0,0 +1,51 @@
+"""
+Tests for the asset side-channel frame format.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage.image_store import content_hash
+from src.utils.asset_channel import (
+    asset_reference,
+    decode_asset_frame,
+    encode_asset_frame,
+    is_valid_asset_id,
+)
+
+
+def test_frame_round_trip():
+    data = os.urandom(4096)
+    asset_id = content_hash(data)
+
+    header, payload = decode_asset_frame(encode_asset_frame({"asset_id": asset_id, "slide_id": "slide_001"}, data))
+
+    assert payload == data
+    assert header["type"] == "asset"
+    assert header["asset_id"] == asset_id
+    assert header["slide_id"] == "slide_001"
+    assert header["size"] == len(data)
+
+
+def test_truncated_frame_is_rejected():
+    frame = encode_asset_frame({"asset_id": "a" * 64}, b"0123456789")
+    with pytest.raises(ValueError):
+        decode_asset_frame(frame[:-1])
+
+
+def test_reference_is_small_and_points_at_asset():
+    asset_id = content_hash(b"image")
+    reference = asset_reference(asset_id, transparent_asset_id=content_hash(b"transparent"))
+
+    assert reference["url"].endswith(asset_id)
+    assert reference["transparent_url"].endswith(reference["transparent_asset_id"])
+    assert "base64" not in reference
+
+
+def test_asset_id_validation():
+    assert is_valid_asset_id(content_hash(b"x"))
+    assert not is_valid_asset_id("../../etc/passwd")
+    assert not is_valid_asset_id("")
@@ -0,0 +1,103 @@
+"""
+Tests for token-budgeted context assembly and the rolling conversation summary.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.context_budget import (
+    MAX_SUMMARY_LINES, RECENT_MESSAGES, ContextSection, assemble_sections, update_conversation_summary
+)
+from src.utils.context_builder import ContextBuilder
+from src.utils.token_counter import TokenCounter
+
+MOCK_STRAWMAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_strawman.json")
+
+# One token per word keeps the arithmetic readable
+counter = TokenCounter(lambda text: len(text.split()))
+
+
+def _history(turns):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"make slide {i} punchier"})
+        history.append({"role": "assistant", "content": {"main_title": "Deck", "slides": [{}] * 10}})
+    return history
+
+
+def test_sections_within_budget_are_untouched():
+    sections = [ContextSection("a", ["one two three"]), ContextSection("b", ["four five"], priority=1)]
+
+    prompt, report = assemble_sections(sections, counter, budget=100)
+
+    assert prompt == "one two three\n\nfour five"
+    assert report["before"] == report["after"] == 5
+
+
+def test_lowest_priority_shrinks_first_and_required_sections_stay():
+    sections = [
+        ContextSection("request", ["keep " * 10]),
+        ContextSection("strawman", ["big " * 50, "small " * 20], priority=2),
+        ContextSection("summary", ["old " * 30, "recent " * 5], priority=3, required=False),
+    ]
+
+    prompt, report = assemble_sections(sections, counter, budget=40)
+
+    assert report["before"] == 90
+    assert report["sections"] == {"request": 10, "strawman": 20, "summary": 5}
+    assert "keep" in prompt and "old" not in prompt
+
+    # Over budget even at the last renderings: optional sections are dropped
+    sections[1].level = sections[2].level = 0
+    _, report = assemble_sections(sections, counter, budget=20)
+    assert report["sections"] == {"request": 10, "strawman": 20}
+
+
+def test_section_cap_truncates():
+    section = ContextSection("request", ["word " * 500], max_tokens=100)
+
+    _, report = assemble_sections([section], counter, budget=1000)
+
+    assert report["after"] <= 100
+    assert section.text.endswith("…[truncated]")
+
+
+def test_summary_is_extended_incrementally():
+    history = _history(3)
+    summary = update_conversation_summary(None, history)
+
+    assert summary["covered"] == len(history) - RECENT_MESSAGES
+    assert summary["lines"][0] == "User: make slide 0 punchier"
+    assert summary["lines"][1] == "Assistant: presented strawman 'Deck' (10 slides)"
+
+    # Nothing new left the recent window
+    assert update_conversation_summary(summary, history) is summary
+
+    history = _history(30)
+    for end in range(len(summary["lines"]), len(history) + 1, 2):
+        summary = update_conversation_summary(summary, history[:end])
+    assert len(summary["lines"]) == MAX_SUMMARY_LINES
+    assert summary["omitted"] + MAX_SUMMARY_LINES == len(history) - RECENT_MESSAGES
+
+
+def test_refinement_prompt_is_compacted_to_budget():
+    with open(MOCK_STRAWMAN) as f:
+        strawman = json.load(f)
+    history = _history(20)
+    session_data = {
+        "presentation_strawman": strawman,
+        "user_message": "make slide 3 more visual",
+        "conversation_history": history,
+        "conversation_summary": update_conversation_summary(None, history)
+    }
+
+    full_context, full_prompt = ContextBuilder(counter, token_budget=100000).build_context("REFINE_STRAWMAN", session_data)
+    budget = full_context["context_tokens"]["before"] * 3 // 4
+    context, prompt = ContextBuilder(counter, token_budget=budget).build_context("REFINE_STRAWMAN", session_data)
+
+    assert "Conversation so far" in full_prompt
+    assert context["context_tokens"]["after"] <= budget
+    assert "User's refinement request: make slide 3 more visual" in prompt
+    assert strawman["slides"][2]["title"] in prompt
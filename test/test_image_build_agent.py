@@ -0,0 +1,193 @@
+"""
+Offline tests for the Image Build Agent using the stub provider.
+No API keys or network access required.
+"""
+import asyncio
+import base64
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agents import image_build_agent
+from src.agents.image_build_agent import (
+    ImageContentV4,
+    StubImageProvider,
+    generate_image_with_imagen3,
+    set_image_provider,
+)
+from src.storage.image_store import LocalImageStore, content_hash, set_image_store
+
+
+def _spec(prompt: str = "a lighthouse", archetype: str = "spot_illustration") -> ImageContentV4:
+    return ImageContentV4(
+        archetype=archetype,
+        primary_subject=prompt,
+        art_direction={},
+        mood_keywords=[],
+        composition_notes="",
+        imagen_prompt=prompt,
+    )
+
+
+@pytest.fixture
+def stub_provider():
+    provider = StubImageProvider(latency=0.05)
+    set_image_provider(provider)
+    set_image_store(None)
+    yield provider
+    set_image_provider(None)
+
+
+@pytest.fixture
+def counting_provider(stub_provider, tmp_path):
+    """Stub provider that counts real generations, with a fresh image store."""
+    set_image_store(LocalImageStore(str(tmp_path)))
+    stub_provider.calls = 0
+    original = stub_provider.generate
+
+    async def counting_generate(prompt, aspect_ratio):
+        stub_provider.calls += 1
+        return await original(prompt, aspect_ratio)
+
+    stub_provider.generate = counting_generate
+    yield stub_provider
+    set_image_store(None)
+
+
+@pytest.mark.asyncio
+async def test_stub_provider_returns_png(stub_provider):
+    result = await generate_image_with_imagen3(_spec())
+    assert result["success"]
+    assert base64.b64decode(result["base64"]).startswith(b"\x89PNG")
+    assert result["metadata"]["model"] == "stub"
+
+
+@pytest.mark.asyncio
+async def test_background_removal_runs_for_icon_archetypes(stub_provider):
+    result = await generate_image_with_imagen3(_spec(archetype="minimalist_vector_art"))
+    assert result["success"]
+    assert result["has_transparent"]
+    assert result["transparent_base64"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_error(stub_provider):
+    stub_provider.latency = 1.0
+    result = await generate_image_with_imagen3(_spec(), timeout=0.01)
+    assert not result["success"]
+    assert "timed out" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(stub_provider, monkeypatch):
+    monkeypatch.setattr(image_build_agent, "IMAGEN_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(image_build_agent, "_semaphore", None)
+
+    in_flight = 0
+    peak = 0
+    original = stub_provider.generate
+
+    async def tracking_generate(prompt, aspect_ratio):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await original(prompt, aspect_ratio)
+        finally:
+            in_flight -= 1
+
+    stub_provider.generate = tracking_generate
+    results = await asyncio.gather(*[generate_image_with_imagen3(_spec(str(i))) for i in range(6)])
+
+    assert all(r["success"] for r in results)
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_repeat_request_served_from_cache(counting_provider):
+    first = await generate_image_with_imagen3(_spec(archetype="minimalist_vector_art"))
+    second = await generate_image_with_imagen3(_spec(archetype="minimalist_vector_art"))
+
+    assert counting_provider.calls == 1
+    assert not first["metadata"]["cache_hit"]
+    assert second["metadata"]["cache_hit"]
+    assert second["base64"] == first["base64"]
+    assert second["transparent_base64"] == first["transparent_base64"]
+
+
+@pytest.mark.asyncio
+async def test_aspect_ratio_is_part_of_cache_key(counting_provider):
+    wide = _spec()
+    square = _spec()
+    square.imagen_config = {**square.imagen_config, "aspectRatio": "1:1"}
+
+    await generate_image_with_imagen3(wide)
+    await generate_image_with_imagen3(square)
+
+    assert counting_provider.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_deduplicated(counting_provider):
+    results = await asyncio.gather(*[generate_image_with_imagen3(_spec()) for _ in range(5)])
+
+    assert counting_provider.calls == 1
+    assert len({r["base64"] for r in results}) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_follower_keeps_shared_generation(counting_provider):
+    leader = asyncio.create_task(generate_image_with_imagen3(_spec()))
+    follower = asyncio.create_task(generate_image_with_imagen3(_spec()))
+    await asyncio.sleep(0.01)
+    follower.cancel()
+
+    result = await leader
+    assert result["success"]
+    assert follower.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_reference_only_results_skip_base64(counting_provider):
+    result = await generate_image_with_imagen3(_spec(archetype="minimalist_vector_art"), inline=False)
+
+    assert result["success"]
+    assert "base64" not in result
+    assert "transparent_base64" not in result
+    assert result["image_url"].endswith(result["image_id"])
+    assert result["transparent_id"]
+
+
+def test_local_store_evicts_least_recently_used_blobs(tmp_path):
+    store = LocalImageStore(str(tmp_path), max_bytes=250)
+    store._put("old", b"a" * 100, None, {})
+    store._put("used", b"b" * 100, None, {})
+    os.utime(tmp_path / "blobs" / f"{content_hash(b'a' * 100)}.png", (1, 1))
+    os.utime(tmp_path / "blobs" / f"{content_hash(b'b' * 100)}.png", (2, 2))
+    assert store._get("used") is not None  # refreshes its last use
+
+    store._put("new", b"c" * 100, None, {})
+
+    assert store._get("old") is None
+    assert not (tmp_path / "index" / "old.json").exists()
+    assert store._get("used") is not None
+    assert store._get("new") is not None
+    assert store._total_bytes <= 250
+
+
+def test_concurrent_puts_of_the_same_image_are_stored_once(tmp_path):
+    store = LocalImageStore(str(tmp_path))
+
+    async def put_concurrently():
+        await asyncio.gather(*[
+            store.put(f"key-{i}", b"same image", None, {}) for i in range(8)
+        ])
+
+    asyncio.run(put_concurrently())
+
+    assert store._total_bytes == len(b"same image")
+    assert [path.name for path in (tmp_path / "blobs").iterdir()] == [f"{content_hash(b'same image')}.png"]
+    assert store._get("key-7")["image_bytes"] == b"same image"
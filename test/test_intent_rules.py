@@ -0,0 +1,62 @@
+"""
+Tests for the IntentRouter fast path rules.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.intent_rules import action_ids_from_context, classify_by_action, classify_by_rules
+
+
+@pytest.mark.parametrize("state, message, expected", [
+    ("PROVIDE_GREETING", "I need a presentation about AI in healthcare", "Submit_Initial_Topic"),
+    ("ASK_CLARIFYING_QUESTIONS", "It's for executives, 15 minutes, focus on ROI", "Submit_Clarification_Answers"),
+    ("CREATE_CONFIRMATION_PLAN", "Yes, that looks perfect, go ahead.", "Accept_Plan"),
+    ("CREATE_CONFIRMATION_PLAN", "No, that's not quite right", "Reject_Plan"),
+    ("GENERATE_STRAWMAN", "Looks good, we're done.", "Accept_Strawman"),
+    ("GENERATE_STRAWMAN", "Can you make the second slide more data-driven?", "Submit_Refinement_Request"),
+    ("REFINE_STRAWMAN", "How long will this take?", "Ask_Help_Or_Question"),
+])
+def test_obvious_messages_are_classified_locally(state, message, expected):
+    intent, _ = classify_by_rules(message, state)
+
+    assert intent.intent_type == expected
+
+
+@pytest.mark.parametrize("state, message", [
+    ("PROVIDE_GREETING", "hi"),
+    ("PROVIDE_GREETING", "what can you do?"),
+    ("ASK_CLARIFYING_QUESTIONS", "actually let's do ancient history instead"),
+    ("CREATE_CONFIRMATION_PLAN", "yes but change the audience"),
+    ("CREATE_CONFIRMATION_PLAN", "make it 12 slides"),
+    ("CREATE_CONFIRMATION_PLAN", "ok, make it 8 slides"),
+    ("GENERATE_STRAWMAN", "ok, now add a slide about pricing"),
+    ("REFINE_STRAWMAN", "sure, add a chart to slide 4"),
+    ("GENERATE_STRAWMAN", "great, also add a closing slide with a call to action"),
+])
+def test_ambiguous_messages_go_to_the_llm(state, message):
+    assert classify_by_rules(message, state) is None
+
+
+@pytest.mark.parametrize("message", [
+    "What is the future of renewable energy in Europe",
+    "What are the key trends in AI for our board",
+])
+def test_questions_are_topics_after_the_greeting(message):
+    intent, _ = classify_by_rules(message, "PROVIDE_GREETING")
+
+    assert intent.intent_type == "Submit_Initial_Topic"
+
+
+def test_button_clicks_map_to_intents():
+    ids = action_ids_from_context("Make slide 2 more visual", {
+        "frontend_actions": [{"action_id": "request_refinement", "action_type": "button_click"}]
+    })
+
+    assert classify_by_action(ids, "GENERATE_STRAWMAN").intent_type == "Submit_Refinement_Request"
+    assert classify_by_action(["accept_plan"], "CREATE_CONFIRMATION_PLAN").confidence == 1.0
+    # Stale buttons from an earlier state are not trusted
+    assert classify_by_action(["accept_plan"], "GENERATE_STRAWMAN") is None
@@ -0,0 +1,84 @@
+"""
+Tests for the process-wide metrics store and the bounded TokenTracker.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.metrics_store import MAX_LABEL_VALUES, WINDOW_SIZE, MetricsStore
+from src.utils.token_tracker import TokenTracker
+
+
+def test_histogram_memory_is_fixed():
+    store = MetricsStore()
+    for i in range(10 * WINDOW_SIZE):
+        store.observe("director_latency_ms", i, state="GENERATE_STRAWMAN")
+
+    histogram = store.histograms["director_latency_ms"]["GENERATE_STRAWMAN"]
+    assert histogram.count == 10 * WINDOW_SIZE
+    assert len(histogram.recent) == WINDOW_SIZE
+    assert sum(histogram.bucket_counts) == histogram.count
+
+
+def test_label_values_are_capped():
+    store = MetricsStore()
+    for i in range(MAX_LABEL_VALUES + 10):
+        store.increment("requests", state=f"state_{i}")
+
+    assert len(store.counters["requests"]) == MAX_LABEL_VALUES + 1
+    assert store.counters["requests"]["other"] == 10
+
+
+def test_prometheus_rendering():
+    store = MetricsStore()
+    store.observe("prompt_tokens", 300, state="ASK_CLARIFYING_QUESTIONS", description="Prompt tokens")
+    store.observe("prompt_tokens", 5000, state="ASK_CLARIFYING_QUESTIONS")
+    store.increment("sessions_tracked")
+    store.register_collector(lambda: [("speculation_hits", {"transition": "A->B"}, 3)])
+
+    text = store.render_prometheus()
+
+    assert "# HELP deckster_prompt_tokens Prompt tokens" in text
+    assert "# TYPE deckster_prompt_tokens histogram" in text
+    assert 'deckster_prompt_tokens_bucket{state="ASK_CLARIFYING_QUESTIONS",le="512"} 1' in text
+    assert 'deckster_prompt_tokens_bucket{state="ASK_CLARIFYING_QUESTIONS",le="+Inf"} 2' in text
+    assert 'deckster_prompt_tokens_sum{state="ASK_CLARIFYING_QUESTIONS"} 5300' in text
+    assert 'deckster_sessions_tracked_total{state="all"} 1' in text
+    assert 'deckster_speculation_hits{transition="A->B"} 3' in text
+
+
+def test_token_tracker_keeps_recent_sessions_only():
+    tracker = TokenTracker(max_sessions=10)
+    tracker.metrics = MetricsStore()
+
+    async def track():
+        for i in range(100):
+            await tracker.track_baseline(f"session-{i}", "GENERATE_STRAWMAN", 1000, 500)
+            await tracker.track_optimized(f"session-{i}", "GENERATE_STRAWMAN", 400, 500)
+
+    asyncio.run(track())
+
+    assert len(tracker.sessions) == 10
+    assert tracker.get_savings_report("session-99")["total_savings"] == 600
+    assert tracker.get_savings_report("session-0")["total_baseline"] == 0
+
+    report = tracker.get_aggregate_report()
+    assert report["total_sessions"] == 100
+    assert report["total_baseline_tokens"] == 150000
+    assert report["states"]["GENERATE_STRAWMAN"]["total_saved"] == 60000
+
+
+def test_returning_sessions_are_counted_once():
+    tracker = TokenTracker(max_sessions=2)
+    tracker.metrics = MetricsStore()
+
+    async def track():
+        for session_id in ["a", "b", "c", "a", "b", "c"]:
+            await tracker.track_baseline(session_id, "GENERATE_STRAWMAN", 100)
+
+    asyncio.run(track())
+
+    assert len(tracker.sessions) == 2
+    assert tracker.get_aggregate_report()["total_sessions"] == 3
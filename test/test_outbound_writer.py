@@ -0,0 +1,107 @@
+"""
+Tests for the per-connection outbound WebSocket writer.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.outbound_writer import SLOW_CLIENT_CLOSE_CODE, OutboundWriter
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.frames = []
+        self.closed_with = None
+
+    async def send_json(self, data):
+        await asyncio.sleep(self.delay)
+        self.frames.append(data)
+
+    async def send_bytes(self, data):
+        await asyncio.sleep(self.delay)
+        self.frames.append(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _messages(count):
+    return [{"type": "chat_message", "n": i} for i in range(count)]
+
+
+def test_turn_is_sent_back_to_back_in_order():
+    async def run():
+        ws = FakeWebSocket()
+        writer = OutboundWriter(ws)
+        started = time.perf_counter()
+        await writer.send_json({"type": "status_update"})
+        await writer.send_batch(_messages(4))
+        await writer.send_bytes(b"asset")
+        await writer.flush()
+        writer.stop()
+        return ws, time.perf_counter() - started
+
+    ws, elapsed = asyncio.run(run())
+
+    assert ws.frames == [{"type": "status_update"}] + _messages(4) + [b"asset"]
+    assert elapsed < 0.05
+
+
+def test_batch_frame():
+    async def run():
+        ws = FakeWebSocket()
+        writer = OutboundWriter(ws, batch_frames=True, reveal_interval_ms=80)
+        await writer.send_batch(_messages(3))
+        await writer.send_batch(_messages(1))
+        await writer.flush()
+        writer.stop()
+        return ws
+
+    ws = asyncio.run(run())
+
+    assert ws.frames == [
+        {"type": "batch", "messages": _messages(3), "reveal_interval_ms": 80},
+        _messages(1)[0]
+    ]
+
+
+def test_droppable_frames_are_skipped_when_queue_is_full():
+    async def run():
+        ws = FakeWebSocket(delay=0.01)
+        writer = OutboundWriter(ws, queue_size=2)
+        for i in range(10):
+            await writer.send_json({"progress": i}, droppable=True)
+        await writer.send_json({"type": "final"})
+        await writer.flush()
+        writer.stop()
+        return ws, writer
+
+    ws, writer = asyncio.run(run())
+
+    assert writer.dropped > 0
+    assert len(ws.frames) == 11 - writer.dropped
+    assert ws.frames[-1] == {"type": "final"}
+
+
+def test_stalled_client_is_closed():
+    async def run():
+        ws = FakeWebSocket(delay=1.0)
+        writer = OutboundWriter(ws, send_timeout=0.05)
+        await writer.send_json({"type": "chat_message"})
+        with pytest.raises(ConnectionError):
+            await writer.flush()
+        with pytest.raises(ConnectionError):
+            await writer.send_json({"type": "chat_message"})
+        writer.stop()
+        return ws
+
+    ws = asyncio.run(run())
+
+    assert ws.closed_with == SLOW_CLIENT_CLOSE_CODE
+    assert ws.frames == []
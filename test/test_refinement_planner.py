@@ -0,0 +1,50 @@
+"""
+Tests for the REFINE_STRAWMAN refinement planner.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.refinement_planner import plan_refinement
+
+MOCK_STRAWMAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_strawman.json")
+
+
+@pytest.fixture
+def deck():
+    with open(MOCK_STRAWMAN) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("feedback, expected", [
+    ("Can you make the second slide more data-driven?", ["slide_002"]),
+    ("make slide 3 more visual", ["slide_003"]),
+    ("tweak slides 3 and 7", ["slide_003", "slide_007"]),
+    ("slides 2-4 need more data", ["slide_002", "slide_003", "slide_004"]),
+    ("add a chart to slide 6", ["slide_006"]),
+    ("the last slide should have a call to action", ["slide_010"]),
+    ("make the title slide punchier", ["slide_001"]),
+    ("The 'Digital Solutions Overview' slide needs numbers", ["slide_005"]),
+])
+def test_targeted_feedback(deck, feedback, expected):
+    plan = plan_refinement(feedback, deck)
+
+    assert plan.is_targeted
+    assert plan.target_slides == expected
+
+
+@pytest.mark.parametrize("feedback", [
+    "Combine slides 4 and 5.",
+    "add a new slide about our team after the intro",
+    "remove slide 6",
+    "change the tone of the whole deck, especially slide 2",
+    "make every slide shorter",
+    "Make it more exciting",
+    "slides 1-9 are too long",
+])
+def test_global_feedback_falls_back_to_full_regeneration(deck, feedback):
+    assert not plan_refinement(feedback, deck).is_targeted
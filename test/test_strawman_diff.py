@@ -0,0 +1,103 @@
+"""
+Tests for the strawman structural diff and refinement partial updates.
+"""
+import copy
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.agents import PresentationStrawman, StateContext
+from src.utils.strawman_diff import diff_strawman
+from src.utils.streamlined_packager import StreamlinedMessagePackager
+
+MOCK_STRAWMAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_strawman.json")
+
+
+def _deck():
+    with open(MOCK_STRAWMAN) as f:
+        return json.load(f)
+
+
+def _renumber(deck, renumber_ids=False):
+    for number, slide in enumerate(deck["slides"], start=1):
+        slide["slide_number"] = number
+        if renumber_ids:
+            slide["slide_id"] = f"slide_{number:03d}"
+    return deck
+
+
+def test_identical_decks_have_no_changes():
+    assert diff_strawman(_deck(), _deck()).is_empty
+
+
+def test_field_level_change():
+    refined = _deck()
+    refined["slides"][2]["title"] = "A sharper title"
+
+    diff = diff_strawman(_deck(), refined)
+
+    assert diff.content_changes == {"slide_003": ["title"]}
+    assert diff.affected_slides == ["slide_003"]
+    assert not diff.structure_changed
+
+
+def test_insert_with_renumbered_ids_is_one_insertion():
+    previous = _deck()
+    refined = copy.deepcopy(previous)
+    new_slide = dict(refined["slides"][3], title="Brand new slide", narrative="New")
+    refined["slides"].insert(3, new_slide)
+    _renumber(refined, renumber_ids=True)
+
+    # The stored deck is a dict missing optional fields; the refined one a model
+    diff = diff_strawman(previous, PresentationStrawman(**refined))
+
+    assert diff.inserted == ["slide_004"]
+    assert diff.removed == []
+    assert diff.content_changes == {}
+    # Every following slide was re-identified, not rewritten
+    assert diff.renamed["slide_005"] == "slide_004"
+    assert diff.slide_changes["slide_005"] == {"slide_number": 5}
+
+
+def test_removed_and_moved_slides():
+    previous = _deck()
+    refined = copy.deepcopy(previous)
+    del refined["slides"][5]
+    refined["slides"][1], refined["slides"][2] = refined["slides"][2], refined["slides"][1]
+
+    diff = diff_strawman(previous, refined)
+
+    assert diff.removed == ["slide_006"]
+    assert len(diff.moved) == 1
+    assert diff.structure_changed
+
+
+def test_partial_update_only_carries_changes():
+    previous = _deck()
+    refined = copy.deepcopy(previous)
+    refined["slides"][4]["key_points"] = ["Only this changed"]
+    context = StateContext(current_state="REFINE_STRAWMAN", session_data={"presentation_strawman": previous})
+
+    messages = StreamlinedMessagePackager().package_messages(
+        "session", "REFINE_STRAWMAN", PresentationStrawman(**refined), context
+    )
+    payload = messages[1].model_dump(mode="json")["payload"]
+
+    assert payload["operation"] == "partial_update"
+    assert payload["slides"] == []
+    assert payload["slide_patches"] == [{"slide_id": "slide_005", "key_points": ["Only this changed"]}]
+    assert payload["affected_slides"] == ["slide_005"]
+    assert payload["metadata"] is None
+    assert payload["slide_order"] is None
+
+
+def test_refinement_without_previous_strawman_sends_full_update():
+    messages = StreamlinedMessagePackager().package_messages(
+        "session", "REFINE_STRAWMAN", PresentationStrawman(**_deck()), StateContext(current_state="REFINE_STRAWMAN")
+    )
+    payload = messages[1].model_dump(mode="json")["payload"]
+
+    assert payload["operation"] == "full_update"
+    assert len(payload["slides"]) == len(_deck()["slides"])
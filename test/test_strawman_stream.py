@@ -0,0 +1,128 @@
+"""
+Tests for incremental slide extraction from a streamed strawman.
+"""
+import asyncio
+import copy
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic_ai.messages import TextPart
+
+from src.agents.director import DirectorAgent
+from src.models.agents import PresentationStrawman, Slide
+from src.utils.metrics_store import get_metrics_store
+from src.utils.strawman_stream import StrawmanStreamParser
+
+MOCK_STRAWMAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_strawman.json")
+
+
+def _deck():
+    with open(MOCK_STRAWMAN) as f:
+        return json.load(f)
+
+
+def _prefixes(text, size):
+    """Growing prefixes of text, as a streaming model delivers them."""
+    return [text[:end] for end in range(size, len(text) + size, size)]
+
+
+def _feed_all(parser, prefixes):
+    slides = []
+    for prefix in prefixes:
+        slides.extend(parser.feed(prefix))
+    return slides
+
+
+def test_chunked_feed_emits_each_slide_once():
+    deck = _deck()
+
+    slides = _feed_all(StrawmanStreamParser(), _prefixes(json.dumps(deck, indent=2), 7))
+
+    assert slides == deck["slides"]
+
+
+def test_escaped_quotes_and_braces_in_strings():
+    document = {
+        "main_title": 'Say "hello" {',
+        "slides": [
+            {"slide_id": "slide_001", "title": 'A "quoted" } title \\ with [brackets]'},
+            {"slide_id": "slide_002", "narrative": '}]{["\\"'},
+        ]
+    }
+
+    slides = _feed_all(StrawmanStreamParser(), _prefixes(json.dumps(document), 3))
+
+    assert slides == document["slides"]
+
+
+def test_nested_slides_keys_are_ignored():
+    document = {
+        "design_suggestions": {"slides": [{"slide_id": "nested"}]},
+        "slides": [{"slide_id": "slide_001", "notes": {"slides": [{"slide_id": "inner"}]}}]
+    }
+
+    assert StrawmanStreamParser().feed(json.dumps(document)) == document["slides"]
+
+
+def test_restarted_stream_does_not_repeat_slides():
+    deck = _deck()
+    first_attempt = json.dumps(deck)
+    parser = StrawmanStreamParser()
+
+    before_restart = parser.feed(first_attempt[:len(first_attempt) * 2 // 3])
+    # The retry renders the same document differently, so it is not a continuation
+    after_restart = _feed_all(parser, _prefixes(json.dumps(deck, indent=2), 50))
+
+    assert before_restart
+    assert before_restart + after_restart == deck["slides"]
+
+
+class FakeStreamRun:
+    def __init__(self, text, output):
+        self.text = text
+        self.output = output
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def stream_responses(self, debounce_by=None):
+        for prefix in _prefixes(self.text, 40):
+            yield SimpleNamespace(parts=[TextPart(content=prefix)]), prefix == self.text
+
+    async def get_output(self):
+        return self.output
+
+
+def test_invalid_streamed_slide_is_delivered_once_from_the_final_strawman():
+    deck = _deck()
+    streamed = copy.deepcopy(deck)
+    del streamed["slides"][1]["title"]
+
+    director = DirectorAgent.__new__(DirectorAgent)
+    run = FakeStreamRun(json.dumps(streamed), PresentationStrawman(**deck))
+    director.strawman_stream_agent = SimpleNamespace(run_stream=lambda prompt, model_settings=None: run)
+    director.metrics = get_metrics_store()
+    director._track_run = lambda *args: None
+
+    async def prepare_user_prompt(state_context):
+        return "prompt", 10
+
+    director.prepare_user_prompt = prepare_user_prompt
+
+    async def collect():
+        state = SimpleNamespace(current_state="GENERATE_STRAWMAN")
+        return [item async for item in director.stream_strawman(state)]
+
+    items = asyncio.run(collect())
+    slide_ids = [item.slide_id for item in items if isinstance(item, Slide)]
+
+    assert isinstance(items[-1], PresentationStrawman)
+    assert sorted(slide_ids) == [slide["slide_id"] for slide in deck["slides"]]
+    assert slide_ids[-1] == "slide_002"
@@ -0,0 +1,70 @@
+"""
+Tests for the calibrated token counter.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.token_counter import TokenCounter, estimate_tokens_heuristic
+
+MOCK_STRAWMAN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_strawman.json")
+
+
+def test_heuristic_counts_json_punctuation():
+    with open(MOCK_STRAWMAN) as f:
+        text = json.dumps(json.load(f), indent=2)
+
+    # Indented JSON is far denser in tokens than four characters per token
+    assert estimate_tokens_heuristic(text) > len(text) // 4 * 1.2
+
+
+def test_heuristic_counts_non_latin_scripts():
+    assert estimate_tokens_heuristic("人工智能在医疗保健中的应用") == 13
+    assert estimate_tokens_heuristic("Искусственный интеллект") > len("Искусственный интеллект") // 4
+    assert estimate_tokens_heuristic("") == 0
+
+
+def test_static_counts_are_cached():
+    calls = []
+    counter = TokenCounter(lambda text: calls.append(text) or len(text.split()))
+
+    assert counter.count_static("a b c") == 3
+    assert counter.count_static("a b c") == 3
+    assert len(calls) == 1
+
+
+def test_calibrates_towards_provider_usage():
+    counter = TokenCounter(lambda text: len(text.split()))
+    prompt = "word " * 100
+
+    for _ in range(30):
+        counter.observe_usage(counter.count(prompt), 150)
+
+    assert abs(counter.count(prompt) - 150) <= 2
+
+    # Calls without provider usage leave the calibration alone
+    counter.observe_usage(counter.count(prompt), 0)
+    assert abs(counter.count(prompt) - 150) <= 2
+
+
+def test_retried_runs_do_not_calibrate():
+    counter = TokenCounter(lambda text: len(text.split()))
+
+    counter.observe_usage(100, 300, requests=3)
+
+    assert counter.ratio == 1.0
+
+
+def test_output_schema_is_counted():
+    class Schema:
+        @staticmethod
+        def model_json_schema():
+            return {"type": "object", "properties": {"title": {"type": "string"}}}
+
+    counter = TokenCounter(lambda text: len(text.split()))
+
+    assert counter.count_schema(Schema) > 0
+    assert counter.count_schema(str) == 0
+    assert counter.count_schema(None) == 0
@@ -0,0 +1,73 @@
+"""
+Tests for per-turn WebSocket tracing and the non-blocking log handler.
+"""
+import logging
+import os
+import queue
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.utils.logger as logger_module
+from src.utils.logger import LogfireLogger, _DroppingQueueHandler
+from src.utils.metrics_store import get_metrics_store
+from src.utils.tracing import TurnTrace
+
+
+def test_phases_are_recorded_per_state():
+    metrics = get_metrics_store()
+    before = metrics.histograms.get("ws_classify_ms", {}).get("TRACE_TEST")
+    count = before.count if before else 0
+
+    trace = TurnTrace("session-1")
+    trace.phase("receive")
+    trace.phase("classify")
+    trace.set(state="TRACE_TEST", intent="Submit_Refinement_Request")
+    trace.phase("send")
+    trace.finish()
+    trace.finish()  # idempotent
+
+    assert [name for name, _ in trace.spans] == ["receive", "classify", "send"]
+    assert metrics.histograms["ws_classify_ms"]["TRACE_TEST"].count == count + 1
+    assert metrics.histograms["ws_turn_ms"]["TRACE_TEST"].count >= 1
+
+
+def test_sampling():
+    assert not TurnTrace("s", sample_rate=0.0).sampled
+    assert TurnTrace("s", sample_rate=1.0).sampled
+
+
+def test_full_log_queue_drops_instead_of_blocking():
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=2))
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message %s", ("x",), None)
+
+    for _ in range(5):
+        handler.handle(record)
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_logfire_logger_skips_formatting_below_its_level(monkeypatch):
+    class Unformattable:
+        def __str__(self):
+            raise AssertionError("formatted a disabled record")
+
+    class Sink:
+        def __init__(self):
+            self.records = []
+
+        def info(self, message, **kwargs):
+            self.records.append(message)
+
+        debug = info
+
+    sink = Sink()
+    monkeypatch.setattr(logger_module, "logfire", sink, raising=False)
+
+    log = LogfireLogger("test", level="INFO")
+    log.debug("session %s", Unformattable())
+    log.info("turn %s", "done")
+
+    assert sink.records == ["[test] turn done"]
+    assert not log.isEnabledFor(logging.DEBUG)